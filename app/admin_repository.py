@@ -0,0 +1,823 @@
+"""
+Data access for the admin API (app/main.py).
+
+Two interchangeable backends expose the same db_* helper names and return
+the same shapes (dict rows with JSON columns decoded, datetimes as datetime):
+
+  - psycopg2 (default): the sync helpers in app/main.py, run in Starlette's
+    threadpool against the shared db_pool.
+  - asyncpg: AsyncpgAdminRepository below, awaited directly on the event
+    loop against a native asyncpg pool. Each connection keeps a prepared
+    statement cache, so repeated queries skip parsing and planning.
+    Concurrency is then bounded by DB_POOL_MAX rather than by the threadpool
+    size.
+
+The query-independent parts (time-range parsing, pattern aggregation and
+analytics shaping) live here so both backends share them.
+
+Configuration (environment):
+    ADMIN_DB_DRIVER            "psycopg2" (default) or "asyncpg"
+    ASYNCPG_STATEMENT_CACHE    prepared statements cached per connection
+    DB_POOL_MIN / DB_POOL_MAX / DB_STATEMENT_TIMEOUT_MS (shared with db_pool)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .db_pool import POOL_MAX, POOL_MIN, STATEMENT_TIMEOUT_MS
+    from .rollups import (
+        ROLLUP_READY_SQL, ROLLUP_RECHECK_SECONDS, pattern_range_sql, pattern_recent_sql, rollup_timeline_sql,
+        rollup_totals_sql,
+    )
+    from .write_behind import STAGE_COLUMNS, STAGE_TABLE_SQL, merge_sql, stage_records
+except (ImportError, SystemError):
+    from db_pool import POOL_MAX, POOL_MIN, STATEMENT_TIMEOUT_MS
+    from rollups import (
+        ROLLUP_READY_SQL, ROLLUP_RECHECK_SECONDS, pattern_range_sql, pattern_recent_sql, rollup_timeline_sql,
+        rollup_totals_sql,
+    )
+    from write_behind import STAGE_COLUMNS, STAGE_TABLE_SQL, merge_sql, stage_records
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    asyncpg = None
+    ASYNCPG_AVAILABLE = False
+
+# Configuration
+ADMIN_DB_DRIVER = os.getenv("ADMIN_DB_DRIVER", "psycopg2").lower()
+STATEMENT_CACHE_SIZE = int(os.getenv("ASYNCPG_STATEMENT_CACHE", "256"))
+RECENT_TX_MAX_LIMIT = int(os.getenv("RECENT_TX_MAX_LIMIT", "1000"))
+
+# Whitelisted SQL interval literals for dashboard stats
+DASHBOARD_INTERVALS = {
+    "1h": "1 hour",
+    "24h": "24 hours",
+    "7d": "7 days",
+    "30d": "30 days",
+}
+
+
+# ---------------------------------------------------------------------------
+# Shared helpers (both backends)
+# ---------------------------------------------------------------------------
+
+def parse_time_range(time_range: str):
+    now = datetime.now(timezone.utc)
+
+    if time_range == "1h":
+        return now - timedelta(hours=1)
+    elif time_range == "24h":
+        return now - timedelta(hours=24)
+    elif time_range == "7d":
+        return now - timedelta(days=7)
+    elif time_range == "30d":
+        return now - timedelta(days=30)
+    else:
+        return None
+
+
+def analytics_buckets(time_range: str) -> Tuple[str, int]:
+    """(date_trunc unit, number of buckets) for the analytics timeline."""
+    if time_range == '1h':
+        return 'minute', 60
+    elif time_range == '7d':
+        return 'day', 7
+    elif time_range == '30d':
+        return 'day', 30
+    return 'hour', 24
+
+
+def build_dashboard_analytics(risk_row, timeline_rows) -> Dict[str, Any]:
+    """Shape the risk-distribution row and (newest-first) timeline rows."""
+    risk_row = risk_row or {"low": 0, "medium": 0, "high": 0, "critical": 0}
+
+    # Reverse to chronological order
+    timeline_rows = list(reversed(timeline_rows or []))
+
+    # Prepare response
+    labels = []
+    blocks = []
+    delays = []
+    allows = []
+    for r in timeline_rows:
+        b = r["bucket"]
+        # Convert to ISO string for client-side formatting
+        labels.append(b.isoformat())
+        blocks.append(int(r["block"]))
+        delays.append(int(r["delay"]))
+        allows.append(int(r["allow"]))
+
+    return {
+        "risk": {
+            "low": int(risk_row["low"] or 0),
+            "medium": int(risk_row["medium"] or 0),
+            "high": int(risk_row["high"] or 0),
+            "critical": int(risk_row["critical"] or 0),
+        },
+        "timeline": {
+            "labels": labels,
+            "block": blocks,
+            "delay": delays,
+            "allow": allows,
+        }
+    }
+
+
+# /recent-transactions pages: newest first by (COALESCE(ts, created_at), tx_id),
+# which idx_transactions_sort_ts / idx_transactions_action_sort_ts cover.
+TX_ACTIONS = ("ALLOW", "DELAY", "BLOCK")
+_TX_SORT_KEY = "COALESCE(ts, created_at)"
+_TX_PAGE_COLS = ("tx_id, user_id, device_id, ts, created_at, amount, recipient_vpa, tx_type, "
+                 "channel, db_status, action, risk_score")
+
+
+def parse_action_filter(action: Optional[str]) -> Optional[List[str]]:
+    """'BLOCK,DELAY' -> ['BLOCK', 'DELAY']; empty or 'ALL' means no filter."""
+    if not action:
+        return None
+    actions = sorted({a.strip().upper() for a in action.split(",") if a.strip()})
+    if not actions or "ALL" in actions:
+        return None
+    unknown = [a for a in actions if a not in TX_ACTIONS]
+    if unknown:
+        raise ValueError(f"Unknown action filter: {', '.join(unknown)}")
+    return actions
+
+
+def encode_tx_cursor(row) -> str:
+    """Opaque cursor pointing just past `row` in page order."""
+    sort_ts = row.get("ts") or row.get("created_at")
+    raw = json.dumps([sort_ts.isoformat(), row["tx_id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_tx_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_tx_cursor(); raises ValueError for anything else."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_ts, tx_id = json.loads(raw)
+        return datetime.fromisoformat(sort_ts), str(tx_id)
+    except Exception:
+        raise ValueError("Invalid cursor") from None
+
+
+def clamp_page_limit(limit: Optional[int]) -> int:
+    return max(1, min(int(limit or RECENT_TX_MAX_LIMIT), RECENT_TX_MAX_LIMIT))
+
+
+def transactions_page_query(since=None, actions: Optional[List[str]] = None, after=None,
+                            limit: int = 300, include_explainability: bool = False,
+                            has_explainability: bool = True, min_risk: Optional[float] = None,
+                            numbered: bool = False) -> Tuple[str, List[Any]]:
+    """
+    SQL and parameters for one page of transactions, fetching limit + 1 rows
+    so transactions_page() can tell whether another page follows. `after` is
+    a decoded cursor. `numbered` selects asyncpg ($n) placeholders over
+    psycopg2 (%s).
+    """
+    args: List[Any] = []
+
+    def ph(value) -> str:
+        args.append(value)
+        return f"${len(args)}" if numbered else "%s"
+
+    cols = _TX_PAGE_COLS
+    if has_explainability:
+        # Enough for the confidence pill without shipping the whole JSON
+        cols += ", explainability->>'confidence_level' AS confidence_level"
+        if include_explainability:
+            cols += ", explainability"
+
+    where = []
+    if since is not None:
+        where.append(f"{_TX_SORT_KEY} >= {ph(since)}::timestamptz::timestamp")
+    if actions:
+        where.append(f"action = ANY({ph(list(actions))}::text[])")
+    if min_risk is not None:
+        # Inlined so the planner can match idx_transactions_high_risk
+        where.append(f"risk_score >= {float(min_risk)!r}")
+    if after is not None:
+        after_ts, after_tx = after
+        where.append(f"({_TX_SORT_KEY}, tx_id) < ({ph(after_ts)}::timestamp, {ph(after_tx)})")
+
+    where_sql = "WHERE " + " AND ".join(where) if where else ""
+    sql = f"""
+        SELECT {cols}
+        FROM public.transactions
+        {where_sql}
+        ORDER BY {_TX_SORT_KEY} DESC, tx_id DESC
+        LIMIT {ph(limit + 1)}
+    """
+    return sql, args
+
+
+def transactions_page(rows: List[Dict[str, Any]], limit: int) -> Dict[str, Any]:
+    """Trim the look-ahead row and derive next_cursor."""
+    rows = list(rows)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "transactions": rows,
+        "next_cursor": encode_tx_cursor(rows[-1]) if has_more else None,
+    }
+
+
+# Bits of transactions.pattern_flags, one per ML pipeline system
+PATTERN_TRUST_ENGINE = 1
+PATTERN_RISK_BUFFER = 2
+PATTERN_DYNAMIC_THRESHOLD = 4
+PATTERN_DRIFT = 8
+PATTERN_GRAPH_SIGNAL = 16
+
+PATTERN_TOTAL_KEYS = (
+    ("trust_engine_triggers", PATTERN_TRUST_ENGINE),
+    ("risk_buffer_escalations", PATTERN_RISK_BUFFER),
+    ("dynamic_threshold_adjustments", PATTERN_DYNAMIC_THRESHOLD),
+    ("drift_alerts", PATTERN_DRIFT),
+    ("graph_signal_flags", PATTERN_GRAPH_SIGNAL),
+)
+
+
+def pattern_trigger_flags(expl, risk_score: float, action: str) -> int:
+    """
+    Which of the 5 ML systems a transaction triggered, as a PATTERN_* bitmask.
+
+    This is the reference for the tx_pattern_flags() SQL function in
+    app.rollups, which stores the same bitmask in transactions.pattern_flags
+    at write time. Change both together.
+    """
+    flags = 0
+
+    if not expl or not isinstance(expl, dict):
+        # No explainability data - every tx still passes through all 5 systems.
+        # Infer baseline activity from action and risk_score.
+        # Trust Engine: flags when risk suggests untrusted relationship
+        if risk_score > 0.3 or action in ("DELAY", "BLOCK"):
+            flags |= PATTERN_TRUST_ENGINE
+        # Dynamic Thresholds: always computes personalized threshold
+        if action in ("DELAY", "BLOCK") or risk_score > 0.3:
+            flags |= PATTERN_DYNAMIC_THRESHOLD
+        # Risk Buffer: high score accumulates in buffer
+        if risk_score > 0.5:
+            flags |= PATTERN_RISK_BUFFER
+        # Graph Signals: recipient network always checked
+        if risk_score > 0.4 or action == "BLOCK":
+            flags |= PATTERN_GRAPH_SIGNAL
+        # Drift Detection: feature distributions always monitored
+        if risk_score > 0.6:
+            flags |= PATTERN_DRIFT
+        return flags
+
+    features = expl.get("features", {}) or {}
+    patterns = expl.get("patterns", {}) or {}
+    model_scores = expl.get("model_scores", {}) or {}
+    detected = patterns.get("detected_patterns", []) or []
+
+    # --- Trust Engine ---
+    # Triggers when dealing with new/unknown recipients or low recipient history
+    is_new_recip = float(features.get("is_new_recipient", 0) or 0)
+    recip_tx_count = float(features.get("recipient_tx_count", 0) or 0)
+    if is_new_recip > 0 or recip_tx_count < 5:
+        flags |= PATTERN_TRUST_ENGINE
+
+    # --- Risk Buffer (Cumulative Risk) ---
+    # Triggers on velocity anomalies, repeated high risk, or high cumulative indicators
+    tx_1min = float(features.get("tx_count_1min", 0) or 0)
+    tx_5min = float(features.get("tx_count_5min", 0) or 0)
+    tx_1h = float(features.get("tx_count_1h", 0) or 0)
+    has_velocity = any(p.get("name", "") == "Velocity Anomaly" for p in detected if isinstance(p, dict))
+    if has_velocity or tx_1min > 2 or tx_5min > 5 or (risk_score > 0.5 and tx_1h > 3):
+        flags |= PATTERN_RISK_BUFFER
+
+    # --- Dynamic Thresholds ---
+    # Triggers on amount deviations, model disagreement, or action escalation
+    amount_dev = float(features.get("amount_deviation", 0) or 0)
+    disagreement = float(model_scores.get("disagreement", 0) or expl.get("disagreement", 0) or 0)
+    has_model_disagree = any(p.get("name", "") == "Model Disagreement" for p in detected if isinstance(p, dict))
+    if amount_dev > 0.8 or has_model_disagree or disagreement > 0.25 or action in ("DELAY", "BLOCK"):
+        flags |= PATTERN_DYNAMIC_THRESHOLD
+
+    # --- Drift Detection ---
+    # Triggers when features are outside normal ranges (statistical anomaly indicators)
+    is_new_device = float(features.get("is_new_device", 0) or 0)
+    confidence_level = str(model_scores.get("confidence_level", "") or expl.get("confidence_level", "")).upper()
+    has_device_anomaly = any(p.get("name", "") == "Device Anomaly" for p in detected if isinstance(p, dict))
+    if confidence_level == "LOW" or has_device_anomaly or (is_new_device > 0 and amount_dev > 0.5):
+        flags |= PATTERN_DRIFT
+
+    # --- Graph Signals ---
+    # Triggers on recipient/merchant network risk indicators
+    merchant_risk = float(features.get("merchant_risk_score", 0) or 0)
+    device_count = float(features.get("device_count", 0) or 0)
+    has_behavioural = any(p.get("name", "") == "Behavioural Anomaly" for p in detected if isinstance(p, dict))
+    if merchant_risk > 0.3 or device_count > 3 or (has_behavioural and recip_tx_count > 10):
+        flags |= PATTERN_GRAPH_SIGNAL
+
+    return flags
+
+
+def aggregate_fraud_pattern_rows(rows: Iterable[Any]) -> Dict[str, int]:
+    """
+    Derive ML Pipeline Contribution counts from (explainability, risk_score,
+    action) rows. See app.main.db_aggregate_fraud_patterns.
+    """
+    totals = {key: 0 for key, _ in PATTERN_TOTAL_KEYS}
+    totals["transactions_analyzed"] = 0
+
+    for row in rows:
+        totals["transactions_analyzed"] += 1
+
+        try:
+            if hasattr(row, 'get'):
+                expl = row.get("explainability")
+                risk_score = float(row.get("risk_score", 0) or 0)
+                action = row.get("action", "")
+            else:
+                expl = row[0] if len(row) > 0 else None
+                risk_score = float(row[1]) if len(row) > 1 and row[1] else 0.0
+                action = row[2] if len(row) > 2 else ""
+        except Exception:
+            continue
+
+        flags = pattern_trigger_flags(expl, risk_score, action)
+        for key, bit in PATTERN_TOTAL_KEYS:
+            if flags & bit:
+                totals[key] += 1
+
+    return totals
+
+
+def pattern_totals(row) -> Dict[str, int]:
+    """Shape a row of pattern_* sums (rollups or a SUM over pattern_flags)."""
+    row = row or {}
+    totals = {key: int(row.get(key) or 0) for key, _ in PATTERN_TOTAL_KEYS}
+    totals["transactions_analyzed"] = int(row.get("transactions_analyzed", row.get("total")) or 0)
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# asyncpg backend
+# ---------------------------------------------------------------------------
+
+_TX_COLS = "tx_id, user_id, device_id, ts, amount, recipient_vpa, tx_type, channel, db_status, action, risk_score, created_at"
+_RECENT_COLS = "tx_id, user_id, amount, recipient_vpa, tx_type, channel, db_status, action, risk_score, created_at"
+
+
+def _ts_text(value):
+    """
+    Timestamps from request bodies are ISO strings; cast server-side
+    ($n::text::timestamp) exactly like psycopg2's untyped literals.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return None if value is None else str(value)
+
+
+def _numeric(value):
+    # asyncpg only encodes NUMERIC from Decimal; psycopg2 accepted int/float/str
+    return None if value is None else Decimal(str(value))
+
+
+def _row(record) -> Optional[Dict[str, Any]]:
+    return dict(record) if record is not None else None
+
+
+def _rows(records) -> List[Dict[str, Any]]:
+    return [dict(r) for r in records]
+
+
+async def _init_connection(conn) -> None:
+    # Decode json/jsonb to Python objects like psycopg2 does
+    for typename in ("json", "jsonb"):
+        await conn.set_type_codec(
+            typename, schema="pg_catalog",
+            encoder=lambda v: json.dumps(v, default=str), decoder=json.loads,
+        )
+
+
+class AsyncpgAdminRepository:
+    """Async twins of the admin db_* helpers on a native asyncpg pool."""
+
+    def __init__(self, dsn: str):
+        if not ASYNCPG_AVAILABLE:
+            raise RuntimeError("asyncpg is not installed (pip install asyncpg)")
+        self.dsn = dsn
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        self._has_expl_col: Optional[bool] = None
+        self._has_admin_logs: Optional[bool] = None
+        self._has_presets_table: Optional[bool] = None
+        self._has_rollups: Optional[bool] = None
+        self._rollups_checked_at = -ROLLUP_RECHECK_SECONDS
+
+    async def pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    server_settings = {}
+                    if STATEMENT_TIMEOUT_MS > 0:
+                        server_settings["statement_timeout"] = str(STATEMENT_TIMEOUT_MS)
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=POOL_MIN,
+                        max_size=POOL_MAX,
+                        statement_cache_size=STATEMENT_CACHE_SIZE,
+                        server_settings=server_settings,
+                        init=_init_connection,
+                    )
+                    print(f"[admin_repository] asyncpg pool created (min={POOL_MIN}, max={POOL_MAX})")
+        return self._pool
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    # --- lazy schema checks (mirror app.main) ---------------------------
+    async def _ensure_explainability_column(self, conn) -> bool:
+        if self._has_expl_col is None:
+            try:
+                self._has_expl_col = await conn.fetchval(
+                    """
+                    SELECT 1
+                    FROM information_schema.columns
+                    WHERE table_schema = 'public'
+                      AND table_name = 'transactions'
+                      AND column_name = 'explainability'
+                    LIMIT 1;
+                    """
+                ) is not None
+            except Exception:
+                self._has_expl_col = False
+        return self._has_expl_col
+
+    async def _ensure_rollups(self, conn) -> bool:
+        """Whether the rollup tables can be read; never creates or backfills them."""
+        if self._has_rollups or time.monotonic() - self._rollups_checked_at < ROLLUP_RECHECK_SECONDS:
+            return bool(self._has_rollups)
+        self._rollups_checked_at = time.monotonic()
+        try:
+            self._has_rollups = bool(await conn.fetchval(ROLLUP_READY_SQL))
+        except Exception as e:
+            print(f"[WARN] Could not check rollup tables, scanning transactions: {e}")
+            self._has_rollups = False
+        return self._has_rollups
+
+    async def _ensure_admin_logs_table(self, conn) -> bool:
+        if self._has_admin_logs is None:
+            try:
+                await conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS public.admin_logs (
+                        log_id SERIAL PRIMARY KEY,
+                        tx_id VARCHAR(100) NOT NULL,
+                        user_id VARCHAR(255),
+                        action VARCHAR(20) NOT NULL,
+                        admin_username VARCHAR(100),
+                        source_ip VARCHAR(50),
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_admin_logs_created_at ON public.admin_logs(created_at DESC);
+                    CREATE INDEX IF NOT EXISTS idx_admin_logs_tx_id ON public.admin_logs(tx_id);
+                    """
+                )
+                self._has_admin_logs = True
+            except Exception:
+                self._has_admin_logs = False
+        return self._has_admin_logs
+
+    async def _ensure_threshold_presets_table(self, conn) -> None:
+        if self._has_presets_table:
+            return
+        try:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS public.admin_threshold_presets (
+                    id SERIAL PRIMARY KEY,
+                    admin_username VARCHAR(100) NOT NULL,
+                    preset_slot INTEGER NOT NULL CHECK (preset_slot IN (1, 2, 3)),
+                    preset_name VARCHAR(100) DEFAULT 'Preset',
+                    config_json JSONB NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(admin_username, preset_slot)
+                );
+                CREATE INDEX IF NOT EXISTS idx_preset_admin ON public.admin_threshold_presets(admin_username);
+            """)
+            self._has_presets_table = True
+        except Exception as e:
+            print(f"Error creating presets table: {e}")
+
+    # --- transactions ----------------------------------------------------
+    async def db_get_transaction(self, tx_id):
+        async with (await self.pool()).acquire() as conn:
+            cols = _TX_COLS
+            if await self._ensure_explainability_column(conn):
+                cols += ", explainability"
+            return _row(await conn.fetchrow(
+                f"SELECT {cols} FROM public.transactions WHERE tx_id=$1;", tx_id
+            ))
+
+    async def db_insert_transaction(self, tx: Dict[str, Any]):
+        params = [
+            tx.get("tx_id"), tx.get("user_id"), tx.get("device_id"), _ts_text(tx.get("ts")),
+            _numeric(tx.get("amount")), tx.get("recipient_vpa"), tx.get("tx_type"), tx.get("channel"),
+            tx.get("risk_score"), tx.get("action"), tx.get("db_status", "inserted"),
+        ]
+        async with (await self.pool()).acquire() as conn:
+            if await self._ensure_explainability_column(conn):
+                try:
+                    return _row(await conn.fetchrow(
+                        """
+                        INSERT INTO public.transactions
+                        (tx_id, user_id, device_id, ts, amount, recipient_vpa, tx_type, channel, risk_score, action, db_status, explainability, created_at)
+                        VALUES ($1,$2,$3,$4::text::timestamp,$5,$6,$7,$8,$9,$10,$11,$12, now())
+                        ON CONFLICT (tx_id) DO UPDATE
+                          SET risk_score = EXCLUDED.risk_score,
+                              action = EXCLUDED.action,
+                              db_status = EXCLUDED.db_status,
+                              explainability = EXCLUDED.explainability,
+                              created_at = now()
+                        RETURNING tx_id, risk_score, action, created_at, explainability;
+                        """,
+                        *params, tx.get("explainability"),
+                    ))
+                except Exception as e:
+                    print("Explainability column write failed, falling back without explainability:", e)
+
+            # Fallback without explainability
+            return _row(await conn.fetchrow(
+                """
+                INSERT INTO public.transactions
+                (tx_id, user_id, device_id, ts, amount, recipient_vpa, tx_type, channel, risk_score, action, db_status, created_at)
+                VALUES ($1,$2,$3,$4::text::timestamp,$5,$6,$7,$8,$9,$10,$11, now())
+                ON CONFLICT (tx_id) DO UPDATE
+                  SET risk_score = EXCLUDED.risk_score,
+                      action = EXCLUDED.action,
+                      db_status = EXCLUDED.db_status,
+                      created_at = now()
+                RETURNING tx_id, risk_score, action, created_at;
+                """,
+                *params,
+            ))
+
+    async def db_copy_transactions(self, rows: List[Dict[str, Any]]):
+        records = stage_records(rows)
+        async with (await self.pool()).acquire() as conn:
+            has_expl = await self._ensure_explainability_column(conn)
+            async with conn.transaction():
+                await conn.execute(STAGE_TABLE_SQL)
+                await conn.copy_records_to_table(
+                    "tx_write_behind_stage", records=records, columns=list(STAGE_COLUMNS)
+                )
+                await conn.execute(merge_sql(has_expl))
+        return len(records)
+
+    async def db_update_action(self, tx_id, action, risk_score=None, explainability=None):
+        async with (await self.pool()).acquire() as conn:
+            if await self._ensure_explainability_column(conn):
+                returning = "RETURNING tx_id, action, risk_score, explainability, created_at;"
+                try:
+                    # Only update explainability when explicitly provided; otherwise preserve existing JSON.
+                    if explainability is not None:
+                        if risk_score is None:
+                            return _row(await conn.fetchrow(
+                                f"UPDATE public.transactions SET action=$1, explainability=$2 WHERE tx_id=$3 {returning}",
+                                action, explainability, tx_id))
+                        return _row(await conn.fetchrow(
+                            f"UPDATE public.transactions SET action=$1, risk_score=$2, explainability=$3 WHERE tx_id=$4 {returning}",
+                            action, risk_score, explainability, tx_id))
+                    if risk_score is None:
+                        return _row(await conn.fetchrow(
+                            f"UPDATE public.transactions SET action=$1 WHERE tx_id=$2 {returning}",
+                            action, tx_id))
+                    return _row(await conn.fetchrow(
+                        f"UPDATE public.transactions SET action=$1, risk_score=$2 WHERE tx_id=$3 {returning}",
+                        action, risk_score, tx_id))
+                except Exception as e:
+                    print("Explainability column update failed, falling back without explainability:", e)
+
+            # Fallback without explainability
+            if risk_score is None:
+                return _row(await conn.fetchrow(
+                    "UPDATE public.transactions SET action=$1 WHERE tx_id=$2 RETURNING tx_id, action, risk_score, created_at;",
+                    action, tx_id))
+            return _row(await conn.fetchrow(
+                "UPDATE public.transactions SET action=$1, risk_score=$2 WHERE tx_id=$3 RETURNING tx_id, action, risk_score, created_at;",
+                action, risk_score, tx_id))
+
+    async def db_recent_transactions(self, limit=50, range_clause=None):
+        async with (await self.pool()).acquire() as conn:
+            cols = _RECENT_COLS
+            if await self._ensure_explainability_column(conn):
+                cols += ", explainability"
+            return _rows(await conn.fetch(
+                f"""
+                SELECT {cols}
+                FROM public.transactions
+                ORDER BY created_at DESC
+                LIMIT $1
+                """,
+                limit,
+            ))
+
+    async def db_high_risk_alerts(self, time_range, limit, min_risk):
+        since = parse_time_range(time_range) or parse_time_range("24h")
+        async with (await self.pool()).acquire() as conn:
+            sql, args = transactions_page_query(
+                since, limit=limit, min_risk=min_risk,
+                has_explainability=await self._ensure_explainability_column(conn), numbered=True,
+            )
+            return transactions_page(_rows(await conn.fetch(sql, *args)), limit)["transactions"]
+
+    async def db_transactions_page(self, since, actions, after, limit, include_explainability=False):
+        async with (await self.pool()).acquire() as conn:
+            sql, args = transactions_page_query(
+                since, actions, after, limit, include_explainability,
+                has_explainability=await self._ensure_explainability_column(conn), numbered=True,
+            )
+            return transactions_page(_rows(await conn.fetch(sql, *args)), limit)
+
+    async def db_dashboard_stats(self, time_range: str):
+        interval = DASHBOARD_INTERVALS.get(time_range, "24 hours")
+        async with (await self.pool()).acquire() as conn:
+            if await self._ensure_rollups(conn):
+                since = parse_time_range(time_range) or parse_time_range("24h")
+                totals = _row(await conn.fetchrow(rollup_totals_sql("$1"), since))
+                return {k: totals[k] for k in ("total", "block", "delay", "allow", "mean_risk")}
+            return _row(await conn.fetchrow(f"""
+                SELECT
+                  COUNT(*) AS total,
+                  COUNT(*) FILTER (WHERE action = 'BLOCK') AS block,
+                  COUNT(*) FILTER (WHERE action = 'DELAY') AS delay,
+                  COUNT(*) FILTER (WHERE action = 'ALLOW') AS allow,
+                  COALESCE(AVG(risk_score), 0) AS mean_risk
+                FROM transactions
+                WHERE ts >= NOW() - INTERVAL '{interval}';
+            """))
+
+    async def db_aggregate_fraud_patterns(self, time_range: str = "24h", limit: int = None):
+        since = parse_time_range(time_range)
+        async with (await self.pool()).acquire() as conn:
+            if await self._ensure_rollups(conn):
+                if since:
+                    return pattern_totals(_row(await conn.fetchrow(pattern_range_sql("$1"), since)))
+                return pattern_totals(_row(await conn.fetchrow(pattern_recent_sql("$1"), limit if limit else 1000)))
+            if since:
+                rows = await conn.fetch("""
+                    SELECT explainability, risk_score, action
+                    FROM public.transactions
+                    WHERE ts >= $1::timestamptz
+                    ORDER BY ts DESC
+                """, since)
+            else:
+                rows = await conn.fetch("""
+                    SELECT explainability, risk_score, action
+                    FROM public.transactions
+                    ORDER BY ts DESC
+                    LIMIT $1
+                """, limit if limit else 1000)
+        return aggregate_fraud_pattern_rows(_rows(rows))
+
+    async def db_dashboard_analytics(self, time_range: str):
+        since = parse_time_range(time_range)
+        bucket_unit, bucket_limit = analytics_buckets(time_range)
+        where = "WHERE created_at >= $1::timestamptz" if since else ""
+        args = (since,) if since else ()
+        limit_param = "$2" if since else "$1"
+
+        async with (await self.pool()).acquire() as conn:
+            if await self._ensure_rollups(conn):
+                return build_dashboard_analytics(
+                    _row(await conn.fetchrow(rollup_totals_sql("$1"), since)),
+                    _rows(await conn.fetch(rollup_timeline_sql(bucket_unit, "$1", "$2"), since, bucket_limit)),
+                )
+
+            # Risk distribution
+            risk_row = await conn.fetchrow(
+                f"""
+                SELECT
+                  SUM(CASE WHEN risk_score < 0.3 THEN 1 ELSE 0 END) AS low,
+                  SUM(CASE WHEN risk_score >= 0.3 AND risk_score < 0.6 THEN 1 ELSE 0 END) AS medium,
+                  SUM(CASE WHEN risk_score >= 0.6 AND risk_score < 0.8 THEN 1 ELSE 0 END) AS high,
+                  SUM(CASE WHEN risk_score >= 0.8 THEN 1 ELSE 0 END) AS critical
+                FROM public.transactions
+                {where};
+                """,
+                *args,
+            )
+
+            # Timeline buckets
+            timeline_rows = await conn.fetch(
+                f"""
+                SELECT date_trunc('{bucket_unit}', created_at) AS bucket,
+                  SUM(CASE WHEN action = 'BLOCK' THEN 1 ELSE 0 END) AS block,
+                  SUM(CASE WHEN action = 'DELAY' THEN 1 ELSE 0 END) AS delay,
+                  SUM(CASE WHEN action = 'ALLOW' THEN 1 ELSE 0 END) AS allow
+                FROM public.transactions
+                {where}
+                GROUP BY bucket
+                ORDER BY bucket DESC
+                LIMIT {limit_param};
+                """,
+                *args, bucket_limit,
+            )
+        return build_dashboard_analytics(_row(risk_row), _rows(timeline_rows))
+
+    # --- admin logs ----------------------------------------------------------
+    async def db_add_admin_log(self, tx_id: str, user_id: str, action: str,
+                               admin_username: str = None, source_ip: str = None):
+        try:
+            async with (await self.pool()).acquire() as conn:
+                await self._ensure_admin_logs_table(conn)
+                return await conn.fetchval(
+                    """
+                    INSERT INTO public.admin_logs (tx_id, user_id, action, admin_username, source_ip, created_at)
+                    VALUES ($1, $2, $3, $4, $5, NOW())
+                    RETURNING log_id;
+                    """,
+                    tx_id, user_id, action, admin_username or "system", source_ip or "unknown",
+                )
+        except Exception as e:
+            print(f"Failed to save admin log: {e}")
+            return None
+
+    async def db_get_admin_logs(self, limit: int = 100):
+        async with (await self.pool()).acquire() as conn:
+            await self._ensure_admin_logs_table(conn)
+            return _rows(await conn.fetch(
+                """
+                SELECT log_id, tx_id, user_id, action, admin_username, source_ip, created_at
+                FROM public.admin_logs
+                ORDER BY created_at DESC
+                LIMIT $1;
+                """,
+                limit,
+            ))
+
+    # --- threshold presets ---------------------------------------------------
+    async def db_save_threshold_preset(self, admin_username: str, preset_slot: int,
+                                       preset_name: str, config: dict):
+        try:
+            async with (await self.pool()).acquire() as conn:
+                await self._ensure_threshold_presets_table(conn)
+                return await conn.fetchval("""
+                    INSERT INTO public.admin_threshold_presets
+                    (admin_username, preset_slot, preset_name, config_json, updated_at)
+                    VALUES ($1, $2, $3, $4, NOW())
+                    ON CONFLICT (admin_username, preset_slot)
+                    DO UPDATE SET
+                        preset_name = EXCLUDED.preset_name,
+                        config_json = EXCLUDED.config_json,
+                        updated_at = NOW()
+                    RETURNING id;
+                """, admin_username, preset_slot, preset_name, config)
+        except Exception as e:
+            print(f"ERROR in db_save_threshold_preset: {e}")
+            return None
+
+    async def db_get_admin_presets(self, admin_username: str):
+        try:
+            async with (await self.pool()).acquire() as conn:
+                await self._ensure_threshold_presets_table(conn)
+                return _rows(await conn.fetch("""
+                    SELECT preset_slot, preset_name, config_json, updated_at
+                    FROM public.admin_threshold_presets
+                    WHERE admin_username = $1
+                    ORDER BY preset_slot;
+                """, admin_username))
+        except Exception as e:
+            print(f"Error getting presets: {e}")
+            return []
+
+    async def db_delete_threshold_preset(self, admin_username: str, preset_slot: int):
+        try:
+            async with (await self.pool()).acquire() as conn:
+                await self._ensure_threshold_presets_table(conn)
+                await conn.execute("""
+                    DELETE FROM public.admin_threshold_presets
+                    WHERE admin_username = $1 AND preset_slot = $2;
+                """, admin_username, preset_slot)
+                return True
+        except Exception as e:
+            print(f"Error deleting preset: {e}")
+            return False
+
+
+def create_admin_repository(dsn: str) -> Optional[AsyncpgAdminRepository]:
+    """Return the asyncpg repository when ADMIN_DB_DRIVER=asyncpg, else None."""
+    if ADMIN_DB_DRIVER != "asyncpg":
+        return None
+    if not ASYNCPG_AVAILABLE:
+        print("[WARN] ADMIN_DB_DRIVER=asyncpg but asyncpg is not installed; using psycopg2")
+        return None
+    return AsyncpgAdminRepository(dsn)
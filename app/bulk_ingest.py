@@ -0,0 +1,110 @@
+"""
+Request parsing for bulk transaction ingest (POST /transactions/bulk).
+
+The body is either NDJSON (one transaction object per line, parsed as the
+bytes arrive) or a single JSON array. Items are numbered in input order and
+grouped into chunks of BULK_CHUNK_SIZE. The endpoint hands each chunk to
+the scoring batcher as soon as it is parsed (admitted or shed as a unit,
+like single requests) and stores it with one COPY batch, so scoring
+overlaps reading the rest of the body. Results are streamed back only after
+the whole body has been read, since the response starts once the request
+handler returns. A request arriving while scoring is saturated gets 503;
+a chunk shed later reports an error line per item.
+
+Response lines (NDJSON, input order):
+
+    {"index": 0, "tx_id": "...", "risk_score": 0.12, "action": "ALLOW"}
+    {"index": 1, "error": "..."}
+    {"done": true, "accepted": 1, "failed": 1}
+
+Configuration (environment):
+    BULK_MAX_ITEMS     items accepted per request; the rest are rejected
+    BULK_CHUNK_SIZE    items per admission check and per COPY batch
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Tuple, Union
+
+try:
+    from .ws_fanout import encode_message
+except (ImportError, SystemError):
+    from ws_fanout import encode_message
+
+# Configuration
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "5000"))
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+
+Item = Tuple[int, Union[Dict[str, Any], Exception]]
+
+
+def _parse_item(raw) -> Union[Dict[str, Any], Exception]:
+    try:
+        item = json.loads(raw) if isinstance(raw, (bytes, str)) else raw
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+    if not isinstance(item, dict):
+        return ValueError("Each item must be a JSON object")
+    if not item.get("tx_id"):
+        return ValueError("tx_id required")
+    return item
+
+
+async def iter_items(chunks: AsyncIterator[bytes], max_items: int = BULK_MAX_ITEMS) -> AsyncIterator[Item]:
+    """(index, transaction-or-error) for each item of an NDJSON or JSON-array body."""
+    buf = b""
+    is_array = None
+    index = 0
+    async for chunk in chunks:
+        buf += chunk
+        if is_array is None:
+            head = buf.lstrip()
+            if not head:
+                continue
+            is_array = head[:1] == b"["
+        if is_array:
+            continue
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            if index >= max_items:
+                yield index, ValueError(f"Bulk limit of {max_items} items exceeded")
+                return
+            yield index, _parse_item(line)
+            index += 1
+
+    if is_array:
+        try:
+            items = json.loads(buf)
+        except ValueError as e:
+            yield 0, ValueError(f"Invalid JSON array: {e}")
+            return
+        if not isinstance(items, list):
+            yield 0, ValueError("Body must be a JSON array or NDJSON")
+            return
+    else:
+        items = [buf] if buf.strip() else []
+    for raw in items:
+        if index >= max_items:
+            yield index, ValueError(f"Bulk limit of {max_items} items exceeded")
+            return
+        yield index, _parse_item(raw)
+        index += 1
+
+
+async def iter_chunks(items: AsyncIterator[Item], size: int = BULK_CHUNK_SIZE) -> AsyncIterator[List[Item]]:
+    chunk: List[Item] = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) >= max(1, size):
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def result_line(result: Dict[str, Any]) -> bytes:
+    return (encode_message(result) + "\n").encode()
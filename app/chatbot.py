@@ -5,10 +5,16 @@ Provides intelligent responses and analytics about fraud detection data
 """
 import os
 import json
+import time
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List
-import psycopg2
-import psycopg2.extras
+
+try:
+    from .db_pool import db_connection
+    from .rollups import ROLLUP_RECHECK_SECONDS, rollup_schema_ready, rollup_timeline, rollup_totals
+except (ImportError, SystemError):
+    from db_pool import db_connection
+    from rollups import ROLLUP_RECHECK_SECONDS, rollup_schema_ready, rollup_timeline, rollup_totals
 
 try:
     from groq import Groq
@@ -17,6 +23,25 @@ except ImportError:
     GROQ_AVAILABLE = False
     print("Warning: Groq not available. Install with: pip install groq")
 
+# Rollup readiness, shared by the per-request chatbot instances
+_HAS_ROLLUPS = None
+_ROLLUPS_CHECKED_AT = -ROLLUP_RECHECK_SECONDS
+
+
+def _rollups_ready(conn) -> bool:
+    """Whether the rollup tables can be read; never creates or backfills them."""
+    global _HAS_ROLLUPS, _ROLLUPS_CHECKED_AT
+    if _HAS_ROLLUPS or time.monotonic() - _ROLLUPS_CHECKED_AT < ROLLUP_RECHECK_SECONDS:
+        return bool(_HAS_ROLLUPS)
+    _ROLLUPS_CHECKED_AT = time.monotonic()
+    try:
+        _HAS_ROLLUPS = rollup_schema_ready(conn.cursor())
+    except Exception as e:
+        conn.rollback()
+        print(f"[WARN] Could not check rollup tables, scanning transactions: {e}")
+        _HAS_ROLLUPS = False
+    return _HAS_ROLLUPS
+
 
 class FraudDetectionChatbot:
     def __init__(self, db_url: str, groq_api_key: str = None):
@@ -40,13 +65,12 @@ class FraudDetectionChatbot:
             print("Chatbot running in fallback mode (no Groq API key)")
     
     def get_conn(self):
-        """Get database connection"""
-        return psycopg2.connect(self.db_url, cursor_factory=psycopg2.extras.RealDictCursor)
+        """Borrow a pooled database connection: `with self.get_conn() as conn:`"""
+        return db_connection(self.db_url)
     
     def get_transaction_details(self, tx_id: str) -> Dict[str, Any]:
         """Fetch detailed information about a specific transaction"""
-        conn = self.get_conn()
-        try:
+        with self.get_conn() as conn:
             cur = conn.cursor()
             cur.execute("""
                 SELECT * FROM public.transactions 
@@ -55,13 +79,10 @@ class FraudDetectionChatbot:
             tx = cur.fetchone()
             cur.close()
             return dict(tx) if tx else None
-        finally:
-            conn.close()
     
     def get_last_n_transactions(self, n: int = 5) -> List[Dict[str, Any]]:
         """Fetch the last N transactions"""
-        conn = self.get_conn()
-        try:
+        with self.get_conn() as conn:
             cur = conn.cursor()
             cur.execute("""
                 SELECT * FROM public.transactions 
@@ -71,42 +92,55 @@ class FraudDetectionChatbot:
             txs = cur.fetchall()
             cur.close()
             return [dict(tx) for tx in txs]
-        finally:
-            conn.close()
     
     def get_analytics_context(self, time_range: str = "24h") -> Dict[str, Any]:
         """Fetch current analytics data from database"""
-        conn = self.get_conn()
-        try:
+        with self.get_conn() as conn:
             cur = conn.cursor()
             
             # Determine time interval
             if time_range == "1h":
-                interval = "1 hour"
+                interval, window = "1 hour", timedelta(hours=1)
             elif time_range == "24h":
-                interval = "24 hours"
+                interval, window = "24 hours", timedelta(hours=24)
             elif time_range == "7d":
-                interval = "7 days"
+                interval, window = "7 days", timedelta(days=7)
             elif time_range == "30d":
-                interval = "30 days"
+                interval, window = "30 days", timedelta(days=30)
             else:
-                interval = "24 hours"
+                interval, window = "24 hours", timedelta(hours=24)
+            since = datetime.now(timezone.utc) - window
             
-            # Get overall stats
-            cur.execute(f"""
-                SELECT
-                    COUNT(*) AS total,
-                    COUNT(*) FILTER (WHERE action = 'BLOCK') AS blocked,
-                    COUNT(*) FILTER (WHERE action = 'DELAY') AS delayed,
-                    COUNT(*) FILTER (WHERE action = 'ALLOW') AS allowed,
-                    COALESCE(AVG(risk_score), 0) AS avg_risk_score,
-                    COALESCE(MAX(risk_score), 0) AS max_risk_score,
-                    COALESCE(SUM(amount), 0) AS total_amount,
-                    COALESCE(AVG(amount), 0) AS avg_amount
-                FROM transactions
-                WHERE created_at >= NOW() - INTERVAL '{interval}';
-            """)
-            stats = cur.fetchone()
+            has_rollups = _rollups_ready(conn)
+
+            # Get overall stats (pre-aggregated rollups when available)
+            if has_rollups:
+                totals = rollup_totals(cur, since)
+                stats = {
+                    "total": totals["total"],
+                    "blocked": totals["block"],
+                    "delayed": totals["delay"],
+                    "allowed": totals["allow"],
+                    "avg_risk_score": totals["mean_risk"],
+                    "max_risk_score": totals["max_risk"],
+                    "total_amount": totals["amount_sum"],
+                    "avg_amount": totals["avg_amount"],
+                }
+            else:
+                cur.execute(f"""
+                    SELECT
+                        COUNT(*) AS total,
+                        COUNT(*) FILTER (WHERE action = 'BLOCK') AS blocked,
+                        COUNT(*) FILTER (WHERE action = 'DELAY') AS delayed,
+                        COUNT(*) FILTER (WHERE action = 'ALLOW') AS allowed,
+                        COALESCE(AVG(risk_score), 0) AS avg_risk_score,
+                        COALESCE(MAX(risk_score), 0) AS max_risk_score,
+                        COALESCE(SUM(amount), 0) AS total_amount,
+                        COALESCE(AVG(amount), 0) AS avg_amount
+                    FROM transactions
+                    WHERE created_at >= NOW() - INTERVAL '{interval}';
+                """)
+                stats = cur.fetchone()
             
             # Get high-risk transactions
             cur.execute(f"""
@@ -131,20 +165,27 @@ class FraudDetectionChatbot:
             top_users = cur.fetchall()
             
             # Get trend data (hourly)
-            cur.execute(f"""
-                SELECT
-                    DATE_TRUNC('hour', created_at) as hour,
-                    COUNT(*) as total,
-                    COUNT(*) FILTER (WHERE action = 'BLOCK') as blocked,
-                    COUNT(*) FILTER (WHERE action = 'DELAY') as delayed,
-                    COUNT(*) FILTER (WHERE action = 'ALLOW') as allowed
-                FROM transactions
-                WHERE created_at >= NOW() - INTERVAL '{interval}'
-                GROUP BY hour
-                ORDER BY hour DESC
-                LIMIT 24;
-            """)
-            trends = cur.fetchall()
+            if has_rollups:
+                trends = [
+                    {"hour": t["bucket"], "total": t["total"], "blocked": t["block"],
+                     "delayed": t["delay"], "allowed": t["allow"]}
+                    for t in rollup_timeline(cur, "hour", since, 24)
+                ]
+            else:
+                cur.execute(f"""
+                    SELECT
+                        DATE_TRUNC('hour', created_at) as hour,
+                        COUNT(*) as total,
+                        COUNT(*) FILTER (WHERE action = 'BLOCK') as blocked,
+                        COUNT(*) FILTER (WHERE action = 'DELAY') as delayed,
+                        COUNT(*) FILTER (WHERE action = 'ALLOW') as allowed
+                    FROM transactions
+                    WHERE created_at >= NOW() - INTERVAL '{interval}'
+                    GROUP BY hour
+                    ORDER BY hour DESC
+                    LIMIT 24;
+                """)
+                trends = cur.fetchall()
             
             cur.close()
             
@@ -155,8 +196,6 @@ class FraudDetectionChatbot:
                 "trends": [dict(t) for t in trends],
                 "time_range": time_range
             }
-        finally:
-            conn.close()
     
     def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """Execute raw SQL query (read-only - SELECT statements only for safety)"""
@@ -165,15 +204,12 @@ class FraudDetectionChatbot:
         if not query_stripped.startswith('SELECT'):
             raise ValueError("Only SELECT queries are allowed for security reasons")
         
-        conn = self.get_conn()
-        try:
+        with self.get_conn() as conn:
             cur = conn.cursor()
             cur.execute(query, params)
             results = cur.fetchall()
             cur.close()
             return [dict(row) for row in results]
-        finally:
-            conn.close()
     
     def get_database_schema(self) -> Dict[str, Any]:
         """Get database schema information for AI context (cached)"""
@@ -181,8 +217,7 @@ class FraudDetectionChatbot:
         if self._schema_cache is not None:
             return self._schema_cache
         
-        conn = self.get_conn()
-        try:
+        with self.get_conn() as conn:
             cur = conn.cursor()
             
             # Get all tables
@@ -219,8 +254,6 @@ class FraudDetectionChatbot:
             # Cache the schema for future use
             self._schema_cache = schema_info
             return schema_info
-        finally:
-            conn.close()
     
     def generate_fallback_response(self, message: str, context: Dict[str, Any]) -> str:
         """Generate a response without AI (rule-based fallback)"""
@@ -0,0 +1,128 @@
+"""
+Cached payload for the admin dashboard (/dashboard-summary).
+
+One response carries everything the dashboard draws: the counter cards,
+the risk distribution, the action timeline and the newest high-risk
+alerts. It is assembled server-side from the rollups (see app.rollups) and
+stored in Redis per time_range, so every open dashboard shares one
+computation.
+
+Entries are dropped whenever a transaction is inserted or its action
+changes (invalidate_dashboard_summary(), called by the admin API and the
+user backend), and expire after DASHBOARD_SUMMARY_TTL seconds regardless.
+Without Redis every request is computed, which the rollups keep cheap.
+
+Configuration (environment):
+    DASHBOARD_SUMMARY_TTL      seconds a cached summary may be served
+    DASHBOARD_ALERT_LIMIT      high-risk alerts per summary
+    DASHBOARD_ALERT_MIN_RISK   risk_score from which a transaction is an alert
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+try:
+    from .admin_repository import DASHBOARD_INTERVALS
+    from .redis_pool import get_redis, mark_redis_down
+except (ImportError, SystemError):
+    from admin_repository import DASHBOARD_INTERVALS
+    from redis_pool import get_redis, mark_redis_down
+
+# Configuration
+SUMMARY_TTL = int(os.getenv("DASHBOARD_SUMMARY_TTL", "30"))
+ALERT_LIMIT = int(os.getenv("DASHBOARD_ALERT_LIMIT", "10"))
+ALERT_MIN_RISK = float(os.getenv("DASHBOARD_ALERT_MIN_RISK", "0.8"))
+KEY_PREFIX = "admin:dashboard-summary:"
+
+# Metrics
+_hits = 0
+_misses = 0
+_invalidations = 0
+
+
+def summary_cache_key(time_range: str) -> Optional[str]:
+    # Only the fixed ranges are cached, so the key space stays bounded
+    return KEY_PREFIX + time_range if time_range in DASHBOARD_INTERVALS else None
+
+
+def get_cached_summary(time_range: str) -> Optional[str]:
+    """The cached summary as a JSON string, or None."""
+    global _hits, _misses
+    key = summary_cache_key(time_range)
+    r = get_redis()
+    if key is None or r is None:
+        _misses += 1
+        return None
+    try:
+        cached = r.get(key)
+    except Exception as e:
+        print(f"[WARN] Dashboard summary cache read failed: {e}")
+        mark_redis_down()
+        cached = None
+    if cached is None:
+        _misses += 1
+    else:
+        _hits += 1
+    return cached
+
+
+def store_summary(time_range: str, payload: Dict[str, Any]) -> str:
+    """Serialize `payload` (already JSON-safe) and cache it; returns the JSON."""
+    body = json.dumps(payload, separators=(",", ":"))
+    key = summary_cache_key(time_range)
+    r = get_redis()
+    if key is not None and r is not None:
+        try:
+            r.setex(key, SUMMARY_TTL, body)
+        except Exception as e:
+            print(f"[WARN] Dashboard summary cache write failed: {e}")
+            mark_redis_down()
+    return body
+
+
+def invalidate_dashboard_summary() -> None:
+    """Drop every cached summary (a transaction was inserted or re-actioned)."""
+    global _invalidations
+    r = get_redis()
+    if r is None:
+        return
+    try:
+        r.delete(*(KEY_PREFIX + tr for tr in DASHBOARD_INTERVALS))
+        _invalidations += 1
+    except Exception as e:
+        print(f"[WARN] Dashboard summary invalidation failed: {e}")
+        mark_redis_down()
+
+
+def build_dashboard_summary(time_range: str, stats: Dict[str, Any], analytics: Dict[str, Any],
+                            alerts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Shape db_dashboard_stats / db_dashboard_analytics / alert rows into one payload."""
+    return {
+        "time_range": time_range,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "stats": {
+            "totalTransactions": int(stats.get("total") or 0),
+            "blocked": int(stats.get("block") or 0),
+            "delayed": int(stats.get("delay") or 0),
+            "allowed": int(stats.get("allow") or 0),
+            "meanRisk": round(float(stats.get("mean_risk") or 0), 4),
+        },
+        "risk": analytics["risk"],
+        "timeline": analytics["timeline"],
+        "alerts": alerts,
+    }
+
+
+def get_metrics() -> Dict[str, Any]:
+    total = _hits + _misses
+    return {
+        "hits": _hits,
+        "misses": _misses,
+        "hit_rate": round(_hits / total, 3) if total else 0.0,
+        "invalidations": _invalidations,
+        "ttl_seconds": SUMMARY_TTL,
+    }
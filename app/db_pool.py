@@ -0,0 +1,202 @@
+"""
+Shared PostgreSQL connection pool (psycopg2 ThreadedConnectionPool).
+
+Every DB helper in app/main.py, backend/server.py and app/chatbot.py borrows
+connections through db_connection() instead of calling psycopg2.connect()
+per request, so a request no longer pays a TCP + auth handshake.
+
+    with db_connection(DB_URL) as conn:
+        cur = conn.cursor()
+        ...
+        conn.commit()
+
+Leaving the block returns the connection to the pool. Work that was not
+committed is rolled back, just like conn.close() did. Broken connections are
+discarded rather than returned.
+
+One pool is kept per DSN per process. ThreadedConnectionPool raises as soon
+as it is exhausted; borrowers here wait up to DB_POOL_TIMEOUT seconds for a
+free slot instead and are counted in the saturation metrics.
+
+Configuration (environment):
+    DB_POOL_MIN               connections opened eagerly
+    DB_POOL_MAX               hard cap per process
+    DB_POOL_TIMEOUT           seconds to wait for a free connection
+    DB_STATEMENT_TIMEOUT_MS   server-side statement_timeout (0 disables)
+    DB_POOL_CHECK_ON_BORROW   "true" to run SELECT 1 before handing out a connection
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+# Configuration
+POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+CHECK_ON_BORROW = os.getenv("DB_POOL_CHECK_ON_BORROW", "false").lower() in ("1", "true", "yes")
+
+
+class DBPool:
+    """ThreadedConnectionPool with a blocking borrow, health checks and metrics."""
+
+    def __init__(self, dsn: str, minconn: int = POOL_MIN, maxconn: int = POOL_MAX,
+                 timeout: float = POOL_TIMEOUT, statement_timeout_ms: int = STATEMENT_TIMEOUT_MS,
+                 check_on_borrow: bool = CHECK_ON_BORROW,
+                 cursor_factory=psycopg2.extras.RealDictCursor):
+        self.dsn = dsn
+        self.maxconn = max(1, int(maxconn))
+        self.timeout = timeout
+        self.check_on_borrow = check_on_borrow
+
+        kwargs: Dict[str, Any] = {"cursor_factory": cursor_factory}
+        if statement_timeout_ms > 0:
+            kwargs["options"] = f"-c statement_timeout={int(statement_timeout_ms)}"
+        self._pool = ThreadedConnectionPool(min(int(minconn), self.maxconn), self.maxconn, dsn, **kwargs)
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+
+        # Metrics
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._borrowed = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._timeouts = 0
+        self._discarded = 0
+        self._peak_in_use = 0
+
+    def getconn(self):
+        """Borrow a connection, waiting up to `timeout` for a free slot."""
+        started = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._waits += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolError(f"DB pool exhausted ({self.maxconn} connections in use)")
+        waited = time.perf_counter() - started
+
+        try:
+            conn = self._pool.getconn()
+            if self.check_on_borrow and not self._healthy(conn):
+                self._pool.putconn(conn, close=True)
+                with self._lock:
+                    self._discarded += 1
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._borrowed += 1
+            self._wait_seconds += waited
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+        return conn
+
+    def putconn(self, conn) -> None:
+        """Return a connection; uncommitted work is rolled back, broken ones are closed."""
+        close = bool(conn.closed)
+        if not close:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                close = True
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                if close:
+                    self._discarded += 1
+            self._slots.release()
+
+    @staticmethod
+    def _healthy(conn) -> bool:
+        if conn.closed:
+            return False
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def closeall(self) -> None:
+        self._pool.closeall()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_size": self.maxconn,
+                "in_use": self._in_use,
+                "idle": len(self._pool._pool),
+                "peak_in_use": self._peak_in_use,
+                "saturation": round(self._in_use / self.maxconn, 3),
+                "borrowed_total": self._borrowed,
+                "waits": self._waits,
+                "avg_wait_ms": round(self._wait_seconds / self._borrowed * 1000, 3) if self._borrowed else 0.0,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+            }
+
+
+_pools: Dict[str, DBPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(dsn: str) -> DBPool:
+    """Return the process-wide pool for `dsn`, creating it on first use."""
+    pool = _pools.get(dsn)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(dsn)
+        if pool is None:
+            pool = DBPool(dsn)
+            _pools[dsn] = pool
+            print(f"[db_pool] Pool created (min={POOL_MIN}, max={POOL_MAX})")
+    return pool
+
+
+@contextmanager
+def db_connection(dsn: str) -> Iterator[Any]:
+    """Borrow a pooled RealDictCursor connection for the duration of a with-block."""
+    if not dsn:
+        raise RuntimeError("DB URL not configured")
+    pool = get_pool(dsn)
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        pool.putconn(conn)
+
+
+def get_pool_metrics(dsn: Optional[str] = None) -> Dict[str, Any]:
+    """Saturation metrics for one pool, or for every pool keyed by index."""
+    if dsn is not None:
+        pool = _pools.get(dsn)
+        return pool.get_metrics() if pool else {}
+    return {f"pool_{i}": p.get_metrics() for i, p in enumerate(list(_pools.values()))}
+
+
+def close_all_pools() -> None:
+    """Close every pooled connection (application shutdown)."""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
@@ -0,0 +1,214 @@
+"""
+Time-ordered expiry schedule for DELAY transactions.
+
+A DELAY transaction is registered when it is created, with the time it
+becomes due for auto-refund. A small async consumer pops due entries every
+DELAY_EXPIRY_POLL_SECONDS and hands their tx_ids to a refund callback, so a
+refund lands within about a second of expiry without scanning the
+transactions table.
+
+The schedule lives in a Redis sorted set (score = expiry epoch seconds).
+Due entries are popped with one atomic Lua call, so several workers can
+consume the same schedule. While Redis is unavailable, entries go to an
+in-process heap instead; pop_due() drains both. The refund callback must be
+idempotent: a transaction confirmed or cancelled before expiry is still
+popped and must be ignored.
+
+Nothing here is the source of truth. On startup the schedule is rebuilt
+from PostgreSQL (pending DELAY rows), and the periodic sweep in the backend
+catches anything lost in between.
+
+Configuration (environment):
+    DELAY_EXPIRY_POLL_SECONDS  how often the consumer checks for due entries
+    DELAY_EXPIRY_BATCH         max entries popped per check
+    DELAY_EXPIRY_KEY           Redis sorted-set key
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .redis_pool import get_redis, mark_redis_down
+except (ImportError, SystemError):
+    from redis_pool import get_redis, mark_redis_down
+
+# Configuration
+POLL_SECONDS = float(os.getenv("DELAY_EXPIRY_POLL_SECONDS", "0.5"))
+POP_BATCH = int(os.getenv("DELAY_EXPIRY_BATCH", "500"))
+EXPIRY_KEY = os.getenv("DELAY_EXPIRY_KEY", "delay:expiry")
+
+# KEYS[1] = schedule; ARGV[1] = now, ARGV[2] = limit.
+# Returns a flat [tx_id, score, ...] list of the entries it removed.
+_POP_DUE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'WITHSCORES', 'LIMIT', 0, tonumber(ARGV[2]))
+for i = 1, #due, 2 do
+    redis.call('ZREM', KEYS[1], due[i])
+end
+return due
+"""
+
+
+class DelayExpiryScheduler:
+    """Redis ZSET (or in-process heap) of tx_id -> expiry, plus an async consumer."""
+
+    def __init__(self, key: str = EXPIRY_KEY, poll_seconds: float = POLL_SECONDS,
+                 batch: int = POP_BATCH):
+        self.key = key
+        self.poll_seconds = max(0.05, float(poll_seconds))
+        self.batch = max(1, int(batch))
+
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[float, str]] = []
+        self._local: Dict[str, float] = {}
+        self._script = None
+        self._script_client = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self._scheduled = 0
+        self._popped = 0
+        self._refunded = 0
+        self._errors = 0
+        self._last_lag_ms = 0.0
+        self._max_lag_ms = 0.0
+
+    # ------------------------------------------------------------------
+    # Schedule
+    # ------------------------------------------------------------------
+
+    def schedule(self, tx_id: str, expires_at: float) -> None:
+        """Register `tx_id` to expire at epoch seconds `expires_at`."""
+        self.schedule_many([(tx_id, expires_at)])
+
+    def schedule_many(self, entries: Iterable[Tuple[str, float]]) -> int:
+        entries = [(str(tx_id), float(expires_at)) for tx_id, expires_at in entries]
+        if not entries:
+            return 0
+        r = get_redis()
+        if r is not None:
+            try:
+                pipe = r.pipeline(transaction=False)
+                for i in range(0, len(entries), 1000):
+                    pipe.zadd(self.key, dict(entries[i:i + 1000]))
+                pipe.execute()
+                self._scheduled += len(entries)
+                return len(entries)
+            except Exception as e:
+                print(f"[WARN] Delay expiry schedule unavailable in Redis, keeping it in memory: {e}")
+                mark_redis_down()
+        with self._lock:
+            for tx_id, expires_at in entries:
+                self._local[tx_id] = expires_at
+                heapq.heappush(self._heap, (expires_at, tx_id))
+        self._scheduled += len(entries)
+        return len(entries)
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Remove and return up to `batch` tx_ids whose expiry is <= now."""
+        now = time.time() if now is None else now
+        due: List[Tuple[str, float]] = []
+
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch:
+                expires_at, tx_id = heapq.heappop(self._heap)
+                # Skip entries superseded by a later schedule() of the same tx
+                if self._local.get(tx_id) == expires_at:
+                    del self._local[tx_id]
+                    due.append((tx_id, expires_at))
+
+        if len(due) < self.batch:
+            r = get_redis()
+            if r is not None:
+                try:
+                    flat = self._pop_script(r)(keys=[self.key], args=[repr(now), str(self.batch - len(due))])
+                    due.extend((flat[i], float(flat[i + 1])) for i in range(0, len(flat), 2))
+                except Exception as e:
+                    print(f"[WARN] Delay expiry pop failed: {e}")
+                    mark_redis_down()
+
+        if due:
+            lag_ms = max(0.0, (now - min(expires_at for _, expires_at in due)) * 1000)
+            self._popped += len(due)
+            self._last_lag_ms = lag_ms
+            self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+        return [tx_id for tx_id, _ in due]
+
+    def _pop_script(self, r):
+        if self._script is None or self._script_client is not r:
+            self._script = r.register_script(_POP_DUE_LUA)
+            self._script_client = r
+        return self._script
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._heap = []
+            self._local = {}
+
+    # ------------------------------------------------------------------
+    # Consumer
+    # ------------------------------------------------------------------
+
+    def start(self, refund_fn: Callable[[List[str]], int]) -> None:
+        """
+        Start the consumer on the running event loop. `refund_fn` runs in the
+        default executor with a list of due tx_ids and returns how many it
+        actually refunded.
+        """
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(refund_fn))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, refund_fn: Callable[[List[str]], int]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                due = await loop.run_in_executor(None, self.pop_due)
+                if due:
+                    self._refunded += int(await loop.run_in_executor(None, refund_fn, due) or 0)
+                    if len(due) >= self.batch:
+                        # Backlog: keep draining without sleeping
+                        continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._errors += 1
+                print(f"[WARN] Delay expiry consumer error: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        pending_redis = None
+        r = get_redis()
+        if r is not None:
+            try:
+                pending_redis = r.zcard(self.key)
+            except Exception:
+                pass
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "pending_redis": pending_redis,
+            "pending_local": len(self._local),
+            "scheduled": self._scheduled,
+            "popped": self._popped,
+            "refunded": self._refunded,
+            "errors": self._errors,
+            "last_lag_ms": round(self._last_lag_ms, 1),
+            "max_lag_ms": round(self._max_lag_ms, 1),
+        }
+
+
+delay_expiry = DelayExpiryScheduler()
@@ -13,15 +13,15 @@ from __future__ import annotations
 
 import json
 import math
-import os
 import time
 from typing import Dict, List, Optional, Tuple
 
 import redis
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-
-_redis_client: Optional[redis.Redis] = None
+try:
+    from .redis_pool import get_redis
+except (ImportError, SystemError):
+    from redis_pool import get_redis
 
 # Configuration
 NUM_BINS = 10
@@ -31,18 +31,8 @@ LIVE_DATA_TTL = 86400 * 7  # 7-day retention
 
 
 def _get_redis() -> Optional[redis.Redis]:
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
-    try:
-        _redis_client = redis.from_url(
-            REDIS_URL, decode_responses=True,
-            socket_connect_timeout=2, socket_timeout=2,
-        )
-        _redis_client.ping()
-        return _redis_client
-    except Exception:
-        return None
+    """Shared pooled client (see redis_pool); None while Redis is down."""
+    return get_redis()
 
 
 # ---------------------------------------------------------------------------
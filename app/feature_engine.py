@@ -1,18 +1,23 @@
 import os
-import redis
+import queue
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
 import math
-import statistics
 
-# Redis connection - Use environment variable or default to localhost
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
 try:
-    r = redis.from_url(REDIS_URL, decode_responses=True, socket_connect_timeout=2, socket_timeout=2)
-    r.ping()
-    print(f"✓ Redis connected: {REDIS_URL}")
-except Exception as e:
-    print(f"[WARN] Redis unavailable: {e}. Using fallback without Redis.")
-    r = None
+    from .redis_pool import get_redis, mark_redis_down
+except (ImportError, SystemError):
+    from redis_pool import get_redis, mark_redis_down
+
+
+def _get_redis():
+    """Shared pooled Redis client (see redis_pool); None while Redis is down."""
+    return get_redis()
 
 # ---------------------------------------------
 # HELPER FUNCTIONS
@@ -29,6 +34,7 @@ def safe_ts(timestamp_str):
 
 def zcount_last_seconds(key, now_ts, seconds):
     """Count events in a ZSET in the last X seconds."""
+    r = _get_redis()
     if r is None:
         return 0
     try:
@@ -39,6 +45,7 @@ def zcount_last_seconds(key, now_ts, seconds):
 
 def zsum_last_seconds(key, now_ts, seconds):
     """Sum values in a ZSET in the last X seconds."""
+    r = _get_redis()
     if r is None:
         return 0
     try:
@@ -48,6 +55,622 @@ def zsum_last_seconds(key, now_ts, seconds):
     except:
         return 0
 
+# ---------------------------------------------
+# AMOUNT STATISTICS (bucketed Welford aggregates)
+# ---------------------------------------------
+# Amount mean/std/max come from per-hour Welford aggregates kept in one Redis
+# hash per user (field = hour index, value = "n:mean:m2:max"). Each
+# transaction updates only its own bucket; buckets older than the 7-day
+# window are deleted one by one. Per-transaction cost is bounded by the
+# number of buckets (168), not by the amount history, and repeated equal
+# amounts are all counted.
+AMOUNT_BUCKET_SECONDS = 3600
+AMOUNT_WINDOW_BUCKETS = 24 * 7  # 7 days
+AMOUNT_STATS_TTL = AMOUNT_BUCKET_SECONDS * (AMOUNT_WINDOW_BUCKETS + 1)
+
+
+def _parse_amount_bucket(raw):
+    n, mean, m2, mx = raw.split(":")
+    return int(n), float(mean), float(m2), float(mx)
+
+
+def _format_amount_bucket(n, mean, m2, mx):
+    # repr() round-trips doubles exactly
+    return f"{n}:{mean!r}:{m2!r}:{mx!r}"
+
+
+def welford_update(state, x):
+    """Add one observation to a (n, mean, m2, max) aggregate."""
+    if state is None:
+        return 1, float(x), 0.0, float(x)
+    n, mean, m2, mx = state
+    n += 1
+    delta = x - mean
+    mean += delta / n
+    m2 += delta * (x - mean)
+    return n, mean, m2, max(mx, x)
+
+
+def merge_amount_buckets(buckets):
+    """
+    Combine (n, mean, m2, max) aggregates with Chan's parallel algorithm.
+    Returns dict with count, mean, std (sample), max - or None if empty.
+    """
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    mx = None
+    for nb, mb, m2b, mxb in buckets:
+        if nb <= 0:
+            continue
+        total = n + nb
+        delta = mb - mean
+        mean += delta * nb / total
+        m2 += m2b + delta * delta * n * nb / total
+        n = total
+        mx = mxb if mx is None else max(mx, mxb)
+    if n == 0:
+        return None
+    std = math.sqrt(max(m2, 0.0) / (n - 1)) if n > 1 else 0.0
+    return {"count": n, "mean": mean, "std": std, "max": mx}
+
+
+# ---------------------------------------------
+# VELOCITY COUNTERS (fixed time buckets)
+# ---------------------------------------------
+# Transaction counts live in one Redis hash per user instead of three
+# timestamp ZSETs: per-second buckets ("s<epoch_second>") back the 1-min and
+# 5-min windows, per-minute buckets ("m<epoch_minute>") back 1h/6h/24h.
+# Each call does one HINCRBY per granularity and sums the windows from the
+# hash's existing buckets (velocity_counts). Stale buckets are pruned at most once per minute per user
+# (field "p" records the last prune minute).
+#
+# Accuracy: with whole-second timestamps the 1-min/5-min counts are exact.
+# The 1h/6h/24h windows start at a minute boundary, so they may miss up to
+# 59 seconds at the far edge of the window compared to an exact sliding
+# window - never over-count.
+VELOCITY_SECOND_BUCKETS = 300    # 5 minutes of per-second buckets
+VELOCITY_MINUTE_BUCKETS = 1440   # 24 hours of per-minute buckets
+VELOCITY_TTL = 86400 + 60
+
+# (feature name, granularity, number of buckets)
+VELOCITY_WINDOWS = [
+    ("tx_count_1h", "m", 60),
+    ("tx_count_6h", "m", 360),
+    ("tx_count_24h", "m", 1440),
+    ("tx_count_1min", "s", 60),
+    ("tx_count_5min", "s", 300),
+]
+
+
+def velocity_counts(buckets, now_ts):
+    """Sum a velocity hash ({"s<sec>"|"m<min>": count}) into tx_count_* windows ending at now_ts."""
+    sec = int(now_ts // 1)
+    minute = int(now_ts // 60)
+    result = {name: 0 for name, _, _ in VELOCITY_WINDOWS}
+    for f, v in buckets.items():
+        if f == "p" or not v:
+            continue
+        unit = f[0]
+        age = (sec if unit == "s" else minute) - int(f[1:])
+        if age < 0:
+            continue
+        for name, window_unit, n in VELOCITY_WINDOWS:
+            if window_unit == unit and age < n:
+                result[name] += int(v)
+    return result
+
+
+def _stale_velocity_fields(fields, now_ts):
+    sec = int(now_ts // 1)
+    minute = int(now_ts // 60)
+    stale = []
+    for f in fields:
+        if f == "p":
+            continue
+        unit, value = f[0], int(f[1:])
+        if (unit == "s" and value <= sec - VELOCITY_SECOND_BUCKETS) or \
+           (unit == "m" and value <= minute - VELOCITY_MINUTE_BUCKETS):
+            stale.append(f)
+    return stale
+
+
+def migrate_user_velocity(user, now_ts=None):
+    """
+    One-off migration from the legacy timestamp ZSETs to the bucket hash.
+    Replays the last 24h of user:{user}:timestamps into buckets, then drops
+    the three ZSETs. Returns the number of timestamps migrated.
+    """
+    r = _get_redis()
+    if r is None:
+        return 0
+    now_ts = now_ts if now_ts is not None else datetime.now(timezone.utc).timestamp()
+    legacy = [f"user:{user}:timestamps", f"user:{user}:vel_1m", f"user:{user}:vel_5m"]
+    stamps = r.zrangebyscore(legacy[0], now_ts - 86400, now_ts, withscores=True)
+
+    pipe = r.pipeline(transaction=True)
+    vel_key = f"user:{user}:velocity"
+    for _, ts in stamps:
+        pipe.hincrby(vel_key, f"s{int(ts // 1)}", 1)
+        pipe.hincrby(vel_key, f"m{int(ts // 60)}", 1)
+    pipe.expire(vel_key, VELOCITY_TTL)
+    pipe.delete(*legacy)
+    pipe.execute()
+    return len(stamps)
+
+
+# ---------------------------------------------
+# SINGLE ROUND-TRIP REDIS BOOKKEEPING
+# ---------------------------------------------
+# All velocity, recipient and amount bookkeeping for one transaction runs in
+# one server-side script (SCRIPT LOAD once, then EVALSHA). Bucket indexes
+# are computed in Python and passed as strings so Lua's number formatting
+# can't shift them. The velocity windows are summed inside the script from
+# one HGETALL of the user's hash, which only holds buckets that saw a
+# transaction and is pruned to the last 24h, so neither the arguments nor
+# the work grow with the window sizes.
+#
+# KEYS: velocity, recipients, amount_stats
+# ARGV: second, minute, recipient, amount, amount_bucket,
+#       oldest_amount_bucket, amount_stats_ttl, read ("1" = sum the windows)
+_BEHAVIOUR_LUA = """
+local sec = tonumber(ARGV[1])
+local minute = tonumber(ARGV[2])
+local secs = """ + str(VELOCITY_SECOND_BUCKETS) + """
+local mins = """ + str(VELOCITY_MINUTE_BUCKETS) + """
+
+-- Velocity buckets: one HINCRBY per granularity
+redis.call('HINCRBY', KEYS[1], 's' .. ARGV[1], 1)
+redis.call('HINCRBY', KEYS[1], 'm' .. ARGV[2], 1)
+
+-- One pass over the hash sums every window and finds stale buckets
+-- (write-through callers pass read = "0" and ignore the counts)
+local c1m, c5m, c1h, c6h, c24h = 0, 0, 0, 0, 0
+local prune = tonumber(redis.call('HGET', KEYS[1], 'p') or '0') < minute
+local stale = {}
+if ARGV[8] == '1' or prune then
+    local all = redis.call('HGETALL', KEYS[1])
+    for i = 1, #all, 2 do
+        local f = all[i]
+        if f ~= 'p' then
+            local unit, value = string.sub(f, 1, 1), tonumber(string.sub(f, 2))
+            local n = tonumber(all[i + 1])
+            if unit == 's' then
+                local age = sec - value
+                if age >= secs then
+                    stale[#stale + 1] = f
+                elseif age >= 0 then
+                    c5m = c5m + n
+                    if age < 60 then c1m = c1m + n end
+                end
+            elseif unit == 'm' then
+                local age = minute - value
+                if age >= mins then
+                    stale[#stale + 1] = f
+                elseif age >= 0 then
+                    c24h = c24h + n
+                    if age < 360 then c6h = c6h + n end
+                    if age < 60 then c1h = c1h + n end
+                end
+            end
+        end
+    end
+end
+
+-- Prune stale buckets at most once per minute
+if prune then
+    if #stale > 0 then redis.call('HDEL', KEYS[1], unpack(stale)) end
+    redis.call('HSET', KEYS[1], 'p', ARGV[2])
+end
+redis.call('EXPIRE', KEYS[1], """ + str(VELOCITY_TTL) + """)
+
+local known = redis.call('SISMEMBER', KEYS[2], ARGV[3])
+redis.call('EXPIRE', KEYS[2], 86400 * 30)
+local rec_count = redis.call('SCARD', KEYS[2])
+
+-- Welford update of this transaction's hour bucket
+local x = tonumber(ARGV[4])
+local bucket = ARGV[5]
+local n, mean, m2, mx = 0, 0, 0, x
+local raw = redis.call('HGET', KEYS[3], bucket)
+if raw then
+    local a, b, c, d = string.match(raw, '^([^:]+):([^:]+):([^:]+):([^:]+)$')
+    n, mean, m2, mx = tonumber(a), tonumber(b), tonumber(c), tonumber(d)
+end
+n = n + 1
+local delta = x - mean
+mean = mean + delta / n
+m2 = m2 + delta * (x - mean)
+if x > mx then mx = x end
+redis.call('HSET', KEYS[3], bucket, string.format('%d:%.17g:%.17g:%.17g', n, mean, m2, mx))
+
+-- Expire old buckets one by one, return the live ones
+local oldest = tonumber(ARGV[6])
+local all = redis.call('HGETALL', KEYS[3])
+local buckets = {}
+for i = 1, #all, 2 do
+    if tonumber(all[i]) < oldest then
+        redis.call('HDEL', KEYS[3], all[i])
+    else
+        buckets[#buckets + 1] = all[i + 1]
+    end
+end
+redis.call('EXPIRE', KEYS[3], ARGV[7])
+
+return {c1h, c6h, c24h, c1m, c5m, known, rec_count, buckets}
+"""
+
+# "lua" (default) or "pipeline" (MULTI/EXEC, for servers with scripting disabled)
+REDIS_FEATURE_MODE = os.getenv("REDIS_FEATURE_MODE", "lua").lower()
+
+_behaviour_script = None
+
+
+def _behaviour_keys(user):
+    return [
+        # Replaces the legacy timestamps/vel_1m/vel_5m ZSETs
+        # (see migrate_user_velocity)
+        f"user:{user}:velocity",
+        f"user:{user}:recipients",
+        # Replaces the old user:{user}:amounts ZSET, which is no longer
+        # written and simply expires after its 7-day TTL.
+        f"user:{user}:amount_stats",
+    ]
+
+
+def _behaviour_args(now_ts, recipient, amount, read=True):
+    bucket = int(now_ts // AMOUNT_BUCKET_SECONDS)
+    return [
+        str(int(now_ts // 1)),
+        str(int(now_ts // 60)),
+        recipient,
+        repr(float(amount)),
+        str(bucket),
+        str(bucket - AMOUNT_WINDOW_BUCKETS + 1),
+        str(AMOUNT_STATS_TTL),
+        "1" if read else "0",
+    ]
+
+
+def _get_behaviour_script(r):
+    global _behaviour_script
+    if _behaviour_script is None:
+        # register_script uses EVALSHA and transparently re-loads on NOSCRIPT
+        _behaviour_script = r.register_script(_BEHAVIOUR_LUA)
+    return _behaviour_script
+
+
+def _fetch_behaviour_lua(r, keys, args):
+    res = _get_behaviour_script(r)(keys=keys, args=args, client=r)
+    res[7] = [_parse_amount_bucket(b) for b in (res[7] or [])]
+    return res
+
+
+def _fetch_behaviour_pipeline(r, keys, args):
+    """
+    Pipeline equivalent of the Lua script. Read-modify-write steps (the
+    Welford bucket update and bucket pruning) need a second, write-only
+    round trip here.
+    """
+    vel_key, rec_key, stats_key = keys
+    sec, minute, recipient, amount, bucket, oldest, stats_ttl = args[:7]
+
+    pipe = r.pipeline(transaction=True)
+    pipe.hincrby(vel_key, f"s{sec}", 1)
+    pipe.hincrby(vel_key, f"m{minute}", 1)
+    pipe.hgetall(vel_key)                    # 2
+    pipe.hget(vel_key, "p")                  # 3
+    pipe.expire(vel_key, VELOCITY_TTL)
+    pipe.sismember(rec_key, recipient)       # 5
+    pipe.expire(rec_key, 86400 * 30)
+    pipe.scard(rec_key)                      # 7
+    pipe.hgetall(stats_key)                  # 8
+    res = pipe.execute()
+
+    counts = velocity_counts(res[2], int(sec))
+
+    oldest_i = int(oldest)
+    live = {}
+    expired = []
+    for field, raw in (res[8] or {}).items():
+        if int(field) < oldest_i:
+            expired.append(field)
+        else:
+            live[field] = _parse_amount_bucket(raw)
+    live[bucket] = welford_update(live.get(bucket), float(amount))
+
+    write = r.pipeline(transaction=True)
+    if int(res[3] or 0) < int(minute):
+        stale = _stale_velocity_fields(list(res[2]), int(sec))
+        if stale:
+            write.hdel(vel_key, *stale)
+        write.hset(vel_key, "p", minute)
+    write.hset(stats_key, bucket, _format_amount_bucket(*live[bucket]))
+    if expired:
+        write.hdel(stats_key, *expired)
+    write.expire(stats_key, int(stats_ttl))
+    write.execute()
+
+    return [counts["tx_count_1h"], counts["tx_count_6h"], counts["tx_count_24h"],
+            counts["tx_count_1min"], counts["tx_count_5min"],
+            res[5], res[7], list(live.values())]
+
+
+def fetch_behaviour(user, recipient, amount, now_ts, mode=None):
+    """
+    Record this transaction and read back every Redis-backed feature input
+    in a single round trip.
+
+    Returns dict with tx_count_* counts, is_known_recipient, recipient_count
+    and 7-day amount_stats (count/mean/std/max), or None when Redis is
+    unavailable.
+    """
+    r = _get_redis()
+    if r is None:
+        return None
+    try:
+        if feature_cache.enabled and mode is None:
+            return feature_cache.fetch(r, user, recipient, amount, now_ts)
+
+        keys = _behaviour_keys(user)
+        args = _behaviour_args(now_ts, recipient, amount)
+        mode = (mode or REDIS_FEATURE_MODE).lower()
+        if mode == "pipeline":
+            res = _fetch_behaviour_pipeline(r, keys, args)
+        else:
+            res = _fetch_behaviour_lua(r, keys, args)
+    except (RedisConnectionError, RedisTimeoutError) as e:
+        print(f"[WARN] Redis unavailable during feature extraction: {e}")
+        mark_redis_down()
+        return None
+
+    return {
+        "tx_count_1h": int(res[0]),
+        "tx_count_6h": int(res[1]),
+        "tx_count_24h": int(res[2]),
+        "tx_count_1min": int(res[3]),
+        "tx_count_5min": int(res[4]),
+        "is_known_recipient": bool(int(res[5])),
+        "recipient_count": int(res[6]),
+        "amount_stats": merge_amount_buckets(res[7]),
+    }
+
+
+def _write_behaviour(r, user, recipient, amount, now_ts, client=None):
+    """Apply one transaction's Redis bookkeeping without reading anything back."""
+    keys = _behaviour_keys(user)
+    args = _behaviour_args(now_ts, recipient, amount, read=False)
+    if REDIS_FEATURE_MODE == "pipeline":
+        _fetch_behaviour_pipeline(r, keys, args)
+        return
+    _get_behaviour_script(r)(keys=keys, args=args, client=client or r)
+
+
+# ---------------------------------------------
+# HOT-USER FEATURE CACHE (optional, per worker)
+# ---------------------------------------------
+# Keeps each recently seen user's velocity buckets, recipient set and amount
+# buckets in process memory. A cached user's features are computed locally
+# with no Redis reads; the same bookkeeping is queued and written through to
+# Redis by a background thread (batched into one pipeline). Misses load the
+# user's state with one pipelined read.
+#
+# Redis stays the source of truth across workers: entries expire after
+# FEATURE_CACHE_TTL seconds, so another worker's transactions for the same
+# user show up in this worker's counts within that bound.
+FEATURE_CACHE_ENABLED = os.getenv("FEATURE_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+FEATURE_CACHE_SIZE = int(os.getenv("FEATURE_CACHE_SIZE", "10000"))
+FEATURE_CACHE_TTL = float(os.getenv("FEATURE_CACHE_TTL", "30"))
+FEATURE_CACHE_WRITE_QUEUE = int(os.getenv("FEATURE_CACHE_WRITE_QUEUE", "10000"))
+FEATURE_CACHE_WRITE_BATCH = 256
+
+
+class _UserState:
+    """One user's behavioural aggregates, mirroring the Redis keys."""
+
+    __slots__ = ("velocity", "recipients", "amount_buckets", "loaded_at", "lock")
+
+    def __init__(self, velocity, recipients, amount_buckets, loaded_at):
+        self.velocity = velocity              # {"s<sec>"|"m<min>": count}
+        self.recipients = recipients          # set of known recipient VPAs
+        self.amount_buckets = amount_buckets  # {hour index: (n, mean, m2, max)}
+        self.loaded_at = loaded_at
+        self.lock = threading.Lock()
+
+    def apply(self, recipient, amount, now_ts):
+        """Same update + read-back as the Lua script, on the local copy."""
+        sec = int(now_ts // 1)
+        minute = int(now_ts // 60)
+        bucket = int(now_ts // AMOUNT_BUCKET_SECONDS)
+        oldest = bucket - AMOUNT_WINDOW_BUCKETS + 1
+        with self.lock:
+            vel = self.velocity
+            vel[f"s{sec}"] = vel.get(f"s{sec}", 0) + 1
+            vel[f"m{minute}"] = vel.get(f"m{minute}", 0) + 1
+            counts = velocity_counts(vel, now_ts)
+            if vel.get("p", 0) < minute:
+                for f in _stale_velocity_fields(list(vel), now_ts):
+                    del vel[f]
+                vel["p"] = minute
+
+            buckets = self.amount_buckets
+            buckets[bucket] = welford_update(buckets.get(bucket), float(amount))
+            for b in [b for b in buckets if b < oldest]:
+                del buckets[b]
+
+            return {
+                **counts,
+                "is_known_recipient": recipient in self.recipients,
+                "recipient_count": len(self.recipients),
+                "amount_stats": merge_amount_buckets(list(buckets.values())),
+            }
+
+
+class HotUserCache:
+    """Size-bounded LRU of _UserState with TTL expiry and write-through."""
+
+    def __init__(self, max_size=FEATURE_CACHE_SIZE, ttl=FEATURE_CACHE_TTL,
+                 enabled=FEATURE_CACHE_ENABLED, write_queue_size=FEATURE_CACHE_WRITE_QUEUE):
+        self.enabled = enabled
+        self.max_size = max(1, int(max_size))
+        self.ttl = float(ttl)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = queue.Queue(maxsize=max(1, int(write_queue_size)))
+        self._writer = None
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.writes_flushed = 0
+        self.writes_sync = 0
+        self.write_errors = 0
+
+    # --- cache ---------------------------------------------------------
+    def get(self, user):
+        with self._lock:
+            state = self._entries.get(user)
+            if state is None:
+                self.misses += 1
+                return None
+            if time.monotonic() - state.loaded_at > self.ttl:
+                del self._entries[user]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user)
+            self.hits += 1
+            return state
+
+    def put(self, user, state):
+        """Insert state unless another thread already did; return the cached one."""
+        with self._lock:
+            existing = self._entries.get(user)
+            if existing is not None:
+                return existing
+            self._entries[user] = state
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return state
+
+    def invalidate(self, user=None):
+        """Drop one user (or everything) so the next lookup reloads from Redis."""
+        with self._lock:
+            if user is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user, None)
+
+    def note_recipient(self, user, recipient):
+        """Mirror an out-of-band SADD to user:{user}:recipients."""
+        with self._lock:
+            state = self._entries.get(user)
+        if state is not None:
+            with state.lock:
+                state.recipients.add(recipient)
+
+    def _load(self, r, user):
+        vel_key, rec_key, stats_key = _behaviour_keys(user)
+        pipe = r.pipeline(transaction=False)
+        pipe.hgetall(vel_key)
+        pipe.smembers(rec_key)
+        pipe.hgetall(stats_key)
+        velocity, recipients, stats = pipe.execute()
+        return _UserState(
+            {f: int(v) for f, v in velocity.items()},
+            set(recipients),
+            {int(b): _parse_amount_bucket(v) for b, v in stats.items()},
+            time.monotonic(),
+        )
+
+    def fetch(self, r, user, recipient, amount, now_ts):
+        """fetch_behaviour() equivalent served from the local copy."""
+        state = self.get(user)
+        if state is None:
+            state = self.put(user, self._load(r, user))
+        result = state.apply(recipient, amount, now_ts)
+        self._enqueue_write(user, recipient, amount, now_ts)
+        return result
+
+    # --- write-through -------------------------------------------------
+    def _enqueue_write(self, user, recipient, amount, now_ts):
+        self._ensure_writer()
+        try:
+            self._writes.put_nowait((user, recipient, amount, now_ts))
+        except queue.Full:
+            # Back-pressure: never drop bookkeeping, write it inline instead
+            self.writes_sync += 1
+            try:
+                _write_behaviour(_get_redis(), user, recipient, amount, now_ts)
+            except Exception as e:
+                self.write_errors += 1
+                print(f"[WARN] Feature cache write-through failed: {e}")
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="feature-cache-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < FEATURE_CACHE_WRITE_BATCH:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                r = _get_redis()
+                if r is None:
+                    raise RedisConnectionError("Redis unavailable")
+                pipe = r.pipeline(transaction=False)
+                for item in batch:
+                    _write_behaviour(r, *item, client=pipe)
+                pipe.execute()
+                self.writes_flushed += len(batch)
+            except Exception as e:
+                self.write_errors += len(batch)
+                print(f"[WARN] Feature cache write-through failed: {e}")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+    def flush(self):
+        """Block until every queued write has reached Redis."""
+        if self._writer is not None:
+            self._writes.join()
+
+    def get_metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "write_queue_depth": self._writes.qsize(),
+            "writes_flushed": self.writes_flushed,
+            "writes_sync": self.writes_sync,
+            "write_errors": self.write_errors,
+        }
+
+
+# Shared per-process instance
+feature_cache = HotUserCache()
+
+
 # ---------------------------------------------
 # MAIN FEATURE EXTRACTOR (v3 - Enhanced)
 # ---------------------------------------------
@@ -101,29 +724,17 @@ def extract_features(tx):
     # =========================================================
     # 3. VELOCITY FEATURES (transaction frequency)
     # =========================================================
-    if r is not None:
-        tx_key = f"user:{user}:timestamps"
-        r.zadd(tx_key, {str(now_ts): now_ts})
-        r.zremrangebyscore(tx_key, 0, now_ts - 86400)  # keep 24h
-        
-        features["tx_count_1h"] = float(r.zcount(tx_key, now_ts - 3600, now_ts))
-        features["tx_count_6h"] = float(r.zcount(tx_key, now_ts - 21600, now_ts))
-        features["tx_count_24h"] = float(r.zcount(tx_key, now_ts - 86400, now_ts))
+    # One round trip for all velocity, recipient and amount bookkeeping
+    behaviour = fetch_behaviour(user, recipient, amount, now_ts)
+
+    if behaviour is not None:
+        features["tx_count_1h"] = float(behaviour["tx_count_1h"])
+        features["tx_count_6h"] = float(behaviour["tx_count_6h"])
+        features["tx_count_24h"] = float(behaviour["tx_count_24h"])
         
         # High-speed velocity
-        vel_1m_key = f"user:{user}:vel_1m"
-        vel_5m_key = f"user:{user}:vel_5m"
-        r.zadd(vel_1m_key, {str(now_ts): now_ts})
-        r.zadd(vel_5m_key, {str(now_ts): now_ts})
-        r.zremrangebyscore(vel_1m_key, 0, now_ts - 60)
-        r.zremrangebyscore(vel_5m_key, 0, now_ts - 300)
-        
-        features["tx_count_1min"] = float(r.zcount(vel_1m_key, now_ts - 60, now_ts))
-        features["tx_count_5min"] = float(r.zcount(vel_5m_key, now_ts - 300, now_ts))
-        
-        r.expire(tx_key, 86400)
-        r.expire(vel_1m_key, 120)
-        r.expire(vel_5m_key, 600)
+        features["tx_count_1min"] = float(behaviour["tx_count_1min"])
+        features["tx_count_5min"] = float(behaviour["tx_count_5min"])
     else:
         # Redis unavailable: use reasonable default velocity features for demonstration
         features["tx_count_1h"] = 1.0
@@ -136,18 +747,13 @@ def extract_features(tx):
     # 4. BEHAVIORAL FEATURES
     # =========================================================
     
-    if r is not None:
+    if behaviour is not None:
         # New recipient detection (DO NOT ADD - only check if known)
-        rec_key = f"user:{user}:recipients"
-        new_rec = 0
-        if not r.sismember(rec_key, recipient):
-            new_rec = 1
-            # REMOVED: Do NOT add recipient here - only add when transaction is confirmed/allowed
-        r.expire(rec_key, 86400 * 30)
-        features["is_new_recipient"] = float(new_rec)
+        # Recipients are only added when a transaction is confirmed/allowed
+        features["is_new_recipient"] = 0.0 if behaviour["is_known_recipient"] else 1.0
         
         # Recipient transaction count
-        features["recipient_tx_count"] = float(r.scard(rec_key))
+        features["recipient_tx_count"] = float(behaviour["recipient_count"])
         
         # Device checking disabled - same device used for testing
         features["is_new_device"] = 0.0
@@ -167,20 +773,13 @@ def extract_features(tx):
     # 5. STATISTICAL FEATURES (amount patterns)
     # =========================================================
     
-    if r is not None:
-        # Track amount history for user
-        amt_key = f"user:{user}:amounts"
-        r.zadd(amt_key, {str(amount): now_ts})
-        r.zremrangebyscore(amt_key, 0, now_ts - 86400 * 7)  # keep 7 days
-        r.expire(amt_key, 86400 * 7)
-        
-        # Get recent amounts for statistics
-        recent_amounts = r.zrangebyscore(amt_key, now_ts - 86400 * 7, now_ts)
-        if recent_amounts:
-            amounts_float = [float(a) for a in recent_amounts]
-            features["amount_mean"] = statistics.mean(amounts_float)
-            features["amount_std"] = statistics.stdev(amounts_float) if len(amounts_float) > 1 else 0.0
-            features["amount_max"] = max(amounts_float)
+    if behaviour is not None:
+        # 7-day amount aggregates (bucketed Welford, maintained by fetch_behaviour)
+        stats = behaviour["amount_stats"]
+        if stats:
+            features["amount_mean"] = stats["mean"]
+            features["amount_std"] = stats["std"]
+            features["amount_max"] = stats["max"]
             features["amount_deviation"] = abs(amount - features["amount_mean"]) / (features["amount_std"] + 1.0)
         else:
             features["amount_mean"] = amount
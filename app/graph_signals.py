@@ -14,32 +14,22 @@ These signals are impossible to detect with per-transaction ML alone.
 
 from __future__ import annotations
 
-import os
 import time
 from typing import Dict, Optional, Tuple
 
 import redis
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-
-_redis_client: Optional[redis.Redis] = None
+try:
+    from .redis_pool import get_redis
+except (ImportError, SystemError):
+    from redis_pool import get_redis
 
 GRAPH_TTL = 86400 * 30  # 30-day retention for graph data
 
 
 def _get_redis() -> Optional[redis.Redis]:
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
-    try:
-        _redis_client = redis.from_url(
-            REDIS_URL, decode_responses=True,
-            socket_connect_timeout=2, socket_timeout=2,
-        )
-        _redis_client.ping()
-        return _redis_client
-    except Exception:
-        return None
+    """Shared pooled client (see redis_pool); None while Redis is down."""
+    return get_redis()
 
 
 # ---------------------------------------------------------------------------
@@ -80,17 +70,21 @@ def _key_user_fraud_count(user_id: str) -> str:
 # Graph Update Operations
 # ---------------------------------------------------------------------------
 
-def record_transaction_edge(user_id: str, recipient: str, device_id: str) -> None:
+def record_transaction_edge(user_id: str, recipient: str, device_id: str, pipe=None) -> None:
     """
     Record a transaction as an edge in the graph.
     Call this for every processed transaction.
+    With pipe the writes are only queued; the caller executes it.
     """
-    r = _get_redis()
-    if r is None:
-        return
+    own_pipe = pipe is None
+    if own_pipe:
+        r = _get_redis()
+        if r is None:
+            return
 
     try:
-        pipe = r.pipeline()
+        if own_pipe:
+            pipe = r.pipeline()
 
         # User → Recipient edge
         pipe.sadd(_key_recipient_senders(recipient), user_id)
@@ -103,22 +97,27 @@ def record_transaction_edge(user_id: str, recipient: str, device_id: str) -> Non
         pipe.sadd(_key_device_users(device_id), user_id)
         pipe.expire(_key_device_users(device_id), GRAPH_TTL)
 
-        pipe.execute()
+        if own_pipe:
+            pipe.execute()
     except Exception as e:
         print(f"[graph_signals] Error recording edge: {e}")
 
 
-def record_fraud_edge(user_id: str, recipient: str, device_id: str) -> None:
+def record_fraud_edge(user_id: str, recipient: str, device_id: str, pipe=None) -> None:
     """
     Mark a transaction as fraudulent in the graph.
     Call this when a transaction is confirmed/detected as fraud.
+    With pipe the writes are only queued; the caller executes it.
     """
-    r = _get_redis()
-    if r is None:
-        return
+    own_pipe = pipe is None
+    if own_pipe:
+        r = _get_redis()
+        if r is None:
+            return
 
     try:
-        pipe = r.pipeline()
+        if own_pipe:
+            pipe = r.pipeline()
 
         # Mark sender as fraud for this recipient
         pipe.sadd(_key_recipient_fraud_senders(recipient), user_id)
@@ -132,7 +131,8 @@ def record_fraud_edge(user_id: str, recipient: str, device_id: str) -> None:
         pipe.incr(_key_user_fraud_count(user_id))
         pipe.expire(_key_user_fraud_count(user_id), GRAPH_TTL)
 
-        pipe.execute()
+        if own_pipe:
+            pipe.execute()
     except Exception as e:
         print(f"[graph_signals] Error recording fraud edge: {e}")
 
@@ -141,6 +141,18 @@ def record_fraud_edge(user_id: str, recipient: str, device_id: str) -> None:
 # Graph Signal Computation
 # ---------------------------------------------------------------------------
 
+def graph_keys(user_id: str, recipient: str) -> Tuple[str, str, str]:
+    """
+    Keys read by compute_graph_signals(), in graph_signals_from_values()
+    argument order: two sets (SCARD) and the user's fraud count (GET).
+    """
+    return (
+        _key_recipient_senders(recipient),
+        _key_recipient_fraud_senders(recipient),
+        _key_user_fraud_count(user_id),
+    )
+
+
 def compute_graph_signals(
     user_id: str,
     recipient: str,
@@ -160,63 +172,76 @@ def compute_graph_signals(
         return 0.0, {"status": "unavailable"}
 
     try:
-        # 1. Recipient fraud ratio
-        total_senders = r.scard(_key_recipient_senders(recipient)) or 0
-        fraud_senders = r.scard(_key_recipient_fraud_senders(recipient)) or 0
-
-        if total_senders > 0 and fraud_senders > 0:
-            recipient_fraud_ratio = fraud_senders / total_senders
-        else:
-            recipient_fraud_ratio = 0.0
-
-        # 2. Recipient degree centrality (how many unique senders)
-        # High degree + fraud = money mule / scam collector
-        degree_centrality = total_senders
-        # Normalize: 1-30 senders is normal, 30+ is suspicious
-        degree_risk = min(1.0, max(0.0, (degree_centrality - 30) / 70.0)) if degree_centrality > 30 else 0.0
-
-        # 3. Shared device risk - DISABLED (same device used for testing)
-        device_users = 0
-        device_fraud_users = 0
-        shared_device_fraud_ratio = 0.0
-        multi_user_device_risk = 0.0
-
-        # 4. User's own fraud history
-        user_fraud_count = int(r.get(_key_user_fraud_count(user_id)) or 0)
-        user_fraud_risk = min(1.0, user_fraud_count * 0.3)
-
-        # 5. Aggregate graph risk score
-        # Weight the components (device components disabled)
-        graph_risk = (
-            0.45 * recipient_fraud_ratio +
-            0.15 * degree_risk +
-            0.40 * user_fraud_risk
-        )
-
-        graph_risk = min(1.0, max(0.0, graph_risk))
-
-        details = {
-            "recipient_fraud_ratio": round(recipient_fraud_ratio, 4),
-            "recipient_total_senders": total_senders,
-            "recipient_fraud_senders": fraud_senders,
-            "degree_centrality": degree_centrality,
-            "degree_risk": round(degree_risk, 4),
-            "shared_device_fraud_ratio": round(shared_device_fraud_ratio, 4),
-            "device_users": device_users,
-            "device_fraud_users": device_fraud_users,
-            "multi_user_device_risk": round(multi_user_device_risk, 4),
-            "user_fraud_count": user_fraud_count,
-            "user_fraud_risk": round(user_fraud_risk, 4),
-            "graph_risk_score": round(graph_risk, 4),
-        }
-
-        return graph_risk, details
-
+        senders_key, fraud_senders_key, fraud_count_key = graph_keys(user_id, recipient)
+        pipe = r.pipeline(transaction=False)
+        pipe.scard(senders_key)
+        pipe.scard(fraud_senders_key)
+        pipe.get(fraud_count_key)
+        return graph_signals_from_values(*pipe.execute())
     except Exception as e:
         print(f"[graph_signals] Error computing signals: {e}")
         return 0.0, {"status": "error", "error": str(e)}
 
 
+def graph_signals_from_values(total_senders, fraud_senders, user_fraud_count) -> Tuple[float, Dict]:
+    """
+    Graph risk from the raw Redis values compute_graph_signals() reads:
+    SCARD of the recipient's senders and fraud senders, and the user's
+    fraud count (None = unset). Shared with risk_context.RiskContext.
+    """
+    total_senders = int(total_senders or 0)
+    fraud_senders = int(fraud_senders or 0)
+
+    # 1. Recipient fraud ratio
+    if total_senders > 0 and fraud_senders > 0:
+        recipient_fraud_ratio = fraud_senders / total_senders
+    else:
+        recipient_fraud_ratio = 0.0
+
+    # 2. Recipient degree centrality (how many unique senders)
+    # High degree + fraud = money mule / scam collector
+    degree_centrality = total_senders
+    # Normalize: 1-30 senders is normal, 30+ is suspicious
+    degree_risk = min(1.0, max(0.0, (degree_centrality - 30) / 70.0)) if degree_centrality > 30 else 0.0
+
+    # 3. Shared device risk - DISABLED (same device used for testing)
+    device_users = 0
+    device_fraud_users = 0
+    shared_device_fraud_ratio = 0.0
+    multi_user_device_risk = 0.0
+
+    # 4. User's own fraud history
+    user_fraud_count = int(user_fraud_count or 0)
+    user_fraud_risk = min(1.0, user_fraud_count * 0.3)
+
+    # 5. Aggregate graph risk score
+    # Weight the components (device components disabled)
+    graph_risk = (
+        0.45 * recipient_fraud_ratio +
+        0.15 * degree_risk +
+        0.40 * user_fraud_risk
+    )
+
+    graph_risk = min(1.0, max(0.0, graph_risk))
+
+    details = {
+        "recipient_fraud_ratio": round(recipient_fraud_ratio, 4),
+        "recipient_total_senders": total_senders,
+        "recipient_fraud_senders": fraud_senders,
+        "degree_centrality": degree_centrality,
+        "degree_risk": round(degree_risk, 4),
+        "shared_device_fraud_ratio": round(shared_device_fraud_ratio, 4),
+        "device_users": device_users,
+        "device_fraud_users": device_fraud_users,
+        "multi_user_device_risk": round(multi_user_device_risk, 4),
+        "user_fraud_count": user_fraud_count,
+        "user_fraud_risk": round(user_fraud_risk, 4),
+        "graph_risk_score": round(graph_risk, 4),
+    }
+
+    return graph_risk, details
+
+
 def get_recipient_profile(recipient: str) -> Dict:
     """
     Get a full risk profile for a recipient based on graph data.
@@ -0,0 +1,285 @@
+"""
+Versioned live dashboard state for the /ws WebSocket.
+
+A dashboard subscribes to one time_range. For each range with subscribers
+the server holds the dashboard aggregate (the /dashboard-summary payload)
+and turns every transaction insert or action change into a small delta:
+counter increments, risk-bucket increments, one timeline-bucket update and
+a slim copy of the row for the table. Deltas carry a per-range sequence
+number and the epoch of the snapshot they apply to.
+
+Resume protocol (client -> server):
+
+    {"type": "subscribe", "range": "24h", "epoch": "<epoch>", "since_seq": 41}
+
+If the epoch matches and every delta after since_seq is still in the
+backlog, only those deltas are replayed. Otherwise (first connect, a
+server restart, a gap too long for the backlog) a full snapshot is sent and
+the client starts over from its seq.
+
+Windowed counters do not decay as time passes, so each range is reseeded
+from the database every LIVE_RESYNC_SECONDS. The reseed starts a new epoch
+and is pushed to subscribers as a snapshot.
+
+Rows published while a range is being seeded are still applied to its old
+state and are also held back. Once the loader returns, they are replayed
+onto the new snapshot, so a row committed after the loader's query is not
+lost. Rows the snapshot's alerts already show with the same action are
+skipped. A non-alert row committed just before the query but published
+after seeding began is counted twice until the next reseed.
+
+Configuration (environment):
+    LIVE_DELTA_BACKLOG     deltas kept per range for resume
+    LIVE_RESYNC_SECONDS    max age of a range's snapshot before reseeding
+"""
+
+from __future__ import annotations
+
+import copy
+import os
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+try:
+    from .admin_repository import analytics_buckets, parse_time_range
+    from .dashboard_summary import ALERT_LIMIT, ALERT_MIN_RISK
+except (ImportError, SystemError):
+    from admin_repository import analytics_buckets, parse_time_range
+    from dashboard_summary import ALERT_LIMIT, ALERT_MIN_RISK
+
+# Configuration
+DELTA_BACKLOG = int(os.getenv("LIVE_DELTA_BACKLOG", "1000"))
+RESYNC_SECONDS = float(os.getenv("LIVE_RESYNC_SECONDS", "60"))
+
+# Row fields shipped with a delta (enough for the table and alerts)
+SLIM_TX_FIELDS = ("tx_id", "user_id", "amount", "channel", "tx_type", "action", "risk_score",
+                  "confidence_level", "ts", "created_at")
+
+_ACTION_COUNTERS = {"BLOCK": "blocked", "DELAY": "delayed", "ALLOW": "allowed"}
+_ACTION_SERIES = {"BLOCK": "block", "DELAY": "delay", "ALLOW": "allow"}
+
+
+def risk_bucket(risk_score) -> str:
+    # Same bands as the rollups and the dashboard radar
+    r = float(risk_score or 0)
+    if r < 0.3:
+        return "low"
+    if r < 0.6:
+        return "medium"
+    if r < 0.8:
+        return "high"
+    return "critical"
+
+
+def _json_value(value):
+    # Same conventions as the HTTP API: naive timestamps are UTC, NUMERIC -> float
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def bucket_label(created_at, unit: str) -> Optional[str]:
+    """Timeline label of `created_at`, formatted like the rollup buckets."""
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            return None
+    if not isinstance(created_at, datetime):
+        return None
+    created_at = created_at.replace(tzinfo=None, second=0, microsecond=0)
+    if unit in ("hour", "day"):
+        created_at = created_at.replace(minute=0)
+    if unit == "day":
+        created_at = created_at.replace(hour=0)
+    return created_at.isoformat()
+
+
+class LiveRange:
+    """Aggregate state of one time_range: snapshot, sequence and delta backlog."""
+
+    def __init__(self, time_range: str, summary: Dict[str, Any], backlog: int = DELTA_BACKLOG):
+        self.time_range = time_range
+        self.unit, _ = analytics_buckets(time_range)
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self.seeded_at = time.monotonic()
+        self.state = copy.deepcopy(summary)
+        self._backlog: deque = deque(maxlen=max(1, int(backlog)))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"type": "snapshot", "range": self.time_range, "epoch": self.epoch, "seq": self.seq,
+                **{k: self.state.get(k) for k in ("stats", "risk", "timeline", "alerts")}}
+
+    def in_window(self, tx: Dict[str, Any]) -> bool:
+        since = parse_time_range(self.time_range)
+        created = tx.get("created_at")
+        if since is None or not isinstance(created, datetime):
+            return True
+        # created_at is a naive UTC timestamp
+        return created.replace(tzinfo=None) >= since.replace(tzinfo=None)
+
+    def _contribution(self, tx: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+        out: Dict[str, Dict[str, int]] = {"counters": {}, "risk": {}, "series": {}}
+        if not tx or not self.in_window(tx):
+            return out
+        action = str(tx.get("action") or "").upper()
+        out["counters"]["totalTransactions"] = 1
+        if action in _ACTION_COUNTERS:
+            out["counters"][_ACTION_COUNTERS[action]] = 1
+            out["series"][_ACTION_SERIES[action]] = 1
+        out["risk"][risk_bucket(tx.get("risk_score"))] = 1
+        return out
+
+    def apply(self, tx: Dict[str, Any], before: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fold an inserted (before=None) or updated row into the state and return
+        the delta message, or None when nothing visible changed.
+        """
+        new, old = self._contribution(tx), self._contribution(before)
+        delta: Dict[str, Any] = {}
+        for part in ("counters", "risk", "series"):
+            diff = {k: new[part].get(k, 0) - old[part].get(k, 0)
+                    for k in set(new[part]) | set(old[part])}
+            diff = {k: v for k, v in diff.items() if v}
+            if diff:
+                delta[part] = diff
+
+        label = bucket_label(tx.get("created_at"), self.unit)
+        slim = {k: _json_value(tx.get(k)) for k in SLIM_TX_FIELDS if k in tx}
+        if not delta and before is not None:
+            return None
+
+        stats = self.state.setdefault("stats", {})
+        for k, v in delta.get("counters", {}).items():
+            stats[k] = stats.get(k, 0) + v
+        risk = self.state.setdefault("risk", {})
+        for k, v in delta.get("risk", {}).items():
+            risk[k] = risk.get(k, 0) + v
+        series = delta.pop("series", None)
+        if series and label:
+            self._apply_bucket(label, series)
+            delta["bucket"] = {"label": label, **series}
+        if before is None and float(tx.get("risk_score") or 0) >= ALERT_MIN_RISK:
+            alerts = self.state.setdefault("alerts", [])
+            alerts.insert(0, slim)
+            del alerts[ALERT_LIMIT:]
+
+        self.seq += 1
+        message = {"type": "delta", "range": self.time_range, "epoch": self.epoch, "seq": self.seq,
+                   "op": "insert" if before is None else "update", "tx": slim, **delta}
+        self._backlog.append(message)
+        return message
+
+    def _apply_bucket(self, label: str, series: Dict[str, int]) -> None:
+        timeline = self.state.setdefault("timeline", {"labels": [], "block": [], "delay": [], "allow": []})
+        labels = timeline["labels"]
+        if label in labels:
+            i = labels.index(label)
+        else:
+            labels.append(label)
+            for name in ("block", "delay", "allow"):
+                timeline[name].append(0)
+            i = len(labels) - 1
+        for name, v in series.items():
+            timeline[name][i] += v
+
+    def since(self, epoch: Optional[str], seq: Optional[int]) -> Optional[List[Dict[str, Any]]]:
+        """Deltas after `seq`, or None when a snapshot is needed instead."""
+        if epoch != self.epoch or seq is None or seq > self.seq:
+            return None
+        if seq == self.seq:
+            return []
+        if not self._backlog or self._backlog[0]["seq"] > seq + 1:
+            return None
+        return [m for m in self._backlog if m["seq"] > seq]
+
+    def stale(self, max_age: float = RESYNC_SECONDS) -> bool:
+        return time.monotonic() - self.seeded_at >= max_age
+
+
+class LiveDeltaHub:
+    """LiveRange per subscribed time_range, seeded from `loader(time_range)`."""
+
+    def __init__(self, loader: Callable[[str], Awaitable[Dict[str, Any]]],
+                 backlog: int = DELTA_BACKLOG, resync_seconds: float = RESYNC_SECONDS):
+        self.loader = loader
+        self.backlog = backlog
+        self.resync_seconds = resync_seconds
+        self.ranges: Dict[str, LiveRange] = {}
+        # time_range -> (tx, before) published while its loader runs
+        self._seeding: Dict[str, List[tuple]] = {}
+        self._deltas = 0
+        self._replayed = 0
+        self._snapshots = 0
+        self._resumes = 0
+
+    async def seed(self, time_range: str) -> LiveRange:
+        """Load a fresh snapshot for a range (callers serialize seeding)."""
+        pending = self._seeding[time_range] = []
+        try:
+            summary = await self.loader(time_range)
+        finally:
+            self._seeding.pop(time_range, None)
+        live = LiveRange(time_range, summary, self.backlog)
+        counted = {a.get("tx_id"): a.get("action") for a in summary.get("alerts") or [] if isinstance(a, dict)}
+        for tx, before in pending:
+            if tx.get("tx_id") in counted and counted[tx.get("tx_id")] == tx.get("action"):
+                continue
+            live.apply(tx, before)
+            self._replayed += 1
+        self.ranges[time_range] = live
+        return live
+
+    async def subscribe(self, time_range: str, epoch: Optional[str] = None,
+                        since_seq: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Messages that bring a subscriber up to date: missed deltas or one snapshot."""
+        live = self.ranges.get(time_range)
+        if live is None or live.stale(self.resync_seconds):
+            live = await self.seed(time_range)
+        missed = live.since(epoch, since_seq)
+        if missed is not None:
+            self._resumes += 1
+            return missed
+        self._snapshots += 1
+        return [live.snapshot()]
+
+    async def resync(self, active_ranges) -> List[Dict[str, Any]]:
+        """Reseed stale active ranges and drop inactive ones; returns new snapshots."""
+        for time_range in list(self.ranges):
+            if time_range not in active_ranges:
+                del self.ranges[time_range]
+        snapshots = []
+        for time_range in active_ranges:
+            live = self.ranges.get(time_range)
+            if live is None or live.stale(self.resync_seconds):
+                snapshots.append((await self.seed(time_range)).snapshot())
+        self._snapshots += len(snapshots)
+        return snapshots
+
+    def apply(self, tx: Dict[str, Any], before: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Delta messages for every live range affected by this row."""
+        for pending in self._seeding.values():
+            pending.append((tx, before))
+        out = []
+        for live in self.ranges.values():
+            message = live.apply(tx, before)
+            if message is not None:
+                out.append(message)
+        self._deltas += len(out)
+        return out
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "ranges": {tr: {"epoch": live.epoch, "seq": live.seq} for tr, live in self.ranges.items()},
+            "deltas": self._deltas,
+            "snapshots": self._snapshots,
+            "resumes": self._resumes,
+            "replayed_during_seed": self._replayed,
+        }
@@ -3,34 +3,92 @@ import os
 import yaml
 import json
 import asyncio
+import time
 from pathlib import Path
-from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional
 
 from fastapi import FastAPI, Request, Form, status, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.templating import Jinja2Templates
 from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 
 import psycopg2
 import psycopg2.extras
 from passlib.hash import pbkdf2_sha256
-import redis
 
 # Import UPI Transaction ID generator
 from .upi_transaction_id import generate_upi_transaction_id
 
-# Initialize Redis client for cache invalidation
-redis_client = None
-try:
-    redis_client = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True)
-    redis_client.ping()
-    print("✓ Admin backend connected to Redis")
-except Exception as e:
-    print(f"⚠ Admin backend Redis unavailable: {e}")
-    redis_client = None
+# Shared pooled Redis client (cache invalidation); connects on first use
+from .redis_pool import get_redis
+
+# Shared PostgreSQL connection pool
+from .db_pool import db_connection
+
+# Admin data access: shared query helpers + optional asyncpg backend
+from .admin_repository import (
+    DASHBOARD_INTERVALS,
+    aggregate_fraud_pattern_rows,
+    analytics_buckets,
+    build_dashboard_analytics,
+    clamp_page_limit,
+    create_admin_repository,
+    decode_tx_cursor,
+    parse_action_filter,
+    parse_time_range,
+    pattern_totals,
+    transactions_page,
+    transactions_page_query,
+)
+
+# Pre-aggregated dashboard rollups (maintained by triggers on transactions)
+from .rollups import (
+    ROLLUP_RECHECK_SECONDS, ensure_rollup_schema, pattern_range, pattern_recent, rollup_schema_ready,
+    rollup_timeline, rollup_totals,
+)
+
+# Cached all-in-one dashboard payload (invalidated on insert)
+from .dashboard_summary import (
+    ALERT_LIMIT,
+    ALERT_MIN_RISK,
+    build_dashboard_summary,
+    get_cached_summary,
+    invalidate_dashboard_summary,
+    store_summary,
+)
+
+# Versioned per-range dashboard state for /ws delta messages
+from .live_deltas import RESYNC_SECONDS, LiveDeltaHub
+
+# Per-connection bounded send queues for /ws (serialize once, never await a socket)
+from .ws_fanout import (
+    ORJSON_AVAILABLE,
+    OVERFLOW_POLICY,
+    SEND_QUEUE_SIZE,
+    ConnectionSender,
+    encode_message,
+)
+
+# Cross-worker fan-out of the admin feed over Redis pub/sub
+from .ws_bus import ADMIN_CHANNEL, ws_bus
+
+# Optional write-behind (batched COPY) persistence for POST /transactions
+from .write_behind import (
+    STAGE_COLUMNS,
+    STAGE_TABLE_SQL,
+    WriteBehindQueue,
+    merge_sql,
+    stage_csv,
+    stage_records,
+    transaction_row,
+)
+
+# NDJSON / JSON-array parsing for POST /transactions/bulk
+from .bulk_ingest import BULK_CHUNK_SIZE, iter_chunks, iter_items, result_line
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
@@ -53,22 +111,6 @@ def to_json_serializable(obj):
         return obj.isoformat()
     return obj
 
-# --- time range helper ---
-def parse_time_range(time_range: str):
-    now = datetime.now(timezone.utc)
-
-    if time_range == "1h":
-        return now - timedelta(hours=1)
-    elif time_range == "24h":
-        return now - timedelta(hours=24)
-    elif time_range == "7d":
-        return now - timedelta(days=7)
-    elif time_range == "30d":
-        return now - timedelta(days=30)
-    else:
-        return None
-
-
 def extract_confidence_level(row: Dict[str, Any], default: str = "HIGH") -> str:
     """Safely derive confidence_level from row or embedded explainability."""
     if not row:
@@ -240,45 +282,164 @@ if STATIC_DIR.is_dir():
     app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
 # --- websockets manager ---
+def _revive_timestamps(row: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not row:
+        return row
+    row = dict(row)
+    for key in ("ts", "created_at"):
+        if isinstance(row.get(key), str):
+            try:
+                row[key] = datetime.fromisoformat(row[key])
+            except ValueError:
+                pass
+    return row
+
+
 class WSManager:
+    """
+    Connections that never subscribe get every full row (tx_inserted /
+    tx_updated). Dashboards that send {"type": "subscribe", ...} get
+    versioned deltas for their time_range instead (see app.live_deltas).
+
+    Publishing only enqueues: each connection has a bounded queue and its
+    own writer task (see app.ws_fanout), so a slow browser never delays
+    the others. notify_tx() also hands the row to the other workers
+    through app.ws_bus; they apply it to their own sockets and ranges.
+    """
+
     def __init__(self):
-        self.connections: List[WebSocket] = []
-        self.lock = asyncio.Lock()
+        self.senders: Dict[WebSocket, ConnectionSender] = {}
+        self.subscriptions: Dict[WebSocket, str] = {}
+        # Serializes range (re)seeding so snapshots are taken one at a time
+        self.publish_lock = asyncio.Lock()
+        self.hub = LiveDeltaHub(lambda tr: compute_dashboard_summary(tr))
+        self._resync_task = None
+        self.evicted = 0
+
+    @property
+    def connections(self) -> List[WebSocket]:
+        return list(self.senders)
 
     async def connect(self, ws: WebSocket):
         await ws.accept()
-        async with self.lock:
-            self.connections.append(ws)
+        self.senders[ws] = ConnectionSender(ws, on_close=self._forget)
+        ws_bus.subscribe(ADMIN_CHANNEL, self._on_bus_event)
+
+    def _forget(self, sender: ConnectionSender):
+        if sender.evicted:
+            self.evicted += 1
+        if self.senders.get(sender.ws) is sender:
+            del self.senders[sender.ws]
+        self.subscriptions.pop(sender.ws, None)
 
     async def disconnect(self, ws: WebSocket):
-        async with self.lock:
-            if ws in self.connections:
-                self.connections.remove(ws)
-
-    async def broadcast(self, message: Dict[str, Any]):
-        text = json.dumps(message, default=str)
-        async with self.lock:
-            conns = list(self.connections)
-        for ws in conns:
+        sender = self.senders.pop(ws, None)
+        self.subscriptions.pop(ws, None)
+        if sender is not None:
+            sender.close()
+
+    def _offer(self, ws: WebSocket, text: str):
+        sender = self.senders.get(ws)
+        if sender is not None:
+            sender.offer(text)
+
+    def broadcast(self, message: Dict[str, Any]):
+        """Queue a full-row message for every unsubscribed connection."""
+        text = encode_message(message)
+        for ws in list(self.senders):
+            if ws not in self.subscriptions:
+                self._offer(ws, text)
+
+    async def subscribe(self, ws: WebSocket, time_range: str, epoch=None, since_seq=None):
+        """(Re)subscribe `ws` to a range and queue what it missed."""
+        async with self.publish_lock:
+            previous = self.hub.ranges.get(time_range)
+            messages = await self.hub.subscribe(time_range, epoch, since_seq)
+            if ws not in self.senders:
+                return
+            self.subscriptions[ws] = time_range
+            for message in messages:
+                self._offer(ws, encode_message(message))
+            live = self.hub.ranges.get(time_range)
+            if previous is not None and live is not previous:
+                # The range was reseeded: everyone else on it needs the new epoch too
+                text = encode_message(live.snapshot())
+                for other, tr in list(self.subscriptions.items()):
+                    if tr == time_range and other is not ws:
+                        self._offer(other, text)
+        if self._resync_task is None or self._resync_task.done():
+            self._resync_task = asyncio.create_task(self._resync_loop())
+
+    def notify_tx(self, msg_type: str, row: Dict[str, Any], before: Dict[str, Any] = None):
+        """Deliver an inserted/updated row here (fast path) and on every other worker."""
+        self.broadcast({"type": msg_type, "data": row})
+        self.publish_tx(row, before)
+        ws_bus.publish(ADMIN_CHANNEL, {"type": msg_type, "row": row, "before": before})
+
+    def _on_bus_event(self, event: Dict[str, Any]):
+        # A row notified on another worker; timestamps arrive as ISO strings
+        row, before = _revive_timestamps(event.get("row")), _revive_timestamps(event.get("before"))
+        if row:
+            self.broadcast({"type": event.get("type"), "data": row})
+            self.publish_tx(row, before)
+
+    def publish_tx(self, row: Dict[str, Any], before: Dict[str, Any] = None):
+        """Fold an inserted (or re-actioned) row into live ranges and queue the deltas."""
+        self._send_by_range(self.hub.apply(row, before))
+
+    def _send_by_range(self, messages: List[Dict[str, Any]]):
+        if not messages:
+            return
+        texts = {m["range"]: encode_message(m) for m in messages}
+        for ws, time_range in list(self.subscriptions.items()):
+            text = texts.get(time_range)
+            if text is not None:
+                self._offer(ws, text)
+
+    async def _resync_loop(self):
+        # Windowed counters don't decay, so stale ranges are reseeded from the DB
+        while self.subscriptions:
+            await asyncio.sleep(max(1.0, RESYNC_SECONDS / 4))
             try:
-                await ws.send_text(text)
-            except Exception:
-                try:
-                    await self.disconnect(ws)
-                except Exception:
-                    pass
+                async with self.publish_lock:
+                    self._send_by_range(await self.hub.resync(set(self.subscriptions.values())))
+            except Exception as e:
+                print(f"[WARN] Live dashboard resync failed: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        conns = [s.get_metrics() for s in self.senders.values()]
+        return {
+            "connections": len(conns),
+            "subscribed": len(self.subscriptions),
+            "queue_size": SEND_QUEUE_SIZE,
+            "overflow_policy": OVERFLOW_POLICY,
+            "encoder": "orjson" if ORJSON_AVAILABLE else "json",
+            "evicted": self.evicted,
+            "bus": ws_bus.get_metrics(),
+            "dropped": sum(c["dropped"] for c in conns),
+            "max_lag_ms": max((c["lag_ms"] for c in conns), default=0.0),
+            "per_connection": conns,
+        }
 
 ws_manager = WSManager()
 
 # --- DB helpers (sync psycopg2 executed in threadpool) ---
 def get_conn():
-    if not DB_URL:
-        raise RuntimeError("DB URL not configured")
-    return psycopg2.connect(DB_URL, cursor_factory=psycopg2.extras.RealDictCursor)
+    """Borrow a pooled connection: `with get_conn() as conn:` (see db_pool)."""
+    return db_connection(DB_URL)
+
+# ADMIN_DB_DRIVER=asyncpg swaps every db_* helper below for its native async
+# twin in admin_repository; otherwise they run in the Starlette threadpool.
+admin_repo = create_admin_repository(DB_URL)
+
+async def run_db(helper, *args):
+    """Await a db_* helper on the configured backend (same return shape either way)."""
+    if admin_repo is not None:
+        return await getattr(admin_repo, helper.__name__)(*args)
+    return await run_in_threadpool(helper, *args)
 
 def db_get_transaction(tx_id):
-    conn = get_conn()
-    try:
+    with get_conn() as conn:
         cur = conn.cursor()
         has_expl = _ensure_explainability_column(conn)
         cols = "tx_id, user_id, device_id, ts, amount, recipient_vpa, tx_type, channel, db_status, action, risk_score, created_at"
@@ -291,8 +452,6 @@ def db_get_transaction(tx_id):
         row = cur.fetchone()
         cur.close()
         return row
-    finally:
-        conn.close()
 
 _HAS_EXPL_COL = None
 
@@ -352,9 +511,43 @@ def _ensure_explainability_column(conn) -> bool:
     return _HAS_EXPL_COL
 
 
-def db_insert_transaction(tx: Dict[str, Any]):
-    conn = get_conn()
+_HAS_ROLLUPS = None
+_ROLLUPS_CHECKED_AT = -ROLLUP_RECHECK_SECONDS
+
+
+def _ensure_rollups(conn) -> bool:
+    """Whether the rollup tables can be read; never creates or backfills them."""
+    global _HAS_ROLLUPS, _ROLLUPS_CHECKED_AT
+    if _HAS_ROLLUPS or time.monotonic() - _ROLLUPS_CHECKED_AT < ROLLUP_RECHECK_SECONDS:
+        return bool(_HAS_ROLLUPS)
+    _ROLLUPS_CHECKED_AT = time.monotonic()
+    try:
+        _HAS_ROLLUPS = rollup_schema_ready(conn.cursor())
+    except Exception as e:
+        conn.rollback()
+        print(f"[WARN] Could not check rollup tables, scanning transactions: {e}")
+        _HAS_ROLLUPS = False
+    return _HAS_ROLLUPS
+
+
+def _prepare_rollups() -> None:
+    global _HAS_ROLLUPS, _ROLLUPS_CHECKED_AT
+    with get_conn() as conn:
+        _HAS_ROLLUPS = ensure_rollup_schema(conn)
+        _ROLLUPS_CHECKED_AT = time.monotonic()
+
+
+@app.on_event("startup")
+async def _ensure_rollups_on_startup():
+    # Create + backfill here (or via tools/rebuild_rollups.py), never from a request
     try:
+        await run_in_threadpool(_prepare_rollups)
+    except Exception as e:
+        print(f"[WARN] Could not prepare dashboard rollups: {e}")
+
+
+def db_insert_transaction(tx: Dict[str, Any]):
+    with get_conn() as conn:
         cur = conn.cursor()
         has_expl = _ensure_explainability_column(conn)
 
@@ -429,12 +622,43 @@ def db_insert_transaction(tx: Dict[str, Any]):
         conn.commit()
         cur.close()
         return inserted
-    finally:
-        conn.close()
+
+def db_copy_transactions(rows: List[Dict[str, Any]]):
+    """Write-behind batch: COPY into the staging table, then one merge and one commit."""
+    records = stage_records(rows)
+    with get_conn() as conn:
+        has_expl = _ensure_explainability_column(conn)
+        cur = conn.cursor()
+        try:
+            cur.execute(STAGE_TABLE_SQL)
+            cur.copy_expert(
+                f"COPY tx_write_behind_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                stage_csv(records),
+            )
+            cur.execute(merge_sql(has_expl))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cur.close()
+    return len(records)
+
+# WRITE_BEHIND_MODE=flush|enqueue: POST /transactions rows are persisted in COPY batches
+write_behind = WriteBehindQueue(
+    flush_fn=lambda rows: run_db(db_copy_transactions, rows),
+    insert_fn=lambda row: run_db(db_insert_transaction, row),
+    # Drop cached dashboard summaries once the batch is actually stored
+    on_flushed=lambda rows: asyncio.ensure_future(run_in_threadpool(invalidate_dashboard_summary)),
+)
+
+@app.on_event("shutdown")
+async def _drain_write_behind():
+    # Queued rows must not be lost on a clean shutdown
+    await write_behind.drain()
 
 def db_recent_transactions(limit=50, range_clause=None):
-    conn = get_conn()
-    try:
+    with get_conn() as conn:
         cur = conn.cursor()
         has_expl = _ensure_explainability_column(conn)
         cols = "tx_id, user_id, amount, recipient_vpa, tx_type, channel, db_status, action, risk_score, created_at"
@@ -451,22 +675,39 @@ def db_recent_transactions(limit=50, range_clause=None):
         rows = cur.fetchall()
         cur.close()
         return rows
-    finally:
-        conn.close()
+
+def db_high_risk_alerts(time_range, limit, min_risk):
+    """Newest transactions with risk_score >= min_risk in the range (dashboard alerts)."""
+    since = parse_time_range(time_range) or parse_time_range("24h")
+    with get_conn() as conn:
+        cur = conn.cursor()
+        sql, args = transactions_page_query(
+            since, limit=limit, min_risk=min_risk,
+            has_explainability=_ensure_explainability_column(conn),
+        )
+        cur.execute(sql, args)
+        return transactions_page(cur.fetchall(), limit)["transactions"]
+
+def db_transactions_page(since, actions, after, limit, include_explainability=False):
+    """One keyset page of transactions, newest first (see transactions_page_query)."""
+    with get_conn() as conn:
+        cur = conn.cursor()
+        sql, args = transactions_page_query(
+            since, actions, after, limit, include_explainability,
+            has_explainability=_ensure_explainability_column(conn),
+        )
+        cur.execute(sql, args)
+        return transactions_page(cur.fetchall(), limit)
 
 def db_dashboard_stats(time_range: str):
-    conn = get_conn()
-    try:
+    with get_conn() as conn:
         cur = conn.cursor()
 
-        interval_map = {
-            "1h": "1 hour",
-            "24h": "24 hours",
-            "7d": "7 days",
-            "30d": "30 days",
-        }
+        if _ensure_rollups(conn):
+            totals = rollup_totals(cur, parse_time_range(time_range) or parse_time_range("24h"))
+            return {k: totals[k] for k in ("total", "block", "delay", "allow", "mean_risk")}
 
-        interval = interval_map.get(time_range, "24 hours")
+        interval = DASHBOARD_INTERVALS.get(time_range, "24 hours")
 
         cur.execute(f"""
             SELECT
@@ -480,8 +721,6 @@ def db_dashboard_stats(time_range: str):
         """)
 
         return cur.fetchone()
-    finally:
-        conn.close()
 
 def db_aggregate_fraud_patterns(time_range: str = "24h", limit: int = None):
     """
@@ -494,12 +733,19 @@ def db_aggregate_fraud_patterns(time_range: str = "24h", limit: int = None):
       - Dynamic Thresholds: amount_deviation, model disagreement, action != ALLOW
       - Drift Detection: feature distribution anomalies (amount_std, deviation)
       - Graph Signals: recipient patterns, device sharing, merchant risk
+
+    The per-transaction flags are computed on write (transactions.pattern_flags)
+    and summed over the same ts range, so this no longer decodes explainability JSON.
     """
-    conn = get_conn()
-    try:
+    with get_conn() as conn:
         cur = conn.cursor()
         
         since = parse_time_range(time_range)
+        if _ensure_rollups(conn):
+            if since:
+                return pattern_totals(pattern_range(cur, since))
+            return pattern_totals(pattern_recent(cur, limit if limit else 1000))
+
         if since:
             cur.execute("""
                 SELECT explainability, risk_score, action
@@ -517,106 +763,11 @@ def db_aggregate_fraud_patterns(time_range: str = "24h", limit: int = None):
             """, (max_limit,))
         
         rows = cur.fetchall()
-        
-        totals = {
-            "trust_engine_triggers": 0,
-            "risk_buffer_escalations": 0,
-            "dynamic_threshold_adjustments": 0,
-            "drift_alerts": 0,
-            "graph_signal_flags": 0,
-            "transactions_analyzed": 0,
-        }
-        
-        for row in rows:
-            totals["transactions_analyzed"] += 1
-            
-            try:
-                if hasattr(row, 'get'):
-                    expl = row.get("explainability")
-                    risk_score = float(row.get("risk_score", 0) or 0)
-                    action = row.get("action", "")
-                else:
-                    expl = row[0] if len(row) > 0 else None
-                    risk_score = float(row[1]) if len(row) > 1 and row[1] else 0.0
-                    action = row[2] if len(row) > 2 else ""
-            except Exception:
-                continue
-            
-            if not expl or not isinstance(expl, dict):
-                # No explainability data - every tx still passes through all 5 systems.
-                # Infer baseline activity from action and risk_score.
-                # Trust Engine: flags when risk suggests untrusted relationship
-                if risk_score > 0.3 or action in ("DELAY", "BLOCK"):
-                    totals["trust_engine_triggers"] += 1
-                # Dynamic Thresholds: always computes personalized threshold
-                if action in ("DELAY", "BLOCK") or risk_score > 0.3:
-                    totals["dynamic_threshold_adjustments"] += 1
-                # Risk Buffer: high score accumulates in buffer
-                if risk_score > 0.5:
-                    totals["risk_buffer_escalations"] += 1
-                # Graph Signals: recipient network always checked
-                if risk_score > 0.4 or action == "BLOCK":
-                    totals["graph_signal_flags"] += 1
-                # Drift Detection: feature distributions always monitored
-                if risk_score > 0.6:
-                    totals["drift_alerts"] += 1
-                continue
-            
-            features = expl.get("features", {}) or {}
-            patterns = expl.get("patterns", {}) or {}
-            model_scores = expl.get("model_scores", {}) or {}
-            detected = patterns.get("detected_patterns", []) or []
-            reasons = expl.get("reasons", []) or []
-            reasons_text = " ".join(str(r).lower() for r in reasons)
-            
-            # --- Trust Engine ---
-            # Triggers when dealing with new/unknown recipients or low recipient history
-            is_new_recip = float(features.get("is_new_recipient", 0) or 0)
-            recip_tx_count = float(features.get("recipient_tx_count", 0) or 0)
-            if is_new_recip > 0 or recip_tx_count < 5:
-                totals["trust_engine_triggers"] += 1
-            
-            # --- Risk Buffer (Cumulative Risk) ---
-            # Triggers on velocity anomalies, repeated high risk, or high cumulative indicators
-            tx_1min = float(features.get("tx_count_1min", 0) or 0)
-            tx_5min = float(features.get("tx_count_5min", 0) or 0)
-            tx_1h = float(features.get("tx_count_1h", 0) or 0)
-            has_velocity = any(p.get("name", "") == "Velocity Anomaly" for p in detected if isinstance(p, dict))
-            if has_velocity or tx_1min > 2 or tx_5min > 5 or (risk_score > 0.5 and tx_1h > 3):
-                totals["risk_buffer_escalations"] += 1
-            
-            # --- Dynamic Thresholds ---
-            # Triggers on amount deviations, model disagreement, or action escalation
-            amount_dev = float(features.get("amount_deviation", 0) or 0)
-            disagreement = float(model_scores.get("disagreement", 0) or expl.get("disagreement", 0) or 0)
-            has_model_disagree = any(p.get("name", "") == "Model Disagreement" for p in detected if isinstance(p, dict))
-            if amount_dev > 0.8 or has_model_disagree or disagreement > 0.25 or action in ("DELAY", "BLOCK"):
-                totals["dynamic_threshold_adjustments"] += 1
-            
-            # --- Drift Detection ---
-            # Triggers when features are outside normal ranges (statistical anomaly indicators)
-            amount_std = float(features.get("amount_std", 0) or 0)
-            is_new_device = float(features.get("is_new_device", 0) or 0)
-            confidence_level = str(model_scores.get("confidence_level", "") or expl.get("confidence_level", "")).upper()
-            has_device_anomaly = any(p.get("name", "") == "Device Anomaly" for p in detected if isinstance(p, dict))
-            if confidence_level == "LOW" or has_device_anomaly or (is_new_device > 0 and amount_dev > 0.5):
-                totals["drift_alerts"] += 1
-            
-            # --- Graph Signals ---
-            # Triggers on recipient/merchant network risk indicators
-            merchant_risk = float(features.get("merchant_risk_score", 0) or 0)
-            device_count = float(features.get("device_count", 0) or 0)
-            has_behavioural = any(p.get("name", "") == "Behavioural Anomaly" for p in detected if isinstance(p, dict))
-            if merchant_risk > 0.3 or device_count > 3 or (has_behavioural and recip_tx_count > 10):
-                totals["graph_signal_flags"] += 1
-        
-        return totals
-    finally:
-        conn.close()
+
+    return aggregate_fraud_pattern_rows(rows)
 
 def db_update_action(tx_id, action, risk_score=None, explainability=None):
-    conn = get_conn()
-    try:
+    with get_conn() as conn:
         cur = conn.cursor()
         has_expl = _ensure_explainability_column(conn)
 
@@ -670,28 +821,21 @@ def db_update_action(tx_id, action, risk_score=None, explainability=None):
         conn.commit()
         cur.close()
         return res
-    finally:
-        conn.close()
 
 # --- analytics helpers ---
 def db_dashboard_analytics(time_range: str):
     since = parse_time_range(time_range)
-    bucket_unit = 'hour'
-    bucket_limit = 24
-    if time_range == '1h':
-        bucket_unit = 'minute'
-        bucket_limit = 60
-    elif time_range == '7d':
-        bucket_unit = 'day'
-        bucket_limit = 7
-    elif time_range == '30d':
-        bucket_unit = 'day'
-        bucket_limit = 30
-
-    conn = get_conn()
-    try:
+    bucket_unit, bucket_limit = analytics_buckets(time_range)
+
+    with get_conn() as conn:
         cur = conn.cursor()
 
+        if _ensure_rollups(conn):
+            return build_dashboard_analytics(
+                rollup_totals(cur, since),
+                rollup_timeline(cur, bucket_unit, since, bucket_limit),
+            )
+
         # Risk distribution
         if since:
             cur.execute(
@@ -717,7 +861,7 @@ def db_dashboard_analytics(time_range: str):
                 FROM public.transactions;
                 """
             )
-        risk_row = cur.fetchone() or {"low": 0, "medium": 0, "high": 0, "critical": 0}
+        risk_row = cur.fetchone()
 
         # Timeline buckets
         dt_expr = f"date_trunc('{bucket_unit}', created_at)"
@@ -752,38 +896,7 @@ def db_dashboard_analytics(time_range: str):
             )
         timeline_rows = cur.fetchall() or []
 
-        # Reverse to chronological order
-        timeline_rows = list(reversed(timeline_rows))
-
-        # Prepare response
-        labels = []
-        blocks = []
-        delays = []
-        allows = []
-        for r in timeline_rows:
-            b = r["bucket"]
-            # Convert to ISO string for client-side formatting
-            labels.append(b.isoformat())
-            blocks.append(int(r["block"]))
-            delays.append(int(r["delay"]))
-            allows.append(int(r["allow"]))
-
-        return {
-            "risk": {
-                "low": int(risk_row["low"] or 0),
-                "medium": int(risk_row["medium"] or 0),
-                "high": int(risk_row["high"] or 0),
-                "critical": int(risk_row["critical"] or 0),
-            },
-            "timeline": {
-                "labels": labels,
-                "block": blocks,
-                "delay": delays,
-                "allow": allows,
-            }
-        }
-    finally:
-        conn.close()
+    return build_dashboard_analytics(risk_row, timeline_rows)
 
 # --- auth helpers ---
 def is_logged_in(request: Request):
@@ -810,7 +923,7 @@ def dashboard(request: Request):
 
 @app.get("/dashboard-data")
 async def dashboard_data(time_range: str = "24h"):
-    stats = await run_in_threadpool(db_dashboard_stats, time_range)
+    stats = await run_db(db_dashboard_stats, time_range)
     return {
         "stats": {
             "totalTransactions": stats["total"],
@@ -823,9 +936,37 @@ async def dashboard_data(time_range: str = "24h"):
 @app.get("/dashboard-analytics")
 async def dashboard_analytics(time_range: str = "24h"):
     """Aggregated analytics for charts to align with card stats."""
-    data = await run_in_threadpool(db_dashboard_analytics, time_range)
+    data = await run_db(db_dashboard_analytics, time_range)
     return data
 
+@app.get("/dashboard-summary")
+async def dashboard_summary(time_range: str = "24h"):
+    """
+    Everything the dashboard draws in one response: counters, risk
+    distribution, action timeline and the newest high-risk alerts. Served
+    from the Redis cache when no transaction was inserted since it was built.
+    """
+    cached = await run_in_threadpool(get_cached_summary, time_range)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    payload = await compute_dashboard_summary(time_range)
+    body = await run_in_threadpool(store_summary, time_range, payload)
+    return Response(content=body, media_type="application/json")
+
+async def compute_dashboard_summary(time_range: str) -> Dict[str, Any]:
+    """JSON-safe /dashboard-summary payload, straight from the database."""
+    stats, analytics, alerts = await asyncio.gather(
+        run_db(db_dashboard_stats, time_range),
+        run_db(db_dashboard_analytics, time_range),
+        run_db(db_high_risk_alerts, time_range, ALERT_LIMIT, ALERT_MIN_RISK),
+    )
+    for r in alerts:
+        r["confidence_level"] = extract_confidence_level(r, "HIGH")
+    return jsonable_encoder(to_json_serializable(
+        build_dashboard_summary(time_range, stats, analytics, alerts)
+    ))
+
 @app.get("/pattern-analytics")
 async def pattern_analytics(time_range: str = "24h", limit: int = None):
     """
@@ -838,7 +979,7 @@ async def pattern_analytics(time_range: str = "24h", limit: int = None):
     Returns:
         JSON with pattern counts and metadata
     """
-    stats = await run_in_threadpool(db_aggregate_fraud_patterns, time_range, limit)
+    stats = await run_db(db_aggregate_fraud_patterns, time_range, limit)
     return stats
 
 @app.get("/model-accuracy")
@@ -879,84 +1020,52 @@ async def model_accuracy():
         }
 
 @app.get("/recent-transactions")
-async def recent_transactions(limit: int = 300, time_range: str = "24h"):
+async def recent_transactions(limit: int = 300, time_range: str = "24h", cursor: Optional[str] = None,
+                              action: Optional[str] = None, include_explainability: bool = False):
     """
-    Get recent transactions within a time range.
+    Get recent transactions, newest first, one page at a time.
     
     Args:
-        limit: Maximum number of transactions to return (default 300)
-        time_range: Time window (1h, 24h, 7d, 30d)
+        limit: Page size (default 300, capped at RECENT_TX_MAX_LIMIT)
+        time_range: Time window (1h, 24h, 7d, 30d); anything else means no lower bound
+        cursor: next_cursor from the previous page
+        action: Comma-separated action filter, e.g. "BLOCK,DELAY"
+        include_explainability: Also return the explainability JSON
     
-    When a time_range is specified, returns ALL transactions in that range (ignoring limit).
-    This ensures the timeline shows data from all dates in the range, not just the most recent.
-    When no time_range, uses the limit parameter to return the most recent N transactions.
+    Pages are keyed on (COALESCE(ts, created_at), tx_id), so following
+    next_cursor walks the whole range without skipping or repeating rows
+    even while new transactions arrive. next_cursor is null on the last page.
+    """
+    try:
+        actions = parse_action_filter(action)
+        after = decode_tx_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return JSONResponse({"detail": str(e)}, status_code=400)
+
+    page = await run_db(db_transactions_page, parse_time_range(time_range), actions, after,
+                        clamp_page_limit(limit), include_explainability)
+    # Enrich confidence_level from explainability if missing
+    for r in page["transactions"]:
+        r["confidence_level"] = extract_confidence_level(r, "HIGH")
+    # Convert to JSON serializable (handles datetime objects)
+    return to_json_serializable(page)
+
+def apply_scoring(tx: Dict[str, Any], scoring_details: Optional[Dict[str, Any]] = None,
+                  risk_score: Optional[float] = None) -> str:
+    """
+    Fold a score into `tx`: risk_score, confidence_level, explainability and
+    (unless the caller set one) the threshold action. `scoring_details` is a
+    scoring.score_batch(..., return_details=True) item; without it
+    `risk_score` is a bare legacy score. Returns the confidence level.
     """
-    since = parse_time_range(time_range)
-
-    def query():
-        conn = get_conn()
-        cur = conn.cursor()
-        if since:
-            # When filtering by time range, get ALL transactions in that range
-            # Do NOT use LIMIT to ensure timeline spans all dates in the range
-            # include rows where `ts` may be NULL by falling back to `created_at`
-            cur.execute("""
-                SELECT * FROM public.transactions
-                WHERE COALESCE(ts, created_at) >= %s
-                ORDER BY COALESCE(ts, created_at) DESC
-            """, (since,))
-        else:
-            # No time range specified, use limit to get most recent N transactions
-            cur.execute("""
-                SELECT * FROM public.transactions
-                ORDER BY COALESCE(ts, created_at) DESC
-                LIMIT %s
-            """, (limit,))
-        rows = cur.fetchall()
-        conn.close()
-        # Enrich confidence_level from explainability if missing
-        for r in rows:
-            r["confidence_level"] = extract_confidence_level(r, "HIGH")
-        # Convert to JSON serializable (handles datetime objects)
-        return to_json_serializable(rows)
-
-    result = await run_in_threadpool(query)
-    return {"transactions": result}
-
-@app.post("/transactions")
-async def new_transaction(request: Request):
-    body = await request.json()
-    tx = dict(body)
-
-    # Enhanced scoring with ensemble models
-    scoring_details = None
-    risk_score = None
     confidence_level = "HIGH"
     disagreement = 0.0
     final_risk_score = None
-    try:
-        try:
-            from . import scoring
-        except (ImportError, SystemError):
-            import scoring
-        try:
-            scoring_details = scoring.score_transaction(tx, return_details=True)
-            risk_score = scoring_details.get("risk_score")
-            confidence_level = scoring_details.get("confidence_level", confidence_level)
-            disagreement = scoring_details.get("disagreement", disagreement)
-            final_risk_score = scoring_details.get("final_risk_score")
-        except Exception as e:
-            print("Ensemble scoring failed, trying legacy:", e)
-            try:
-                features = scoring.extract_features(tx)
-                legacy_score = scoring.score_features(features)
-                risk_score = legacy_score
-            except Exception as e2:
-                print("Legacy scoring also failed:", e2)
-                risk_score = None
-    except Exception as e:
-        print("Could not import scoring module:", e)
-        risk_score = None
+    if scoring_details:
+        risk_score = scoring_details.get("risk_score")
+        confidence_level = scoring_details.get("confidence_level", confidence_level)
+        disagreement = scoring_details.get("disagreement", disagreement)
+        final_risk_score = scoring_details.get("final_risk_score")
 
     if risk_score is None:
         risk_score = float(tx.get("risk_score", 0.0))
@@ -1011,17 +1120,178 @@ async def new_transaction(request: Request):
         else:
             tx["action"] = "ALLOW"
 
-    inserted = await run_in_threadpool(db_insert_transaction, tx)
-    if isinstance(inserted, dict):
-        inserted["confidence_level"] = confidence_level
-    full_row = await run_in_threadpool(db_get_transaction, inserted["tx_id"])
+    return confidence_level
+
+@app.post("/transactions")
+async def new_transaction(request: Request):
+    body = await request.json()
+    tx = dict(body)
+
+    # Enhanced scoring with ensemble models
+    scoring_details = None
+    risk_score = None
+    try:
+        try:
+            from . import scoring
+            from .score_batcher import score_batcher
+            from .scoring_executor import ScoringOverloaded, get_scoring_executor
+        except (ImportError, SystemError):
+            import scoring
+            from score_batcher import score_batcher
+            from scoring_executor import ScoringOverloaded, get_scoring_executor
+        try:
+            # Coalesced with concurrent requests into one batched model call,
+            # executed on the dedicated scoring executor (never on this loop)
+            scoring_details = await score_batcher.score(tx)
+        except ScoringOverloaded as e:
+            # Shed load instead of stalling the event loop
+            return JSONResponse(
+                {"detail": "Scoring capacity exceeded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        except Exception as e:
+            print("Ensemble scoring failed, trying legacy:", e)
+            try:
+                loop = asyncio.get_running_loop()
+                features = await loop.run_in_executor(get_scoring_executor(), scoring.extract_features, tx)
+                legacy_score = await loop.run_in_executor(get_scoring_executor(), scoring.score_features, features)
+                risk_score = legacy_score
+            except Exception as e2:
+                print("Legacy scoring also failed:", e2)
+                risk_score = None
+    except Exception as e:
+        print("Could not import scoring module:", e)
+        risk_score = None
+
+    confidence_level = apply_scoring(tx, scoring_details, risk_score)
+
+    # The broadcast row is built in memory; no re-read after the write
+    if write_behind.enabled:
+        full_row = await write_behind.submit(transaction_row(tx))
+        # The summary cache is invalidated by the flusher once the batch is stored
+    else:
+        inserted = await run_db(db_insert_transaction, tx)
+        full_row = transaction_row(tx, created_at=inserted.get("created_at"))
+        await run_in_threadpool(invalidate_dashboard_summary)
     full_row = attach_confidence_level(full_row, confidence_level)
 
-    # broadcast to websockets
-    asyncio.create_task(ws_manager.broadcast({"type": "tx_inserted", "data": full_row}))
+    # broadcast to websockets: full rows for plain listeners, deltas for dashboards
+    ws_manager.notify_tx("tx_inserted", full_row)
 
+    inserted = {k: full_row.get(k) for k in ("tx_id", "risk_score", "action", "created_at", "explainability")
+                if k in full_row}
+    inserted["confidence_level"] = confidence_level
+    if write_behind.enabled:
+        return {"status": "ok", "inserted": inserted, "durability": write_behind.mode}
     return {"status": "ok", "inserted": inserted}
 
+async def _process_bulk_chunk(chunk, previous=None) -> List[Dict[str, Any]]:
+    """Score, store and broadcast one bulk chunk; one result per item."""
+    if previous is not None:
+        # Chunks are scored in input order: feature extraction updates velocity state
+        await asyncio.gather(previous, return_exceptions=True)
+    try:
+        from .score_batcher import score_batcher
+        from .scoring_executor import ScoringOverloaded
+    except (ImportError, SystemError):
+        from score_batcher import score_batcher
+        from scoring_executor import ScoringOverloaded
+
+    results = {i: {"index": i, "error": str(item)} for i, item in chunk if isinstance(item, Exception)}
+    txs = [(i, dict(item)) for i, item in chunk if not isinstance(item, Exception)]
+    if txs:
+        try:
+            # Same admission control and batched model calls as POST /transactions
+            details = await score_batcher.score_many([tx for _, tx in txs])
+        except ScoringOverloaded:
+            # Shed the chunk rather than store it unscored; the client retries these items
+            for i, _ in txs:
+                results[i] = {"index": i, "error": "Scoring capacity exceeded, retry later"}
+            return [results[i] for i in sorted(results)]
+        except Exception as e:
+            print(f"[WARN] Bulk scoring failed, using submitted risk scores: {e}")
+            details = [None] * len(txs)
+
+        indexed_rows = []
+        for (i, tx), detail in zip(txs, details):
+            try:
+                confidence_level = apply_scoring(tx, detail)
+                indexed_rows.append((i, attach_confidence_level(transaction_row(tx), confidence_level)))
+            except Exception as e:
+                # e.g. a non-numeric amount: fail this item, not the whole chunk
+                results[i] = {"index": i, "error": str(e)}
+        rows = [row for _, row in indexed_rows]
+        if not rows:
+            return [results[i] for i in sorted(results)]
+
+        failed = {}
+        try:
+            await run_db(db_copy_transactions, rows)
+        except Exception as e:
+            print(f"[WARN] Bulk batch of {len(rows)} failed, retrying row by row: {e}")
+            for row in rows:
+                try:
+                    await run_db(db_insert_transaction, row)
+                except Exception as e2:
+                    failed[row["tx_id"]] = str(e2)
+        await run_in_threadpool(invalidate_dashboard_summary)
+
+        for i, row in indexed_rows:
+            if row["tx_id"] in failed:
+                results[i] = {"index": i, "tx_id": row["tx_id"], "error": failed[row["tx_id"]]}
+                continue
+            ws_manager.notify_tx("tx_inserted", row)
+            results[i] = {"index": i, "tx_id": row["tx_id"], "risk_score": row["risk_score"],
+                          "action": row["action"]}
+    return [results[i] for i in sorted(results)]
+
+@app.post("/transactions/bulk")
+async def bulk_transactions(request: Request):
+    """
+    Ingest many transactions in one request (NDJSON or a JSON array; see
+    app.bulk_ingest). Chunks are scored and stored as they are parsed, and
+    per-item results stream back as NDJSON in input order once the whole
+    body has been read.
+    """
+    try:
+        from .score_batcher import score_batcher
+        from .scoring_executor import ScoringOverloaded
+    except (ImportError, SystemError):
+        from score_batcher import score_batcher
+        from scoring_executor import ScoringOverloaded
+    try:
+        score_batcher.check_capacity(BULK_CHUNK_SIZE)
+    except ScoringOverloaded as e:
+        return JSONResponse(
+            {"detail": "Scoring capacity exceeded, retry later"},
+            status_code=503,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+    tasks = []
+    async for chunk in iter_chunks(iter_items(request.stream()), BULK_CHUNK_SIZE):
+        previous = tasks[-1][1] if tasks else None
+        tasks.append((chunk, asyncio.create_task(_process_bulk_chunk(chunk, previous))))
+
+    async def stream_results():
+        accepted = failed = 0
+        for chunk, task in tasks:
+            try:
+                results = await task
+            except Exception as e:
+                print(f"[WARN] Bulk chunk failed: {e}")
+                results = [{"index": i, "error": str(e)} for i, _ in chunk]
+            for result in results:
+                if "error" in result:
+                    failed += 1
+                else:
+                    accepted += 1
+                yield result_line(result)
+        yield result_line({"done": True, "accepted": accepted, "failed": failed})
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 # --- admin pages & actions ---
 @app.get("/admin/login", response_class=HTMLResponse)
 def admin_login_page(request: Request):
@@ -1072,7 +1342,7 @@ async def admin_action(request: Request):
         )
     
     # Fetch current transaction to verify it's blocked
-    current_tx = await run_in_threadpool(db_get_transaction, tx_id)
+    current_tx = await run_db(db_get_transaction, tx_id)
     if not current_tx:
         return JSONResponse({"detail": "tx not found"}, status_code=404)
     
@@ -1085,19 +1355,20 @@ async def admin_action(request: Request):
     
     # Perform the unblock
     risk_score = body.get("risk_score")
-    updated = await run_in_threadpool(db_update_action, tx_id, action, risk_score)
+    updated = await run_db(db_update_action, tx_id, action, risk_score)
     if not updated:
         return JSONResponse({"detail": "tx not found"}, status_code=404)
 
-    full = await run_in_threadpool(db_get_transaction, tx_id)
+    full = await run_db(db_get_transaction, tx_id)
+    await run_in_threadpool(invalidate_dashboard_summary)
     full = attach_confidence_level(full, "HIGH")
-    asyncio.create_task(ws_manager.broadcast({"type": "tx_updated", "data": full}))
+    ws_manager.notify_tx("tx_updated", full, before=current_tx)
     
     # Save admin log to database for persistence across devices
     admin_username = request.session.get("admin_username", "admin")
     source_ip = request.client.host if request.client else "unknown"
     user_id = updated.get("user_id", "unknown") if updated else "unknown"
-    await run_in_threadpool(
+    await run_db(
         db_add_admin_log,
         tx_id,
         user_id,
@@ -1107,6 +1378,7 @@ async def admin_action(request: Request):
     )
     
     # Clear dashboard cache for the user so they see the updated transaction
+    redis_client = get_redis()
     if user_id and redis_client:
         try:
             redis_client.delete(f"dashboard:{user_id}")
@@ -1119,34 +1391,31 @@ async def admin_action(request: Request):
 # --- admin logs endpoints ---
 def db_add_admin_log(tx_id: str, user_id: str, action: str, admin_username: str = None, source_ip: str = None):
     """Save admin action log to database"""
-    conn = get_conn()
-    try:
-        _ensure_admin_logs_table(conn)
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO public.admin_logs (tx_id, user_id, action, admin_username, source_ip, created_at)
-            VALUES (%s, %s, %s, %s, %s, NOW())
-            RETURNING log_id;
-            """,
-            (tx_id, user_id, action, admin_username or "system", source_ip or "unknown")
-        )
-        row = cur.fetchone()
-        log_id = row["log_id"] if row else None
-        conn.commit()
-        cur.close()
-        return log_id
-    except Exception as e:
-        conn.rollback()
-        print(f"Failed to save admin log: {e}")
-        return None
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        try:
+            _ensure_admin_logs_table(conn)
+            cur = conn.cursor()
+            cur.execute(
+                """
+                INSERT INTO public.admin_logs (tx_id, user_id, action, admin_username, source_ip, created_at)
+                VALUES (%s, %s, %s, %s, %s, NOW())
+                RETURNING log_id;
+                """,
+                (tx_id, user_id, action, admin_username or "system", source_ip or "unknown")
+            )
+            row = cur.fetchone()
+            log_id = row["log_id"] if row else None
+            conn.commit()
+            cur.close()
+            return log_id
+        except Exception as e:
+            conn.rollback()
+            print(f"Failed to save admin log: {e}")
+            return None
 
 def db_get_admin_logs(limit: int = 100):
     """Retrieve recent admin logs from database"""
-    conn = get_conn()
-    try:
+    with get_conn() as conn:
         _ensure_admin_logs_table(conn)
         cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         cur.execute(
@@ -1161,8 +1430,6 @@ def db_get_admin_logs(limit: int = 100):
         rows = cur.fetchall()
         cur.close()
         return rows
-    finally:
-        conn.close()
 
 # --- Threshold Presets Management ---
 _HAS_PRESETS_TABLE = None
@@ -1195,76 +1462,70 @@ def _ensure_threshold_presets_table(conn):
 
 def db_save_threshold_preset(admin_username: str, preset_slot: int, preset_name: str, config: dict):
     """Save or update a threshold preset for an admin"""
-    conn = get_conn()
-    try:
-        _ensure_threshold_presets_table(conn)
-        cur = conn.cursor()
-        cur.execute("""
-            INSERT INTO public.admin_threshold_presets 
-            (admin_username, preset_slot, preset_name, config_json, updated_at)
-            VALUES (%s, %s, %s, %s, NOW())
-            ON CONFLICT (admin_username, preset_slot) 
-            DO UPDATE SET 
-                preset_name = EXCLUDED.preset_name,
-                config_json = EXCLUDED.config_json,
-                updated_at = NOW()
-            RETURNING id;
-        """, (admin_username, preset_slot, preset_name, json.dumps(config)))
-        result = cur.fetchone()
-        conn.commit()
-        cur.close()
-        preset_id = result['id'] if result else None
-        return preset_id
-    except Exception as e:
-        import traceback
-        print(f"ERROR in db_save_threshold_preset: {e}")
-        print(f"ERROR type: {type(e).__name__}")
-        print(f"ERROR traceback:\n{traceback.format_exc()}")
-        conn.rollback()
-        return None
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        try:
+            _ensure_threshold_presets_table(conn)
+            cur = conn.cursor()
+            cur.execute("""
+                INSERT INTO public.admin_threshold_presets 
+                (admin_username, preset_slot, preset_name, config_json, updated_at)
+                VALUES (%s, %s, %s, %s, NOW())
+                ON CONFLICT (admin_username, preset_slot) 
+                DO UPDATE SET 
+                    preset_name = EXCLUDED.preset_name,
+                    config_json = EXCLUDED.config_json,
+                    updated_at = NOW()
+                RETURNING id;
+            """, (admin_username, preset_slot, preset_name, json.dumps(config)))
+            result = cur.fetchone()
+            conn.commit()
+            cur.close()
+            preset_id = result['id'] if result else None
+            return preset_id
+        except Exception as e:
+            import traceback
+            print(f"ERROR in db_save_threshold_preset: {e}")
+            print(f"ERROR type: {type(e).__name__}")
+            print(f"ERROR traceback:\n{traceback.format_exc()}")
+            conn.rollback()
+            return None
 
 def db_get_admin_presets(admin_username: str):
     """Get all threshold presets for an admin"""
-    conn = get_conn()
-    try:
-        _ensure_threshold_presets_table(conn)
-        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur.execute("""
-            SELECT preset_slot, preset_name, config_json, updated_at
-            FROM public.admin_threshold_presets
-            WHERE admin_username = %s
-            ORDER BY preset_slot;
-        """, (admin_username,))
-        rows = cur.fetchall()
-        cur.close()
-        return rows
-    except Exception as e:
-        print(f"Error getting presets: {e}")
-        return []
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        try:
+            _ensure_threshold_presets_table(conn)
+            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cur.execute("""
+                SELECT preset_slot, preset_name, config_json, updated_at
+                FROM public.admin_threshold_presets
+                WHERE admin_username = %s
+                ORDER BY preset_slot;
+            """, (admin_username,))
+            rows = cur.fetchall()
+            cur.close()
+            return rows
+        except Exception as e:
+            print(f"Error getting presets: {e}")
+            return []
 
 def db_delete_threshold_preset(admin_username: str, preset_slot: int):
     """Delete a threshold preset"""
-    conn = get_conn()
-    try:
-        _ensure_threshold_presets_table(conn)
-        cur = conn.cursor()
-        cur.execute("""
-            DELETE FROM public.admin_threshold_presets
-            WHERE admin_username = %s AND preset_slot = %s;
-        """, (admin_username, preset_slot))
-        conn.commit()
-        cur.close()
-        return True
-    except Exception as e:
-        print(f"Error deleting preset: {e}")
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
+    with get_conn() as conn:
+        try:
+            _ensure_threshold_presets_table(conn)
+            cur = conn.cursor()
+            cur.execute("""
+                DELETE FROM public.admin_threshold_presets
+                WHERE admin_username = %s AND preset_slot = %s;
+            """, (admin_username, preset_slot))
+            conn.commit()
+            cur.close()
+            return True
+        except Exception as e:
+            print(f"Error deleting preset: {e}")
+            conn.rollback()
+            return False
 
 @app.post("/admin/logs")
 async def save_admin_log(request: Request):
@@ -1284,7 +1545,7 @@ async def save_admin_log(request: Request):
         admin_username = request.session.get("admin_username", "admin")
         source_ip = request.client.host if request.client else "unknown"
         
-        log_id = await run_in_threadpool(
+        log_id = await run_db(
             db_add_admin_log, 
             tx_id, 
             user_id or "unknown",
@@ -1305,7 +1566,7 @@ async def get_admin_logs(request: Request, limit: int = 10000):
         return JSONResponse({"detail": "unauthenticated"}, status_code=401)
     
     try:
-        logs = await run_in_threadpool(db_get_admin_logs, min(limit, 10000))
+        logs = await run_db(db_get_admin_logs, min(limit, 10000))
         
         # Convert to list of dicts for JSON response
         result = []
@@ -1350,7 +1611,7 @@ async def save_threshold_preset(request: Request):
         
         admin_username = request.session.get("admin_username", "admin")
         
-        preset_id = await run_in_threadpool(
+        preset_id = await run_db(
             db_save_threshold_preset,
             admin_username,
             preset_slot,
@@ -1378,7 +1639,7 @@ async def get_threshold_presets(request: Request):
     
     try:
         admin_username = request.session.get("admin_username", "admin")
-        presets = await run_in_threadpool(db_get_admin_presets, admin_username)
+        presets = await run_db(db_get_admin_presets, admin_username)
         
         # Convert to dict format
         result = {}
@@ -1411,7 +1672,7 @@ async def delete_threshold_preset(request: Request):
         
         admin_username = request.session.get("admin_username", "admin")
         
-        success = await run_in_threadpool(
+        success = await run_db(
             db_delete_threshold_preset,
             admin_username,
             preset_slot
@@ -1494,7 +1755,7 @@ async def update_thresholds(request: Request):
         admin_username = request.session.get("admin_username", "admin")
         source_ip = request.client.host if request.client else "unknown"
         
-        await run_in_threadpool(
+        await run_db(
             db_add_admin_log,
             "SYSTEM",
             "system",
@@ -1529,8 +1790,19 @@ async def websocket_endpoint(ws: WebSocket):
     await ws_manager.connect(ws)
     try:
         while True:
-            # simple keepalive / echo — clients generally don't need to send
-            await ws.receive_text()
+            # Dashboards send {"type": "subscribe", "range", "epoch", "since_seq"};
+            # anything else is a keepalive
+            try:
+                msg = json.loads(await ws.receive_text())
+            except ValueError:
+                continue
+            if isinstance(msg, dict) and msg.get("type") == "subscribe":
+                time_range = msg.get("range") if msg.get("range") in DASHBOARD_INTERVALS else "24h"
+                since_seq = msg.get("since_seq")
+                await ws_manager.subscribe(
+                    ws, time_range, msg.get("epoch"),
+                    since_seq if isinstance(since_seq, int) else None,
+                )
     except WebSocketDisconnect:
         await ws_manager.disconnect(ws)
     except Exception:
@@ -1558,12 +1830,14 @@ async def system_health():
     }
     
     # Check database connection
+    def ping_db():
+        with get_conn() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+
     try:
-        conn = await run_in_threadpool(get_conn)
-        cur = conn.cursor()
-        cur.execute("SELECT 1;")
-        cur.close()
-        conn.close()
+        await run_in_threadpool(ping_db)
         health_status["components"]["database"]["status"] = "healthy"
         health_status["components"]["database"]["message"] = "Connected"
     except Exception as e:
@@ -1694,6 +1968,25 @@ async def risk_buffer_endpoint(user_id: str, request: Request):
         )
 
 
+# --- Scoring Batcher Metrics Endpoint ---
+@app.get("/api/scoring-metrics")
+async def scoring_metrics_endpoint():
+    """Queue depth and batch size metrics for the live scoring micro-batcher."""
+    from app.score_batcher import score_batcher
+    from app.feature_engine import feature_cache
+    from app.redis_pool import get_pool_metrics
+    from app.db_pool import get_pool_metrics as get_db_pool_metrics
+    from app.dashboard_summary import get_metrics as get_summary_metrics
+    return JSONResponse({"batcher": score_batcher.get_metrics(),
+                         "feature_cache": feature_cache.get_metrics(),
+                         "redis_pool": get_pool_metrics(),
+                         "db_pool": get_db_pool_metrics(DB_URL),
+                         "dashboard_summary": get_summary_metrics(),
+                         "live_deltas": ws_manager.hub.get_metrics(),
+                         "websocket": ws_manager.get_metrics(),
+                         "write_behind": write_behind.get_metrics()})
+
+
 # --- Graph Signal Profile Endpoint ---
 @app.get("/api/graph-profile/{recipient}")
 async def graph_profile_endpoint(recipient: str, request: Request):
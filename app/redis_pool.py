@@ -0,0 +1,171 @@
+"""
+Shared Redis connection pool for every app/* engine and both FastAPI apps.
+
+One pooled client per process replaces the per-module redis.from_url()
+clients. Nothing connects at import time. get_redis() hands out the shared
+client and health-checks it (PING) at most once per REDIS_HEALTH_CHECK_INTERVAL.
+When Redis is unreachable it returns None for REDIS_DOWN_COOLDOWN seconds, so
+an outage costs one connect timeout per cooldown window for the whole
+process, not one per module per call. Transient command errors are retried
+with exponential backoff by redis-py itself.
+
+get_async_redis() returns a redis.asyncio twin built from the same settings
+for async callers.
+
+Configuration (environment):
+    REDIS_URL                    connection URL
+    REDIS_MAX_CONNECTIONS        pool size per process (sync and async each)
+    REDIS_SOCKET_TIMEOUT         per-command socket timeout (seconds)
+    REDIS_CONNECT_TIMEOUT        connect timeout (seconds)
+    REDIS_HEALTH_CHECK_INTERVAL  seconds between PING checks
+    REDIS_RETRY_ATTEMPTS         retries for transient connection errors
+    REDIS_DOWN_COOLDOWN          seconds to report Redis as down after a failed check
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import redis
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+from redis.retry import Retry
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis-py < 4.2
+    redis_asyncio = None
+
+# Configuration
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "2"))
+CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "2"))
+HEALTH_CHECK_INTERVAL = float(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", "30"))
+RETRY_ATTEMPTS = int(os.getenv("REDIS_RETRY_ATTEMPTS", "2"))
+DOWN_COOLDOWN = float(os.getenv("REDIS_DOWN_COOLDOWN", "5"))
+
+_lock = threading.Lock()
+_client: Optional[redis.Redis] = None
+_async_client: Optional[Any] = None
+_last_check = 0.0
+_down_until = 0.0
+_healthy = False
+
+# Metrics
+_checks = 0
+_failures = 0
+
+
+def _client_kwargs() -> Dict[str, Any]:
+    return {
+        "decode_responses": True,
+        "max_connections": MAX_CONNECTIONS,
+        "socket_timeout": SOCKET_TIMEOUT,
+        "socket_connect_timeout": CONNECT_TIMEOUT,
+        "health_check_interval": HEALTH_CHECK_INTERVAL,
+        "retry_on_error": [ConnectionError, TimeoutError],
+    }
+
+
+def _build_client() -> redis.Redis:
+    retry = Retry(ExponentialBackoff(cap=0.5, base=0.05), RETRY_ATTEMPTS)
+    return redis.from_url(REDIS_URL, retry=retry, **_client_kwargs())
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Return the shared Redis client, or None while Redis is known to be down.
+
+    Connections are only opened on first use; callers never pay for a PING
+    more than once per health-check interval.
+    """
+    global _client, _last_check, _down_until, _healthy, _checks, _failures
+
+    now = time.monotonic()
+    if _healthy and now - _last_check < HEALTH_CHECK_INTERVAL:
+        return _client
+    if not _healthy and now < _down_until:
+        return None
+
+    with _lock:
+        now = time.monotonic()
+        if _healthy and now - _last_check < HEALTH_CHECK_INTERVAL:
+            return _client
+        if not _healthy and now < _down_until:
+            return None
+
+        if _client is None:
+            _client = _build_client()
+        _checks += 1
+        try:
+            _client.ping()
+        except Exception as e:
+            _failures += 1
+            if _healthy or _failures == 1:
+                print(f"[WARN] Redis unavailable: {e}. Retrying in {DOWN_COOLDOWN:.0f}s.")
+            _healthy = False
+            _down_until = time.monotonic() + DOWN_COOLDOWN
+            return None
+
+        if not _healthy:
+            print(f"✓ Redis connected: {REDIS_URL}")
+        _healthy = True
+        _last_check = time.monotonic()
+        return _client
+
+
+def get_async_redis() -> Optional[Any]:
+    """
+    Return the shared redis.asyncio client (own pool, same settings).
+
+    No health check is done here; async callers should treat command errors
+    as "Redis unavailable", like the sync engines do.
+    """
+    global _async_client
+    if redis_asyncio is None:
+        return None
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                _async_client = redis_asyncio.from_url(REDIS_URL, **_client_kwargs())
+    return _async_client
+
+
+def mark_redis_down() -> None:
+    """Report a failed command so other callers skip Redis for the cooldown."""
+    global _healthy, _down_until
+    with _lock:
+        _healthy = False
+        _down_until = time.monotonic() + DOWN_COOLDOWN
+
+
+def reset_redis() -> None:
+    """Drop the shared clients (tests, or after changing REDIS_URL)."""
+    global _client, _async_client, _healthy, _down_until, _last_check
+    with _lock:
+        if _client is not None:
+            _client.connection_pool.disconnect()
+        _client = None
+        _async_client = None
+        _healthy = False
+        _down_until = 0.0
+        _last_check = 0.0
+
+
+def get_pool_metrics() -> Dict[str, Any]:
+    """Connection counts for the sync pool plus health-check counters."""
+    pool = _client.connection_pool if _client is not None else None
+    return {
+        "healthy": _healthy,
+        "max_connections": MAX_CONNECTIONS,
+        "created_connections": getattr(pool, "_created_connections", 0) if pool else 0,
+        "in_use_connections": len(getattr(pool, "_in_use_connections", ())) if pool else 0,
+        "idle_connections": len(getattr(pool, "_available_connections", ())) if pool else 0,
+        "health_checks": _checks,
+        "health_check_failures": _failures,
+        "down_for_seconds": max(0.0, round(_down_until - time.monotonic(), 2)) if not _healthy else 0.0,
+    }
@@ -9,6 +9,12 @@ Formula:
     user_risk_buffer = previous_buffer * decay + current_risk
 
 If the buffer crosses a threshold, the transaction is escalated.
+
+update_risk_buffer() runs the whole read-decay-accumulate-write step as one
+server-side script (SCRIPT LOAD once, then EVALSHA): one round trip, and
+concurrent transactions of the same user cannot overwrite each other's
+update. RISK_BUFFER_MODE=pipeline keeps the read-then-write path for
+servers with scripting disabled.
 """
 
 from __future__ import annotations
@@ -19,30 +25,24 @@ from typing import Dict, Optional, Tuple
 
 import redis
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-
-_redis_client: Optional[redis.Redis] = None
+try:
+    from .redis_pool import get_redis
+except (ImportError, SystemError):
+    from redis_pool import get_redis
 
 # Configuration
 DECAY_FACTOR = float(os.getenv("RISK_BUFFER_DECAY", "0.85"))
 ESCALATE_THRESHOLD = float(os.getenv("RISK_BUFFER_ESCALATE", "2.5"))
 BLOCK_THRESHOLD = float(os.getenv("RISK_BUFFER_BLOCK", "4.0"))
 BUFFER_TTL = 86400 * 7  # 7-day retention
+HISTORY_LENGTH = 20
+# "lua" (default) or "pipeline" (GET then write back; concurrent updates can race)
+RISK_BUFFER_MODE = os.getenv("RISK_BUFFER_MODE", "lua").lower()
 
 
 def _get_redis() -> Optional[redis.Redis]:
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
-    try:
-        _redis_client = redis.from_url(
-            REDIS_URL, decode_responses=True,
-            socket_connect_timeout=2, socket_timeout=2,
-        )
-        _redis_client.ping()
-        return _redis_client
-    except Exception:
-        return None
+    """Shared pooled client (see redis_pool); None while Redis is down."""
+    return get_redis()
 
 
 def _key_buffer(user_id: str) -> str:
@@ -57,6 +57,54 @@ def _key_history(user_id: str) -> str:
     return f"risk_buffer:{user_id}:history"
 
 
+# Same arithmetic as buffer_from_values() + next_buffer(), executed
+# atomically. Values are stored with %.17g so they round-trip exactly; the
+# history entry is formatted in Python.
+#
+# KEYS: value, last_ts, history
+# ARGV: now, current_risk, decay, escalate, block, ttl, history_length,
+#       history_entry
+_UPDATE_LUA = """
+local now = tonumber(ARGV[1])
+local decay = tonumber(ARGV[3])
+local old = 0
+local raw = redis.call('GET', KEYS[1])
+if raw then
+    old = tonumber(raw)
+    local raw_ts = redis.call('GET', KEYS[2])
+    local last_ts = now
+    if raw_ts and raw_ts ~= '' then last_ts = tonumber(raw_ts) end
+    local elapsed_hours = (now - last_ts) / 3600.0
+    if elapsed_hours > 0 then old = old * decay ^ (elapsed_hours / 6.0) end
+end
+
+local new = old * decay + tonumber(ARGV[2])
+local ttl = tonumber(ARGV[6])
+local value = string.format('%.17g', new)
+redis.call('SET', KEYS[1], value, 'EX', ttl)
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ttl)
+redis.call('LPUSH', KEYS[3], ARGV[8])
+redis.call('LTRIM', KEYS[3], 0, tonumber(ARGV[7]) - 1)
+redis.call('EXPIRE', KEYS[3], ttl)
+
+local action = 'NONE'
+if new >= tonumber(ARGV[5]) then
+    action = 'BLOCK'
+elseif new >= tonumber(ARGV[4]) then
+    action = 'ESCALATE'
+end
+-- (a Lua number would come back truncated to an integer)
+return {value, action}
+"""
+
+_update_script = None
+
+
+def buffer_keys(user_id: str) -> Tuple[str, str]:
+    """Keys read by get_risk_buffer(), in buffer_from_values() argument order."""
+    return _key_buffer(user_id), _key_last_ts(user_id)
+
+
 def get_risk_buffer(user_id: str) -> Tuple[float, Dict]:
     """
     Get the current risk buffer value for a user.
@@ -72,50 +120,104 @@ def get_risk_buffer(user_id: str) -> Tuple[float, Dict]:
         return 0.0, {"buffer": 0.0, "status": "unavailable"}
 
     try:
-        raw_buffer = r.get(_key_buffer(user_id))
-        raw_ts = r.get(_key_last_ts(user_id))
-
-        if raw_buffer is None:
-            return 0.0, {"buffer": 0.0, "status": "new_user"}
-
-        buffer_val = float(raw_buffer)
-        last_ts = float(raw_ts) if raw_ts else time.time()
-
-        # Apply time-based decay since last update
-        elapsed_hours = (time.time() - last_ts) / 3600.0
-        if elapsed_hours > 0:
-            # Decay per hour: decay_factor applied per transaction,
-            # but also passive decay over time (slower)
-            passive_decay = DECAY_FACTOR ** (elapsed_hours / 6.0)  # decay per 6 hours
-            buffer_val *= passive_decay
-
-        status = "normal"
-        if buffer_val >= BLOCK_THRESHOLD:
-            status = "critical"
-        elif buffer_val >= ESCALATE_THRESHOLD:
-            status = "elevated"
-
-        details = {
-            "buffer": round(buffer_val, 4),
-            "elapsed_hours": round(elapsed_hours, 1),
-            "status": status,
-            "escalate_threshold": ESCALATE_THRESHOLD,
-            "block_threshold": BLOCK_THRESHOLD,
-        }
-
-        return buffer_val, details
-
+        return buffer_from_values(*r.mget(buffer_keys(user_id)))
     except Exception as e:
         print(f"[risk_buffer] Error getting buffer: {e}")
         return 0.0, {"buffer": 0.0, "status": "error"}
 
 
-def update_risk_buffer(user_id: str, current_risk: float) -> Tuple[float, str]:
+def buffer_from_values(raw_buffer, raw_ts, now: Optional[float] = None) -> Tuple[float, Dict]:
+    """
+    Decayed buffer from the raw Redis values of buffer_keys() (None = unset).
+    Shared by get_risk_buffer() and risk_context.RiskContext.
+    """
+    if raw_buffer is None:
+        return 0.0, {"buffer": 0.0, "status": "new_user"}
+
+    if now is None:
+        now = time.time()
+    buffer_val = float(raw_buffer)
+    last_ts = float(raw_ts) if raw_ts else now
+
+    # Apply time-based decay since last update
+    elapsed_hours = (now - last_ts) / 3600.0
+    if elapsed_hours > 0:
+        # Decay per hour: decay_factor applied per transaction,
+        # but also passive decay over time (slower)
+        passive_decay = DECAY_FACTOR ** (elapsed_hours / 6.0)  # decay per 6 hours
+        buffer_val *= passive_decay
+
+    status = "normal"
+    if buffer_val >= BLOCK_THRESHOLD:
+        status = "critical"
+    elif buffer_val >= ESCALATE_THRESHOLD:
+        status = "elevated"
+
+    details = {
+        "buffer": round(buffer_val, 4),
+        "elapsed_hours": round(elapsed_hours, 1),
+        "status": status,
+        "escalate_threshold": ESCALATE_THRESHOLD,
+        "block_threshold": BLOCK_THRESHOLD,
+    }
+
+    return buffer_val, details
+
+
+def classify_buffer(buffer_value: float) -> str:
+    """Action modifier for a buffer value: "NONE" | "ESCALATE" | "BLOCK"."""
+    if buffer_value >= BLOCK_THRESHOLD:
+        return "BLOCK"
+    if buffer_value >= ESCALATE_THRESHOLD:
+        return "ESCALATE"
+    return "NONE"
+
+
+def next_buffer(old_buffer: float, current_risk: float) -> Tuple[float, str]:
+    """new_buffer = old_buffer * decay + current_risk, and its action modifier."""
+    new_buffer = old_buffer * DECAY_FACTOR + current_risk
+    return new_buffer, classify_buffer(new_buffer)
+
+
+def _history_entry(current_risk: float, now: float) -> str:
+    return f"{current_risk:.4f}:{now:.0f}"
+
+
+def _get_update_script(r):
+    global _update_script
+    if _update_script is None:
+        # register_script uses EVALSHA and transparently re-loads on NOSCRIPT
+        _update_script = r.register_script(_UPDATE_LUA)
+    return _update_script
+
+
+def _update_lua(r, user_id: str, current_risk: float, now: float) -> Tuple[float, str]:
+    keys = [_key_buffer(user_id), _key_last_ts(user_id), _key_history(user_id)]
+    args = [repr(float(now)), repr(float(current_risk)), repr(DECAY_FACTOR),
+            repr(ESCALATE_THRESHOLD), repr(BLOCK_THRESHOLD), str(BUFFER_TTL),
+            str(HISTORY_LENGTH), _history_entry(current_risk, now)]
+    value, action = _get_update_script(r)(keys=keys, args=args, client=r)
+    if isinstance(action, bytes):
+        action = action.decode()
+    return float(value), action
+
+
+def update_risk_buffer(user_id: str, current_risk: float,
+                       old_buffer: Optional[float] = None, pipe=None) -> Tuple[float, str]:
     """
     Update the risk buffer with a new transaction's risk score.
 
     Formula: new_buffer = old_buffer * decay + current_risk
 
+    In the default "lua" mode this is one atomic EVALSHA that reads the
+    stored buffer itself; old_buffer and pipe are ignored, since the
+    result is needed now and a prefetched value could be stale.
+
+    In "pipeline" mode old_buffer may be a get_risk_buffer() value read
+    earlier for the same transaction (prefetched concurrently); otherwise
+    it is read here. With pipe the writes are only queued on it and the
+    caller executes them (see risk_context.RiskWriteBatch).
+
     Returns
     -------
     (new_buffer, action_modifier)
@@ -127,33 +229,33 @@ def update_risk_buffer(user_id: str, current_risk: float) -> Tuple[float, str]:
         return 0.0, "NONE"
 
     try:
+        now = time.time()
+        if RISK_BUFFER_MODE != "pipeline":
+            return _update_lua(r, user_id, current_risk, now)
+
         # Get current buffer (with passive decay applied)
-        old_buffer, _ = get_risk_buffer(user_id)
+        if old_buffer is None:
+            old_buffer, _ = get_risk_buffer(user_id)
 
         # Apply decay and add current risk
-        new_buffer = old_buffer * DECAY_FACTOR + current_risk
+        new_buffer, action_modifier = next_buffer(old_buffer, current_risk)
 
         # Store updated values
-        pipe = r.pipeline()
+        own_pipe = pipe is None
+        if own_pipe:
+            pipe = r.pipeline()
         pipe.set(_key_buffer(user_id), str(new_buffer))
         pipe.expire(_key_buffer(user_id), BUFFER_TTL)
-        pipe.set(_key_last_ts(user_id), str(time.time()))
+        pipe.set(_key_last_ts(user_id), str(now))
         pipe.expire(_key_last_ts(user_id), BUFFER_TTL)
 
-        # Store recent history (last 20 risk scores)
-        pipe.lpush(_key_history(user_id), f"{current_risk:.4f}:{time.time():.0f}")
-        pipe.ltrim(_key_history(user_id), 0, 19)
+        # Store recent history (last HISTORY_LENGTH risk scores)
+        pipe.lpush(_key_history(user_id), _history_entry(current_risk, now))
+        pipe.ltrim(_key_history(user_id), 0, HISTORY_LENGTH - 1)
         pipe.expire(_key_history(user_id), BUFFER_TTL)
 
-        pipe.execute()
-
-        # Determine action modifier
-        if new_buffer >= BLOCK_THRESHOLD:
-            action_modifier = "BLOCK"
-        elif new_buffer >= ESCALATE_THRESHOLD:
-            action_modifier = "ESCALATE"
-        else:
-            action_modifier = "NONE"
+        if own_pipe:
+            pipe.execute()
 
         return new_buffer, action_modifier
 
@@ -0,0 +1,179 @@
+"""
+One-round-trip Redis state for the trust, graph and risk-buffer engines.
+
+Scoring a transaction used to read per-user/per-recipient state engine by
+engine: 4 GETs for trust, 2 SCARDs and a GET for graph signals, 2 GETs for
+the risk buffer (twice, since update_risk_buffer() re-reads it), then one
+pipeline per engine to write back. fetch_risk_context() reads everything
+in a single non-transactional pipeline (one MGET plus the two SCARDs) and
+returns a RiskContext whose trust(), graph() and buffer() feed the raw
+values to the engines' *_from_values() functions, so results are exactly
+what compute_trust_score(), compute_graph_signals() and get_risk_buffer()
+would return.
+
+The writes go the other way: RiskWriteBatch hands one pipeline to the
+engines' record_*/update_* functions (pipe=...), which only queue on it,
+and execute() sends them all once the transaction is committed. The
+exception is update_risk_buffer() in its default "lua" mode: it needs its
+result before the decision and runs as one atomic EVALSHA instead.
+
+    ctx = fetch_risk_context(user_id, recipient, device_id)
+    trust_score, trust_details = ctx.trust()
+    writes = RiskWriteBatch()
+    update_risk_buffer(user_id, risk, old_buffer=ctx.buffer()[0], pipe=writes.pipe)
+    ...
+    conn.commit()
+    writes.execute()
+
+Device signals are disabled in graph_signals, so device_id is not read yet;
+it is part of the API so enabling them does not change callers.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from .graph_signals import graph_keys, graph_signals_from_values
+    from .redis_pool import get_redis
+    from .risk_buffer import buffer_from_values, buffer_keys
+    from .trust_engine import baseline_trust, trust_from_values, trust_keys
+except (ImportError, SystemError):
+    from graph_signals import graph_keys, graph_signals_from_values
+    from redis_pool import get_redis
+    from risk_buffer import buffer_from_values, buffer_keys
+    from trust_engine import baseline_trust, trust_from_values, trust_keys
+
+# Metrics
+_fetches = 0
+_fetch_errors = 0
+_write_batches = 0
+_write_commands = 0
+_write_errors = 0
+
+
+@dataclass
+class RiskContext:
+    """Raw engine state for one (user, recipient, device); None = unset key."""
+    user_id: str
+    recipient: str
+    device_id: Optional[str]
+    status: str = "ok"  # ok | unavailable | error
+    error: Optional[str] = None
+    trust_values: Tuple[Any, Any, Any, Any] = (None, None, None, None)
+    graph_values: Tuple[Any, Any, Any] = (None, None, None)
+    buffer_values: Tuple[Any, Any] = (None, None)
+    fetch_ms: float = 0.0
+    _cache: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def available(self) -> bool:
+        return self.status == "ok"
+
+    def trust(self) -> Tuple[float, Dict[str, float]]:
+        """Same result as trust_engine.compute_trust_score()."""
+        if "trust" not in self._cache:
+            if not self.available:
+                self._cache["trust"] = baseline_trust()
+            else:
+                self._cache["trust"] = trust_from_values(*self.trust_values)
+        return self._cache["trust"]
+
+    def graph(self) -> Tuple[float, Dict]:
+        """Same result as graph_signals.compute_graph_signals()."""
+        if "graph" not in self._cache:
+            if self.status == "unavailable":
+                self._cache["graph"] = (0.0, {"status": "unavailable"})
+            elif self.status == "error":
+                self._cache["graph"] = (0.0, {"status": "error", "error": self.error})
+            else:
+                self._cache["graph"] = graph_signals_from_values(*self.graph_values)
+        return self._cache["graph"]
+
+    def buffer(self) -> Tuple[float, Dict]:
+        """Same result as risk_buffer.get_risk_buffer() (decayed to now)."""
+        if "buffer" not in self._cache:
+            if not self.available:
+                self._cache["buffer"] = (0.0, {"buffer": 0.0, "status": self.status})
+            else:
+                self._cache["buffer"] = buffer_from_values(*self.buffer_values)
+        return self._cache["buffer"]
+
+
+def fetch_risk_context(user_id: str, recipient: str, device_id: Optional[str] = None) -> RiskContext:
+    """Read the trust, graph and buffer state in one pipelined round trip."""
+    global _fetches, _fetch_errors
+    ctx = RiskContext(user_id=user_id, recipient=recipient, device_id=device_id)
+    r = get_redis()
+    if r is None:
+        ctx.status = "unavailable"
+        return ctx
+
+    started = time.perf_counter()
+    senders_key, fraud_senders_key, fraud_count_key = graph_keys(user_id, recipient)
+    get_keys = trust_keys(user_id, recipient) + (fraud_count_key,) + buffer_keys(user_id)
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.mget(get_keys)
+        pipe.scard(senders_key)
+        pipe.scard(fraud_senders_key)
+        values, total_senders, fraud_senders = pipe.execute()
+    except Exception as e:
+        _fetch_errors += 1
+        print(f"[WARN] Risk context fetch failed for {user_id}: {e}")
+        ctx.status, ctx.error = "error", str(e)
+        return ctx
+    finally:
+        ctx.fetch_ms = round((time.perf_counter() - started) * 1000.0, 2)
+
+    _fetches += 1
+    ctx.trust_values = tuple(values[0:4])
+    ctx.graph_values = (total_senders, fraud_senders, values[4])
+    ctx.buffer_values = tuple(values[5:7])
+    return ctx
+
+
+class RiskWriteBatch:
+    """One pipeline for every engine write of a transaction, sent by execute()."""
+
+    def __init__(self):
+        self._pipe = None
+        self._opened = False
+
+    @property
+    def pipe(self):
+        """The shared pipeline, or None while Redis is down (writes are skipped)."""
+        if not self._opened:
+            self._opened = True
+            r = get_redis()
+            self._pipe = r.pipeline(transaction=False) if r is not None else None
+        return self._pipe
+
+    def execute(self) -> int:
+        """Send the queued writes in one round trip; returns the command count."""
+        global _write_batches, _write_commands, _write_errors
+        pipe, self._pipe = self._pipe, None
+        if pipe is None or not len(pipe):
+            return 0
+        commands = len(pipe)
+        try:
+            pipe.execute()
+        except Exception as e:
+            _write_errors += 1
+            print(f"[WARN] Risk context writes failed ({commands} commands): {e}")
+            return 0
+        _write_batches += 1
+        _write_commands += commands
+        return commands
+
+
+def get_metrics() -> Dict[str, Any]:
+    return {
+        "fetches": _fetches,
+        "fetch_errors": _fetch_errors,
+        "write_batches": _write_batches,
+        "avg_write_commands": round(_write_commands / _write_batches, 2) if _write_batches else 0.0,
+        "write_errors": _write_errors,
+    }
@@ -0,0 +1,566 @@
+"""
+Pre-aggregated transaction rollups for the admin dashboard and chatbot.
+
+Two tables hold per-bucket aggregates of public.transactions keyed on
+created_at:
+
+    tx_rollup_minute   one row per (minute, slot)
+    tx_rollup_hour     one row per (hour, slot)
+
+Each row carries counts by action, risk-bucket counts, amount sum and risk
+sum/count/max. Row triggers on transactions keep both tables up to date
+inside the writing transaction. An INSERT adds the row's contribution, a
+DELETE subtracts it, and an UPDATE of action, risk_score, amount or
+created_at does both. Every bucket is split over ROLLUP_SLOTS rows (slot =
+hash(tx_id)) so concurrent inserts in the same minute do not queue on one
+row lock. Readers sum over the slots.
+
+A range is read as whole hours from tx_rollup_hour plus the partial hours
+at either end from tx_rollup_minute, so a 30-day query touches about the
+same number of rows as a 1-hour one. Results have minute resolution: the
+minute containing the range start is counted whole. risk_max only ever
+grows; a lowered risk score does not reduce it.
+
+This is a deliberate change from the direct scans it replaces, which
+filtered on the transaction's own ts to the microsecond: ranged dashboard
+stats now bucket by created_at (when the row was stored) at minute
+resolution. The two differ only for rows whose ts lies outside the range
+while created_at lies inside it, or vice versa (backdated or replayed
+transactions), and by less than a minute at the range start. Ranged pattern
+counts keep the old ts filter: they sum the stored pattern_flags bits over
+an index range scan on ts (pattern_range()), not over the rollups.
+
+Minute rows are kept for ROLLUP_MINUTE_RETENTION_DAYS (longer than the
+largest dashboard range) and pruned by prune_minute_rollups(). Hour rows
+are kept indefinitely. The tables are created and backfilled at startup
+(ensure_rollup_schema()); request handlers only check that they are ready
+(rollup_schema_ready()) and scan transactions until they are.
+tools/rebuild_rollups.py rebuilds both tables from the transactions table.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List
+
+# Configuration
+ROLLUP_SLOTS = 8  # baked into tx_rollup_add(); rebuild after changing
+MINUTE_RETENTION_DAYS = int(os.getenv("ROLLUP_MINUTE_RETENTION_DAYS", "35"))
+
+_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        bucket TIMESTAMP NOT NULL,
+        slot SMALLINT NOT NULL,
+        total BIGINT NOT NULL DEFAULT 0,
+        block BIGINT NOT NULL DEFAULT 0,
+        delay BIGINT NOT NULL DEFAULT 0,
+        allow BIGINT NOT NULL DEFAULT 0,
+        risk_low BIGINT NOT NULL DEFAULT 0,
+        risk_medium BIGINT NOT NULL DEFAULT 0,
+        risk_high BIGINT NOT NULL DEFAULT 0,
+        risk_critical BIGINT NOT NULL DEFAULT 0,
+        risk_count BIGINT NOT NULL DEFAULT 0,
+        risk_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+        risk_max DOUBLE PRECISION,
+        amount_sum NUMERIC(20, 2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (bucket, slot)
+    );
+"""
+
+_UPSERT_SQL = """
+        INSERT INTO {table} AS r
+            (bucket, slot, total, block, delay, allow, risk_low, risk_medium, risk_high,
+             risk_critical, risk_count, risk_sum, risk_max, amount_sum,
+             {pattern_columns})
+        VALUES (date_trunc('{unit}', p_at), v_slot, p_sign, v_block, v_delay, v_allow,
+                v_low, v_medium, v_high, v_critical, v_risk_count, v_risk_sum, v_risk_max, v_amount,
+                {pattern_values})
+        ON CONFLICT (bucket, slot) DO UPDATE SET
+            total = r.total + EXCLUDED.total,
+            block = r.block + EXCLUDED.block,
+            delay = r.delay + EXCLUDED.delay,
+            allow = r.allow + EXCLUDED.allow,
+            risk_low = r.risk_low + EXCLUDED.risk_low,
+            risk_medium = r.risk_medium + EXCLUDED.risk_medium,
+            risk_high = r.risk_high + EXCLUDED.risk_high,
+            risk_critical = r.risk_critical + EXCLUDED.risk_critical,
+            risk_count = r.risk_count + EXCLUDED.risk_count,
+            risk_sum = r.risk_sum + EXCLUDED.risk_sum,
+            risk_max = GREATEST(r.risk_max, EXCLUDED.risk_max),
+            amount_sum = r.amount_sum + EXCLUDED.amount_sum,
+{pattern_updates};
+"""
+
+# ML pipeline trigger counters (bits of transactions.pattern_flags, see
+# admin_repository.PATTERN_TOTAL_KEYS). Added with ALTER so older rollup
+# tables are upgraded in place.
+PATTERN_COLUMNS = (
+    ("pattern_trust_engine", "trust_engine_triggers", 1),
+    ("pattern_risk_buffer", "risk_buffer_escalations", 2),
+    ("pattern_dynamic_threshold", "dynamic_threshold_adjustments", 4),
+    ("pattern_drift", "drift_alerts", 8),
+    ("pattern_graph_signal", "graph_signal_flags", 16),
+)
+
+_PATTERN_ALTER_SQL = "".join(
+    f"    ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} BIGINT NOT NULL DEFAULT 0;\n"
+    for table in ("tx_rollup_minute", "tx_rollup_hour")
+    for column, _, _ in PATTERN_COLUMNS
+)
+
+# SQL twin of admin_repository.pattern_trigger_flags(): the same five
+# checks over the explainability JSONB, with Python's truthiness and
+# float() conversions spelled out (tests/test_rollups.py checks parity
+# against PostgreSQL when DB_URL is reachable). BEFORE triggers store the bitmask in
+# transactions.pattern_flags whenever explainability, risk_score or action
+# is written.
+PATTERN_FUNCTIONS_SQL = """
+    -- Python truthiness of a JSON value
+    CREATE OR REPLACE FUNCTION tx_pattern_truthy(v JSONB) RETURNS BOOLEAN AS $$
+        SELECT CASE jsonb_typeof(v)
+            WHEN 'number' THEN (v #>> '{}')::numeric <> 0
+            WHEN 'string' THEN v <> '""'::jsonb
+            WHEN 'boolean' THEN v = 'true'::jsonb
+            WHEN 'array' THEN jsonb_array_length(v) > 0
+            WHEN 'object' THEN v <> '{}'::jsonb
+            ELSE FALSE
+        END;
+    $$ LANGUAGE sql IMMUTABLE;
+
+    -- float(v or 0)
+    CREATE OR REPLACE FUNCTION tx_pattern_num(v JSONB) RETURNS DOUBLE PRECISION AS $$
+    BEGIN
+        CASE jsonb_typeof(v)
+            WHEN 'number' THEN
+                RETURN (v #>> '{}')::double precision;
+            WHEN 'boolean' THEN
+                RETURN CASE WHEN v = 'true'::jsonb THEN 1 ELSE 0 END;
+            WHEN 'string' THEN
+                BEGIN
+                    RETURN COALESCE(NULLIF(v #>> '{}', '')::double precision, 0);
+                EXCEPTION WHEN others THEN
+                    RETURN 0;
+                END;
+            ELSE
+                RETURN 0;
+        END CASE;
+    END;
+    $$ LANGUAGE plpgsql IMMUTABLE;
+
+    CREATE OR REPLACE FUNCTION tx_pattern_flags(expl JSONB, p_risk NUMERIC, p_action TEXT)
+    RETURNS SMALLINT AS $$
+    DECLARE
+        risk DOUBLE PRECISION := COALESCE(p_risk, 0);
+        act TEXT := COALESCE(p_action, '');
+        features JSONB;
+        patterns JSONB;
+        model_scores JSONB;
+        names TEXT[];
+        recip_tx_count DOUBLE PRECISION;
+        amount_dev DOUBLE PRECISION;
+        disagreement DOUBLE PRECISION;
+        confidence_level TEXT;
+        flags INT := 0;
+    BEGIN
+        IF expl IS NULL OR jsonb_typeof(expl) <> 'object' OR expl = '{}'::jsonb THEN
+            -- No explainability data: infer baseline activity from action and risk
+            IF risk > 0.3 OR act IN ('DELAY', 'BLOCK') THEN
+                flags := flags | 1 | 4;
+            END IF;
+            IF risk > 0.5 THEN
+                flags := flags | 2;
+            END IF;
+            IF risk > 0.4 OR act = 'BLOCK' THEN
+                flags := flags | 16;
+            END IF;
+            IF risk > 0.6 THEN
+                flags := flags | 8;
+            END IF;
+            RETURN flags;
+        END IF;
+
+        features := CASE WHEN jsonb_typeof(expl->'features') = 'object' THEN expl->'features' ELSE '{}'::jsonb END;
+        patterns := CASE WHEN jsonb_typeof(expl->'patterns') = 'object' THEN expl->'patterns' ELSE '{}'::jsonb END;
+        model_scores := CASE WHEN jsonb_typeof(expl->'model_scores') = 'object' THEN expl->'model_scores' ELSE '{}'::jsonb END;
+        SELECT COALESCE(array_agg(e->>'name'), '{}') INTO names
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof(patterns->'detected_patterns') = 'array'
+                 THEN patterns->'detected_patterns' ELSE '[]'::jsonb END) e
+        WHERE jsonb_typeof(e) = 'object' AND jsonb_typeof(e->'name') = 'string';
+
+        recip_tx_count := tx_pattern_num(features->'recipient_tx_count');
+        amount_dev := tx_pattern_num(features->'amount_deviation');
+        disagreement := CASE WHEN tx_pattern_truthy(model_scores->'disagreement')
+                             THEN tx_pattern_num(model_scores->'disagreement')
+                             ELSE tx_pattern_num(expl->'disagreement') END;
+        confidence_level := upper(CASE WHEN tx_pattern_truthy(model_scores->'confidence_level')
+                                       THEN CASE WHEN jsonb_typeof(model_scores->'confidence_level') = 'string'
+                                                 THEN model_scores->>'confidence_level' END
+                                       ELSE CASE WHEN jsonb_typeof(expl->'confidence_level') = 'string'
+                                                 THEN expl->>'confidence_level' END
+                                  END);
+
+        -- Trust Engine
+        IF tx_pattern_num(features->'is_new_recipient') > 0 OR recip_tx_count < 5 THEN
+            flags := flags | 1;
+        END IF;
+        -- Risk Buffer
+        IF 'Velocity Anomaly' = ANY(names)
+           OR tx_pattern_num(features->'tx_count_1min') > 2
+           OR tx_pattern_num(features->'tx_count_5min') > 5
+           OR (risk > 0.5 AND tx_pattern_num(features->'tx_count_1h') > 3) THEN
+            flags := flags | 2;
+        END IF;
+        -- Dynamic Thresholds
+        IF amount_dev > 0.8 OR 'Model Disagreement' = ANY(names) OR disagreement > 0.25
+           OR act IN ('DELAY', 'BLOCK') THEN
+            flags := flags | 4;
+        END IF;
+        -- Drift Detection
+        IF confidence_level = 'LOW' OR 'Device Anomaly' = ANY(names)
+           OR (tx_pattern_num(features->'is_new_device') > 0 AND amount_dev > 0.5) THEN
+            flags := flags | 8;
+        END IF;
+        -- Graph Signals
+        IF tx_pattern_num(features->'merchant_risk_score') > 0.3
+           OR tx_pattern_num(features->'device_count') > 3
+           OR ('Behavioural Anomaly' = ANY(names) AND recip_tx_count > 10) THEN
+            flags := flags | 16;
+        END IF;
+        RETURN flags;
+    END;
+    $$ LANGUAGE plpgsql IMMUTABLE;
+"""
+
+PATTERN_FLAGS_SQL = """
+    ALTER TABLE transactions ADD COLUMN IF NOT EXISTS explainability JSONB;
+    ALTER TABLE transactions ADD COLUMN IF NOT EXISTS pattern_flags SMALLINT;
+""" + PATTERN_FUNCTIONS_SQL + """
+    CREATE OR REPLACE FUNCTION tx_pattern_flags_apply() RETURNS trigger AS $$
+    BEGIN
+        NEW.pattern_flags := tx_pattern_flags(NEW.explainability, NEW.risk_score, NEW.action);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER trg_tx_pattern_flags
+        BEFORE INSERT OR UPDATE OF explainability, risk_score, action ON transactions
+        FOR EACH ROW EXECUTE FUNCTION tx_pattern_flags_apply();
+"""
+
+_PATTERN_UPSERT = {
+    "pattern_columns": ", ".join(column for column, _, _ in PATTERN_COLUMNS),
+    "pattern_values": ", ".join(f"v_{column}" for column, _, _ in PATTERN_COLUMNS),
+    "pattern_updates": ",\n".join(
+        f"            {column} = r.{column} + EXCLUDED.{column}" for column, _, _ in PATTERN_COLUMNS
+    ),
+}
+
+_PATTERN_VARS = "".join(
+    f"        v_{column} INT := CASE WHEN COALESCE(p_flags, 0) & {bit} <> 0 THEN p_sign ELSE 0 END;\n"
+    for column, _, bit in PATTERN_COLUMNS
+)
+
+# Risk buckets match the dashboard: low < 0.3 <= medium < 0.6 <= high < 0.8 <= critical
+ROLLUP_SCHEMA_SQL = (
+    _TABLE_SQL.format(table="tx_rollup_minute")
+    + _TABLE_SQL.format(table="tx_rollup_hour")
+    + _PATTERN_ALTER_SQL
+    + PATTERN_FLAGS_SQL
+    + """
+    DROP FUNCTION IF EXISTS tx_rollup_add(TIMESTAMP, TEXT, TEXT, NUMERIC, NUMERIC, INT);
+
+    CREATE OR REPLACE FUNCTION tx_rollup_add(p_at TIMESTAMP, p_tx TEXT, p_action TEXT,
+                                             p_risk NUMERIC, p_amount NUMERIC, p_flags SMALLINT,
+                                             p_sign INT)
+    RETURNS void AS $$
+    DECLARE
+        v_slot SMALLINT := hashtext(p_tx) & """ + str(ROLLUP_SLOTS - 1) + """;
+        v_block INT := CASE WHEN p_action = 'BLOCK' THEN p_sign ELSE 0 END;
+        v_delay INT := CASE WHEN p_action = 'DELAY' THEN p_sign ELSE 0 END;
+        v_allow INT := CASE WHEN p_action = 'ALLOW' THEN p_sign ELSE 0 END;
+        v_low INT := CASE WHEN p_risk < 0.3 THEN p_sign ELSE 0 END;
+        v_medium INT := CASE WHEN p_risk >= 0.3 AND p_risk < 0.6 THEN p_sign ELSE 0 END;
+        v_high INT := CASE WHEN p_risk >= 0.6 AND p_risk < 0.8 THEN p_sign ELSE 0 END;
+        v_critical INT := CASE WHEN p_risk >= 0.8 THEN p_sign ELSE 0 END;
+        v_risk_count INT := CASE WHEN p_risk IS NOT NULL THEN p_sign ELSE 0 END;
+        v_risk_sum DOUBLE PRECISION := COALESCE(p_risk, 0) * p_sign;
+        v_risk_max DOUBLE PRECISION := CASE WHEN p_sign > 0 THEN p_risk END;
+        v_amount NUMERIC := COALESCE(p_amount, 0) * p_sign;
+""" + _PATTERN_VARS + """    BEGIN
+        IF p_at IS NULL THEN
+            RETURN;
+        END IF;
+"""
+    + _UPSERT_SQL.format(table="tx_rollup_minute", unit="minute", **_PATTERN_UPSERT)
+    + _UPSERT_SQL.format(table="tx_rollup_hour", unit="hour", **_PATTERN_UPSERT)
+    + """
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE FUNCTION tx_rollup_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM tx_rollup_add(OLD.created_at, OLD.tx_id, OLD.action, OLD.risk_score, OLD.amount,
+                                  OLD.pattern_flags, -1);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM tx_rollup_add(NEW.created_at, NEW.tx_id, NEW.action, NEW.risk_score, NEW.amount,
+                                  NEW.pattern_flags, 1);
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER trg_tx_rollup_insert
+        AFTER INSERT ON transactions
+        FOR EACH ROW EXECUTE FUNCTION tx_rollup_apply();
+
+    CREATE OR REPLACE TRIGGER trg_tx_rollup_update
+        AFTER UPDATE OF action, risk_score, amount, created_at, explainability ON transactions
+        FOR EACH ROW
+        WHEN (OLD.action IS DISTINCT FROM NEW.action
+              OR OLD.risk_score IS DISTINCT FROM NEW.risk_score
+              OR OLD.amount IS DISTINCT FROM NEW.amount
+              OR OLD.created_at IS DISTINCT FROM NEW.created_at
+              OR OLD.pattern_flags IS DISTINCT FROM NEW.pattern_flags)
+        EXECUTE FUNCTION tx_rollup_apply();
+
+    CREATE OR REPLACE TRIGGER trg_tx_rollup_delete
+        AFTER DELETE ON transactions
+        FOR EACH ROW EXECUTE FUNCTION tx_rollup_apply();
+"""
+)
+
+_BACKFILL_SQL = """
+    INSERT INTO {table}
+        (bucket, slot, total, block, delay, allow, risk_low, risk_medium, risk_high,
+         risk_critical, risk_count, risk_sum, risk_max, amount_sum, """ + _PATTERN_UPSERT["pattern_columns"] + """)
+    SELECT date_trunc('{unit}', created_at), hashtext(tx_id) & """ + str(ROLLUP_SLOTS - 1) + """,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE action = 'BLOCK'),
+        COUNT(*) FILTER (WHERE action = 'DELAY'),
+        COUNT(*) FILTER (WHERE action = 'ALLOW'),
+        COUNT(*) FILTER (WHERE risk_score < 0.3),
+        COUNT(*) FILTER (WHERE risk_score >= 0.3 AND risk_score < 0.6),
+        COUNT(*) FILTER (WHERE risk_score >= 0.6 AND risk_score < 0.8),
+        COUNT(*) FILTER (WHERE risk_score >= 0.8),
+        COUNT(risk_score),
+        COALESCE(SUM(risk_score), 0),
+        MAX(risk_score),
+        COALESCE(SUM(amount), 0),
+""" + ",\n".join(
+    f"        COUNT(*) FILTER (WHERE pattern_flags & {bit} <> 0)" for _, _, bit in PATTERN_COLUMNS
+) + """
+    FROM transactions
+    WHERE created_at IS NOT NULL {where}
+    GROUP BY 1, 2;
+"""
+
+# ---------------------------------------------------------------------------
+# Range reads. {since} is the driver's placeholder for the range start
+# (timestamptz, or NULL for all time) and {limit} for the bucket limit.
+# ---------------------------------------------------------------------------
+
+_RANGE_CTE = """
+    WITH bounds AS (
+        SELECT m_start, h_end,
+               CASE WHEN date_trunc('hour', m_start) = m_start THEN m_start
+                    ELSE date_trunc('hour', m_start) + INTERVAL '1 hour' END AS h_start
+        FROM (SELECT COALESCE(date_trunc('minute', {since}::timestamptz::timestamp), '-infinity'::timestamp) AS m_start,
+                     date_trunc('hour', LOCALTIMESTAMP) AS h_end) b
+    ),
+    buckets AS (
+        SELECT h.* FROM tx_rollup_hour h, bounds
+        WHERE h.bucket >= bounds.h_start AND h.bucket < bounds.h_end
+        UNION ALL
+        SELECT m.* FROM tx_rollup_minute m, bounds
+        WHERE m.bucket >= bounds.m_start AND (m.bucket < bounds.h_start OR m.bucket >= bounds.h_end)
+    )
+"""
+
+ROLLUP_TOTALS_SQL = _RANGE_CTE + """
+    SELECT
+      COALESCE(SUM(total), 0)::bigint AS total,
+      COALESCE(SUM(block), 0)::bigint AS block,
+      COALESCE(SUM(delay), 0)::bigint AS delay,
+      COALESCE(SUM(allow), 0)::bigint AS allow,
+      COALESCE(SUM(risk_low), 0)::bigint AS low,
+      COALESCE(SUM(risk_medium), 0)::bigint AS medium,
+      COALESCE(SUM(risk_high), 0)::bigint AS high,
+      COALESCE(SUM(risk_critical), 0)::bigint AS critical,
+      COALESCE(SUM(risk_sum) / NULLIF(SUM(risk_count), 0), 0) AS mean_risk,
+      COALESCE(MAX(risk_max), 0) AS max_risk,
+      COALESCE(SUM(amount_sum), 0) AS amount_sum,
+      COALESCE(SUM(amount_sum) / NULLIF(SUM(total), 0), 0) AS avg_amount,
+""" + ",\n".join(
+    f"      COALESCE(SUM({column}), 0)::bigint AS {key}" for column, key, _ in PATTERN_COLUMNS
+) + """
+    FROM buckets;
+"""
+
+# ML pipeline counters over the most recent {limit} transactions by ts
+PATTERN_RECENT_SQL = """
+    SELECT COUNT(*) AS transactions_analyzed,
+""" + ",\n".join(
+    f"      COUNT(*) FILTER (WHERE pattern_flags & {bit} <> 0) AS {key}" for _, key, bit in PATTERN_COLUMNS
+) + """
+    FROM (
+        SELECT pattern_flags FROM transactions ORDER BY ts DESC LIMIT {limit}
+    ) recent;
+"""
+
+# ML pipeline counters over transactions with ts >= {since} (the filter the
+# explainability scan used; idx_transactions_ts keeps it a range scan)
+PATTERN_RANGE_SQL = """
+    SELECT COUNT(*) AS transactions_analyzed,
+""" + ",\n".join(
+    f"      COUNT(*) FILTER (WHERE pattern_flags & {bit} <> 0) AS {key}" for _, key, bit in PATTERN_COLUMNS
+) + """
+    FROM transactions
+    WHERE ts >= {since}::timestamptz;
+"""
+
+# Request handlers only read ROLLUP_READY_SQL; a missing schema is rechecked
+# at most this often (startup or tools/rebuild_rollups.py creates it)
+ROLLUP_RECHECK_SECONDS = 60.0
+
+# True once the rollup tables exist with every current column
+ROLLUP_READY_SQL = """
+    SELECT COUNT(*) = 1 AS ready
+    FROM information_schema.columns
+    WHERE table_schema = 'public' AND table_name = 'tx_rollup_hour'
+      AND column_name = '""" + PATTERN_COLUMNS[-1][0] + """'
+"""
+
+# Timeline: minute buckets come from the minute table; hour and day buckets
+# from the hour table (the first bucket has hour resolution).
+_TIMELINE_SQL = """
+    SELECT date_trunc('{unit}', r.bucket) AS bucket,
+      SUM(r.total)::bigint AS total,
+      SUM(r.block)::bigint AS block,
+      SUM(r.delay)::bigint AS delay,
+      SUM(r.allow)::bigint AS allow
+    FROM {table} r
+    WHERE {since}::timestamptz IS NULL
+       OR r.bucket >= date_trunc('{source_unit}', {since}::timestamptz::timestamp)
+    GROUP BY 1
+    HAVING SUM(r.total) <> 0
+    ORDER BY 1 DESC
+    LIMIT {limit};
+"""
+
+
+def rollup_timeline_sql(unit: str, since: str, limit: str) -> str:
+    """Timeline SQL for a date_trunc unit of 'minute', 'hour' or 'day'."""
+    if unit not in ("minute", "hour", "day"):
+        raise ValueError(f"Unsupported rollup unit: {unit}")
+    table, source_unit = ("tx_rollup_minute", "minute") if unit == "minute" else ("tx_rollup_hour", "hour")
+    return _TIMELINE_SQL.format(unit=unit, table=table, source_unit=source_unit, since=since, limit=limit)
+
+
+def rollup_totals_sql(since: str) -> str:
+    return ROLLUP_TOTALS_SQL.format(since=since)
+
+
+# ---------------------------------------------------------------------------
+# psycopg2 helpers
+# ---------------------------------------------------------------------------
+
+def rollup_schema_ready(cur) -> bool:
+    """True once the rollup tables exist with every current column (no DDL)."""
+    cur.execute(ROLLUP_READY_SQL)
+    row = cur.fetchone()
+    return bool(row["ready"] if hasattr(row, "get") else row[0])
+
+
+def ensure_rollup_schema(conn) -> bool:
+    """
+    Create and backfill the rollup tables and triggers unless they are
+    already in place. Meant for startup and tools/rebuild_rollups.py, not
+    request handlers: the backfill scans transactions under a lock that
+    blocks writers. When the schema is ready no DDL is run, so a changed
+    trigger function only reaches an existing database via the rebuild
+    tool. Returns False when the schema cannot be created; callers then
+    fall back to scanning transactions.
+    """
+    try:
+        cur = conn.cursor()
+        if rollup_schema_ready(cur):
+            conn.commit()
+            return True
+        # Block writers until the triggers exist so the backfill is exact
+        cur.execute("LOCK TABLE transactions IN SHARE ROW EXCLUSIVE MODE")
+        cur.execute(ROLLUP_SCHEMA_SQL)
+        backfill_rollups(cur)
+        conn.commit()
+        return True
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f"[WARN] Rollup tables unavailable, dashboard queries will scan transactions: {e}")
+        return False
+
+
+def backfill_statements() -> List[str]:
+    """SQL that recomputes pattern_flags and both rollup tables from transactions."""
+    return [
+        "UPDATE transactions SET pattern_flags = tx_pattern_flags(explainability, risk_score, action) "
+        "WHERE pattern_flags IS NULL",
+        "TRUNCATE tx_rollup_minute, tx_rollup_hour",
+        _BACKFILL_SQL.format(
+            table="tx_rollup_minute", unit="minute",
+            where=f"AND created_at >= LOCALTIMESTAMP - INTERVAL '{MINUTE_RETENTION_DAYS} days'",
+        ),
+        _BACKFILL_SQL.format(table="tx_rollup_hour", unit="hour", where=""),
+    ]
+
+
+def backfill_rollups(cur) -> None:
+    """Recompute both rollup tables from transactions (caller commits)."""
+    for sql in backfill_statements():
+        cur.execute(sql)
+
+
+def prune_minute_rollups(cur, retention_days: int = MINUTE_RETENTION_DAYS) -> int:
+    """Delete minute rows older than the retention window; returns rows deleted."""
+    cur.execute(
+        "DELETE FROM tx_rollup_minute WHERE bucket < date_trunc('minute', LOCALTIMESTAMP) - make_interval(days => %s)",
+        (int(retention_days),)
+    )
+    return cur.rowcount
+
+
+def pattern_recent_sql(limit: str) -> str:
+    return PATTERN_RECENT_SQL.format(limit=limit)
+
+
+def pattern_recent(cur, limit: int) -> Dict[str, Any]:
+    """ML pipeline counters over the `limit` most recent transactions."""
+    cur.execute(pattern_recent_sql("%(limit)s"), {"limit": int(limit)})
+    return cur.fetchone()
+
+
+def pattern_range_sql(since: str) -> str:
+    return PATTERN_RANGE_SQL.format(since=since)
+
+
+def pattern_range(cur, since) -> Dict[str, Any]:
+    """ML pipeline counters over transactions with ts >= since."""
+    cur.execute(pattern_range_sql("%(since)s"), {"since": since})
+    return cur.fetchone()
+
+
+def rollup_totals(cur, since) -> Dict[str, Any]:
+    """Aggregates over [since, now] (since=None for all time)."""
+    cur.execute(rollup_totals_sql("%(since)s"), {"since": since})
+    return cur.fetchone()
+
+
+def rollup_timeline(cur, unit: str, since, limit: int) -> List[Dict[str, Any]]:
+    """Newest-first (bucket, total, block, delay, allow) rows."""
+    cur.execute(rollup_timeline_sql(unit, "%(since)s", "%(limit)s"), {"since": since, "limit": int(limit)})
+    return cur.fetchall() or []
+
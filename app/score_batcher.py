@@ -0,0 +1,206 @@
+"""
+Micro-batching request coalescer for live scoring.
+
+Concurrent scoring requests are queued and flushed as one batch through
+scoring.score_batch(), so each model runs once per batch instead of once
+per transaction. A batch is flushed when it reaches MAX_BATCH_SIZE items or
+when the oldest queued request has waited MAX_WAIT_MS, whichever is first.
+Every awaiting caller receives its own score_transaction-style result.
+
+Batches run on the dedicated scoring executor (see scoring_executor), never
+on the event loop, and requests beyond SCORING_MAX_PENDING are rejected
+with ScoringOverloaded. score_many() queues a whole group (a bulk-ingest
+chunk) under the same limit: it is admitted or rejected as a unit.
+
+Configuration (environment):
+    SCORE_BATCH_MAX_SIZE    max transactions per batch (1 disables coalescing)
+    SCORE_BATCH_MAX_WAIT_MS max time a request waits for a batch to fill
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from . import scoring
+    from .scoring_executor import MAX_PENDING, ScoringOverloaded, get_scoring_executor
+except (ImportError, SystemError):
+    import scoring
+    from scoring_executor import MAX_PENDING, ScoringOverloaded, get_scoring_executor
+
+# Configuration
+MAX_BATCH_SIZE = int(os.getenv("SCORE_BATCH_MAX_SIZE", "64"))
+MAX_WAIT_MS = float(os.getenv("SCORE_BATCH_MAX_WAIT_MS", "5"))
+
+
+def _score_details_batch(txs: List[dict]) -> List[Dict[str, Any]]:
+    return scoring.score_batch(txs, return_details=True)
+
+
+class ScoringBatcher:
+    """Coalesce concurrent score requests into batched model calls."""
+
+    def __init__(
+        self,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS,
+        executor: Optional[Executor] = None,
+        score_fn: Callable[[List[dict]], List[Any]] = _score_details_batch,
+        max_pending: int = MAX_PENDING,
+    ):
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._executor = executor
+        self.score_fn = score_fn
+        self.max_pending = max(1, int(max_pending))
+
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+        # Metrics
+        self._outstanding = 0
+        self._rejected = 0
+        self._in_flight = 0
+        self._batches = 0
+        self._items = 0
+        self._last_batch_size = 0
+        self._max_batch_seen = 0
+        self._errors = 0
+        self._last_batch_ms = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = get_scoring_executor()
+        return self._executor
+
+    async def score(self, tx: dict) -> Any:
+        """
+        Queue one transaction and wait for its batched result.
+
+        Raises ScoringOverloaded when max_pending requests are already waiting.
+        """
+        self.check_capacity()
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((tx, fut))
+        self._outstanding += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, loop)
+
+        try:
+            return await fut
+        finally:
+            self._outstanding -= 1
+
+    async def score_many(self, txs: List[dict]) -> List[Any]:
+        """
+        Queue several transactions at once and wait for all their results,
+        in order. They join the normal batches, so a group larger than
+        max_batch_size is split across several model calls.
+
+        Raises ScoringOverloaded unless there is room for the whole group
+        (an idle batcher always admits one group, however large).
+        """
+        if not txs:
+            return []
+        self.check_capacity(len(txs))
+        loop = asyncio.get_running_loop()
+        futs = []
+        self._outstanding += len(txs)
+        try:
+            for tx in txs:
+                fut = loop.create_future()
+                self._pending.append((tx, fut))
+                futs.append(fut)
+                if len(self._pending) >= self.max_batch_size:
+                    self._flush(loop)
+            if self._pending and self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self._flush, loop)
+            return list(await asyncio.gather(*futs))
+        finally:
+            self._outstanding -= len(txs)
+
+    def check_capacity(self, n: int = 1) -> None:
+        """Raise ScoringOverloaded if n more requests would exceed max_pending."""
+        # Admission control: shed instead of queueing without bound
+        if self._outstanding and self._outstanding + n > self.max_pending:
+            self._rejected += 1
+            raise ScoringOverloaded(self._outstanding)
+
+    def score_threadsafe(self, tx: dict, loop: asyncio.AbstractEventLoop,
+                         timeout: Optional[float] = None) -> Any:
+        """Submit from a worker thread (e.g. run_in_threadpool) and block for the result."""
+        return asyncio.run_coroutine_threadsafe(self.score(tx), loop).result(timeout)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = loop.create_task(self._run_batch(loop, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, loop: asyncio.AbstractEventLoop,
+                         batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        txs = [tx for tx, _ in batch]
+        self._in_flight += len(batch)
+        started = time.perf_counter()
+        try:
+            results = await loop.run_in_executor(self.executor, self.score_fn, txs)
+        except Exception as e:
+            self._errors += 1
+            print(f"[score_batcher] Batch scoring error: {e}")
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            self._in_flight -= len(batch)
+            self._record_batch(len(batch), started)
+
+        for (_, fut), result in zip(batch, results):
+            if not fut.done():
+                fut.set_result(result)
+
+    def _record_batch(self, size: int, started: float) -> None:
+        self._batches += 1
+        self._items += size
+        self._last_batch_size = size
+        self._max_batch_seen = max(self._max_batch_seen, size)
+        self._last_batch_ms = (time.perf_counter() - started) * 1000.0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depth and batch size statistics."""
+        return {
+            "queue_depth": len(self._pending),
+            "in_flight": self._in_flight,
+            "outstanding": self._outstanding,
+            "rejected": self._rejected,
+            "max_pending": self.max_pending,
+            "batches_flushed": self._batches,
+            "items_scored": self._items,
+            "avg_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "last_batch_size": self._last_batch_size,
+            "max_batch_size_seen": self._max_batch_seen,
+            "last_batch_ms": round(self._last_batch_ms, 2),
+            "batch_errors": self._errors,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
+
+
+# Shared per-process instance
+score_batcher = ScoringBatcher()
@@ -6,7 +6,7 @@ Uses multiple trained models with proper feature extraction and ensemble voting
 import os
 import math
 from datetime import datetime, timezone
-from typing import Dict, Optional, Union, Any
+from typing import Dict, List, Optional, Union, Any
 import numpy as np
 
 try:
@@ -206,9 +206,7 @@ def score_with_ensemble(features_dict: dict) -> Dict[str, float]:
         try:
             # Anomaly score: higher = more anomalous
             anomaly_score = -_IFOREST.decision_function(feature_vec)[0]
-            # Normalize to 0-1
-            iforest_score = 1 / (1 + math.exp(-anomaly_score))
-            scores["iforest"] = float(max(0.0, min(1.0, iforest_score)))
+            scores["iforest"] = _iforest_probability(anomaly_score)
         except Exception as e:
             print(f"Isolation Forest scoring error: {e}")
     
@@ -228,6 +226,21 @@ def score_with_ensemble(features_dict: dict) -> Dict[str, float]:
         except Exception as e:
             print(f"XGBoost scoring error: {e}")
     
+    return _combine_model_scores(scores, features_dict)
+
+
+def _iforest_probability(anomaly_score: float) -> float:
+    """Normalize an Isolation Forest anomaly score to 0-1."""
+    iforest_score = 1 / (1 + math.exp(-float(anomaly_score)))
+    return float(max(0.0, min(1.0, iforest_score)))
+
+
+def _combine_model_scores(scores: Dict[str, float], features_dict: dict) -> Dict[str, float]:
+    """
+    Blend per-model scores into ensemble, final_risk_score, disagreement
+    and confidence_level. Shared by the single-row and batch paths so both
+    produce identical results.
+    """
     # Ensemble: weighted average
     if scores:
         # Weight supervised models higher than unsupervised
@@ -270,6 +283,71 @@ def score_with_ensemble(features_dict: dict) -> Dict[str, float]:
     return scores
 
 
+def score_with_ensemble_batch(feature_matrix: np.ndarray,
+                              features_list: Optional[List[dict]] = None) -> List[Dict[str, float]]:
+    """
+    Score a batch of transactions with one model call per model.
+
+    Args:
+        feature_matrix: (N, n_features) array in get_feature_names() order
+        features_list: Optional per-row feature dicts, used only for the
+            rule-based fallback when no model is available.
+
+    Returns:
+        list of N dicts, each identical to what score_with_ensemble()
+        returns for the corresponding row.
+    """
+    # Lazy load models
+    if not _MODELS_LOADED:
+        load_models()
+
+    feature_matrix = np.asarray(feature_matrix, dtype=float)
+    if feature_matrix.ndim == 1:
+        feature_matrix = feature_matrix.reshape(1, -1)
+    n_rows = feature_matrix.shape[0]
+    if n_rows == 0:
+        return []
+
+    if features_list is None:
+        try:
+            from .feature_engine import get_feature_names
+        except (ImportError, SystemError):
+            from feature_engine import get_feature_names
+        names = get_feature_names()
+        features_list = [dict(zip(names, map(float, row))) for row in feature_matrix]
+
+    columns = {}
+
+    # Isolation Forest (unsupervised)
+    if _IFOREST:
+        try:
+            anomaly_scores = -_IFOREST.decision_function(feature_matrix)
+            columns["iforest"] = [_iforest_probability(a) for a in anomaly_scores]
+        except Exception as e:
+            print(f"Isolation Forest batch scoring error: {e}")
+
+    # Random Forest (supervised)
+    if _RANDOM_FOREST:
+        try:
+            columns["random_forest"] = [float(p) for p in _RANDOM_FOREST.predict_proba(feature_matrix)[:, 1]]
+        except Exception as e:
+            print(f"Random Forest batch scoring error: {e}")
+
+    # XGBoost (supervised)
+    if _XGBOOST:
+        try:
+            columns["xgboost"] = [float(p) for p in _XGBOOST.predict_proba(feature_matrix)[:, 1]]
+        except Exception as e:
+            print(f"XGBoost batch scoring error: {e}")
+
+    results = []
+    for i in range(n_rows):
+        # Keep model insertion order identical to the single-row path
+        scores = {name: col[i] for name, col in columns.items()}
+        results.append(_combine_model_scores(scores, features_list[i]))
+    return results
+
+
 def fallback_rule_based_score(features: dict) -> float:
     """
     Fallback rule-based scoring when no models are available.
@@ -340,48 +418,107 @@ def score_transaction(tx: dict, return_details: bool = False) -> Union[float, Di
 
         # Score with ensemble
         model_scores = score_with_ensemble(features)
-        risk_score = model_scores.get("ensemble", 0.0)
-        final_risk_score = model_scores.get("final_risk_score", risk_score)
-        disagreement = model_scores.get("disagreement", 0.0)
-        confidence_level = model_scores.get("confidence_level", "HIGH")
 
         if not return_details:
-            return risk_score
-
-        # Build explainability reasons using the dedicated module (no scoring done here)
-        reasons = explain_transaction(
-            features,
-            {
-                "iforest_score": model_scores.get("iforest"),
-                "rf_proba": model_scores.get("random_forest"),
-                "xgb_proba": model_scores.get("xgboost"),
-            },
-        )
+            return model_scores.get("ensemble", 0.0)
 
-        return {
-            "risk_score": risk_score,
-            "final_risk_score": final_risk_score,
-            "model_scores": model_scores,
-            "disagreement": disagreement,
-            "confidence_level": confidence_level,
-            "reasons": reasons,
-            "features": features,
-        }
+        return _build_details(features, model_scores)
 
     except Exception as e:
         print(f"Scoring error: {e}")
         # Emergency fallback
-        if return_details:
-            return {
-                "risk_score": 0.5,
-                "final_risk_score": 0.5,
-                "model_scores": {},
-                "disagreement": 0.0,
-                "confidence_level": "LOW",
-                "reasons": ["Scoring fallback due to error"],
-                "features": {},
-            }
-        return 0.5
+        return _error_result(return_details)
+
+
+def score_batch(txs: List[dict], return_details: bool = False) -> List[Union[float, Dict[str, Any]]]:
+    """
+    Score many transactions with a single model call per model.
+
+    Features are still extracted one transaction at a time and in order,
+    because the Redis velocity/amount bookkeeping is stateful. Each element
+    of the result matches what score_transaction() returns for that tx; a
+    transaction that cannot be featurized gets the error result on its own
+    and the rest of the batch is scored normally.
+    """
+    if not txs:
+        return []
+
+    results: List[Union[float, Dict[str, Any]]] = [None] * len(txs)
+    good: List[int] = []
+    features_list: List[dict] = []
+    vectors = []
+    for i, tx in enumerate(txs):
+        try:
+            features = extract_features(tx)
+            vector = np.asarray(features_to_vector(features), dtype=float)
+        except Exception as e:
+            print(f"Scoring error for {tx.get('tx_id') if isinstance(tx, dict) else tx!r}: {e}")
+            results[i] = _error_result(return_details)
+            continue
+        good.append(i)
+        features_list.append(features)
+        vectors.append(vector)
+
+    if not good:
+        return results
+
+    try:
+        model_scores_list = score_with_ensemble_batch(np.vstack(vectors), features_list)
+    except Exception as e:
+        print(f"Batch scoring error, scoring rows one by one: {e}")
+        # Per-row path already knows how to fall back
+        model_scores_list = [score_with_ensemble(f) for f in features_list]
+
+    for i, features, model_scores in zip(good, features_list, model_scores_list):
+        try:
+            if return_details:
+                results[i] = _build_details(features, model_scores)
+            else:
+                results[i] = model_scores.get("ensemble", 0.0)
+        except Exception as e:
+            print(f"Scoring error: {e}")
+            results[i] = _error_result(return_details)
+    return results
+
+
+def _build_details(features: dict, model_scores: Dict[str, Any]) -> Dict[str, Any]:
+    """Assemble the return_details payload for one scored transaction."""
+    risk_score = model_scores.get("ensemble", 0.0)
+
+    # Build explainability reasons using the dedicated module (no scoring done here)
+    reasons = explain_transaction(
+        features,
+        {
+            "iforest_score": model_scores.get("iforest"),
+            "rf_proba": model_scores.get("random_forest"),
+            "xgb_proba": model_scores.get("xgboost"),
+        },
+    )
+
+    return {
+        "risk_score": risk_score,
+        "final_risk_score": model_scores.get("final_risk_score", risk_score),
+        "model_scores": model_scores,
+        "disagreement": model_scores.get("disagreement", 0.0),
+        "confidence_level": model_scores.get("confidence_level", "HIGH"),
+        "reasons": reasons,
+        "features": features,
+    }
+
+
+def _error_result(return_details: bool) -> Union[float, Dict[str, Any]]:
+    """Emergency fallback result when scoring raises."""
+    if return_details:
+        return {
+            "risk_score": 0.5,
+            "final_risk_score": 0.5,
+            "model_scores": {},
+            "disagreement": 0.0,
+            "confidence_level": "LOW",
+            "reasons": ["Scoring fallback due to error"],
+            "features": {},
+        }
+    return 0.5
 
 
 # Legacy compatibility functions
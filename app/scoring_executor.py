@@ -0,0 +1,73 @@
+"""
+Dedicated executor and admission control for ML scoring.
+
+Feature extraction (blocking Redis round trips) and model inference must
+never run on the asyncio event loop. Scoring work is submitted to a bounded
+pool owned by this module instead of Starlette's shared threadpool:
+
+  - thread mode (default): ThreadPoolExecutor, fine because sklearn/XGBoost
+    release the GIL for most of the heavy lifting
+  - process mode: ProcessPoolExecutor for CPU-bound inference; each worker
+    process loads its own copy of the models on first use
+
+When more than SCORING_MAX_PENDING requests are already waiting for a score,
+new requests are rejected with ScoringOverloaded so the HTTP layer can shed
+load with 503 + Retry-After instead of queueing without bound.
+
+Configuration (environment):
+    SCORING_EXECUTOR_MODE     "thread" (default) or "process"
+    SCORING_EXECUTOR_WORKERS  pool size
+    SCORING_MAX_PENDING       admitted-but-unfinished requests before shedding
+    SCORING_RETRY_AFTER       seconds advertised in the Retry-After header
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+# Configuration
+EXECUTOR_MODE = os.getenv("SCORING_EXECUTOR_MODE", "thread").lower()
+EXECUTOR_WORKERS = int(os.getenv("SCORING_EXECUTOR_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+MAX_PENDING = int(os.getenv("SCORING_MAX_PENDING", "512"))
+RETRY_AFTER_SECONDS = int(os.getenv("SCORING_RETRY_AFTER", "1"))
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+class ScoringOverloaded(Exception):
+    """Raised when the scoring executor is saturated and a request is shed."""
+
+    def __init__(self, pending: int, retry_after: int = RETRY_AFTER_SECONDS):
+        super().__init__(f"Scoring overloaded ({pending} requests pending)")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+def get_scoring_executor() -> Executor:
+    """Return the shared scoring executor, creating it on first use."""
+    global _executor
+    if _executor is not None:
+        return _executor
+    with _executor_lock:
+        if _executor is None:
+            if EXECUTOR_MODE == "process":
+                _executor = ProcessPoolExecutor(max_workers=EXECUTOR_WORKERS)
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=EXECUTOR_WORKERS, thread_name_prefix="scoring"
+                )
+            print(f"[scoring_executor] {EXECUTOR_MODE} pool started ({EXECUTOR_WORKERS} workers)")
+    return _executor
+
+
+def shutdown_scoring_executor(wait: bool = True) -> None:
+    """Stop the shared executor (e.g. on application shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
@@ -0,0 +1,154 @@
+"""
+Declared stage graphs for per-transaction enrichment.
+
+A pipeline is a set of named stages, each with the stages it depends on.
+Stages whose dependencies are done run concurrently on a small dedicated
+thread pool, so independent Redis/DB lookups overlap and the wall time is
+roughly the slowest chain instead of the sum of all stages.
+
+    graph = StageGraph("create_transaction")
+    graph.stage("score", lambda res: score(tx))
+    graph.stage("trust", lambda res: compute_trust_score(u, r), fallback=lambda e: (0.3, {}))
+    graph.stage("drift", lambda res: record(res["score"]), after=("score",))
+    results = graph.run()
+    with graph.measure("blend"):
+        ...  # dependent math on the calling thread
+
+A stage with a fallback never fails the graph: its exception is logged and
+fallback(exc) becomes its result. Without a fallback the first exception is
+re-raised from run() once the stages already started have finished.
+
+Each stage's wall time is kept in graph.timings (ms) and folded into
+per-pipeline stats (get_stage_metrics()).
+
+Configuration (environment):
+    ENRICH_WORKERS     threads shared by all stage graphs in the process
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Configuration
+ENRICH_WORKERS = int(os.getenv("ENRICH_WORKERS", "16"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Metrics: pipeline -> stage -> [runs, total_ms, max_ms, last_ms]
+_stats: Dict[str, Dict[str, list]] = {}
+_stats_lock = threading.Lock()
+
+
+def get_enrich_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, ENRICH_WORKERS),
+                                               thread_name_prefix="enrich")
+    return _executor
+
+
+class StageGraph:
+    """Named stages with dependencies, run as soon as their inputs are ready."""
+
+    def __init__(self, name: str, executor: Optional[ThreadPoolExecutor] = None):
+        self.name = name
+        self._executor = executor
+        self._stages: Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Tuple[str, ...], Optional[Callable]]] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}
+
+    def stage(self, name: str, fn: Callable[[Dict[str, Any]], Any], after: Iterable[str] = (),
+              fallback: Optional[Callable[[BaseException], Any]] = None) -> "StageGraph":
+        """Declare `name`; fn receives the results of finished stages."""
+        deps = tuple(after)
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage {name!r} depends on undeclared stage {dep!r}")
+        self._stages[name] = (fn, deps, fallback)
+        return self
+
+    def _call(self, name: str, fn, fallback, inputs: Dict[str, Any]):
+        started = time.perf_counter()
+        try:
+            return fn(inputs)
+        except Exception as e:
+            if fallback is None:
+                raise
+            print(f"[WARN] {self.name} stage {name} failed, using fallback: {e}")
+            return fallback(e)
+        finally:
+            self.timings[name] = round((time.perf_counter() - started) * 1000.0, 2)
+
+    def run(self) -> Dict[str, Any]:
+        """Run every declared stage; returns {stage: result}."""
+        executor = self._executor or get_enrich_executor()
+        started = time.perf_counter()
+        remaining = dict(self._stages)
+        running: Dict[Future, str] = {}
+        error: Optional[BaseException] = None
+
+        while remaining or running:
+            if error is None:
+                for name, (fn, deps, fallback) in list(remaining.items()):
+                    if all(d in self.results for d in deps):
+                        del remaining[name]
+                        # Stages only see finished results (a snapshot, not the live dict)
+                        future = executor.submit(self._call, name, fn, fallback, dict(self.results))
+                        running[future] = name
+            if not running:
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    self.results[name] = future.result()
+                except BaseException as e:
+                    error = error or e
+
+        self.timings["total"] = round((time.perf_counter() - started) * 1000.0, 2)
+        _record(self.name, self.timings)
+        if error is not None:
+            raise error
+        return self.results
+
+    @contextmanager
+    def measure(self, name: str):
+        """Time an inline (calling-thread) stage alongside the graph's stages."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - started) * 1000.0, 2)
+            _record(self.name, {name: self.timings[name]})
+
+
+def _record(pipeline: str, timings: Dict[str, float]) -> None:
+    with _stats_lock:
+        stages = _stats.setdefault(pipeline, {})
+        for name, ms in timings.items():
+            s = stages.setdefault(name, [0, 0.0, 0.0, 0.0])
+            s[0] += 1
+            s[1] += ms
+            s[2] = max(s[2], ms)
+            s[3] = ms
+
+
+def get_stage_metrics() -> Dict[str, Any]:
+    """Per pipeline and stage: runs, avg/max/last wall time in ms."""
+    with _stats_lock:
+        return {
+            pipeline: {
+                name: {"runs": s[0], "avg_ms": round(s[1] / s[0], 2) if s[0] else 0.0,
+                       "max_ms": s[2], "last_ms": s[3]}
+                for name, s in stages.items()
+            }
+            for pipeline, stages in _stats.items()
+        }
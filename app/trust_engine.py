@@ -14,31 +14,21 @@ Risk adjustment:  risk_score = risk_score * (1 - 0.3 * trust_score)
 
 from __future__ import annotations
 
-import os
 import math
 import time
 from typing import Dict, Optional, Tuple
 
 import redis
 
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-
-_redis_client: Optional[redis.Redis] = None
+try:
+    from .redis_pool import get_redis
+except (ImportError, SystemError):
+    from redis_pool import get_redis
 
 
 def _get_redis() -> Optional[redis.Redis]:
-    global _redis_client
-    if _redis_client is not None:
-        return _redis_client
-    try:
-        _redis_client = redis.from_url(
-            REDIS_URL, decode_responses=True,
-            socket_connect_timeout=2, socket_timeout=2,
-        )
-        _redis_client.ping()
-        return _redis_client
-    except Exception:
-        return None
+    """Shared pooled client (see redis_pool); None while Redis is down."""
+    return get_redis()
 
 
 # ---------------------------------------------------------------------------
@@ -68,6 +58,21 @@ TTL_SECONDS = 86400 * 90  # 90-day retention
 # Public API
 # ---------------------------------------------------------------------------
 
+def baseline_trust() -> Tuple[float, Dict[str, float]]:
+    """Trust for an unknown pair (also used while Redis is unavailable)."""
+    return 0.3, {"tx_count": 0, "total_amount": 0.0, "days_known": 0.0, "fraud_flags": 0, "baseline_trust": True}
+
+
+def trust_keys(user_id: str, recipient: str) -> Tuple[str, str, str, str]:
+    """Keys read by compute_trust_score(), in trust_from_values() argument order."""
+    return (
+        _key_tx_count(user_id, recipient),
+        _key_total_amount(user_id, recipient),
+        _key_first_ts(user_id, recipient),
+        _key_fraud_flags(user_id, recipient),
+    )
+
+
 def compute_trust_score(user_id: str, recipient: str) -> Tuple[float, Dict[str, float]]:
     """
     Compute a gradual trust score for the (user, recipient) pair.
@@ -83,16 +88,22 @@ def compute_trust_score(user_id: str, recipient: str) -> Tuple[float, Dict[str,
     """
     r = _get_redis()
     if r is None:
-        # Even without Redis, give a baseline trust for new recipients
-        return 0.3, {"tx_count": 0, "total_amount": 0.0, "days_known": 0.0, "fraud_flags": 0, "baseline_trust": True}
+        return baseline_trust()
 
     try:
-        tx_count = int(r.get(_key_tx_count(user_id, recipient)) or 0)
-        total_amount = float(r.get(_key_total_amount(user_id, recipient)) or 0.0)
-        first_ts = r.get(_key_first_ts(user_id, recipient))
-        fraud_flags = int(r.get(_key_fraud_flags(user_id, recipient)) or 0)
+        return trust_from_values(*r.mget(trust_keys(user_id, recipient)))
     except Exception:
-        return 0.3, {"tx_count": 0, "total_amount": 0.0, "days_known": 0.0, "fraud_flags": 0, "baseline_trust": True}
+        return baseline_trust()
+
+
+def trust_from_values(tx_count, total_amount, first_ts, fraud_flags) -> Tuple[float, Dict[str, float]]:
+    """
+    Trust score from the raw Redis values of trust_keys() (None = unset).
+    Shared by compute_trust_score() and risk_context.RiskContext.
+    """
+    tx_count = int(tx_count or 0)
+    total_amount = float(total_amount or 0.0)
+    fraud_flags = int(fraud_flags or 0)
 
     # Days since first transaction
     if first_ts is not None:
@@ -159,17 +170,23 @@ def apply_trust_discount(risk_score: float, trust_score: float) -> float:
 
 
 def record_transaction(user_id: str, recipient: str, amount: float,
-                       is_fraud: bool = False) -> None:
+                       is_fraud: bool = False, pipe=None) -> None:
     """
     Update trust data after a transaction is processed (allowed).
     Call this when a transaction is confirmed/allowed.
+
+    With pipe (see risk_context.RiskWriteBatch) the writes are only queued
+    on it; the caller executes them together with the other engines'.
     """
-    r = _get_redis()
-    if r is None:
-        return
+    own_pipe = pipe is None
+    if own_pipe:
+        r = _get_redis()
+        if r is None:
+            return
 
     try:
-        pipe = r.pipeline()
+        if own_pipe:
+            pipe = r.pipeline()
 
         # Increment transaction count
         pipe.incr(_key_tx_count(user_id, recipient))
@@ -189,17 +206,19 @@ def record_transaction(user_id: str, recipient: str, amount: float,
             pipe.incr(_key_fraud_flags(user_id, recipient))
             pipe.expire(_key_fraud_flags(user_id, recipient), TTL_SECONDS)
 
-        pipe.execute()
+        if own_pipe:
+            pipe.execute()
     except Exception as e:
         print(f"[trust_engine] Error recording transaction: {e}")
 
 
-def record_fraud_flag(user_id: str, recipient: str) -> None:
+def record_fraud_flag(user_id: str, recipient: str, pipe=None) -> None:
     """
     Increment fraud flag count for a (user, recipient) pair.
     Called when a transaction to this recipient is confirmed as fraud.
+    With pipe the writes are only queued (see record_transaction()).
     """
-    r = _get_redis()
+    r = pipe if pipe is not None else _get_redis()
     if r is None:
         return
     try:
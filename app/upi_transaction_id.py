@@ -5,14 +5,306 @@ Format: YYMMDDXXXXXX (Year-Month-Day + 6-digit sequence number)
 Example: 260214000001 (14 Feb 2026, sequence 000001)
 """
 
-import random
+import os
+import re
+import sys
+import threading
 import time
-from datetime import datetime, timezone
-from typing import Optional
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+# Allocation backend: "postgres" (per-day SEQUENCE), "redis" (INCRBY) or "memory"
+TX_ID_BACKEND = os.getenv("TX_ID_BACKEND", "postgres").lower()
+# IDs reserved per round trip (hi/lo); unused IDs in a block are skipped on restart
+TX_ID_BLOCK_SIZE = int(os.getenv("TX_ID_BLOCK_SIZE", "100"))
+MAX_SEQUENCE = 999999
+SEQUENCE_PREFIX = "tx_id_seq_"
+REDIS_KEY_PREFIX = "txid:seq:"
+REDIS_KEY_TTL = 2 * 86400
+
+# INCRBY only a seeded day key; nil tells the caller to seed it first, so a
+# key lost mid-day (eviction, FLUSHDB) can never restart near 000001
+_INCRBY_SEEDED_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+return redis.call('INCRBY', KEYS[1], ARGV[1])
+"""
 
 # Global sequence counter for the current day (in-memory cache)
 _sequence_counter = {}
 
+
+class TxIdAllocator:
+    """
+    Hi/lo allocator for YYMMDDXXXXXX transaction IDs.
+
+    Each process reserves a block of TX_ID_BLOCK_SIZE sequence numbers at a
+    time from a shared per-day counter and hands them out locally, so only
+    one allocation in TX_ID_BLOCK_SIZE needs a round trip. The shared
+    counter is either a PostgreSQL sequence (tx_id_seq_YYMMDD, INCREMENT BY
+    block size) or a Redis key (txid:seq:YYMMDD, INCRBY block size). Both
+    are atomic, so concurrent workers never receive overlapping blocks.
+
+    A new counter is seeded from the highest existing sequence in
+    public.transactions (one MAX scan per day, not per insert). The Redis
+    key is reseeded the same way whenever it has gone missing, and only
+    over the caller's cursor or `dsn`; with neither, seeding raises
+    RuntimeError. If the shared counter is unreachable, next_id() raises
+    RuntimeError (the backend answers 503): continuing from the stored MAX
+    would collide with blocks other workers reserved but have not stored
+    yet. The "memory" backend, and callers with neither a cursor nor `dsn`
+    (single-process scripts), count locally from 1.
+
+    The postgres backend reserves on the caller's cursor inside a SAVEPOINT
+    (nextval is not transactional, so the block stays reserved even if the
+    caller rolls back) and only borrows a pooled connection to `dsn` once a
+    day, to create and commit the new day's sequence independently of the
+    caller. Callers without a cursor (scripts) reserve over the pool.
+    """
+
+    def __init__(self, backend: str = TX_ID_BACKEND, block_size: int = TX_ID_BLOCK_SIZE,
+                 dsn: Optional[str] = None):
+        self.backend = backend
+        self.block_size = max(1, int(block_size))
+        self.dsn = dsn
+        self._lock = threading.Lock()
+        self._day: Optional[str] = None
+        self._next = 0
+        self._end = -1
+        self._script = None
+        self._script_client = None
+
+        # Metrics
+        self._allocated = 0
+        self._reservations = 0
+        self._reserve_seconds = 0.0
+        self._fallbacks = 0
+
+    def next_id(self, timestamp: Optional[datetime] = None, db_cursor=None) -> str:
+        """Return the next transaction ID for the day of `timestamp`."""
+        if timestamp is None:
+            timestamp = datetime.now(timezone.utc)
+        day = timestamp.strftime("%y%m%d")
+
+        with self._lock:
+            if day != self._day or self._next > self._end:
+                started = time.perf_counter()
+                block = self._reserve(day, db_cursor)
+                self._reserve_seconds += time.perf_counter() - started
+                if block is None:
+                    sequence = self._fallback_sequence(day, db_cursor)
+                    self._fallbacks += 1
+                    self._allocated += 1
+                    return f"{day}{sequence:06d}"
+                self._reservations += 1
+                self._day = day
+                self._next, self._end = block
+            sequence = self._next
+            self._next += 1
+            self._allocated += 1
+        return f"{day}{sequence:06d}"
+
+    def reset(self) -> None:
+        """Forget the current block (tests, or after changing the backend)."""
+        with self._lock:
+            self._day = None
+            self._next = 0
+            self._end = -1
+
+    # ------------------------------------------------------------------
+    # Block reservation
+    # ------------------------------------------------------------------
+
+    def _reserve(self, day: str, db_cursor) -> Optional[Tuple[int, int]]:
+        """Reserve the next block for `day` as an inclusive (start, end) range."""
+        try:
+            if self.backend == "redis":
+                return self._reserve_redis(day, db_cursor)
+            if self.backend == "postgres":
+                if db_cursor is not None:
+                    return self._reserve_postgres(day, db_cursor, create_apart=bool(self.dsn))
+                if self.dsn:
+                    with self._pooled_cursor() as cur:
+                        return self._reserve_postgres(day, cur)
+        except RuntimeError:
+            raise
+        except Exception as e:
+            print(f"[WARN] Failed to reserve transaction ID block ({self.backend}): {e}", file=sys.stderr)
+        return None
+
+    @contextmanager
+    def _pooled_cursor(self):
+        """Cursor on a pooled connection to dsn, committed on success."""
+        try:
+            from .db_pool import db_connection
+        except (ImportError, SystemError):
+            from db_pool import db_connection
+        with db_connection(self.dsn) as conn:
+            yield conn.cursor()
+            conn.commit()
+
+    def _fallback_sequence(self, day: str, db_cursor) -> int:
+        """
+        Next ID when no block could be reserved. Only single-process callers
+        count locally; with a shared counter, other workers still hold blocks
+        above the stored MAX, so anything derived from it could collide.
+        """
+        if self.backend == "memory" or (db_cursor is None and not self.dsn):
+            return _next_local_sequence(day)
+        raise RuntimeError(f"Transaction ID allocation unavailable for {day} ({self.backend})")
+
+    def _reserve_postgres(self, day: str, cur, create_apart: bool = False) -> Tuple[int, int]:
+        seq_name = f"{SEQUENCE_PREFIX}{day}"
+        for attempt in range(2):
+            try:
+                return self._nextval_block(day, seq_name, cur, create_apart)
+            except RuntimeError:
+                raise
+            except Exception:
+                # Two workers racing on CREATE SEQUENCE IF NOT EXISTS can
+                # collide in the catalog; the retry finds the sequence present.
+                if attempt:
+                    raise
+
+    def _nextval_block(self, day: str, seq_name: str, cur, create_apart: bool = False) -> Tuple[int, int]:
+        cur.execute("SAVEPOINT tx_id_alloc")
+        try:
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL AS present", (seq_name,))
+            if not _first(cur.fetchone()):
+                # Once a day: create it committed on its own where possible, so a
+                # rollback of the caller cannot drop a sequence others reserved from
+                if create_apart:
+                    with self._pooled_cursor() as own:
+                        self._create_sequence(day, seq_name, own)
+                else:
+                    self._create_sequence(day, seq_name, cur)
+            # The increment is read back so workers configured with a
+            # different block size still get disjoint ranges
+            cur.execute(
+                """
+                SELECT nextval(%s) AS start, s.increment_by AS step
+                FROM pg_sequences s
+                WHERE s.schemaname = current_schema() AND s.sequencename = %s
+                """,
+                (seq_name, seq_name),
+            )
+            row = cur.fetchone()
+            cur.execute("RELEASE SAVEPOINT tx_id_alloc")
+        except Exception as e:
+            cur.execute("ROLLBACK TO SAVEPOINT tx_id_alloc")
+            if "reached maximum value" in str(e):
+                raise RuntimeError(f"Transaction ID space exhausted for {day}") from e
+            raise
+
+        start, step = (row["start"], row["step"]) if hasattr(row, "get") else (row[0], row[1])
+        return int(start), min(int(start) + int(step) - 1, MAX_SEQUENCE)
+
+    def _create_sequence(self, day: str, seq_name: str, cur) -> None:
+        seed = _max_sequence(cur, day)
+        cur.execute(
+            f"CREATE SEQUENCE IF NOT EXISTS {seq_name} "
+            f"INCREMENT BY {self.block_size} MINVALUE 1 MAXVALUE {MAX_SEQUENCE} "
+            f"START WITH {min(seed + 1, MAX_SEQUENCE)} NO CYCLE"
+        )
+        _drop_old_sequences(cur)
+
+    def _reserve_redis(self, day: str, db_cursor) -> Optional[Tuple[int, int]]:
+        try:
+            from .redis_pool import get_redis
+        except (ImportError, SystemError):
+            from redis_pool import get_redis
+        r = get_redis()
+        if r is None:
+            return None
+
+        key = f"{REDIS_KEY_PREFIX}{day}"
+        incrby = self._incrby_script(r)
+        end = incrby(keys=[key], args=[self.block_size])
+        if end is None:
+            # Only the first worker to get here seeds; everyone else's SET is a no-op
+            r.set(key, self._redis_seed(day, db_cursor), nx=True, ex=REDIS_KEY_TTL)
+            end = incrby(keys=[key], args=[self.block_size])
+        end = int(end)
+        start = end - self.block_size + 1
+        if start > MAX_SEQUENCE:
+            raise RuntimeError(f"Transaction ID space exhausted for {day}")
+        return start, min(end, MAX_SEQUENCE)
+
+    def _incrby_script(self, r):
+        if self._script is None or self._script_client is not r:
+            self._script = r.register_script(_INCRBY_SEEDED_LUA)
+            self._script_client = r
+        return self._script
+
+    def _redis_seed(self, day: str, db_cursor) -> int:
+        """Day's MAX for a missing Redis key; never guesses 0."""
+        if db_cursor is not None:
+            return _max_sequence(db_cursor, day)
+        if self.dsn:
+            with self._pooled_cursor() as cur:
+                return _max_sequence(cur, day)
+        raise RuntimeError(f"Cannot seed transaction ID counter for {day} without a cursor or dsn")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        reservations = self._reservations
+        return {
+            "backend": self.backend,
+            "block_size": self.block_size,
+            "allocated": self._allocated,
+            "reservations": reservations,
+            "avg_reserve_ms": round(self._reserve_seconds / reservations * 1000, 3) if reservations else 0.0,
+            "fallbacks": self._fallbacks,
+            "remaining_in_block": max(0, self._end - self._next + 1),
+        }
+
+
+def _first(row) -> Any:
+    if row is None:
+        return None
+    return next(iter(row.values())) if hasattr(row, "values") else row[0]
+
+
+def _max_sequence(cur, day: str) -> int:
+    """Highest sequence already used for `day` (seeds a new day's counter)."""
+    cur.execute(
+        """
+        SELECT COALESCE(MAX(CAST(SUBSTR(tx_id, 7, 6) AS INTEGER)), 0) as max_seq
+        FROM transactions
+        WHERE tx_id LIKE %s
+        """,
+        (f"{day}%",)
+    )
+    return int(_first(cur.fetchone()) or 0)
+
+
+def _drop_old_sequences(cur) -> None:
+    """Drop per-day sequences older than yesterday (UTC)."""
+    yesterday = SEQUENCE_PREFIX + (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%y%m%d")
+    cur.execute(
+        "SELECT sequencename FROM pg_sequences WHERE schemaname = current_schema() AND sequencename LIKE %s",
+        (f"{SEQUENCE_PREFIX}%",)
+    )
+    for row in cur.fetchall():
+        name = _first(row)
+        if re.fullmatch(rf"{SEQUENCE_PREFIX}\d{{6}}", name) and name < yesterday:
+            cur.execute(f"DROP SEQUENCE IF EXISTS {name}")
+
+
+def _next_local_sequence(day: str) -> int:
+    """In-memory fallback counter (single process only)."""
+    _sequence_counter[day] = _sequence_counter.get(day, 0) + 1
+    if _sequence_counter[day] > MAX_SEQUENCE:
+        _sequence_counter[day] = 1
+    return _sequence_counter[day]
+
+
+# Process-wide allocator. Services set tx_id_allocator.dsn at startup;
+# scripts that set neither dsn nor a cursor keep using the local counter.
+tx_id_allocator = TxIdAllocator()
+
+
 def generate_upi_transaction_id(timestamp: Optional[datetime] = None, db_cursor=None) -> str:
     """
     Generate a 12-digit UPI transaction ID.
@@ -23,7 +315,8 @@ def generate_upi_transaction_id(timestamp: Optional[datetime] = None, db_cursor=
     
     Args:
         timestamp: Optional datetime object. If None, uses current UTC time.
-        db_cursor: Optional database cursor to fetch next sequence from DB.
+        db_cursor: Optional database cursor used to reserve ID blocks from the
+            per-day sequence (see TxIdAllocator).
     
     Returns:
         12-digit transaction ID as string
@@ -35,55 +328,7 @@ def generate_upi_transaction_id(timestamp: Optional[datetime] = None, db_cursor=
         >>> tx_id.isdigit()
         True
     """
-    if timestamp is None:
-        timestamp = datetime.now(timezone.utc)
-    
-    # Format: YYMMDD (6 digits)
-    date_component = timestamp.strftime("%y%m%d")
-    
-    # Try to get sequence from database if cursor provided
-    sequence = None
-    if db_cursor is not None:
-        try:
-            # Get the max sequence for today from database (PostgreSQL syntax)
-            db_cursor.execute(
-                """
-                SELECT COALESCE(MAX(CAST(SUBSTR(tx_id, 7, 6) AS INTEGER)), 0) as max_seq
-                FROM transactions 
-                WHERE tx_id LIKE %s
-                """,
-                (f"{date_component}%",)
-            )
-            result = db_cursor.fetchone()
-            if result:
-                # Handle both dict-like cursor (RealDictCursor) and tuple cursor
-                max_seq = result.get("max_seq") if hasattr(result, "get") else result[0]
-                if max_seq:
-                    sequence = int(max_seq) + 1
-        except Exception as e:
-            # Fall back to in-memory counter if DB fails
-            import sys
-            print(f"[WARN] Failed to get sequence from DB: {e}", file=sys.stderr)
-            pass
-    
-    # Fall back to in-memory counter if no DB cursor or DB lookup failed
-    if sequence is None:
-        if date_component not in _sequence_counter:
-            _sequence_counter[date_component] = 0
-        _sequence_counter[date_component] += 1
-        sequence = _sequence_counter[date_component]
-    
-    # Ensure sequence wraps around at 999999
-    if sequence > 999999:
-        sequence = 1
-    
-    # Format sequence with leading zeros: 000001, 000002, etc.
-    sequence_component = str(sequence).zfill(6)
-    
-    # Combine to create 12-digit transaction ID
-    tx_id = f"{date_component}{sequence_component}"
-    
-    return tx_id
+    return tx_id_allocator.next_id(timestamp, db_cursor=db_cursor)
 
 def parse_upi_transaction_id(tx_id: str) -> dict:
     """
@@ -158,6 +403,7 @@ def reset_sequence(date_str: Optional[str] = None):
         date_str: Optional YYMMDD format date. If None, resets all.
     """
     global _sequence_counter
+    tx_id_allocator.reset()
     if date_str:
         if date_str in _sequence_counter:
             del _sequence_counter[date_str]
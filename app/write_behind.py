@@ -0,0 +1,301 @@
+"""
+Write-behind persistence for scored transactions (POST /transactions).
+
+With WRITE_BEHIND_MODE set, the admin API stops doing one INSERT and one
+commit per request. Scored rows are queued in memory instead. A flusher
+writes them every WRITE_BEHIND_BATCH_ROWS rows or WRITE_BEHIND_FLUSH_MS,
+whichever comes first: COPY into a temp staging table, then a single
+INSERT ... SELECT ... ON CONFLICT merge into public.transactions. That is
+one round trip per table and one commit per batch. The rollup and
+pattern-flag triggers fire per row as usual.
+
+Modes:
+    off       synchronous INSERT per request (default)
+    flush     the request returns once its batch is committed
+    enqueue   the request returns once the row is queued; a crash loses at
+              most the queued rows (WRITE_BEHIND_MAX_QUEUE bounds that: past
+              it, callers wait for their flush like in "flush" mode)
+
+If a batch fails as a whole (one bad row: FK, length), its rows are retried
+one by one, so only the offending rows fail.
+
+created_at is taken when the row is queued, so the row broadcast to
+dashboards (transaction_row()) carries the stored instant. It is naive UTC
+in the row, staged with an explicit +00:00 offset and cast through
+timestamptz, so the TIMESTAMP column gets the same session-timezone value
+as the now() the synchronous INSERT stores.
+
+Configuration (environment):
+    WRITE_BEHIND_MODE         off | flush | enqueue
+    WRITE_BEHIND_BATCH_ROWS   rows per COPY batch
+    WRITE_BEHIND_FLUSH_MS     max time a row waits for its batch
+    WRITE_BEHIND_MAX_QUEUE    queued rows before callers wait for the flush
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Configuration
+MODE = os.getenv("WRITE_BEHIND_MODE", "off").lower()
+BATCH_ROWS = int(os.getenv("WRITE_BEHIND_BATCH_ROWS", "500"))
+FLUSH_MS = float(os.getenv("WRITE_BEHIND_FLUSH_MS", "50"))
+MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "10000"))
+MODES = ("off", "flush", "enqueue")
+
+if MODE not in MODES:
+    print(f"[WARN] Unknown WRITE_BEHIND_MODE={MODE!r}, using off")
+    MODE = "off"
+
+# Staged as text and cast in the merge, so both drivers can COPY plain strings
+STAGE_COLUMNS = ("tx_id", "user_id", "device_id", "ts", "amount", "recipient_vpa", "tx_type",
+                 "channel", "risk_score", "action", "db_status", "explainability", "created_at")
+
+STAGE_TABLE_SQL = (
+    "CREATE TEMP TABLE IF NOT EXISTS tx_write_behind_stage ("
+    + ", ".join(f"{c} TEXT" for c in STAGE_COLUMNS)
+    + ") ON COMMIT DELETE ROWS;"
+)
+
+_STAGE_CASTS = {
+    "ts": "ts::timestamp",
+    "amount": "amount::numeric",
+    "risk_score": "risk_score::numeric",
+    "explainability": "explainability::jsonb",
+    "created_at": "created_at::timestamptz::timestamp",
+}
+
+
+def merge_sql(has_explainability: bool) -> str:
+    """Staging table -> public.transactions, same upsert as the per-row INSERT."""
+    cols = [c for c in STAGE_COLUMNS if has_explainability or c != "explainability"]
+    updates = ["risk_score", "action", "db_status", "created_at"]
+    if has_explainability:
+        updates.insert(3, "explainability")
+    return (
+        f"INSERT INTO public.transactions ({', '.join(cols)}) "
+        f"SELECT {', '.join(_STAGE_CASTS.get(c, c) for c in cols)} FROM tx_write_behind_stage "
+        "ON CONFLICT (tx_id) DO UPDATE SET "
+        + ", ".join(f"{c} = EXCLUDED.{c}" for c in updates) + ";"
+    )
+
+
+def _parse_ts(value):
+    # Same result as PostgreSQL's text -> timestamp cast (any offset is dropped)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return value
+
+
+def transaction_row(tx: Dict[str, Any], created_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """The stored row (db_get_transaction shape) built from the scored request."""
+    amount, risk = tx.get("amount"), tx.get("risk_score")
+    row = {
+        "tx_id": tx.get("tx_id"),
+        "user_id": tx.get("user_id"),
+        "device_id": tx.get("device_id"),
+        "ts": _parse_ts(tx.get("ts")),
+        "amount": round(float(amount), 2) if amount is not None else None,
+        "recipient_vpa": tx.get("recipient_vpa"),
+        "tx_type": tx.get("tx_type"),
+        "channel": tx.get("channel"),
+        "db_status": tx.get("db_status", "inserted"),
+        "action": tx.get("action"),
+        "risk_score": round(float(risk), 4) if risk is not None else None,
+        "created_at": created_at or datetime.now(timezone.utc).replace(tzinfo=None),
+    }
+    if tx.get("explainability") is not None:
+        row["explainability"] = tx.get("explainability")
+    return row
+
+
+def stage_records(rows: List[Dict[str, Any]]) -> List[Tuple[Optional[str], ...]]:
+    """Rows as text tuples in STAGE_COLUMNS order (last write per tx_id wins)."""
+    latest: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        latest[row.get("tx_id")] = row
+    records = []
+    for row in latest.values():
+        record = []
+        for col in STAGE_COLUMNS:
+            value = row.get(col)
+            if value is None:
+                record.append(None)
+            elif col == "explainability":
+                record.append(json.dumps(value, default=str))
+            elif col == "created_at" and isinstance(value, datetime):
+                # Naive created_at is UTC (transaction_row); the merge converts it to the session zone
+                record.append((value if value.tzinfo else value.replace(tzinfo=timezone.utc)).isoformat())
+            elif isinstance(value, datetime):
+                record.append(value.isoformat())
+            else:
+                record.append(str(value))
+        records.append(tuple(record))
+    return records
+
+
+def _csv_field(value: Optional[str]) -> str:
+    # In COPY csv an unquoted empty field is NULL and "" is the empty string
+    return "" if value is None else '"' + value.replace('"', '""') + '"'
+
+
+def stage_csv(records: List[Tuple[Optional[str], ...]]) -> io.StringIO:
+    """COPY ... WITH (FORMAT csv) input for stage_records() output."""
+    buf = io.StringIO()
+    for record in records:
+        buf.write(",".join(_csv_field(v) for v in record))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+
+class WriteBehindQueue:
+    """Queue scored rows and persist them in COPY batches."""
+
+    def __init__(
+        self,
+        flush_fn: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Any]]] = None,
+        insert_fn: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+        mode: str = MODE,
+        batch_rows: int = BATCH_ROWS,
+        flush_ms: float = FLUSH_MS,
+        max_queue: int = MAX_QUEUE,
+        on_flushed: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+    ):
+        self.flush_fn = flush_fn
+        self.insert_fn = insert_fn
+        self.mode = mode
+        self.batch_rows = max(1, int(batch_rows))
+        self.max_wait = max(0.0, float(flush_ms)) / 1000.0
+        self.max_queue = max(1, int(max_queue))
+        self.on_flushed = on_flushed
+
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        # Metrics
+        self._queued = 0
+        self._batches = 0
+        self._rows = 0
+        self._last_batch_rows = 0
+        self._last_flush_ms = 0.0
+        self._fallbacks = 0
+        self._failed = 0
+        self._waited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off" and self.flush_fn is not None
+
+    async def submit(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue a row; returns once queued or flushed, depending on the mode."""
+        loop = asyncio.get_running_loop()
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        fut = loop.create_future()
+        # enqueue-mode callers may never look at the outcome
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending.append((row, fut))
+        self._queued += 1
+
+        if len(self._pending) >= self.batch_rows:
+            self._flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, loop)
+
+        if self.mode == "flush" or self._queued > self.max_queue:
+            if self.mode != "flush":
+                self._waited += 1
+            await fut
+        return row
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = loop.create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        rows = [row for row, _ in batch]
+        # One batch at a time, so repeated tx_ids are applied in order
+        async with self._flush_lock:
+            started = time.perf_counter()
+            try:
+                await self.flush_fn(rows)
+                results = [None] * len(batch)
+            except Exception as e:
+                print(f"[WARN] Write-behind batch of {len(rows)} failed, retrying row by row: {e}")
+                self._fallbacks += 1
+                results = [await self._insert_one(row) for row in rows]
+            finally:
+                self._queued -= len(batch)
+            self._batches += 1
+            self._rows += len(batch)
+            self._last_batch_rows = len(batch)
+            self._last_flush_ms = (time.perf_counter() - started) * 1000.0
+
+        for (_, fut), error in zip(batch, results):
+            if fut.done():
+                continue
+            if error is None:
+                fut.set_result(None)
+            else:
+                fut.set_exception(error)
+        if self.on_flushed is not None:
+            try:
+                self.on_flushed([row for (row, _), error in zip(batch, results) if error is None])
+            except Exception as e:
+                print(f"[WARN] Write-behind flush callback failed: {e}")
+
+    async def _insert_one(self, row: Dict[str, Any]) -> Optional[Exception]:
+        try:
+            if self.insert_fn is None:
+                raise RuntimeError("no per-row insert configured")
+            await self.insert_fn(row)
+            return None
+        except Exception as e:
+            self._failed += 1
+            print(f"[WARN] Write-behind row {row.get('tx_id')} not persisted: {e}")
+            return e
+
+    async def drain(self) -> None:
+        """Flush everything queued (shutdown)."""
+        if self._pending:
+            self._flush(asyncio.get_running_loop())
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode if self.enabled else "off",
+            "queued": self._queued,
+            "max_queue": self.max_queue,
+            "batches_flushed": self._batches,
+            "rows_flushed": self._rows,
+            "avg_batch_rows": round(self._rows / self._batches, 2) if self._batches else 0.0,
+            "last_batch_rows": self._last_batch_rows,
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "batch_fallbacks": self._fallbacks,
+            "failed_rows": self._failed,
+            "backpressure_waits": self._waited,
+            "batch_rows": self.batch_rows,
+            "flush_ms": self.max_wait * 1000.0,
+        }
@@ -0,0 +1,234 @@
+"""
+Cross-worker WebSocket fan-out over Redis pub/sub.
+
+Sockets live in the memory of the worker that accepted them. To reach a
+socket on another worker, a publisher does two things:
+
+    1. delivers to its own local sockets directly (the fast path: no Redis
+       round trip, no re-serialization), and
+    2. ws_bus.publish(channel, message) for every other worker.
+
+publish() never awaits Redis. Messages are serialized once and buffered per
+channel. A flusher task sends them every WS_BUS_FLUSH_MS, all channels in one
+pipeline and up to WS_BUS_MAX_BATCH messages per PUBLISH. Each payload carries
+the publishing worker's id, so that worker skips its own messages (it has
+already delivered them locally).
+
+A worker only subscribes to channels it has sockets for:
+
+    ws:admin            admin dashboard feed (app.main)
+    ws:user:<user_id>   one user's sockets (backend.ws_manager.send_to_user)
+    ws:users            every user socket (broadcast_to_all)
+
+When Redis is down, local delivery still works. Other workers miss the
+messages published until Redis comes back.
+
+Configuration (environment):
+    WS_BUS_ENABLED       1 to fan out through Redis, 0 for single-worker setups
+    WS_BUS_FLUSH_MS      max time a message waits in the publish buffer
+    WS_BUS_MAX_BATCH     messages packed into one PUBLISH
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .redis_pool import DOWN_COOLDOWN, get_async_redis, get_redis, mark_redis_down
+    from .ws_fanout import encode_message
+except (ImportError, SystemError):
+    from redis_pool import DOWN_COOLDOWN, get_async_redis, get_redis, mark_redis_down
+    from ws_fanout import encode_message
+
+# Configuration
+BUS_ENABLED = os.getenv("WS_BUS_ENABLED", "1").lower() in ("1", "true", "yes")
+FLUSH_MS = float(os.getenv("WS_BUS_FLUSH_MS", "5"))
+MAX_BATCH = int(os.getenv("WS_BUS_MAX_BATCH", "100"))
+
+ADMIN_CHANNEL = "ws:admin"
+USERS_CHANNEL = "ws:users"
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def user_channel(user_id: str) -> str:
+    return f"ws:user:{user_id}"
+
+
+def pack_batch(texts: List[str], origin: str = WORKER_ID) -> str:
+    """One PUBLISH payload: the origin worker plus already-serialized messages."""
+    return '{"o":%s,"m":[%s]}' % (json.dumps(origin), ",".join(texts))
+
+
+def unpack_batch(data) -> Tuple[Optional[str], List[Any]]:
+    if isinstance(data, bytes):
+        data = data.decode()
+    try:
+        payload = json.loads(data)
+        return payload.get("o"), list(payload.get("m") or [])
+    except (ValueError, AttributeError):
+        return None, []
+
+
+class WSBus:
+    """Per-process publish buffer and pub/sub listener."""
+
+    def __init__(self, enabled: bool = BUS_ENABLED, flush_ms: float = FLUSH_MS,
+                 max_batch: int = MAX_BATCH, worker_id: str = WORKER_ID):
+        self.enabled = enabled
+        self.flush_seconds = max(0.0, flush_ms) / 1000
+        self.max_batch = max(1, int(max_batch))
+        self.worker_id = worker_id
+        self.handlers: Dict[str, Callable[[Any], Any]] = {}
+        self._pending: Dict[str, List[str]] = {}
+        self._loop = None
+        self._flush_wakeup: Optional[asyncio.Event] = None
+        self._flush_task = None
+        self._listen_task = None
+        # Metrics
+        self.published = 0
+        self.publish_calls = 0
+        self.received = 0
+        self.skipped_own = 0
+        self.errors = 0
+
+    def subscribe(self, channel: str, handler: Callable[[Any], Any]) -> None:
+        """Call `handler(message)` for messages other workers publish on `channel`."""
+        self.handlers[channel] = handler
+        self._ensure_tasks()
+
+    def unsubscribe(self, channel: str) -> None:
+        self.handlers.pop(channel, None)
+
+    def publish(self, channel: str, message: Any) -> None:
+        """Queue `message` for the other workers; never waits on Redis."""
+        if not self.enabled:
+            return
+        self._pending.setdefault(channel, []).append(encode_message(message))
+        self._ensure_tasks()
+        if self._flush_wakeup is not None:
+            self._flush_wakeup.set()
+
+    def _ensure_tasks(self):
+        if not self.enabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._loop is not loop:
+            # First use, or a new event loop (tests, app restarts): start over on it
+            self._loop = loop
+            self._flush_wakeup = asyncio.Event()
+            self._flush_task = self._listen_task = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if self.handlers and (self._listen_task is None or self._listen_task.done()):
+            self._listen_task = asyncio.create_task(self._listen_loop())
+
+    def take_batches(self) -> List[Tuple[str, str]]:
+        """Drain the publish buffer into (channel, payload) pairs."""
+        pending, self._pending = self._pending, {}
+        batches = []
+        for channel, texts in pending.items():
+            for i in range(0, len(texts), self.max_batch):
+                batches.append((channel, pack_batch(texts[i:i + self.max_batch], self.worker_id)))
+                self.published += len(texts[i:i + self.max_batch])
+        return batches
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._flush_wakeup.wait()
+            # Let a burst accumulate so it goes out in one round trip
+            await asyncio.sleep(self.flush_seconds)
+            self._flush_wakeup.clear()
+            batches = self.take_batches()
+            if not batches:
+                continue
+            # While Redis is down (cooldown), other workers simply miss these
+            r = get_async_redis()
+            if r is None or await loop.run_in_executor(None, get_redis) is None:
+                continue
+            try:
+                async with r.pipeline(transaction=False) as pipe:
+                    for channel, payload in batches:
+                        pipe.publish(channel, payload)
+                    await pipe.execute()
+                self.publish_calls += len(batches)
+            except Exception as e:
+                self.errors += 1
+                print(f"[WARN] WebSocket bus publish failed: {e}")
+                mark_redis_down()
+
+    async def dispatch(self, channel: str, data) -> None:
+        """Hand a received payload to the channel's handler (skipping our own)."""
+        handler = self.handlers.get(channel)
+        origin, messages = unpack_batch(data)
+        if handler is None:
+            return
+        if origin == self.worker_id:
+            self.skipped_own += len(messages)
+            return
+        for message in messages:
+            self.received += 1
+            try:
+                result = handler(message)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"[WARN] WebSocket bus handler for {channel} failed: {e}")
+
+    async def _listen_loop(self):
+        loop = asyncio.get_running_loop()
+        while self.handlers:
+            # Sync health check (with cooldown) keeps a dead Redis from spinning this loop
+            if await loop.run_in_executor(None, get_redis) is None or get_async_redis() is None:
+                await asyncio.sleep(DOWN_COOLDOWN)
+                continue
+            pubsub = get_async_redis().pubsub()
+            subscribed = set()
+            try:
+                while self.handlers:
+                    # Channel changes are applied between reads, on this task only
+                    wanted = set(self.handlers)
+                    if wanted - subscribed:
+                        await pubsub.subscribe(*(wanted - subscribed))
+                    if subscribed - wanted:
+                        await pubsub.unsubscribe(*(subscribed - wanted))
+                    subscribed = wanted
+                    msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.2)
+                    if msg and msg.get("type") == "message":
+                        await self.dispatch(msg["channel"], msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"[WARN] WebSocket bus listener failed: {e}")
+                mark_redis_down()
+            finally:
+                try:
+                    await getattr(pubsub, "aclose", pubsub.close)()
+                except Exception:
+                    pass
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "worker_id": self.worker_id,
+            "channels": len(self.handlers),
+            "pending": sum(len(t) for t in self._pending.values()),
+            "published": self.published,
+            "publish_calls": self.publish_calls,
+            "received": self.received,
+            "skipped_own": self.skipped_own,
+            "errors": self.errors,
+        }
+
+
+# Shared per-process bus
+ws_bus = WSBus()
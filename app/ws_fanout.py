@@ -0,0 +1,151 @@
+"""
+Queued WebSocket fan-out for the admin /ws endpoint.
+
+Publishing never awaits a socket. A message is serialized once
+(encode_message) and the same string is offered to every connection's
+bounded queue; each connection has its own writer task that drains its queue
+at whatever pace that browser manages. A slow consumer therefore only ever
+delays itself.
+
+When a queue is full, WS_OVERFLOW_POLICY decides what happens:
+
+    drop_oldest   the oldest queued message is discarded and a
+                  {"type": "resync", "dropped": n} marker is sent ahead of the
+                  next message, so the client knows to reload (dashboards on
+                  the delta protocol also see the seq gap and resume)
+    disconnect    the connection is closed with code 1013 (try again later);
+                  the client reconnects and starts from a fresh snapshot
+
+Configuration (environment):
+    WS_SEND_QUEUE          messages buffered per connection
+    WS_OVERFLOW_POLICY     drop_oldest | disconnect
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Configuration
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE", "256"))
+OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", "drop_oldest").lower()
+OVERFLOW_POLICIES = ("drop_oldest", "disconnect")
+CLOSE_TRY_AGAIN_LATER = 1013
+
+if OVERFLOW_POLICY not in OVERFLOW_POLICIES:
+    print(f"[WARN] Unknown WS_OVERFLOW_POLICY={OVERFLOW_POLICY!r}, using drop_oldest")
+    OVERFLOW_POLICY = "drop_oldest"
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Serialize a message once for every connection (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(message, default=str, separators=(",", ":"))
+
+
+class ConnectionSender:
+    """Bounded send queue and writer task for one WebSocket."""
+
+    def __init__(self, ws, maxsize: int = SEND_QUEUE_SIZE, policy: str = OVERFLOW_POLICY,
+                 on_close: Optional[Callable[["ConnectionSender"], None]] = None):
+        self.ws = ws
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.on_close = on_close
+        self.closed = False
+        self.evicted = False
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._pending_resync = 0
+        # Metrics
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._task = asyncio.create_task(self._writer())
+
+    def offer(self, text: str) -> bool:
+        """Queue `text` without waiting; False if the connection is gone or evicted."""
+        if self.closed:
+            return False
+        if len(self._queue) >= self.maxsize:
+            if self.policy == "disconnect":
+                self.dropped += len(self._queue) + 1
+                self._queue.clear()
+                self.evicted = True
+                self._wakeup.set()
+                return False
+            self._queue.popleft()
+            self.dropped += 1
+            self._pending_resync += 1
+        self._queue.append((time.monotonic(), text))
+        if len(self._queue) > self.max_depth:
+            self.max_depth = len(self._queue)
+        self._wakeup.set()
+        return True
+
+    async def _writer(self):
+        try:
+            while True:
+                while not self._queue and not self.evicted:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                if self.evicted:
+                    await self.ws.close(code=CLOSE_TRY_AGAIN_LATER)
+                    return
+                if self._pending_resync:
+                    dropped, self._pending_resync = self._pending_resync, 0
+                    await self.ws.send_text(encode_message({"type": "resync", "dropped": dropped}))
+                queued_at, text = self._queue.popleft()
+                await self.ws.send_text(text)
+                self.sent += 1
+                self.last_lag_ms = (time.monotonic() - queued_at) * 1000
+                if self.last_lag_ms > self.max_lag_ms:
+                    self.max_lag_ms = self.last_lag_ms
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        finally:
+            self._finish()
+
+    def _finish(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        if self.on_close is not None:
+            self.on_close(self)
+
+    def close(self):
+        """Stop the writer; queued messages are discarded."""
+        if not self._task.done():
+            self._task.cancel()
+        self._finish()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        oldest = (time.monotonic() - self._queue[0][0]) * 1000 if self._queue else 0.0
+        client = getattr(self.ws, "client", None)
+        return {
+            "client": f"{client.host}:{client.port}" if client else None,
+            "depth": len(self._queue),
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "lag_ms": round(oldest, 1),
+            "last_lag_ms": round(self.last_lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+        }
@@ -132,6 +132,15 @@ CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions(created_a
 CREATE INDEX IF NOT EXISTS idx_transactions_receiver_user_id ON transactions(receiver_user_id);
 -- Composite index for action filtering queries
 CREATE INDEX IF NOT EXISTS idx_transactions_user_action_created ON transactions(user_id, action, created_at DESC);
+-- Partial index for the auto-refund job (expired pending DELAY rows)
+CREATE INDEX IF NOT EXISTS idx_transactions_delay_pending ON transactions(created_at) WHERE action = 'DELAY' AND db_status = 'pending';
+-- Sort keys for /recent-transactions keyset pagination (all rows, and per action)
+CREATE INDEX IF NOT EXISTS idx_transactions_sort_ts ON transactions((COALESCE(ts, created_at)) DESC, tx_id DESC);
+CREATE INDEX IF NOT EXISTS idx_transactions_action_sort_ts ON transactions(action, (COALESCE(ts, created_at)) DESC, tx_id DESC);
+-- Ranged /pattern-analytics counts and the most-recent-by-ts window
+CREATE INDEX IF NOT EXISTS idx_transactions_ts ON transactions(ts DESC);
+-- Newest high-risk transactions (admin dashboard alerts)
+CREATE INDEX IF NOT EXISTS idx_transactions_high_risk ON transactions((COALESCE(ts, created_at)) DESC, tx_id DESC) WHERE risk_score >= 0.8;
 CREATE INDEX IF NOT EXISTS idx_fraud_alerts_user_id ON fraud_alerts(user_id);
 CREATE INDEX IF NOT EXISTS idx_fraud_alerts_tx_id ON fraud_alerts(tx_id);
 CREATE INDEX IF NOT EXISTS idx_user_devices_user_id ON user_devices(user_id);
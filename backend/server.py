@@ -29,7 +29,6 @@ from apscheduler.triggers.interval import IntervalTrigger
 
 import psycopg2
 import psycopg2.extras
-import redis
 import secrets
 import base64
 import webauthn
@@ -45,7 +44,12 @@ from webauthn.helpers.structs import (
 # Setup project root path and import UPI Transaction ID generator
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
-from app.upi_transaction_id import generate_upi_transaction_id
+from app.upi_transaction_id import generate_upi_transaction_id, tx_id_allocator
+from app.db_pool import db_connection
+from app.delay_expiry import delay_expiry
+from app.dashboard_summary import invalidate_dashboard_summary
+from app.rollups import ensure_rollup_schema, prune_minute_rollups
+from app.risk_context import RiskWriteBatch, fetch_risk_context
 
 # Import WebSocket manager
 try:
@@ -94,6 +98,8 @@ def _load_cfg_db_url() -> str:
 env_db_url = os.getenv("DB_URL")
 cfg_db_url = _load_cfg_db_url()
 DB_URL = (env_db_url or cfg_db_url or DEFAULT_DB_URL).strip()
+# Transaction IDs are reserved in blocks from a per-day sequence over a pooled connection
+tx_id_allocator.dsn = DB_URL
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "fdt_jwt_secret_key_change_in_production")
 JWT_ALGORITHM = "HS256"
@@ -102,20 +108,17 @@ JWT_EXPIRATION_HOURS = 24
 # =========================================================================
 # REDIS CACHE INITIALIZATION
 # =========================================================================
-redis_client = None
+# All Redis access goes through the shared pool in app.redis_pool, which
+# health-checks lazily and reports None while Redis is down.
+from app.redis_pool import get_redis
 
 def init_redis():
-    """Initialize Redis connection for caching"""
-    global redis_client
-    try:
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-        redis_client.ping()
+    """Warm up the shared Redis pool for caching"""
+    if get_redis() is not None:
         print(f"✓ Redis cache connected: {REDIS_URL}")
         return True
-    except Exception as e:
-        print(f"⚠ Redis unavailable ({e}). Caching disabled, using direct DB queries.")
-        redis_client = None
-        return False
+    print("⚠ Redis unavailable. Caching disabled until it comes back, using direct DB queries.")
+    return False
 
 # Cache TTL constants (in seconds)
 CACHE_TTL_USER = 300  # 5 minutes
@@ -211,207 +214,319 @@ def startup_event():
     init_redis()
     
     try:
-        conn = get_db_conn()
-        cur = conn.cursor()
+        with get_db_conn() as conn:
+            cur = conn.cursor()
         
-        # Step 1: Add Send Money feature columns to transactions table
-        new_columns = [
-            ("receiver_user_id", "VARCHAR(100) REFERENCES users(user_id)"),
-            ("status_history", "TEXT[] DEFAULT '{}'"),
-            ("amount_deducted_at", "TIMESTAMP"),
-            ("amount_credited_at", "TIMESTAMP")
-        ]
+            # Step 1: Add Send Money feature columns to transactions table
+            new_columns = [
+                ("receiver_user_id", "VARCHAR(100) REFERENCES users(user_id)"),
+                ("status_history", "TEXT[] DEFAULT '{}'"),
+                ("amount_deducted_at", "TIMESTAMP"),
+                ("amount_credited_at", "TIMESTAMP")
+            ]
         
-        for column_name, column_def in new_columns:
-            try:
-                cur.execute(f"ALTER TABLE transactions ADD COLUMN IF NOT EXISTS {column_name} {column_def}")
-            except Exception as e:
-                print(f"Column {column_name} already exists or error: {e}")
+            for column_name, column_def in new_columns:
+                try:
+                    cur.execute(f"ALTER TABLE transactions ADD COLUMN IF NOT EXISTS {column_name} {column_def}")
+                except Exception as e:
+                    print(f"Column {column_name} already exists or error: {e}")
         
-        # Step 3: Create transaction_ledger table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS transaction_ledger (
-                ledger_id SERIAL PRIMARY KEY,
-                tx_id VARCHAR(100) REFERENCES transactions(tx_id),
-                operation VARCHAR(50) NOT NULL,
-                user_id VARCHAR(100) REFERENCES users(user_id),
-                amount DECIMAL(15, 2) NOT NULL,
-                operation_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                remarks TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+            # Step 3: Create transaction_ledger table
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS transaction_ledger (
+                    ledger_id SERIAL PRIMARY KEY,
+                    tx_id VARCHAR(100) REFERENCES transactions(tx_id),
+                    operation VARCHAR(50) NOT NULL,
+                    user_id VARCHAR(100) REFERENCES users(user_id),
+                    amount DECIMAL(15, 2) NOT NULL,
+                    operation_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    remarks TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
         
-        # Step 4: Create user_daily_transactions table
-        cur.execute("""
-            CREATE TABLE IF NOT EXISTS user_daily_transactions (
-                record_id SERIAL PRIMARY KEY,
-                user_id VARCHAR(100) REFERENCES users(user_id),
-                transaction_date DATE NOT NULL,
-                total_amount DECIMAL(15, 2) DEFAULT 0.00,
-                transaction_count INTEGER DEFAULT 0,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, transaction_date)
-            )
-        """)
+            # Step 4: Create user_daily_transactions table
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS user_daily_transactions (
+                    record_id SERIAL PRIMARY KEY,
+                    user_id VARCHAR(100) REFERENCES users(user_id),
+                    transaction_date DATE NOT NULL,
+                    total_amount DECIMAL(15, 2) DEFAULT 0.00,
+                    transaction_count INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(user_id, transaction_date)
+                )
+            """)
         
-        # Step 5: Create indexes for performance optimization
-        indexes = [
-            # User queries
-            ("idx_users_phone", "users", "phone"),
-            ("idx_users_user_id", "users", "user_id"),
-            # Transaction queries
-            ("idx_transactions_user_id", "transactions", "user_id"),
-            ("idx_transactions_tx_id", "transactions", "tx_id"),
-            ("idx_transactions_created_at", "transactions", "created_at"),
-            ("idx_transactions_receiver_user_id", "transactions", "receiver_user_id"),
-            # Transaction ledger
-            ("idx_transaction_ledger_tx_id", "transaction_ledger", "tx_id"),
-            ("idx_transaction_ledger_user_id", "transaction_ledger", "user_id"),
-            # User daily transactions
-            ("idx_user_daily_transactions_user_date", "user_daily_transactions", "user_id, transaction_date")
-        ]
+            # Step 5: Create indexes for performance optimization
+            indexes = [
+                # User queries
+                ("idx_users_phone", "users", "phone"),
+                ("idx_users_user_id", "users", "user_id"),
+                # Transaction queries
+                ("idx_transactions_user_id", "transactions", "user_id"),
+                ("idx_transactions_tx_id", "transactions", "tx_id"),
+                ("idx_transactions_created_at", "transactions", "created_at"),
+                ("idx_transactions_receiver_user_id", "transactions", "receiver_user_id"),
+                # Admin /recent-transactions keyset pagination
+                ("idx_transactions_sort_ts", "transactions", "(COALESCE(ts, created_at)) DESC, tx_id DESC"),
+                ("idx_transactions_action_sort_ts", "transactions", "action, (COALESCE(ts, created_at)) DESC, tx_id DESC"),
+                # Transaction ledger
+                ("idx_transaction_ledger_tx_id", "transaction_ledger", "tx_id"),
+                ("idx_transaction_ledger_user_id", "transaction_ledger", "user_id"),
+                # User daily transactions
+                ("idx_user_daily_transactions_user_date", "user_daily_transactions", "user_id, transaction_date")
+            ]
         
-        for index_name, table_name, columns in indexes:
+            for index_name, table_name, columns in indexes:
+                try:
+                    cur.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})")
+                except Exception as e:
+                    print(f"Index {index_name} already exists or error: {e}")
+
+            # Partial index for the auto-refund job: only pending DELAY rows
             try:
-                cur.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns})")
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_transactions_delay_pending ON transactions (created_at) "
+                    "WHERE action = 'DELAY' AND db_status = 'pending'"
+                )
             except Exception as e:
-                print(f"Index {index_name} already exists or error: {e}")
-        
-        # Step 6: Add new test users
-        new_users = [
-            ('user_004', 'Abishek Kumar', '+919876543219', 'abishek@example.com', 
-             '$2b$12$sC4pqNPR0pxSK8.6E4aire4FCKHbWK988MYFODhurkjGs35TPj8i.', 20000.00),
-            ('user_005', 'Jerold Smith', '+919876543218', 'jerold@example.com', 
-             '$2b$12$sC4pqNPR0pxSK8.6E4aire4FCKHbWK988MYFODhurkjGs35TPj8i.', 18000.00),
-            ('user_006', 'Gowtham Kumar', '+919876543217', 'gowtham@example.com', 
-             '$2b$12$sC4pqNPR0pxSK8.6E4aire4FCKHbWK988MYFODhurkjGs35TPj8i.', 22000.00)
-        ]
-        
-        for user_data in new_users:
+                print(f"Index idx_transactions_delay_pending already exists or error: {e}")
+
+            # Partial index for the admin dashboard's high-risk alerts
             try:
-                cur.execute("""
-                    INSERT INTO users (user_id, name, phone, email, password_hash, balance)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (user_id) DO NOTHING
-                """, user_data)
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_transactions_high_risk "
+                    "ON transactions ((COALESCE(ts, created_at)) DESC, tx_id DESC) WHERE risk_score >= 0.8"
+                )
             except Exception as e:
-                print(f"User {user_data[1]} already exists or error: {e}")
+                print(f"Index idx_transactions_high_risk already exists or error: {e}")
+
+            # Ranged /pattern-analytics counts filter on ts, like the explainability scan did
+            try:
+                cur.execute("CREATE INDEX IF NOT EXISTS idx_transactions_ts ON transactions (ts DESC)")
+            except Exception as e:
+                print(f"Index idx_transactions_ts already exists or error: {e}")
         
-        conn.commit()
-        print("✓ Database schema initialized successfully (including Send Money feature)")
+            # Step 6: Add new test users
+            new_users = [
+                ('user_004', 'Abishek Kumar', '+919876543219', 'abishek@example.com', 
+                 '$2b$12$sC4pqNPR0pxSK8.6E4aire4FCKHbWK988MYFODhurkjGs35TPj8i.', 20000.00),
+                ('user_005', 'Jerold Smith', '+919876543218', 'jerold@example.com', 
+                 '$2b$12$sC4pqNPR0pxSK8.6E4aire4FCKHbWK988MYFODhurkjGs35TPj8i.', 18000.00),
+                ('user_006', 'Gowtham Kumar', '+919876543217', 'gowtham@example.com', 
+                 '$2b$12$sC4pqNPR0pxSK8.6E4aire4FCKHbWK988MYFODhurkjGs35TPj8i.', 22000.00)
+            ]
+        
+            for user_data in new_users:
+                try:
+                    cur.execute("""
+                        INSERT INTO users (user_id, name, phone, email, password_hash, balance)
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                        ON CONFLICT (user_id) DO NOTHING
+                    """, user_data)
+                except Exception as e:
+                    print(f"User {user_data[1]} already exists or error: {e}")
+        
+            conn.commit()
+            print("✓ Database schema initialized successfully (including Send Money feature)")
     except Exception as e:
         print(f"⚠ Warning: Could not ensure database schema: {e}")
-    finally:
-        try:
-            if conn:
-                conn.close()
-        except Exception as e:
-            print(f"[WARN] Error closing database connection: {e}")
+
+    # Dashboard rollup tables + triggers (backfilled on first creation)
+    try:
+        with get_db_conn() as conn:
+            if ensure_rollup_schema(conn):
+                print("✓ Dashboard rollups ready")
+    except Exception as e:
+        print(f"⚠ Warning: Could not ensure dashboard rollups: {e}")
     
+    # Rebuild the DELAY expiry schedule from PostgreSQL and start its consumer
+    loop = asyncio.get_running_loop()
+    try:
+        rebuilt = rebuild_delay_expiry_schedule()
+        print(f"✓ Delay expiry schedule rebuilt ({rebuilt} pending)")
+    except Exception as e:
+        print(f"⚠ Warning: Could not rebuild delay expiry schedule: {e}")
+    delay_expiry.start(
+        lambda tx_ids: _refund_delayed_chunk(loop, AUTO_REFUND_DUE_CLAIM, {"tx_ids": tx_ids}, batch=len(tx_ids))
+    )
+
     # Start the scheduler
     try:
         scheduler.add_job(
             auto_refund_delayed_transactions,
-            trigger=IntervalTrigger(minutes=1),  # Run every 1 minute
+            trigger=IntervalTrigger(minutes=AUTO_REFUND_SWEEP_MINUTES),  # Backstop sweep
             id="auto_refund_job",
             name="Auto-refund delayed transactions",
             replace_existing=True
         )
+        scheduler.add_job(
+            prune_rollups,
+            trigger=IntervalTrigger(hours=1),
+            id="rollup_prune_job",
+            name="Prune minute rollups",
+            replace_existing=True
+        )
         scheduler.start()
         print("✓ Auto-refund scheduler started")
     except Exception as e:
         print(f"⚠ Warning: Could not start scheduler: {e}")
 
+# Delayed transactions are auto-refunded after this long
+AUTO_REFUND_AFTER = timedelta(minutes=5)
+# Rows claimed per chunk; each chunk is its own short transaction
+AUTO_REFUND_BATCH_SIZE = int(os.getenv("AUTO_REFUND_BATCH_SIZE", "500"))
+AUTO_REFUND_REMARK = "Auto-refund after 5 minute timeout"
+# Refunds are driven by the delay expiry schedule (app.delay_expiry); the
+# table sweep only catches entries the schedule lost (e.g. a Redis flush)
+AUTO_REFUND_SWEEP_MINUTES = int(os.getenv("AUTO_REFUND_SWEEP_MINUTES", "10"))
+
+# One statement per chunk: claim expired DELAY rows (skipping rows another
+# worker holds), credit each sender once with the summed amount, write the
+# ledger rows and flip the transactions. Served by idx_transactions_delay_pending.
+AUTO_REFUND_SQL = """
+    WITH claimed AS (
+        SELECT tx_id, user_id, amount, amount_deducted_at
+        FROM transactions
+        WHERE action = 'DELAY'
+        AND db_status = 'pending'
+        AND {claim}
+        ORDER BY created_at
+        LIMIT %(batch)s
+        FOR UPDATE SKIP LOCKED
+    ),
+    refunds AS (
+        SELECT user_id, SUM(amount) AS amount
+        FROM claimed
+        WHERE amount_deducted_at IS NOT NULL
+        GROUP BY user_id
+    ),
+    credited AS (
+        UPDATE users u
+        SET balance = u.balance + r.amount
+        FROM refunds r
+        WHERE u.user_id = r.user_id
+        RETURNING u.user_id
+    ),
+    ledger AS (
+        INSERT INTO transaction_ledger (tx_id, operation, user_id, amount, remarks)
+        SELECT tx_id, 'REFUND', user_id, amount, %(remark)s
+        FROM claimed
+        WHERE amount_deducted_at IS NOT NULL
+        RETURNING tx_id
+    )
+    UPDATE transactions t
+    SET db_status = 'auto-refunded',
+        action = 'BLOCK',
+        updated_at = NOW()
+    FROM claimed c
+    WHERE t.tx_id = c.tx_id
+    RETURNING t.tx_id, t.user_id, t.amount
+"""
+# Sweep: every pending DELAY row older than the cutoff
+AUTO_REFUND_SWEEP_CLAIM = "created_at < %(cutoff)s"
+# Expiry consumer: the transactions the schedule reported due
+AUTO_REFUND_DUE_CLAIM = "tx_id = ANY(%(tx_ids)s)"
+
+def _refund_delayed_chunk(loop, claim, params, batch=AUTO_REFUND_BATCH_SIZE):
+    """Refund one chunk of pending DELAY rows matching `claim`; returns the count."""
+    with get_db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            AUTO_REFUND_SQL.format(claim=claim),
+            {**params, "batch": batch, "remark": AUTO_REFUND_REMARK}
+        )
+        refunded = cur.fetchall()
+        conn.commit()
+
+    if refunded:
+        # Refunded rows moved DELAY -> BLOCK
+        invalidate_dashboard_summary()
+
+    for tx in refunded:
+        # Emit WebSocket event for auto-refund
+        try:
+            _fire_ws_event(loop,
+                ws_manager.send_to_user(tx["user_id"], {
+                    "type": "transaction_auto_refunded",
+                    "tx_id": tx["tx_id"],
+                    "amount": float(tx["amount"]),
+                    "reason": AUTO_REFUND_REMARK
+                })
+            )
+        except Exception as e:
+            print(f"WebSocket emit error for auto-refund: {e}")
+
+    return len(refunded)
+
+def rebuild_delay_expiry_schedule():
+    """Re-register every pending DELAY transaction with the expiry schedule."""
+    with get_db_conn() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT tx_id, EXTRACT(EPOCH FROM (NOW() - created_at)) AS age_seconds
+            FROM transactions
+            WHERE action = 'DELAY' AND db_status = 'pending'
+            """
+        )
+        rows = cur.fetchall()
+    now_ts = datetime.now(timezone.utc).timestamp()
+    ttl = AUTO_REFUND_AFTER.total_seconds()
+    return delay_expiry.schedule_many(
+        (row["tx_id"], now_ts + ttl - float(row["age_seconds"] or 0)) for row in rows
+    )
+
 async def auto_refund_delayed_transactions():
-    """Auto-refund transactions that have been delayed for more than 5 minutes"""
+    """
+    Sweep for delayed transactions older than 5 minutes that the expiry
+    schedule did not refund.
+
+    Expired rows are processed in chunks of AUTO_REFUND_BATCH_SIZE, one
+    committed transaction per chunk. Rows are claimed with FOR UPDATE SKIP
+    LOCKED, so several workers can run the job at once without
+    double-refunding.
+    """
     loop = asyncio.get_running_loop()
     def _auto_refund():
-        conn = None
+        cutoff = datetime.now(timezone.utc) - AUTO_REFUND_AFTER
+        total = 0
         try:
-            conn = get_db_conn()
-            cur = conn.cursor()
-            
-            # Find transactions older than 5 minutes with DELAY status
-            five_minutes_ago = datetime.now(timezone.utc) - timedelta(minutes=5)
-            cur.execute(
-                """
-                SELECT tx_id, user_id, amount, recipient_vpa, created_at, amount_deducted_at
-                FROM transactions 
-                WHERE action = 'DELAY' 
-                AND db_status = 'pending'
-                AND created_at < %s
-                """,
-                (five_minutes_ago,)
-            )
-            
-            expired_transactions = cur.fetchall()
-            
-            for tx in expired_transactions:
-                # Refund sender only if funds were previously deducted
-                if tx["amount_deducted_at"] is not None:
-                    cur.execute(
-                        "UPDATE users SET balance = balance + %s WHERE user_id = %s",
-                        (float(tx["amount"]), tx["user_id"])
-                    )
-                    
-                    # Log refund in transaction_ledger
-                    cur.execute(
-                        """
-                        INSERT INTO transaction_ledger (tx_id, operation, user_id, amount, remarks)
-                        VALUES (%s, 'REFUND', %s, %s, %s)
-                        """,
-                        (tx["tx_id"], tx["user_id"], float(tx["amount"]), "Auto-refund after 5 minute timeout")
-                    )
-                
-                # Update transaction status
-                cur.execute(
-                    """
-                    UPDATE transactions 
-                    SET db_status = 'auto-refunded', 
-                        action = 'BLOCK',
-                        updated_at = NOW()
-                    WHERE tx_id = %s
-                    """,
-                    (tx["tx_id"],)
-                )
-                
-                # Emit WebSocket event for auto-refund
-                try:
-                    _fire_ws_event(loop,
-                        ws_manager.send_to_user(tx["user_id"], {
-                            "type": "transaction_auto_refunded",
-                            "tx_id": tx["tx_id"],
-                            "amount": float(tx["amount"]),
-                            "reason": "Auto-refund after 5 minute timeout"
-                        })
-                    )
-                except Exception as e:
-                    print(f"WebSocket emit error for auto-refund: {e}")
-                
-                print(f"Auto-refunded transaction {tx['tx_id']} (₹{tx['amount']})")
-            
-            if expired_transactions:
-                conn.commit()
-                print(f"✓ Auto-refunded {len(expired_transactions)} delayed transactions")
-            
+            while True:
+                refunded = _refund_delayed_chunk(loop, AUTO_REFUND_SWEEP_CLAIM, {"cutoff": cutoff})
+                total += refunded
+                if refunded < AUTO_REFUND_BATCH_SIZE:
+                    break
         except Exception as e:
             print(f"Auto-refund error: {e}")
-            if conn:
-                conn.rollback()
-        finally:
-            if conn:
-                conn.close()
-    
+
+        if total:
+            print(f"✓ Auto-refunded {total} delayed transactions")
+
     return await run_in_threadpool(_auto_refund)
 
+async def prune_rollups():
+    """Drop minute rollup rows older than the retention window"""
+    def _prune():
+        try:
+            with get_db_conn() as conn:
+                deleted = prune_minute_rollups(conn.cursor())
+                conn.commit()
+            if deleted:
+                print(f"✓ Pruned {deleted} minute rollup rows")
+        except Exception as e:
+            print(f"Rollup prune error: {e}")
+
+    return await run_in_threadpool(_prune)
+
 # ============================================================================
 # DATABASE HELPERS
 # ============================================================================
 
 def get_db_conn():
-    """Get PostgreSQL database connection"""
-    return psycopg2.connect(DB_URL, cursor_factory=psycopg2.extras.RealDictCursor)
+    """Borrow a pooled PostgreSQL connection: `with get_db_conn() as conn:`"""
+    return db_connection(DB_URL)
 
 # =========================================================================
 # REDIS CACHING HELPERS
@@ -420,6 +535,7 @@ def get_db_conn():
 def cache_get(key: str):
     """Get value from Redis cache"""
     try:
+        redis_client = get_redis()
         if redis_client:
             return redis_client.get(key)
     except Exception as e:
@@ -429,6 +545,7 @@ def cache_get(key: str):
 def cache_set(key: str, value: str, ttl: int = 300):
     """Set value in Redis cache with TTL"""
     try:
+        redis_client = get_redis()
         if redis_client:
             redis_client.setex(key, ttl, value)
     except Exception as e:
@@ -437,6 +554,7 @@ def cache_set(key: str, value: str, ttl: int = 300):
 def cache_delete(key: str):
     """Delete value from Redis cache"""
     try:
+        redis_client = get_redis()
         if redis_client:
             redis_client.delete(key)
     except Exception as e:
@@ -574,8 +692,7 @@ async def get_current_user(request: Request) -> str:
 async def register_user(user_data: UserRegister):
     """Register a new user"""
     def _register():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             normalized_phone = normalize_phone(user_data.phone)
@@ -619,8 +736,6 @@ async def register_user(user_data: UserRegister):
                 "user": dict_to_json_serializable(dict(user)),
                 "token": token
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_register)
 
@@ -628,8 +743,7 @@ async def register_user(user_data: UserRegister):
 async def login_user(credentials: UserLogin):
     """Login user and return JWT token"""
     def _login():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             normalized_phone = normalize_phone(credentials.phone)
@@ -661,8 +775,6 @@ async def login_user(credentials: UserLogin):
                 "user": dict_to_json_serializable(user_data),
                 "token": token
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_login)
 
@@ -715,8 +827,7 @@ async def register_credential(
 ):
     """Register a new WebAuthn credential (fingerprint/biometric)"""
     def _register_credential():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Check if credential already exists
@@ -765,8 +876,6 @@ async def register_credential(
                 "message": "Biometric authentication enabled successfully",
                 "credential": dict_to_json_serializable(dict(credential))
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_register_credential)
 
@@ -780,8 +889,7 @@ async def create_login_challenge(request: Request):
         raise HTTPException(status_code=400, detail="Phone number required")
     
     def _get_user():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             cur.execute(
                 "SELECT user_id, fingerprint_enabled FROM users WHERE phone = %s AND is_active = TRUE",
@@ -819,8 +927,6 @@ async def create_login_challenge(request: Request):
                 "user_id": user['user_id'],
                 "allowCredentials": [{"id": c['credential_id'], "type": "public-key"} for c in credentials]
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_get_user)
 
@@ -828,8 +934,7 @@ async def create_login_challenge(request: Request):
 async def authenticate_credential(auth_data: WebAuthnAuthenticateRequest):
     """Authenticate user using WebAuthn credential"""
     def _authenticate():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Get credential and user
@@ -876,8 +981,6 @@ async def authenticate_credential(auth_data: WebAuthnAuthenticateRequest):
                 "user": user_data,
                 "token": token
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_authenticate)
 
@@ -885,8 +988,7 @@ async def authenticate_credential(auth_data: WebAuthnAuthenticateRequest):
 async def list_credentials(user_id: str = Depends(get_current_user)):
     """List all registered credentials for user"""
     def _list_credentials():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             cur.execute(
                 """
@@ -903,8 +1005,6 @@ async def list_credentials(user_id: str = Depends(get_current_user)):
                 "status": "success",
                 "credentials": [dict_to_json_serializable(dict(c)) for c in credentials]
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_list_credentials)
 
@@ -912,8 +1012,7 @@ async def list_credentials(user_id: str = Depends(get_current_user)):
 async def revoke_credential(credential_id: str, user_id: str = Depends(get_current_user)):
     """Revoke a WebAuthn credential"""
     def _revoke():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Check ownership
@@ -955,8 +1054,6 @@ async def revoke_credential(credential_id: str, user_id: str = Depends(get_curre
                 "status": "success",
                 "message": "Credential revoked successfully"
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_revoke)
 
@@ -968,8 +1065,7 @@ async def revoke_credential(credential_id: str, user_id: str = Depends(get_curre
 async def get_user_dashboard(user_id: str = Depends(get_current_user)):
     """Get user dashboard data (queries PostgreSQL directly for real-time updates)"""
     def _get_dashboard():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Get user info
@@ -1023,8 +1119,6 @@ async def get_user_dashboard(user_id: str = Depends(get_current_user)):
             }
             
             return result
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_get_dashboard)
 
@@ -1037,17 +1131,20 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
     """Create new transaction and perform fraud detection"""
     loop = asyncio.get_running_loop()
     def _create_transaction():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
-            # Verify user exists
-            cur.execute("SELECT user_id FROM users WHERE user_id = %s", (user_id,))
+            # Verify user exists (created_at feeds the dynamic thresholds)
+            cur.execute("SELECT user_id, created_at FROM users WHERE user_id = %s", (user_id,))
             user = cur.fetchone()
             
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
             
+            account_age_days = 365.0  # default
+            if user.get("created_at"):
+                account_age_days = (datetime.now(timezone.utc) - user["created_at"].replace(tzinfo=timezone.utc)).days
+            
             # Check daily limit and get cumulative amount for today
             today = datetime.now(timezone.utc).date()
             cur.execute(
@@ -1062,8 +1159,12 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
              
             total_today = float(daily_stats["total_amount"]) if daily_stats else 0.0
             
-            # Generate 12-digit UPI transaction ID (pass cursor for DB-backed sequence)
-            tx_id = generate_upi_transaction_id(db_cursor=cur)
+            # Generate 12-digit UPI transaction ID (hi/lo block from the per-day
+            # sequence, reserved on this cursor; MAX-seeded if that fails)
+            try:
+                tx_id = generate_upi_transaction_id(db_cursor=cur)
+            except RuntimeError as e:
+                raise HTTPException(status_code=503, detail=str(e))
             device_id = tx_data.device_id or f"device_{uuid.uuid4().hex[:8]}"
             
             # Find receiver user if it's a registered user
@@ -1098,21 +1199,18 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
             risk_buffer_value = 0.0
             delay_threshold = float(os.getenv("DELAY_THRESHOLD", "0.30"))
             block_threshold = float(os.getenv("BLOCK_THRESHOLD", "0.60"))
+            stage_timings = {}
+            # Engine writes (trust, graph, recipients) go out in one pipeline after commit;
+            # the risk buffer updates atomically on its own (see risk_buffer.RISK_BUFFER_MODE)
+            risk_writes = RiskWriteBatch()
             try:
                 # Ensure project root is on sys.path for app module imports
                 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
                 if project_root not in sys.path:
                     sys.path.insert(0, project_root)
-                from app import scoring
-                
-                # Get detailed scoring with reasons
-                scoring_details = scoring.score_transaction(transaction, return_details=True)
-                if isinstance(scoring_details, dict):
-                    risk_score = scoring_details.get("risk_score", 0.0)
-                    fraud_reasons_list = scoring_details.get("reasons", [])
-                else:
-                    risk_score = scoring_details
-                    fraud_reasons_list = []
+                from app.score_batcher import score_batcher
+                from app.scoring_executor import ScoringOverloaded
+                from app.stage_graph import StageGraph
                 
                 # ============================================================
                 # ENHANCED FRAUD DETECTION PIPELINE (v2)
@@ -1121,61 +1219,101 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
                 # 3. Cumulative Risk Memory (slow-burn detection)
                 # 4. Dynamic Thresholds
                 # 5. Drift Monitoring
+                #
+                # The engines' Redis state only depends on the request, so
+                # it is fetched (one round trip) concurrently with scoring;
+                # the blend math below runs once both are in, in the order
+                # above.
                 # ============================================================
                 
+                def _score(_):
+                    # Detailed scoring with reasons (micro-batched on the main loop)
+                    try:
+                        return score_batcher.score_threadsafe(transaction, loop)
+                    except ScoringOverloaded as e:
+                        raise HTTPException(
+                            status_code=503,
+                            detail="Scoring capacity exceeded, retry later",
+                            headers={"Retry-After": str(e.retry_after)},
+                        )
+                
+                def _context(_):
+                    return fetch_risk_context(user_id, tx_data.recipient_vpa, device_id)
+                
+                def _drift(results):
+                    from app.drift_detector import record_live_features
+                    if isinstance(results["score"], dict):
+                        record_live_features(results["score"].get("features", {}))
+                
+                # Failed lookups resolve to None and the step is skipped below
+                graph = StageGraph("create_transaction")
+                graph.stage("score", _score)
+                graph.stage("context", _context, fallback=lambda e: None)
+                graph.stage("drift", _drift, after=("score",), fallback=lambda e: None)
+                stage_timings = graph.timings
+                prefetched = graph.run()
+                
+                scoring_details = prefetched["score"]
+                if isinstance(scoring_details, dict):
+                    risk_score = scoring_details.get("risk_score", 0.0)
+                    fraud_reasons_list = scoring_details.get("reasons", [])
+                else:
+                    risk_score = scoring_details
+                    fraud_reasons_list = []
+                
                 features = scoring_details.get("features", {})
                 original_ml_score = risk_score
+                context = prefetched["context"]
                 
-                # --- Step 1: Gradual Trust Score ---
-                try:
-                    from app.trust_engine import compute_trust_score, apply_trust_discount
-                    trust_score, trust_details = compute_trust_score(user_id, tx_data.recipient_vpa)
-                    risk_score = apply_trust_discount(risk_score, trust_score)
-                    
-                    # Update fraud reasons based on trust
-                    if trust_score > 0.5:
-                        if "Payment to new/unknown recipient" in fraud_reasons_list:
-                            fraud_reasons_list.remove("Payment to new/unknown recipient")
-                        if "First transaction to this recipient" in fraud_reasons_list:
-                            fraud_reasons_list.remove("First transaction to this recipient")
-                        fraud_reasons_list.insert(0, f"Trusted recipient (trust score: {trust_score:.2f})")
-                    elif trust_score > 0.0:
-                        fraud_reasons_list.insert(0, f"Partially trusted recipient (trust score: {trust_score:.2f})")
-                    
-                    print(f"ML Risk Score for {tx_id}: {original_ml_score:.4f} -> {risk_score:.4f} (trust: {trust_score:.3f})")
-                except Exception as e:
-                    print(f"Trust engine error: {e} - using original score")
-                
-                # --- Step 2: Graph-based Fraud Signals ---
-                graph_risk = 0.0
-                try:
-                    from app.graph_signals import compute_graph_signals
-                    graph_risk, graph_details = compute_graph_signals(
-                        user_id, tx_data.recipient_vpa, device_id
-                    )
-                    
-                    if graph_risk > 0.3:
-                        # Blend graph signal into risk score (20% weight)
-                        risk_score = 0.8 * risk_score + 0.2 * graph_risk
+                with graph.measure("blend"):
+                    # --- Step 1: Gradual Trust Score ---
+                    if context is not None:
+                        from app.trust_engine import apply_trust_discount
+                        trust_score, trust_details = context.trust()
+                        risk_score = apply_trust_discount(risk_score, trust_score)
                         
-                        if graph_details.get("recipient_fraud_ratio", 0) > 0.2:
-                            fraud_reasons_list.append(
-                                f"Recipient has fraud history ({graph_details['recipient_fraud_senders']}/{graph_details['recipient_total_senders']} senders flagged)"
-                            )
-                        if graph_details.get("shared_device_fraud_ratio", 0) > 0:
-                            fraud_reasons_list.append("Device shared with fraud-flagged users")
-                        if graph_details.get("user_fraud_count", 0) > 0:
-                            fraud_reasons_list.append(f"User has {graph_details['user_fraud_count']} prior fraud flag(s)")
+                        # Update fraud reasons based on trust
+                        if trust_score > 0.5:
+                            if "Payment to new/unknown recipient" in fraud_reasons_list:
+                                fraud_reasons_list.remove("Payment to new/unknown recipient")
+                            if "First transaction to this recipient" in fraud_reasons_list:
+                                fraud_reasons_list.remove("First transaction to this recipient")
+                            fraud_reasons_list.insert(0, f"Trusted recipient (trust score: {trust_score:.2f})")
+                        elif trust_score > 0.0:
+                            fraud_reasons_list.insert(0, f"Partially trusted recipient (trust score: {trust_score:.2f})")
+                        
+                        print(f"ML Risk Score for {tx_id}: {original_ml_score:.4f} -> {risk_score:.4f} (trust: {trust_score:.3f})")
                     
-                    print(f"  Graph risk: {graph_risk:.4f} | Final blended: {risk_score:.4f}")
-                except Exception as e:
-                    print(f"Graph signals error: {e}")
+                    # --- Step 2: Graph-based Fraud Signals ---
+                    graph_risk = 0.0
+                    if context is not None:
+                        graph_risk, graph_details = context.graph()
+                        
+                        if graph_risk > 0.3:
+                            # Blend graph signal into risk score (20% weight)
+                            risk_score = 0.8 * risk_score + 0.2 * graph_risk
+                            
+                            if graph_details.get("recipient_fraud_ratio", 0) > 0.2:
+                                fraud_reasons_list.append(
+                                    f"Recipient has fraud history ({graph_details['recipient_fraud_senders']}/{graph_details['recipient_total_senders']} senders flagged)"
+                                )
+                            if graph_details.get("shared_device_fraud_ratio", 0) > 0:
+                                fraud_reasons_list.append("Device shared with fraud-flagged users")
+                            if graph_details.get("user_fraud_count", 0) > 0:
+                                fraud_reasons_list.append(f"User has {graph_details['user_fraud_count']} prior fraud flag(s)")
+                        
+                        print(f"  Graph risk: {graph_risk:.4f} | Final blended: {risk_score:.4f}")
                 
                 # --- Step 3: Cumulative Risk Memory (Slow-Burn Detection) ---
                 buffer_action = "NONE"
                 try:
                     from app.risk_buffer import update_risk_buffer
-                    risk_buffer_value, buffer_action = update_risk_buffer(user_id, risk_score)
+                    with graph.measure("buffer_update"):
+                        risk_buffer_value, buffer_action = update_risk_buffer(
+                            user_id, risk_score,
+                            old_buffer=context.buffer()[0] if context is not None else None,
+                            pipe=risk_writes.pipe,
+                        )
                     
                     if buffer_action == "ESCALATE":
                         fraud_reasons_list.append(f"Cumulative risk elevated (buffer: {risk_buffer_value:.2f})")
@@ -1191,37 +1329,26 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
                 try:
                     from app.dynamic_thresholds import compute_dynamic_thresholds
                     
-                    # Get account age for threshold computation
-                    account_age_days = 365.0  # default
-                    try:
-                        cur.execute("SELECT created_at FROM users WHERE user_id = %s", (user_id,))
-                        user_row = cur.fetchone()
-                        if user_row and user_row.get("created_at"):
-                            account_age_days = (datetime.now(timezone.utc) - user_row["created_at"].replace(tzinfo=timezone.utc)).days
-                    except Exception:
-                        pass
-                    
-                    delay_threshold, block_threshold, threshold_details = compute_dynamic_thresholds(
-                        amount=float(tx_data.amount),
-                        features=features,
-                        risk_buffer_value=risk_buffer_value,
-                        account_age_days=account_age_days,
-                    )
+                    with graph.measure("thresholds"):
+                        delay_threshold, block_threshold, threshold_details = compute_dynamic_thresholds(
+                            amount=float(tx_data.amount),
+                            features=features,
+                            risk_buffer_value=risk_buffer_value,
+                            account_age_days=account_age_days,
+                        )
                     print(f"  Dynamic thresholds: delay={delay_threshold:.3f}, block={block_threshold:.3f}")
                 except Exception as e:
                     print(f"Dynamic thresholds error: {e} - using static defaults")
                     delay_threshold = float(os.getenv("DELAY_THRESHOLD", "0.30"))
                     block_threshold = float(os.getenv("BLOCK_THRESHOLD", "0.60"))
                 
-                # --- Step 5: Record features for Drift Monitoring ---
-                try:
-                    from app.drift_detector import record_live_features
-                    record_live_features(features)
-                except Exception as e:
-                    print(f"Drift recording error: {e}")
+                # --- Step 5: Drift Monitoring (recorded by the "drift" stage) ---
                 
                 if fraud_reasons_list:
                     print(f"  Fraud Reasons: {fraud_reasons_list}")
+            except HTTPException:
+                # Load shedding (503) must reach the client, not the rule-based fallback
+                raise
             except Exception as e:
                 print(f"Scoring error: {e}")
                 fraud_reasons_list = []
@@ -1269,7 +1396,8 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
                     "delay": delay_threshold,
                     "block": block_threshold
                 },
-                "final_risk_score": risk_score
+                "final_risk_score": risk_score,
+                "stage_timings_ms": dict(stage_timings) or None
             }
             
             # Remove None values for cleaner JSON
@@ -1295,10 +1423,13 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
             # Handle different actions
             if action == "ALLOW":
                 # Track recipient relationship in Redis for future transaction analysis
-                if redis_client:
+                redis_pipe = risk_writes.pipe
+                if redis_pipe is not None:
                     rec_key = f"user:{user_id}:recipients"
-                    redis_client.sadd(rec_key, tx_data.recipient_vpa)
-                    redis_client.expire(rec_key, 86400 * 30)  # 30 day TTL
+                    redis_pipe.sadd(rec_key, tx_data.recipient_vpa)
+                    redis_pipe.expire(rec_key, 86400 * 30)  # 30 day TTL
+                    from app.feature_engine import feature_cache
+                    feature_cache.note_recipient(user_id, tx_data.recipient_vpa)
                     print(f"✓ Tracked recipient {tx_data.recipient_vpa} for user {user_id}")
                 
                 # Log in transaction_ledger (no balance deduction - demo mode)
@@ -1336,13 +1467,14 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
                 # Record successful transaction in trust engine & graph
                 try:
                     from app.trust_engine import record_transaction as trust_record
-                    trust_record(user_id, tx_data.recipient_vpa, float(tx_data.amount), is_fraud=False)
+                    trust_record(user_id, tx_data.recipient_vpa, float(tx_data.amount), is_fraud=False,
+                                 pipe=risk_writes.pipe)
                 except Exception as e:
                     print(f"Trust recording error: {e}")
                 
                 try:
                     from app.graph_signals import record_transaction_edge
-                    record_transaction_edge(user_id, tx_data.recipient_vpa, device_id)
+                    record_transaction_edge(user_id, tx_data.recipient_vpa, device_id, pipe=risk_writes.pipe)
                 except Exception as e:
                     print(f"Graph edge recording error: {e}")
             
@@ -1365,16 +1497,16 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
                 # Record fraud signals in graph and trust engine
                 try:
                     from app.graph_signals import record_fraud_edge, record_transaction_edge
-                    record_transaction_edge(user_id, tx_data.recipient_vpa, device_id)
+                    record_transaction_edge(user_id, tx_data.recipient_vpa, device_id, pipe=risk_writes.pipe)
                     if action == "BLOCK":
-                        record_fraud_edge(user_id, tx_data.recipient_vpa, device_id)
+                        record_fraud_edge(user_id, tx_data.recipient_vpa, device_id, pipe=risk_writes.pipe)
                 except Exception as e:
                     print(f"Graph fraud recording error: {e}")
                 
                 try:
                     from app.trust_engine import record_fraud_flag
                     if action == "BLOCK":
-                        record_fraud_flag(user_id, tx_data.recipient_vpa)
+                        record_fraud_flag(user_id, tx_data.recipient_vpa, pipe=risk_writes.pipe)
                 except Exception as e:
                     print(f"Trust fraud flag error: {e}")
             
@@ -1393,11 +1525,20 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
             )
             
             conn.commit()
+            risk_writes.execute()
 
-            # Clear dashboard cache for sender and receiver
+            # Register for auto-refund when the delay window expires
+            if action == "DELAY":
+                try:
+                    delay_expiry.schedule(tx_id, datetime.now(timezone.utc).timestamp() + AUTO_REFUND_AFTER.total_seconds())
+                except Exception as e:
+                    print(f"Delay expiry schedule error: {e}")
+
+            # Clear dashboard cache for sender and receiver, and the admin summary
             cache_delete(f"dashboard:{user_id}")
             if receiver_user_id:
                 cache_delete(f"dashboard:{receiver_user_id}")
+            invalidate_dashboard_summary()
             
             # Schedule WebSocket events (fire from sync thread to main loop)
             try:
@@ -1440,8 +1581,6 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
                 "receiver_user_id": receiver_user_id,
                 "fraud_reasons": fraud_reasons_list
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_create_transaction)
 
@@ -1449,8 +1588,7 @@ async def create_transaction(tx_data: TransactionCreate, user_id: str = Depends(
 async def handle_user_decision(decision_data: UserDecision, user_id: str = Depends(get_current_user)):
     """Handle user's decision on flagged transaction"""
     def _handle_decision():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Get transaction
@@ -1555,18 +1693,17 @@ async def handle_user_decision(decision_data: UserDecision, user_id: str = Depen
             
             conn.commit()
 
-            # Clear dashboard cache for sender and receiver
+            # Clear dashboard cache for sender and receiver, and the admin summary (action changed)
             cache_delete(f"dashboard:{user_id}")
             if transaction.get("receiver_user_id"):
                 cache_delete(f"dashboard:{transaction['receiver_user_id']}")
+            invalidate_dashboard_summary()
             
             return {
                 "status": "success",
                 "message": f"Transaction {decision_data.decision}ed successfully",
                 "transaction": dict_to_json_serializable(dict(result))
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_handle_decision)
 
@@ -1578,8 +1715,7 @@ async def get_user_transactions(
 ):
     """Get user transaction history with optional filtering"""
     def _get_transactions():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Optimized query - avoid LEFT JOIN, fetch fraud_alerts separately only when needed
@@ -1642,8 +1778,6 @@ async def get_user_transactions(
                 "transactions": dict_to_json_serializable(processed_transactions),
                 "count": len(processed_transactions)
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_get_transactions)
 
@@ -1655,8 +1789,7 @@ async def get_user_transactions(
 async def register_push_token(token_data: PushToken, user_id: str = Depends(get_current_user)):
     """Register FCM push notification token for user"""
     def _register_token():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Check if token already exists
@@ -1691,8 +1824,6 @@ async def register_push_token(token_data: PushToken, user_id: str = Depends(get_
                 "status": "success",
                 "message": "Push token registered successfully"
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_register_token)
 
@@ -1709,8 +1840,7 @@ async def register_push_token(token_data: PushToken, user_id: str = Depends(get_
 async def search_users(phone: str = "", user_id: str = Depends(get_current_user)):
     """Search for registered users by phone number"""
     def _search_users():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Search users by phone number (partial match)
@@ -1741,8 +1871,6 @@ async def search_users(phone: str = "", user_id: str = Depends(get_current_user)
                 "results": results,
                 "count": len(results)
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_search_users)
 
@@ -1751,8 +1879,7 @@ async def confirm_transaction(confirm_data: TransactionConfirm, user_id: str = D
     """Confirm a delayed transaction and credit the receiver"""
     loop = asyncio.get_running_loop()
     def _confirm():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Get transaction details
@@ -1824,10 +1951,11 @@ async def confirm_transaction(confirm_data: TransactionConfirm, user_id: str = D
             
             conn.commit()
 
-            # Clear dashboard cache for sender and receiver
+            # Clear dashboard cache for sender and receiver, and the admin summary (action changed)
             cache_delete(f"dashboard:{user_id}")
             if transaction.get("receiver_user_id"):
                 cache_delete(f"dashboard:{transaction['receiver_user_id']}")
+            invalidate_dashboard_summary()
             
             # Emit WebSocket events
             try:
@@ -1872,8 +2000,6 @@ async def confirm_transaction(confirm_data: TransactionConfirm, user_id: str = D
                 "amount": float(transaction["amount"]),
                 "receiver_balance": float(receiver_balance["balance"]) if receiver_balance else None
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_confirm)
 
@@ -1882,8 +2008,7 @@ async def cancel_transaction(cancel_data: TransactionCancel, user_id: str = Depe
     """Cancel a delayed transaction and refund the sender"""
     loop = asyncio.get_running_loop()
     def _cancel():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Get transaction details
@@ -1942,10 +2067,11 @@ async def cancel_transaction(cancel_data: TransactionCancel, user_id: str = Depe
             
             conn.commit()
 
-            # Clear dashboard cache for sender and receiver
+            # Clear dashboard cache for sender and receiver, and the admin summary (action changed)
             cache_delete(f"dashboard:{user_id}")
             if transaction.get("receiver_user_id"):
                 cache_delete(f"dashboard:{transaction['receiver_user_id']}")
+            invalidate_dashboard_summary()
             
             # Emit WebSocket events
             try:
@@ -1970,8 +2096,6 @@ async def cancel_transaction(cancel_data: TransactionCancel, user_id: str = Depe
                 "refunded": sender_balance is not None,
                 "refunded_balance": float(sender_balance["balance"]) if sender_balance else None
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_cancel)
 
@@ -1979,8 +2103,7 @@ async def cancel_transaction(cancel_data: TransactionCancel, user_id: str = Depe
 async def get_transaction(tx_id: str, user_id: str = Depends(get_current_user)):
     """Get transaction details"""
     def _get_transaction():
-        conn = get_db_conn()
-        try:
+        with get_db_conn() as conn:
             cur = conn.cursor()
             
             # Get transaction details (user must be sender or receiver)
@@ -2005,8 +2128,6 @@ async def get_transaction(tx_id: str, user_id: str = Depends(get_current_user)):
                 "status": "success",
                 "transaction": dict_to_json_serializable(dict(transaction))
             }
-        finally:
-            conn.close()
     
     return await run_in_threadpool(_get_transaction)
 
@@ -2068,6 +2189,20 @@ def health_check():
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
+@app.get("/api/scoring-metrics")
+def scoring_metrics():
+    """Queue depth and batch size metrics for the live scoring micro-batcher"""
+    from app.score_batcher import score_batcher
+    from app.feature_engine import feature_cache
+    from app.redis_pool import get_pool_metrics
+    from app.db_pool import get_pool_metrics as get_db_pool_metrics
+    from app.stage_graph import get_stage_metrics
+    from app.risk_context import get_metrics as get_risk_context_metrics
+    return {"batcher": score_batcher.get_metrics(), "feature_cache": feature_cache.get_metrics(),
+            "redis_pool": get_pool_metrics(), "db_pool": get_db_pool_metrics(DB_URL),
+            "tx_id_allocator": tx_id_allocator.get_metrics(), "delay_expiry": delay_expiry.get_metrics(),
+            "stages": get_stage_metrics(), "risk_context": get_risk_context_metrics()}
+
 @app.get("/api/info")
 def app_info():
     """App information endpoint"""
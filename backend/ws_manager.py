@@ -1,12 +1,18 @@
 """
 FDT WebSocket Manager
 Handles real-time WebSocket connections for Send Money feature
+
+Connections are per worker. send_to_user() and broadcast_to_all() deliver
+to this worker's sockets directly and publish the message on the user's
+Redis channel (app.ws_bus), so sockets held by other workers get it too.
 """
 
 import json
 from typing import Dict, List
 from datetime import datetime
 
+from app.ws_bus import USERS_CHANNEL, user_channel, ws_bus
+
 class WebSocketManager:
     def __init__(self):
         """Initialize the WebSocket manager"""
@@ -20,6 +26,9 @@ class WebSocketManager:
         # Store connection
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
+            # First socket for this user on this worker: listen for other workers' sends
+            ws_bus.subscribe(user_channel(user_id), lambda message, uid=user_id: self._deliver(uid, message))
+            ws_bus.subscribe(USERS_CHANNEL, self._deliver_all)
         
         self.active_connections[user_id].append(websocket)
         self.connection_info[websocket] = {
@@ -42,6 +51,7 @@ class WebSocketManager:
                 # Clean up empty user entries
                 if not self.active_connections[user_id]:
                     del self.active_connections[user_id]
+                    ws_bus.unsubscribe(user_channel(user_id))
             
             # Remove connection info
             del self.connection_info[websocket]
@@ -56,7 +66,12 @@ class WebSocketManager:
             print(f"Error sending personal message: {e}")
 
     async def send_to_user(self, user_id: str, message: dict):
-        """Send a message to all connections for a specific user"""
+        """Send a message to all connections for a specific user, on every worker"""
+        ws_bus.publish(user_channel(user_id), message)
+        await self._deliver(user_id, message)
+
+    async def _deliver(self, user_id: str, message: dict):
+        """Send a message to this worker's connections for a user"""
         if user_id in self.active_connections:
             message_str = json.dumps(message)
             disconnected_connections = []
@@ -73,7 +88,12 @@ class WebSocketManager:
                 self.disconnect(connection)
 
     async def broadcast_to_all(self, message: dict):
-        """Broadcast a message to all connected users"""
+        """Broadcast a message to all connected users, on every worker"""
+        ws_bus.publish(USERS_CHANNEL, message)
+        await self._deliver_all(message)
+
+    async def _deliver_all(self, message: dict):
+        """Broadcast a message to this worker's connected users"""
         message_str = json.dumps(message)
         all_disconnected = []
         
@@ -94,7 +114,7 @@ class WebSocketManager:
             self.disconnect(connection)
 
     def get_connection_count(self):
-        """Get total number of active connections"""
+        """Get total number of active connections on this worker"""
         return sum(len(connections) for connections in self.active_connections.values())
 
     def get_user_count(self):
@@ -102,7 +122,7 @@ class WebSocketManager:
         return len(self.active_connections)
 
     def is_user_connected(self, user_id: str):
-        """Check if a user is currently connected"""
+        """Check if a user is currently connected to this worker"""
         return user_id in self.active_connections and len(self.active_connections[user_id]) > 0
 
 # Global WebSocket manager instance
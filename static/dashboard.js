@@ -76,16 +76,28 @@ let txCache = window.txCache || [];
 let chatHistory = [];
 let sortState = window.sortState || { column: 'time', direction: 'desc' };
 let useServerTimeline = false; // prefer server-provided timeline when available
+// Server aggregates for the whole range (/dashboard-summary) and the live
+// transactions received since they were fetched (newest first)
+let serverAnalytics = null;
+let summaryAlerts = [];
+let liveTx = [];
+// Live delta stream (see app/live_deltas.py): the range, snapshot epoch and
+// last applied seq, so a reconnect only replays what was missed
+let liveSocket = null;
+let liveRange = null;
+let liveEpoch = null;
+let liveSeq = 0;
+// Page size for /recent-transactions (the table shows the newest rows only)
+const TX_PAGE_SIZE = 300;
 // Prevent stale server responses from overwriting live UI increments
 let lastServerTotal = null;
 // Track when the time range changes so server should be authoritative
 let _rangeChanged = false;
 // Response cache to avoid redundant API calls
 let _responseCache = {
-  'dashboard-data': {},
+  'dashboard-summary': {},
   'recent-transactions': {},
-  'pattern-analytics': {},
-  'dashboard-analytics': {}
+  'pattern-analytics': {}
 };
 // Simple debounce utility for bursty websocket updates (minimal delay for instant feedback)
 const _debounceTimers = {};
@@ -612,10 +624,13 @@ function hideAlertsLoading() {
 
 // Data loading functions
 async function loadDashboardData() {
+  // While subscribed to this range, snapshots and deltas are authoritative
+  if (isLiveSubscribed()) return;
   try {
-    const url = `/dashboard-data?time_range=${currentTimeRange}`;
+    // Counters, chart series and alerts in one cached server-side payload
+    const url = `/dashboard-summary?time_range=${currentTimeRange}`;
     console.log(`[loadDashboardData] Fetching from: ${url}`);
-    const j = await cachedFetch(url, 'dashboard-data', 15000); // 15 second cache for stats
+    const j = await cachedFetch(url, 'dashboard-summary', 15000); // 15 second cache for stats
     const s = j.stats || {};
     console.log(`[loadDashboardData] Got stats:`, s);
 
@@ -666,6 +681,18 @@ async function loadDashboardData() {
     if (timeLabel) {
       timeLabel.textContent = getRangeLabel(currentTimeRange);
     }
+
+    // The transaction table only holds one page, so charts and alerts are
+    // drawn from the summary; live inserts since this fetch are added on top
+    if (j !== serverAnalytics) {
+      serverAnalytics = j;
+      summaryAlerts = Array.isArray(j.alerts) ? j.alerts : [];
+      liveTx = [];
+    }
+    useServerTimeline = !!(j.timeline && j.risk);
+    updateTimelineFromCache();
+    updateRiskDistributionFromCache();
+    updateHighRiskAlerts(highRiskAlerts());
   } catch (e) {
     console.error('loadDashboardData error', e);
     showToast('error', 'Failed to load dashboard statistics - Data may be outdated. Refresh the page to try again.', 'Data Load Error');
@@ -741,25 +768,28 @@ async function loadModelAccuracy() {
   }
 }
 
-function getLimitForRange(range) {
-  switch (range) {
-    case '1h':
-      return 50; // finer granularity
-    case '24h':
-      return 300; // enough to populate hourly buckets
-    case '7d':
-      return 1500; // larger window for week view
-    case '30d':
-      return 3000; // month view aggregation
-    default:
-      return 200;
-  }
+// Every transaction in a range, following next_cursor page by page
+async function fetchAllTransactions(timeRange) {
+  const all = [];
+  let cursor = null;
+  do {
+    const params = new URLSearchParams({ limit: '1000', time_range: timeRange, _: String(Date.now()) });
+    if (cursor) params.set('cursor', cursor);
+    const res = await fetch(`/recent-transactions?${params}`);
+    if (!res.ok) throw new Error('Failed to fetch transactions');
+    const page = await res.json();
+    all.push(...(page.transactions || []));
+    cursor = page.next_cursor;
+  } while (cursor);
+  return all;
 }
 
 async function loadRecentTransactions() {
   try {
-    const limit = getLimitForRange(currentTimeRange);
-    const url = `/recent-transactions?limit=${limit}&time_range=${currentTimeRange}`;
+    // One page of the newest rows; the action filter is applied server-side
+    const filter = document.getElementById('txFilter')?.value || 'ALL';
+    const actionParam = filter === 'ALL' ? '' : `&action=${filter}`;
+    const url = `/recent-transactions?limit=${TX_PAGE_SIZE}&time_range=${currentTimeRange}${actionParam}`;
     console.log(`[loadRecentTransactions] Fetching from: ${url}`);
     const j = await cachedFetch(url, 'recent-transactions', 20000); // 20 second cache for transactions
     txCache = Array.isArray(j.transactions) ? j.transactions : [];
@@ -778,7 +808,7 @@ async function loadRecentTransactions() {
     }
 
     // Immediately update charts from fresh cache data, including realtime timeline
-    updateHighRiskAlerts(txCache);
+    updateHighRiskAlerts(highRiskAlerts());
     updateTimelineFromCache();
     updateRiskDistributionFromCache();
     console.log('[loadRecentTransactions] Complete');
@@ -788,21 +818,6 @@ async function loadRecentTransactions() {
   }
 }
 
-// Aggregated analytics for charts
-async function loadDashboardAnalytics() {
-  try {
-    const url = `/dashboard-analytics?time_range=${currentTimeRange}`;
-    const data = await cachedFetch(url, 'dashboard-analytics', 15000);
-    
-    // DISABLED server timeline - using client-side cache timeline for consistency
-    // This prevents dual updates that overwrite each other
-    console.log('Server analytics loaded, but using client-side timeline generation');
-    
-  } catch (e) {
-    console.error('loadDashboardAnalytics error', e);
-  }
-}
-
 // Transaction row builder
 function makeTxRow(tx) {
   const o = Object.assign({}, tx || {});
@@ -877,6 +892,29 @@ function renderTransactionTable() {
   }
 }
 
+// Server timestamps without an offset are UTC (see to_json_serializable)
+function parseServerTs(raw) {
+  const s = String(raw || '');
+  return new Date(/(Z|[+-]\d{2}:?\d{2})$/.test(s) ? s : `${s}Z`);
+}
+
+// Chart input as {ts, action, count}: server buckets plus live transactions,
+// or the loaded page until the aggregates arrive
+function chartEvents() {
+  const fromTx = txs => txs.map(tx => ({ ts: tx.ts || tx.created_at || tx.timestamp, action: tx.action, count: 1 }));
+  if (!useServerTimeline || !serverAnalytics) return fromTx(txCache);
+
+  const t = serverAnalytics.timeline;
+  const events = [];
+  (t.labels || []).forEach((label, i) => {
+    const ts = parseServerTs(label);
+    events.push({ ts, action: 'BLOCK', count: t.block[i] || 0 });
+    events.push({ ts, action: 'DELAY', count: t.delay[i] || 0 });
+    events.push({ ts, action: 'ALLOW', count: t.allow[i] || 0 });
+  });
+  return events.filter(e => e.count > 0).concat(fromTx(liveTx));
+}
+
 // Chart update functions
 function updateRiskDistributionFromCache() {
   console.log('[updateRiskDistributionFromCache] Called', {
@@ -890,7 +928,23 @@ function updateRiskDistributionFromCache() {
     return;
   }
   
-  if (txCache.length === 0) {
+  let low = 0, medium = 0, high = 0, critical = 0;
+  const countRisk = tx => {
+    const r = Number(tx.risk_score ?? 0);
+    if (r < 0.3) low++;
+    else if (r < 0.6) medium++;
+    else if (r < 0.8) high++;
+    else critical++;
+  };
+
+  if (useServerTimeline && serverAnalytics) {
+    ({ low, medium, high, critical } = serverAnalytics.risk);
+    liveTx.forEach(countRisk);
+  } else {
+    txCache.forEach(countRisk);
+  }
+
+  if (low + medium + high + critical === 0) {
     console.log('[updateRiskDistributionFromCache] No data - showing no-data overlay');
     // Show no data overlay when there are no transactions
     riskPie.data.datasets[0].data = [0, 0, 0, 0];
@@ -899,17 +953,6 @@ function updateRiskDistributionFromCache() {
     return;
   }
 
-  console.log('[updateRiskDistributionFromCache] Processing', txCache.length, 'transactions');
-  let low = 0, medium = 0, high = 0, critical = 0;
-
-  txCache.forEach(tx => {
-    const r = Number(tx.risk_score ?? 0);
-    if (r < 0.3) low++;
-    else if (r < 0.6) medium++;
-    else if (r < 0.8) high++;
-    else critical++;
-  });
-
   riskPie.data.labels = ['Low', 'Medium', 'High', 'Critical'];
   riskPie.data.datasets[0].data = [low, medium, high, critical];
   
@@ -981,9 +1024,10 @@ function updateTimelineFromCache() {
   }
 
   // Process transactions and match to buckets
-  if (Array.isArray(txCache) && txCache.length > 0) {
-    txCache.forEach(tx => {
-      const ts = new Date(tx.ts || tx.created_at || tx.timestamp);
+  const events = chartEvents();
+  if (events.length > 0) {
+    events.forEach(ev => {
+      const ts = new Date(ev.ts);
       if (isNaN(ts)) return;
 
       let key;
@@ -1004,10 +1048,10 @@ function updateTimelineFromCache() {
         key = ts.toLocaleDateString([], { month: 'short', day: '2-digit' });
       }
 
-      const action = (tx.action || '').toUpperCase();
+      const action = (ev.action || '').toUpperCase();
       if (buckets[key]) {
         if (buckets[key][action] !== undefined) {
-          buckets[key][action]++;
+          buckets[key][action] += ev.count;
         }
       }
     });
@@ -1025,7 +1069,7 @@ function updateTimelineFromCache() {
     timelineChart.update('none');
     
     // Check if chart has any data
-    const hasData = txCache && txCache.length > 0;
+    const hasData = events.length > 0;
     if (!hasData) {
       showChartNoData('timeline');
     } else {
@@ -1034,6 +1078,13 @@ function updateTimelineFromCache() {
   }
 }
 
+// Newest high-risk transactions: live inserts, then the summary's alerts
+// (or the loaded page until the summary arrives)
+function highRiskAlerts() {
+  const source = serverAnalytics ? liveTx.concat(summaryAlerts) : txCache;
+  return source.filter(tx => Number(tx.risk_score || 0) >= 0.8).slice(0, 10);
+}
+
 function updateHighRiskAlerts(transactions) {
   const container = document.getElementById('alertsList');
   if (!container) return;
@@ -1066,19 +1117,107 @@ function updateHighRiskAlerts(transactions) {
   }
 }
 
+// Live dashboard deltas
+function isLiveSubscribed() {
+  return !!(liveSocket && liveSocket.readyState === WebSocket.OPEN && liveEpoch && liveRange === currentTimeRange);
+}
+
+// Subscribe to the current range; resumes from liveSeq when the range is unchanged
+function subscribeLive() {
+  if (!liveSocket || liveSocket.readyState !== WebSocket.OPEN) return;
+  const resume = liveRange === currentTimeRange && liveEpoch;
+  liveSocket.send(JSON.stringify({
+    type: 'subscribe',
+    range: currentTimeRange,
+    epoch: resume ? liveEpoch : null,
+    since_seq: resume ? liveSeq : null
+  }));
+}
+
+function redrawLive() {
+  renderTransactionTable();
+  updateTimelineFromCache();
+  updateRiskDistributionFromCache();
+  updateHighRiskAlerts(highRiskAlerts());
+}
+
+function applyLiveSnapshot(msg) {
+  liveRange = msg.range;
+  liveEpoch = msg.epoch;
+  liveSeq = msg.seq;
+  if (msg.range !== currentTimeRange) return;
+
+  const s = msg.stats || {};
+  const cards = { totalTx: s.totalTransactions, blockedTx: s.blocked, delayedTx: s.delayed, allowedTx: s.allowed };
+  Object.entries(cards).forEach(([id, val]) => {
+    const el = document.getElementById(id);
+    if (el) el.textContent = Number(val || 0).toLocaleString();
+  });
+  serverAnalytics = { risk: msg.risk, timeline: msg.timeline };
+  summaryAlerts = Array.isArray(msg.alerts) ? msg.alerts : [];
+  liveTx = [];
+  useServerTimeline = !!(msg.timeline && msg.risk);
+  redrawLive();
+}
+
+function applyLiveDelta(msg) {
+  if (msg.epoch !== liveEpoch || msg.range !== liveRange) return subscribeLive();
+  if (msg.seq <= liveSeq) return; // already applied
+  if (msg.seq !== liveSeq + 1) return subscribeLive(); // gap: ask for what was missed
+  liveSeq = msg.seq;
+
+  const cardIds = { totalTransactions: 'totalTx', blocked: 'blockedTx', delayed: 'delayedTx', allowed: 'allowedTx' };
+  Object.entries(msg.counters || {}).forEach(([k, v]) => incrementStatById(cardIds[k], v));
+  if (serverAnalytics) {
+    Object.entries(msg.risk || {}).forEach(([k, v]) => {
+      serverAnalytics.risk[k] = (serverAnalytics.risk[k] || 0) + v;
+    });
+    if (msg.bucket) {
+      const t = serverAnalytics.timeline;
+      let i = t.labels.indexOf(msg.bucket.label);
+      if (i === -1) {
+        t.labels.push(msg.bucket.label);
+        t.block.push(0); t.delay.push(0); t.allow.push(0);
+        i = t.labels.length - 1;
+      }
+      ['block', 'delay', 'allow'].forEach(k => { t[k][i] += msg.bucket[k] || 0; });
+    }
+  }
+
+  const tx = msg.tx || {};
+  const filter = document.getElementById('txFilter')?.value || 'ALL';
+  if (msg.op === 'update') {
+    const idx = txCache.findIndex(t => t.tx_id === tx.tx_id);
+    if (idx !== -1) txCache[idx] = Object.assign({}, txCache[idx], tx);
+  } else {
+    if (filter === 'ALL' || filter === tx.action) {
+      txCache.unshift(tx);
+      if (txCache.length > TX_PAGE_SIZE) txCache.pop();
+    }
+    if (Number(tx.risk_score || 0) >= 0.8) summaryAlerts.unshift(tx);
+  }
+  redrawLive();
+}
+
 // WebSocket setup
 function setupWebSocket() {
   const proto = location.protocol === 'https:' ? 'wss' : 'ws';
   const ws = new WebSocket(`${proto}://${location.host}/ws`);
+  liveSocket = ws;
 
   ws.onopen = () => {
     console.log('WebSocket connected');
+    subscribeLive();
     showToast('success', 'Connected to real-time data stream - You\'ll receive instant updates for new transactions', 'Live Updates Active');
   };
 
   ws.onmessage = (ev) => {
     try {
       const msg = JSON.parse(ev.data);
+      if (msg && msg.type === 'snapshot') return applyLiveSnapshot(msg);
+      if (msg && msg.type === 'delta') return applyLiveDelta(msg);
+      // The server dropped queued messages for this (slow) connection
+      if (msg && msg.type === 'resync') return isLiveSubscribed() ? subscribeLive() : loadDashboardData();
       if (!msg || !msg.data) return;
 
       const txObj = msg.data;
@@ -1086,12 +1225,13 @@ function setupWebSocket() {
 
       if (msgType === 'tx_inserted') {
         txCache.unshift(txObj);
-        if (txCache.length > 200) txCache.pop();
+        if (txCache.length > TX_PAGE_SIZE) txCache.pop();
+        if (serverAnalytics) liveTx.unshift(txObj);
 
         renderTransactionTable();
 
         // Immediate chart updates with no debounce for instant visual feedback
-        updateHighRiskAlerts(txCache);
+        updateHighRiskAlerts(highRiskAlerts());
         // Always push realtime updates to the timeline from cache
         updateTimelineFromCache();
         updateRiskDistributionFromCache();
@@ -1125,7 +1265,7 @@ function setupWebSocket() {
 
       if (msgType === 'tx_updated') {
         invalidateCache('recent-transactions', '/recent-transactions');
-        invalidateCache('dashboard-data', '/dashboard-data');
+        invalidateCache('dashboard-summary', '/dashboard-summary');
         invalidateCache('pattern-analytics', '/pattern-analytics');
         loadRecentTransactions();
         debounce('dashboardData', () => loadDashboardData(), 100);
@@ -1265,9 +1405,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
   // Initialize data loading
   try {
-    loadDashboardData();
+    loadDashboardData(); // counters, charts and alerts from /dashboard-summary
     loadRecentTransactions();
-    loadDashboardAnalytics(); // server aggregated timeline for full range coverage
     loadPatternAnalytics();
     loadModelAccuracy(); // Load model performance metrics
   } catch (err) {
@@ -1295,6 +1434,10 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // Clear chart data AND transaction cache immediately to prevent stale data rendering
     txCache = []; // Clear cache to prevent updateTimelineFromCache from using old data
+    serverAnalytics = null;
+    summaryAlerts = [];
+    liveTx = [];
+    useServerTimeline = false;
     
     if (timelineChart) {
       timelineChart.data.labels = [];
@@ -1311,16 +1454,17 @@ document.addEventListener('DOMContentLoaded', () => {
     }
     
     // Clear response cache for all endpoints to ensure fresh data on range change
-    _responseCache['dashboard-data'] = {};
+    _responseCache['dashboard-summary'] = {};
     _responseCache['recent-transactions'] = {};
-    _responseCache['dashboard-analytics'] = {};
     _responseCache['pattern-analytics'] = {};
     
     // Fetch all data in parallel for fastest response
+    // Live stream switches to the new range (answers with a snapshot)
+    subscribeLive();
+
     await Promise.all([
       loadDashboardData(),
       loadRecentTransactions(),
-      loadDashboardAnalytics(),
       loadPatternAnalytics()
     ]);
     
@@ -1349,9 +1493,10 @@ document.addEventListener('DOMContentLoaded', () => {
   });
 
   // Transaction filter
-  document.getElementById('txFilter').addEventListener('change', (e) => {
+  document.getElementById('txFilter').addEventListener('change', async (e) => {
     const filter = e.target.value;
-    renderTransactionTable();
+    invalidateCache('recent-transactions', '/recent-transactions');
+    await loadRecentTransactions();
     const filterLabel = filter === 'ALL' ? 'all transactions' : filter === 'BLOCK' ? 'blocked transactions' : filter === 'DELAY' ? 'delayed transactions' : 'allowed transactions';
     const count = filter === 'ALL' ? txCache.length : txCache.filter(tx => (tx.action || tx.tx_type || tx.type || '') === filter).length;
     showToast('info', `Displaying ${count} ${filterLabel}`, 'Filter Applied');
@@ -1544,13 +1689,8 @@ async function performExport() {
 
     console.log(`Export range: ${startDate.toISOString()} to ${endDate.toISOString()}`);
 
-    // Fetch ALL transactions from server for the specified time range
-    // The time_range parameter tells the API to ignore limit and return ALL transactions in that period
-    const response = await fetch(`/recent-transactions?limit=99999&time_range=${timeRange}&_=${Date.now()}`);
-    if (!response.ok) throw new Error('Failed to fetch transactions');
-    
-    const data = await response.json();
-    let allTx = data.transactions || [];
+    // Fetch ALL transactions from server for the specified time range, page by page
+    let allTx = await fetchAllTransactions(timeRange);
 
     // Filter by date range (extra safety filter for custom ranges)
     const filteredTx = allTx.filter(tx => {
@@ -0,0 +1,157 @@
+"""
+Admin repository tests: the row-shaping helpers shared by the psycopg2 and
+asyncpg backends, and driver selection. No database needed.
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import admin_repository
+from app.admin_repository import (
+    aggregate_fraud_pattern_rows,
+    analytics_buckets,
+    build_dashboard_analytics,
+    create_admin_repository,
+    decode_tx_cursor,
+    encode_tx_cursor,
+    parse_action_filter,
+    transactions_page,
+    transactions_page_query,
+)
+
+
+class TestSharedHelpers:
+    def test_analytics_buckets(self):
+        assert analytics_buckets("1h") == ("minute", 60)
+        assert analytics_buckets("24h") == ("hour", 24)
+        assert analytics_buckets("7d") == ("day", 7)
+        assert analytics_buckets("30d") == ("day", 30)
+
+    def test_dashboard_analytics_shape(self):
+        t1 = datetime(2026, 2, 10, 10, tzinfo=timezone.utc)
+        t2 = datetime(2026, 2, 10, 11, tzinfo=timezone.utc)
+        result = build_dashboard_analytics(
+            {"low": 5, "medium": 2, "high": None, "critical": 1},
+            [{"bucket": t2, "block": 1, "delay": 0, "allow": 3},
+             {"bucket": t1, "block": 0, "delay": 2, "allow": 4}],
+        )
+        assert result["risk"] == {"low": 5, "medium": 2, "high": 0, "critical": 1}
+        # Newest-first rows come back in chronological order
+        assert result["timeline"]["labels"] == [t1.isoformat(), t2.isoformat()]
+        assert result["timeline"]["allow"] == [4, 3]
+
+    def test_dashboard_analytics_empty(self):
+        result = build_dashboard_analytics(None, [])
+        assert result["risk"]["critical"] == 0
+        assert result["timeline"]["labels"] == []
+
+    def test_fraud_patterns_dict_and_tuple_rows(self):
+        expl = {
+            "features": {"is_new_recipient": 1, "tx_count_1min": 3},
+            "patterns": {"detected_patterns": [{"name": "Device Anomaly"}]},
+            "model_scores": {},
+        }
+        rows = [
+            {"explainability": expl, "risk_score": 0.2, "action": "ALLOW"},
+            (None, 0.7, "BLOCK"),
+        ]
+        totals = aggregate_fraud_pattern_rows(rows)
+        assert totals["transactions_analyzed"] == 2
+        assert totals["trust_engine_triggers"] == 2
+        assert totals["risk_buffer_escalations"] == 2
+        assert totals["drift_alerts"] == 2
+        assert totals["graph_signal_flags"] == 1
+
+
+class TestTransactionPages:
+    def test_action_filter(self):
+        assert parse_action_filter(None) is None
+        assert parse_action_filter("ALL") is None
+        assert parse_action_filter("delay, BLOCK") == ["BLOCK", "DELAY"]
+        with pytest.raises(ValueError):
+            parse_action_filter("BLOCK,REFUND")
+
+    def test_cursor_round_trip(self):
+        ts = datetime(2026, 2, 10, 10, 30, 15, 123456)
+        cursor = encode_tx_cursor({"ts": ts, "created_at": None, "tx_id": "260210000042"})
+        assert decode_tx_cursor(cursor) == (ts, "260210000042")
+        # created_at is the sort key when ts is missing
+        cursor = encode_tx_cursor({"ts": None, "created_at": ts, "tx_id": "x"})
+        assert decode_tx_cursor(cursor) == (ts, "x")
+        with pytest.raises(ValueError):
+            decode_tx_cursor("not-a-cursor")
+
+    def test_query_placeholders_per_driver(self):
+        since = datetime(2026, 2, 10, tzinfo=timezone.utc)
+        after = (datetime(2026, 2, 10, 12), "t1")
+        sql, args = transactions_page_query(since, ["BLOCK"], after, 50, numbered=True)
+        assert "$5" in sql and "%s" not in sql
+        assert args == [since, ["BLOCK"], after[0], "t1", 51]
+        assert "ORDER BY COALESCE(ts, created_at) DESC, tx_id DESC" in sql
+
+        sql, args = transactions_page_query(limit=10, has_explainability=False)
+        assert "WHERE" not in sql and "explainability" not in sql
+        assert args == [11]
+
+    def test_explainability_projection(self):
+        sql, _ = transactions_page_query(limit=10)
+        assert "explainability->>'confidence_level'" in sql
+        assert ", explainability\n" not in sql
+        sql, _ = transactions_page_query(limit=10, include_explainability=True)
+        assert ", explainability\n" in sql
+
+    def test_page_trims_look_ahead_row(self):
+        rows = [{"ts": datetime(2026, 2, 10, 12, i), "tx_id": f"t{i}"} for i in (3, 2, 1)]
+        page = transactions_page(rows, 2)
+        assert [r["tx_id"] for r in page["transactions"]] == ["t3", "t2"]
+        assert decode_tx_cursor(page["next_cursor"]) == (rows[1]["ts"], "t2")
+        assert transactions_page(rows[:2], 2)["next_cursor"] is None
+
+
+class TestDriverSelection:
+    def test_default_driver_uses_threadpool_helpers(self, monkeypatch):
+        monkeypatch.setattr(admin_repository, "ADMIN_DB_DRIVER", "psycopg2")
+        assert create_admin_repository("postgresql://localhost/x") is None
+
+    def test_asyncpg_missing_falls_back(self, monkeypatch):
+        monkeypatch.setattr(admin_repository, "ADMIN_DB_DRIVER", "asyncpg")
+        monkeypatch.setattr(admin_repository, "ASYNCPG_AVAILABLE", False)
+        assert create_admin_repository("postgresql://localhost/x") is None
+
+
+class _AsyncConn:
+    """Records every statement; fetchval answers the rollup readiness check."""
+
+    def __init__(self, ready):
+        self.ready = ready
+        self.log = []
+
+    async def fetchval(self, sql, *args):
+        self.log.append(sql)
+        return self.ready
+
+    async def execute(self, sql, *args):
+        self.log.append(sql)
+
+
+class TestAsyncpgRollupCheck:
+    def test_request_path_only_checks(self, monkeypatch):
+        import asyncio
+        from app.rollups import ROLLUP_READY_SQL
+
+        monkeypatch.setattr(admin_repository, "ASYNCPG_AVAILABLE", True)
+        repo = admin_repository.AsyncpgAdminRepository("postgresql://localhost/x")
+        conn = _AsyncConn(ready=False)
+        assert not asyncio.run(repo._ensure_rollups(conn)) and conn.log == [ROLLUP_READY_SQL]
+        # Not ready: rechecked only after ROLLUP_RECHECK_SECONDS, never created here
+        assert not asyncio.run(repo._ensure_rollups(conn)) and len(conn.log) == 1
+        repo._rollups_checked_at = -admin_repository.ROLLUP_RECHECK_SECONDS
+        conn.ready = True
+        assert asyncio.run(repo._ensure_rollups(conn)) and asyncio.run(repo._ensure_rollups(conn))
+        assert conn.log == [ROLLUP_READY_SQL, ROLLUP_READY_SQL]
@@ -0,0 +1,50 @@
+"""
+Amount statistics tests: bucketed Welford aggregates must match a full
+recomputation over the amount history (including repeated amounts).
+"""
+
+import os
+import random
+import statistics
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.feature_engine import merge_amount_buckets, welford_update
+
+
+def _bucketed(amounts, n_buckets, rng):
+    buckets = [None] * n_buckets
+    for amount in amounts:
+        i = rng.randrange(n_buckets)
+        buckets[i] = welford_update(buckets[i], amount)
+    return [b for b in buckets if b is not None]
+
+
+class TestAmountStats:
+    """Welford update + Chan merge vs statistics.mean / stdev"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_matches_full_recompute(self, seed):
+        rng = random.Random(seed)
+        amounts = [round(rng.uniform(1, 50000), 2) for _ in range(rng.randrange(2, 400))]
+        stats = merge_amount_buckets(_bucketed(amounts, 168, rng))
+
+        assert stats["count"] == len(amounts)
+        assert stats["mean"] == pytest.approx(statistics.mean(amounts), rel=1e-9)
+        assert stats["std"] == pytest.approx(statistics.stdev(amounts), rel=1e-9)
+        assert stats["max"] == max(amounts)
+
+    def test_repeated_amounts_are_counted(self):
+        stats = merge_amount_buckets([welford_update(welford_update(None, 500.0), 500.0),
+                                      welford_update(None, 100.0)])
+        assert stats["count"] == 3
+        assert stats["mean"] == pytest.approx(1100.0 / 3)
+
+    def test_single_and_empty(self):
+        assert merge_amount_buckets([]) is None
+        stats = merge_amount_buckets([welford_update(None, 42.0)])
+        assert stats == {"count": 1, "mean": 42.0, "std": 0.0, "max": 42.0}
@@ -0,0 +1,72 @@
+"""
+Batch scoring tests: score_with_ensemble_batch / score_batch must return
+exactly what the single-row path returns for every transaction.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import scoring
+from app.feature_engine import features_to_vector
+
+
+def _sample_transactions():
+    return [
+        {"user_id": "u1", "amount": 250.0, "recipient_vpa": "grocer@upi",
+         "tx_type": "P2M", "channel": "app", "timestamp": "2026-02-10T10:15:00Z"},
+        {"user_id": "u2", "amount": 49999.0, "recipient_vpa": "9x@upi",
+         "tx_type": "P2P", "channel": "qr", "timestamp": "2026-02-10T02:40:00Z"},
+        {"user_id": "u3", "amount": 1000.0, "recipient_vpa": "friend@upi",
+         "tx_type": "P2P", "channel": "web", "timestamp": "2026-02-14T22:05:00Z"},
+        {"user_id": "u1", "amount": 75000.0, "recipient_vpa": "01@upi",
+         "tx_type": "P2M", "channel": "app", "timestamp": "2026-02-15T13:00:00Z"},
+    ]
+
+
+class TestBatchScoring:
+    """Batch path parity with score_with_ensemble / score_transaction"""
+
+    def test_ensemble_batch_matches_single_row(self):
+        features = [scoring.extract_features_fallback(tx) for tx in _sample_transactions()]
+        matrix = np.vstack([features_to_vector(f) for f in features])
+
+        batch = scoring.score_with_ensemble_batch(matrix, features)
+        single = [scoring.score_with_ensemble(f) for f in features]
+
+        assert batch == single
+
+    def test_score_batch_matches_score_transaction(self, monkeypatch):
+        # Stateless features so both paths see the same inputs
+        monkeypatch.setattr(scoring, "extract_features", scoring.extract_features_fallback)
+        txs = _sample_transactions()
+
+        batch = scoring.score_batch(txs, return_details=True)
+        single = [scoring.score_transaction(tx, return_details=True) for tx in txs]
+        batch_scores = scoring.score_batch(txs)
+
+        assert batch == single
+        assert batch_scores == [d["risk_score"] for d in single]
+
+    def test_empty_batch(self):
+        assert scoring.score_batch([]) == []
+        assert scoring.score_with_ensemble_batch(np.empty((0, 27))) == []
+
+    def test_bad_rows_do_not_poison_the_batch(self, monkeypatch):
+        monkeypatch.setattr(scoring, "extract_features", scoring.extract_features_fallback)
+        good = _sample_transactions()
+        bad_amount = dict(good[0], amount="abc")
+        bad_type = dict(good[1], tx_type=None)
+        txs = [good[0], bad_amount, good[2], bad_type, good[3]]
+
+        batch = scoring.score_batch(txs, return_details=True)
+        single = [scoring.score_transaction(tx, return_details=True) for tx in (good[0], good[2], good[3])]
+
+        assert [batch[0], batch[2], batch[4]] == single
+        assert batch[1]["reasons"] == ["Scoring fallback due to error"]
+        assert batch[3]["reasons"] == ["Scoring fallback due to error"]
+        assert scoring.score_batch(txs)[1] == 0.5
@@ -0,0 +1,145 @@
+"""
+Bulk ingest tests: NDJSON split across network chunks, JSON arrays,
+per-item errors and the item limit, plus POST /transactions/bulk end to end
+(batched scoring, the row-by-row fallback when COPY fails, and the streamed
+results) with the database and model calls replaced by in-memory fakes.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.bulk_ingest import iter_chunks, iter_items, result_line
+
+
+async def _stream(*parts):
+    for part in parts:
+        yield part
+
+
+def _collect(agen):
+    async def run():
+        return [x async for x in agen]
+    return asyncio.run(run())
+
+
+def _describe(items):
+    return [(i, item["tx_id"] if isinstance(item, dict) else str(item)) for i, item in items]
+
+
+class TestBulkParsing:
+    def test_ndjson_lines_split_across_chunks(self):
+        body = b'{"tx_id": "a"}\n{"tx_id"' + b': "b"}\n\n{"tx_id": "c"}'
+        items = _collect(iter_items(_stream(body[:10], body[10:25], body[25:])))
+        assert _describe(items) == [(0, "a"), (1, "b"), (2, "c")]
+
+    def test_json_array(self):
+        body = json.dumps([{"tx_id": "a"}, {"tx_id": "b"}]).encode()
+        items = _collect(iter_items(_stream(b"  ", body[:5], body[5:])))
+        assert _describe(items) == [(0, "a"), (1, "b")]
+
+    def test_bad_items_become_errors(self):
+        body = b'{"tx_id": "a"}\nnope\n[1]\n{"amount": 5}\n'
+        items = _collect(iter_items(_stream(body)))
+        assert items[0][1] == {"tx_id": "a"}
+        assert [str(e).split(":")[0] for _, e in items[1:]] == [
+            "Invalid JSON", "Each item must be a JSON object", "tx_id required"]
+
+    def test_item_limit(self):
+        body = b"".join(b'{"tx_id": "t%d"}\n' % i for i in range(5))
+        items = _collect(iter_items(_stream(body), max_items=3))
+        assert [i for i, _ in items] == [0, 1, 2, 3]
+        assert "limit" in str(items[-1][1])
+
+    def test_chunks_and_result_lines(self):
+        body = b"".join(b'{"tx_id": "t%d"}\n' % i for i in range(5))
+        chunks = _collect(iter_chunks(iter_items(_stream(body)), size=2))
+        assert [len(c) for c in chunks] == [2, 2, 1]
+        line = result_line({"index": 0, "tx_id": "t0", "action": "ALLOW"})
+        assert line.endswith(b"\n") and json.loads(line)["action"] == "ALLOW"
+
+
+@pytest.fixture
+def bulk_app(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import main
+    from app.score_batcher import score_batcher
+
+    state = {"copies": [], "inserts": [], "fail_copy": False, "fail_insert": set(), "scored": [],
+             "notified": []}
+
+    def score_fn(txs):
+        state["scored"].append([tx["tx_id"] for tx in txs])
+        return [{"risk_score": 0.9 if tx.get("amount", 0) > 10000 else 0.1, "confidence_level": "HIGH"}
+                for tx in txs]
+
+    async def run_db(helper, *args):
+        if helper is main.db_copy_transactions:
+            if state["fail_copy"]:
+                raise RuntimeError("COPY failed")
+            state["copies"].append([row["tx_id"] for row in args[0]])
+        elif helper is main.db_insert_transaction:
+            if args[0]["tx_id"] in state["fail_insert"]:
+                raise RuntimeError("duplicate key")
+            state["inserts"].append(args[0]["tx_id"])
+
+    monkeypatch.setattr(score_batcher, "score_fn", score_fn)
+    monkeypatch.setattr(main, "run_db", run_db)
+    monkeypatch.setattr(main, "invalidate_dashboard_summary", lambda: None)
+    monkeypatch.setattr(main, "BULK_CHUNK_SIZE", 2)
+    monkeypatch.setattr(main.ws_manager, "notify_tx", lambda event, row, **kw: state["notified"].append(row["tx_id"]))
+    return TestClient(main.app), state
+
+
+def _post(client, items):
+    body = b"".join(json.dumps(item).encode() + b"\n" if isinstance(item, dict) else item for item in items)
+    response = client.post("/transactions/bulk", content=body)
+    return response, [json.loads(line) for line in response.text.splitlines()]
+
+
+class TestBulkEndpoint:
+    def test_scores_stores_and_streams_in_order(self, bulk_app):
+        client, state = bulk_app
+        response, lines = _post(client, [{"tx_id": "b1", "amount": 50}, b"nope\n",
+                                         {"tx_id": "b2", "amount": 50000}, {"tx_id": "b3", "amount": 5}])
+        assert response.status_code == 200
+        assert [line.get("index") for line in lines[:-1]] == [0, 1, 2, 3]
+        assert "Invalid JSON" in lines[1]["error"]
+        assert lines[0]["risk_score"] == 0.1 and lines[2]["risk_score"] == 0.9
+        assert lines[-1] == {"done": True, "accepted": 3, "failed": 1}
+        assert state["scored"] and sorted(sum(state["scored"], [])) == ["b1", "b2", "b3"]
+        assert state["copies"] == [["b1"], ["b2", "b3"]] and state["inserts"] == []
+        assert state["notified"] == ["b1", "b2", "b3"]
+
+    def test_copy_failure_falls_back_to_row_inserts(self, bulk_app):
+        client, state = bulk_app
+        state["fail_copy"], state["fail_insert"] = True, {"c2"}
+        response, lines = _post(client, [{"tx_id": "c1"}, {"tx_id": "c2"}, {"tx_id": "c3"}])
+        assert state["inserts"] == ["c1", "c3"]
+        assert lines[1] == {"index": 1, "tx_id": "c2", "error": "duplicate key"}
+        assert lines[-1] == {"done": True, "accepted": 2, "failed": 1}
+        assert "c2" not in state["notified"]
+
+    def test_saturated_scoring_returns_503(self, bulk_app, monkeypatch):
+        from app.score_batcher import score_batcher
+        client, state = bulk_app
+        monkeypatch.setattr(score_batcher, "_outstanding", score_batcher.max_pending)
+        response = client.post("/transactions/bulk", content=b'{"tx_id": "d1"}\n')
+        assert response.status_code == 503 and response.headers["Retry-After"]
+        assert state["scored"] == [] and state["copies"] == []
+
+    def test_malformed_amount_fails_only_that_item(self, bulk_app):
+        client, state = bulk_app
+        response, lines = _post(client, [{"tx_id": "e1", "amount": 50}, {"tx_id": "e2", "amount": "abc"},
+                                         {"tx_id": "e3", "amount": 5}])
+        assert response.status_code == 200
+        assert lines[0]["tx_id"] == "e1" and lines[2]["tx_id"] == "e3"
+        assert lines[1]["index"] == 1 and "error" in lines[1] and "tx_id" not in lines[1]
+        assert lines[-1] == {"done": True, "accepted": 2, "failed": 1}
+        assert state["copies"] == [["e1"], ["e3"]] and state["notified"] == ["e1", "e3"]
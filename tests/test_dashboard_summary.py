@@ -0,0 +1,85 @@
+"""
+Dashboard summary tests: payload shape, per-range caching and invalidation
+on insert. Redis is replaced by a dict-backed stand-in.
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import dashboard_summary
+from app.dashboard_summary import (
+    build_dashboard_summary,
+    get_cached_summary,
+    invalidate_dashboard_summary,
+    store_summary,
+)
+
+
+class DictRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    r = DictRedis()
+    monkeypatch.setattr(dashboard_summary, "get_redis", lambda: r)
+    return r
+
+
+def _summary(time_range="24h"):
+    return build_dashboard_summary(
+        time_range,
+        {"total": 10, "block": 2, "delay": 3, "allow": 5, "mean_risk": 0.41234},
+        {"risk": {"low": 5, "medium": 3, "high": 1, "critical": 1},
+         "timeline": {"labels": ["2026-02-10T10:00:00"], "block": [2], "delay": [3], "allow": [5]}},
+        [{"tx_id": "t1", "risk_score": 0.9}],
+    )
+
+
+class TestDashboardSummary:
+    def test_payload_shape(self):
+        payload = _summary()
+        assert payload["stats"] == {"totalTransactions": 10, "blocked": 2, "delayed": 3,
+                                    "allowed": 5, "meanRisk": 0.4123}
+        assert payload["risk"]["critical"] == 1
+        assert payload["alerts"][0]["tx_id"] == "t1"
+        assert datetime.fromisoformat(payload["generated_at"]).tzinfo == timezone.utc
+
+    def test_cached_per_range_until_insert(self, fake_redis):
+        assert get_cached_summary("24h") is None
+        body = store_summary("24h", _summary("24h"))
+        store_summary("7d", _summary("7d"))
+        assert get_cached_summary("24h") == body
+        assert json.loads(get_cached_summary("7d"))["time_range"] == "7d"
+
+        invalidate_dashboard_summary()
+        assert get_cached_summary("24h") is None
+        assert get_cached_summary("7d") is None
+
+    def test_unknown_range_not_cached(self, fake_redis):
+        store_summary("all", _summary("all"))
+        assert fake_redis.data == {}
+        assert get_cached_summary("all") is None
+
+    def test_without_redis(self, monkeypatch):
+        monkeypatch.setattr(dashboard_summary, "get_redis", lambda: None)
+        assert json.loads(store_summary("24h", _summary()))["stats"]["blocked"] == 2
+        assert get_cached_summary("24h") is None
+        invalidate_dashboard_summary()
@@ -0,0 +1,100 @@
+"""
+DB pool tests: blocking borrow, rollback-on-return and saturation metrics.
+Uses an in-memory stand-in for ThreadedConnectionPool (no PostgreSQL needed).
+"""
+
+import os
+import sys
+import threading
+
+import psycopg2.extensions
+import pytest
+from psycopg2.pool import PoolError
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import db_pool
+
+
+class _Conn:
+    def __init__(self):
+        self.closed = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class _ThreadedPool:
+    def __init__(self, minconn, maxconn, dsn, **kwargs):
+        self.kwargs = kwargs
+        self._pool = []
+        self.closed = []
+
+    def getconn(self):
+        return self._pool.pop() if self._pool else _Conn()
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.closed.append(conn)
+        else:
+            self._pool.append(conn)
+
+    def closeall(self):
+        self._pool.clear()
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(db_pool, "ThreadedConnectionPool", _ThreadedPool)
+    return db_pool.DBPool("postgresql://test", minconn=0, maxconn=2, timeout=0.05,
+                          statement_timeout_ms=5000)
+
+
+class TestDBPool:
+    """DBPool borrow/return semantics"""
+
+    def test_statement_timeout_option(self, pool):
+        assert pool._pool.kwargs["options"] == "-c statement_timeout=5000"
+
+    def test_connections_are_reused(self, pool):
+        conn = pool.getconn()
+        pool.putconn(conn)
+        assert pool.getconn() is conn
+        assert pool.get_metrics()["borrowed_total"] == 2
+
+    def test_uncommitted_work_is_rolled_back(self, pool):
+        conn = pool.getconn()
+        conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        pool.putconn(conn)
+        assert conn.rollbacks == 1
+
+    def test_broken_connection_is_discarded(self, pool):
+        conn = pool.getconn()
+        conn.closed = 1
+        pool.putconn(conn)
+        assert pool._pool.closed == [conn]
+        assert pool.get_metrics()["discarded"] == 1
+
+    def test_exhausted_pool_times_out(self, pool):
+        held = [pool.getconn(), pool.getconn()]
+        assert pool.get_metrics()["saturation"] == 1.0
+        with pytest.raises(PoolError):
+            pool.getconn()
+        metrics = pool.get_metrics()
+        assert metrics["waits"] == 1 and metrics["timeouts"] == 1
+        for conn in held:
+            pool.putconn(conn)
+        assert pool.get_metrics()["in_use"] == 0
+
+    def test_waiter_gets_released_connection(self, pool):
+        pool.timeout = 2
+        held = [pool.getconn(), pool.getconn()]
+        threading.Timer(0.05, pool.putconn, args=(held[0],)).start()
+        assert pool.getconn() is held[0]
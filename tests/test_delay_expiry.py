@@ -0,0 +1,83 @@
+"""
+Delay expiry schedule tests: due entries pop in expiry order, exactly once,
+from the in-process heap and from Redis, and the consumer hands them to the
+refund callback.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import delay_expiry as delay_expiry_module
+from app.delay_expiry import DelayExpiryScheduler
+from app.redis_pool import get_redis
+
+
+@pytest.fixture
+def local_only(monkeypatch):
+    monkeypatch.setattr(delay_expiry_module, "get_redis", lambda: None)
+
+
+class TestLocalSchedule:
+    def test_pops_only_due_entries_in_order(self, local_only):
+        sched = DelayExpiryScheduler()
+        sched.schedule_many([("tx_late", 300.0), ("tx_b", 120.0), ("tx_a", 100.0)])
+        assert sched.pop_due(now=50.0) == []
+        assert sched.pop_due(now=150.0) == ["tx_a", "tx_b"]
+        assert sched.pop_due(now=150.0) == []
+        assert sched.pop_due(now=301.0) == ["tx_late"]
+        assert sched.get_metrics()["popped"] == 3
+
+    def test_reschedule_supersedes_earlier_entry(self, local_only):
+        sched = DelayExpiryScheduler()
+        sched.schedule("tx_1", 100.0)
+        sched.schedule("tx_1", 200.0)
+        assert sched.pop_due(now=150.0) == []
+        assert sched.pop_due(now=250.0) == ["tx_1"]
+
+    def test_batch_limit(self, local_only):
+        sched = DelayExpiryScheduler(batch=3)
+        sched.schedule_many((f"tx_{i}", float(i)) for i in range(10))
+        assert len(sched.pop_due(now=100.0)) == 3
+        assert len(sched.pop_due(now=100.0)) == 3
+
+    def test_consumer_refunds_due_entries(self, local_only):
+        sched = DelayExpiryScheduler(poll_seconds=0.05)
+        refunded = []
+
+        def refund(tx_ids):
+            refunded.extend(tx_ids)
+            return len(tx_ids)
+
+        async def run():
+            sched.start(refund)
+            sched.schedule("tx_due", time.time() + 0.1)
+            sched.schedule("tx_later", time.time() + 60)
+            await asyncio.sleep(0.4)
+            await sched.stop()
+
+        asyncio.run(run())
+        assert refunded == ["tx_due"]
+        assert sched.get_metrics()["refunded"] == 1
+
+
+class TestRedisSchedule:
+    @pytest.mark.skipif(get_redis() is None, reason="Redis unavailable")
+    def test_redis_pop_is_atomic_and_ordered(self):
+        key = "delay:expiry:test"
+        r = get_redis()
+        r.delete(key)
+        first, second = DelayExpiryScheduler(key=key), DelayExpiryScheduler(key=key)
+        first.schedule_many([("tx_b", 120.0), ("tx_a", 100.0), ("tx_late", 300.0)])
+
+        assert first.pop_due(now=150.0) == ["tx_a", "tx_b"]
+        # Another worker sharing the schedule never sees them again
+        assert second.pop_due(now=150.0) == []
+        assert second.pop_due(now=301.0) == ["tx_late"]
+        assert r.zcard(key) == 0
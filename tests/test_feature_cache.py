@@ -0,0 +1,87 @@
+"""
+Hot-user feature cache tests: LRU/TTL bookkeeping and parity of the local
+update with the Redis-backed fetch_behaviour path.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import feature_engine
+from app.feature_engine import HotUserCache, _UserState
+
+
+def _state():
+    return _UserState({}, set(), {}, loaded_at=feature_engine.time.monotonic())
+
+
+class TestHotUserCache:
+    """LRU eviction, TTL expiry and hit/miss metrics"""
+
+    def test_lru_eviction(self):
+        cache = HotUserCache(max_size=2, ttl=60, enabled=True)
+        cache.put("a", _state())
+        cache.put("b", _state())
+        assert cache.get("a") is not None   # "a" is now most recent
+        cache.put("c", _state())
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        metrics = cache.get_metrics()
+        assert metrics["evictions"] == 1
+        assert metrics["hits"] == 2 and metrics["misses"] == 1
+        assert metrics["size"] == 2
+
+    def test_ttl_expiry(self):
+        cache = HotUserCache(max_size=10, ttl=0, enabled=True)
+        state = _state()
+        state.loaded_at -= 1
+        cache.put("a", state)
+        assert cache.get("a") is None
+        assert cache.get_metrics()["expirations"] == 1
+
+    def test_put_keeps_existing_entry(self):
+        cache = HotUserCache(max_size=10, ttl=60, enabled=True)
+        first = cache.put("a", _state())
+        assert cache.put("a", _state()) is first
+
+    def test_local_update(self):
+        state = _state()
+        state.recipients.add("shop@upi")
+        now = 1770000000
+        for i, amount in enumerate([100.0, 300.0]):
+            result = state.apply("shop@upi", amount, now + i)
+
+        assert result["tx_count_1min"] == 2 and result["tx_count_24h"] == 2
+        assert result["is_known_recipient"] and result["recipient_count"] == 1
+        assert result["amount_stats"]["mean"] == 200.0
+        assert result["amount_stats"]["max"] == 300.0
+
+    @pytest.mark.skipif(feature_engine._get_redis() is None, reason="Redis unavailable")
+    def test_matches_redis_path(self):
+        r = feature_engine._get_redis()
+        cache = HotUserCache(max_size=10, ttl=60, enabled=True)
+        rng = random.Random(3)
+        users = ["cache_test_a", "cache_test_b"]
+        keys = [k for u in users for k in feature_engine._behaviour_keys(u)]
+        r.delete(*keys)
+        now = 1770000000
+        expected = []
+        try:
+            # Redis path first, then replay the same stream through the cache
+            stream = [(rng.choice(users), rng.choice([100.0, 250.5]), now + i * 7)
+                      for i in range(100)]
+            for user, amount, ts in stream:
+                expected.append(feature_engine.fetch_behaviour(user, "x@upi", amount, ts, mode="lua"))
+            r.delete(*keys)
+            got = [cache.fetch(r, user, "x@upi", amount, ts) for user, amount, ts in stream]
+            cache.flush()
+            assert got == expected
+            assert cache.get_metrics()["writes_flushed"] == len(stream)
+        finally:
+            r.delete(*keys)
@@ -0,0 +1,61 @@
+"""
+Shared Redis pool tests: lazy health checks and the outage cooldown.
+"""
+
+import os
+import sys
+
+import pytest
+from redis.exceptions import ConnectionError
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import redis_pool
+
+
+class _Client:
+    def __init__(self, up):
+        self.up = up
+        self.pings = 0
+
+    def ping(self):
+        self.pings += 1
+        if not self.up:
+            raise ConnectionError("refused")
+        return True
+
+
+@pytest.fixture
+def client(monkeypatch):
+    redis_pool.reset_redis()
+    c = _Client(up=True)
+    monkeypatch.setattr(redis_pool, "_build_client", lambda: c)
+    yield c
+    redis_pool._client = None
+    redis_pool.reset_redis()
+
+
+class TestRedisPool:
+    """get_redis() health checking"""
+
+    def test_healthy_client_is_shared_and_pinged_once(self, client):
+        assert redis_pool.get_redis() is client
+        assert redis_pool.get_redis() is client
+        assert client.pings == 1
+
+    def test_outage_is_cached_for_cooldown(self, client, monkeypatch):
+        client.up = False
+        assert redis_pool.get_redis() is None
+        assert redis_pool.get_redis() is None
+        assert client.pings == 1
+
+        # Cooldown over: next call re-checks and recovers
+        client.up = True
+        monkeypatch.setattr(redis_pool, "_down_until", 0.0)
+        assert redis_pool.get_redis() is client
+
+    def test_mark_down_skips_redis(self, client):
+        assert redis_pool.get_redis() is client
+        redis_pool.mark_redis_down()
+        assert redis_pool.get_redis() is None
@@ -0,0 +1,94 @@
+"""
+Risk buffer tests: the atomic Lua update must match the Python formula
+(old * DECAY^(elapsed/6h) * DECAY + risk, then threshold classification)
+and must not lose updates under concurrency.
+"""
+
+import os
+import random
+import sys
+import threading
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import risk_buffer
+from app.risk_buffer import (
+    BLOCK_THRESHOLD,
+    DECAY_FACTOR,
+    ESCALATE_THRESHOLD,
+    HISTORY_LENGTH,
+    buffer_from_values,
+    buffer_keys,
+    classify_buffer,
+    next_buffer,
+)
+
+
+class TestFormula:
+    def test_classification(self):
+        assert classify_buffer(0.0) == "NONE"
+        assert classify_buffer(ESCALATE_THRESHOLD) == "ESCALATE"
+        assert classify_buffer(BLOCK_THRESHOLD) == "BLOCK"
+
+    def test_passive_decay_then_accumulate(self):
+        now = 1770000000.0
+        old, _ = buffer_from_values("2.0", str(now - 6 * 3600), now=now)
+        assert old == pytest.approx(2.0 * DECAY_FACTOR)
+        new, action = next_buffer(old, 0.5)
+        assert new == pytest.approx(2.0 * DECAY_FACTOR ** 2 + 0.5)
+        assert action == classify_buffer(new)
+
+
+@pytest.mark.skipif(risk_buffer._get_redis() is None, reason="Redis unavailable")
+class TestLuaUpdate:
+    USER = "risk_buffer_test_user"
+
+    def _clear(self, r):
+        r.delete(*buffer_keys(self.USER), risk_buffer._key_history(self.USER))
+
+    def test_matches_python_formula(self):
+        r = risk_buffer._get_redis()
+        rng = random.Random(7)
+        now = 1770000000.0
+        try:
+            for _ in range(200):
+                self._clear(r)
+                if rng.random() < 0.8:
+                    old = rng.uniform(0.0, 6.0)
+                    last_ts = now - rng.choice([0.0, rng.uniform(0, 3600), rng.uniform(0, 7 * 86400)])
+                    r.set(buffer_keys(self.USER)[0], repr(old))
+                    r.set(buffer_keys(self.USER)[1], repr(last_ts))
+                raw_buffer, raw_ts = r.mget(buffer_keys(self.USER))
+                risk = rng.uniform(0.0, 1.0)
+
+                expected = next_buffer(buffer_from_values(raw_buffer, raw_ts, now=now)[0], risk)
+                got = risk_buffer._update_lua(r, self.USER, risk, now)
+                assert got[0] == pytest.approx(expected[0], rel=1e-12, abs=1e-12)
+                assert got[1] == expected[1]
+                assert float(r.get(buffer_keys(self.USER)[0])) == got[0]
+                assert float(r.get(buffer_keys(self.USER)[1])) == now
+        finally:
+            self._clear(r)
+
+    def test_concurrent_updates_are_not_lost(self):
+        r = risk_buffer._get_redis()
+        self._clear(r)
+        updates = 40
+        try:
+            threads = [threading.Thread(target=risk_buffer.update_risk_buffer, args=(self.USER, 1.0))
+                       for _ in range(updates)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            # Sequentially: sum of DECAY^k; the passive decay over the run is negligible
+            expected = sum(DECAY_FACTOR ** k for k in range(updates))
+            value = float(r.get(buffer_keys(self.USER)[0]))
+            assert value == pytest.approx(expected, rel=1e-6)
+            assert r.llen(risk_buffer._key_history(self.USER)) == HISTORY_LENGTH
+        finally:
+            self._clear(r)
@@ -0,0 +1,81 @@
+"""
+Combined risk context tests: the one-round-trip fetch must give the engines
+exactly what their own per-key reads give, and the coalesced write batch
+must leave Redis in the same state as the per-engine pipelines.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import graph_signals, risk_buffer, risk_context, trust_engine
+from app.risk_context import RiskContext, RiskWriteBatch, fetch_risk_context
+
+
+class TestFromValues:
+    def test_raw_bytes_match_typed_values(self, monkeypatch):
+        now = time.time()
+        monkeypatch.setattr(trust_engine.time, "time", lambda: now)
+        first_ts = now - 10 * 86400
+        assert trust_engine.trust_from_values(b"4", b"1200.5", str(first_ts).encode(), None) == \
+            trust_engine.trust_from_values(4, 1200.5, first_ts, 0)
+        assert graph_signals.graph_signals_from_values(40, 5, b"1") == \
+            graph_signals.graph_signals_from_values(40, 5, 1)
+
+    def test_unset_keys(self):
+        ctx = RiskContext(user_id="u1", recipient="a@upi", device_id="d1")
+        trust_score, details = ctx.trust()
+        assert trust_score == 0.3 and details["baseline_trust"] and details["tx_count"] == 0
+        assert ctx.graph()[0] == 0.0 and ctx.graph()[1]["recipient_total_senders"] == 0
+        assert ctx.buffer() == (0.0, {"buffer": 0.0, "status": "new_user"})
+
+    def test_redis_down_matches_engines(self, monkeypatch):
+        monkeypatch.setattr(risk_context, "get_redis", lambda: None)
+        ctx = fetch_risk_context("u1", "a@upi", "d1")
+        assert not ctx.available
+        assert ctx.trust() == trust_engine.baseline_trust()
+        assert ctx.graph() == (0.0, {"status": "unavailable"})
+        assert ctx.buffer() == (0.0, {"buffer": 0.0, "status": "unavailable"})
+        batch = RiskWriteBatch()
+        assert batch.pipe is None and batch.execute() == 0
+
+
+@pytest.mark.skipif(risk_context.get_redis() is None, reason="Redis unavailable")
+class TestAgainstRedis:
+    USER, RECIPIENT, DEVICE = "risk_ctx_user", "risk_ctx@upi", "risk_ctx_device"
+
+    def _keys(self):
+        return (trust_engine.trust_keys(self.USER, self.RECIPIENT)
+                + graph_signals.graph_keys(self.USER, self.RECIPIENT)
+                + risk_buffer.buffer_keys(self.USER)
+                + (f"graph:user:{self.USER}:recipients", f"graph:device:{self.DEVICE}:users",
+                   f"graph:device:{self.DEVICE}:fraud_users", f"risk_buffer:{self.USER}:history"))
+
+    def test_fetch_and_batched_writes_match_engines(self, monkeypatch):
+        # The default Lua buffer update runs immediately; batching is the pipeline path
+        monkeypatch.setattr(risk_buffer, "RISK_BUFFER_MODE", "pipeline")
+        r = risk_context.get_redis()
+        r.delete(*self._keys())
+        try:
+            batch = RiskWriteBatch()
+            trust_engine.record_transaction(self.USER, self.RECIPIENT, 500.0, pipe=batch.pipe)
+            graph_signals.record_transaction_edge(self.USER, self.RECIPIENT, self.DEVICE, pipe=batch.pipe)
+            graph_signals.record_fraud_edge(self.USER, self.RECIPIENT, self.DEVICE, pipe=batch.pipe)
+            trust_engine.record_fraud_flag(self.USER, self.RECIPIENT, pipe=batch.pipe)
+            new_buffer, _ = risk_buffer.update_risk_buffer(self.USER, 0.7, old_buffer=0.0, pipe=batch.pipe)
+            assert r.get(risk_buffer.buffer_keys(self.USER)[0]) is None  # queued, not sent
+            assert batch.execute() > 0
+
+            ctx = fetch_risk_context(self.USER, self.RECIPIENT, self.DEVICE)
+            assert ctx.available
+            assert ctx.trust() == trust_engine.compute_trust_score(self.USER, self.RECIPIENT)
+            assert ctx.graph() == graph_signals.compute_graph_signals(self.USER, self.RECIPIENT, self.DEVICE)
+            assert ctx.buffer()[0] == pytest.approx(risk_buffer.get_risk_buffer(self.USER)[0], rel=1e-3)
+            assert ctx.buffer()[0] == pytest.approx(new_buffer, rel=1e-3)
+        finally:
+            r.delete(*self._keys())
@@ -0,0 +1,211 @@
+"""
+Rollup SQL tests: range reads pick the right tables and placeholders for
+both drivers, and tx_pattern_flags() matches pattern_trigger_flags() over
+explainability fixtures (needs PostgreSQL at DB_URL, skipped otherwise).
+Schema setup runs its DDL and backfill only when the tables are missing.
+The trigger maintenance itself is checked by tools/rebuild_rollups.py --check.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.admin_repository import PATTERN_TOTAL_KEYS, pattern_totals
+from app.rollups import (
+    PATTERN_COLUMNS,
+    ROLLUP_READY_SQL,
+    ROLLUP_SCHEMA_SQL,
+    ROLLUP_SLOTS,
+    ensure_rollup_schema,
+    pattern_range_sql,
+    pattern_recent_sql,
+    rollup_timeline_sql,
+    rollup_totals_sql,
+)
+
+
+class TestRollupSql:
+    def test_totals_reads_hours_plus_minute_edges(self):
+        sql = rollup_totals_sql("%(since)s")
+        assert "FROM tx_rollup_hour" in sql and "FROM tx_rollup_minute" in sql
+        assert "{" not in sql
+        assert rollup_totals_sql("$1").count("$1") == 1
+
+    @pytest.mark.parametrize("unit,table", [
+        ("minute", "tx_rollup_minute"), ("hour", "tx_rollup_hour"), ("day", "tx_rollup_hour"),
+    ])
+    def test_timeline_table_per_unit(self, unit, table):
+        sql = rollup_timeline_sql(unit, "$1", "$2")
+        assert f"FROM {table} r" in sql
+        assert f"date_trunc('{unit}', r.bucket)" in sql
+        assert "LIMIT $2" in sql
+
+    def test_timeline_rejects_unknown_unit(self):
+        with pytest.raises(ValueError):
+            rollup_timeline_sql("week; DROP TABLE transactions", "$1", "$2")
+
+    def test_schema_has_triggers_for_every_write(self):
+        for name in ("trg_tx_rollup_insert", "trg_tx_rollup_update", "trg_tx_rollup_delete"):
+            assert name in ROLLUP_SCHEMA_SQL
+        assert f"& {ROLLUP_SLOTS - 1}" in ROLLUP_SCHEMA_SQL
+        assert "%" not in ROLLUP_SCHEMA_SQL  # executed without parameters
+
+
+class TestPatternFlags:
+    def test_sql_bits_match_python_reference(self):
+        assert [(key, bit) for _, key, bit in PATTERN_COLUMNS] == list(PATTERN_TOTAL_KEYS)
+
+    def test_flags_stored_on_write_and_rolled_up(self):
+        assert "trg_tx_pattern_flags" in ROLLUP_SCHEMA_SQL
+        assert "OLD.pattern_flags IS DISTINCT FROM NEW.pattern_flags" in ROLLUP_SCHEMA_SQL
+        totals = rollup_totals_sql("$1")
+        for column, key, _ in PATTERN_COLUMNS:
+            assert f"ADD COLUMN IF NOT EXISTS {column}" in ROLLUP_SCHEMA_SQL
+            assert f"AS {key}" in totals
+
+    def test_recent_and_totals_rows_shape_alike(self):
+        assert "LIMIT $1" in pattern_recent_sql("$1")
+        row = {key: bit for key, bit in PATTERN_TOTAL_KEYS}
+        from_rollup = pattern_totals(dict(row, total=7))
+        from_recent = pattern_totals(dict(row, transactions_analyzed=7))
+        assert from_rollup == from_recent
+        assert from_rollup["transactions_analyzed"] == 7
+
+    def test_ranged_counts_filter_on_ts_like_the_scan(self):
+        # Same range as the explainability scan (ts, not the created_at rollup buckets)
+        sql = pattern_range_sql("$1")
+        assert "WHERE ts >= $1::timestamptz" in sql and "tx_rollup" not in sql
+        assert "AS transactions_analyzed" in sql
+        for _, key, bit in PATTERN_COLUMNS:
+            assert f"pattern_flags & {bit} <> 0) AS {key}" in sql
+
+
+class _Conn:
+    """Records statements; ROLLUP_READY_SQL answers `ready`."""
+
+    def __init__(self, ready):
+        self.ready = ready
+        self.log = []
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.log.append(sql)
+
+    def fetchone(self):
+        return {"ready": self.ready}
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class TestEnsureSchema:
+    def test_ready_schema_runs_no_ddl(self):
+        conn = _Conn(ready=True)
+        assert ensure_rollup_schema(conn)
+        assert conn.log == [ROLLUP_READY_SQL]
+
+    def test_missing_schema_is_created_and_backfilled(self):
+        conn = _Conn(ready=False)
+        assert ensure_rollup_schema(conn)
+        assert conn.log[1].startswith("LOCK TABLE transactions") and conn.log[2] == ROLLUP_SCHEMA_SQL
+        assert any(sql.startswith("TRUNCATE tx_rollup_minute") for sql in conn.log)
+        assert conn.commits == 1
+
+    def test_ready_check_is_scoped_to_public(self):
+        assert "table_schema = 'public'" in ROLLUP_READY_SQL
+
+    def test_request_path_only_checks(self, monkeypatch):
+        from app import main
+        monkeypatch.setattr(main, "_HAS_ROLLUPS", None)
+        monkeypatch.setattr(main, "_ROLLUPS_CHECKED_AT", -main.ROLLUP_RECHECK_SECONDS)
+        conn = _Conn(ready=False)
+        assert not main._ensure_rollups(conn) and conn.log == [ROLLUP_READY_SQL]
+        # Not ready: rechecked only after ROLLUP_RECHECK_SECONDS
+        assert not main._ensure_rollups(conn) and len(conn.log) == 1
+        monkeypatch.setattr(main, "_ROLLUPS_CHECKED_AT", -main.ROLLUP_RECHECK_SECONDS)
+        conn.ready = True
+        assert main._ensure_rollups(conn) and main._ensure_rollups(conn) and len(conn.log) == 2
+
+    def test_chatbot_request_path_only_checks(self, monkeypatch):
+        # /api/chatbot builds a new chatbot per request, so readiness is cached per module
+        from app import chatbot
+        monkeypatch.setattr(chatbot, "_HAS_ROLLUPS", None)
+        monkeypatch.setattr(chatbot, "_ROLLUPS_CHECKED_AT", -chatbot.ROLLUP_RECHECK_SECONDS)
+        conn = _Conn(ready=False)
+        assert not chatbot._rollups_ready(conn) and conn.log == [ROLLUP_READY_SQL]
+        assert not chatbot._rollups_ready(conn) and len(conn.log) == 1
+        monkeypatch.setattr(chatbot, "_ROLLUPS_CHECKED_AT", -chatbot.ROLLUP_RECHECK_SECONDS)
+        conn.ready = True
+        assert chatbot._rollups_ready(conn) and chatbot._rollups_ready(conn) and len(conn.log) == 2
+        assert conn.commits == 0
+
+
+# Explainability shapes seen in stored rows, plus the edge cases the SQL
+# twin has to convert exactly like Python (strings, booleans, nulls, junk types)
+PATTERN_FIXTURES = [
+    None,
+    {},
+    [],
+    {"reasons": []},
+    {"features": {"is_new_recipient": 1, "recipient_tx_count": 0}},
+    {"features": {"is_new_recipient": 0, "recipient_tx_count": 12, "merchant_risk_score": 0.31}},
+    {"features": {"recipient_tx_count": "7", "tx_count_1min": "3", "amount_deviation": "0.9"}},
+    {"features": {"recipient_tx_count": 20, "tx_count_1h": 4, "tx_count_5min": 5}},
+    {"features": {"recipient_tx_count": True, "is_new_device": True, "amount_deviation": 0.6}},
+    {"features": {"recipient_tx_count": None, "device_count": 4}, "model_scores": None},
+    {"features": [], "patterns": [], "model_scores": []},
+    {"features": {"recipient_tx_count": 11},
+     "patterns": {"detected_patterns": [{"name": "Behavioural Anomaly"}, "stray", {"name": 3}]}},
+    {"features": {"recipient_tx_count": 50},
+     "patterns": {"detected_patterns": [{"name": "Velocity Anomaly"}, {"name": "Device Anomaly"}]}},
+    {"features": {"recipient_tx_count": 50}, "patterns": {"detected_patterns": [{"name": "Model Disagreement"}]}},
+    {"features": {"recipient_tx_count": 50}, "model_scores": {"disagreement": 0.3}},
+    {"features": {"recipient_tx_count": 50}, "model_scores": {"disagreement": 0}, "disagreement": "0.4"},
+    {"features": {"recipient_tx_count": 50}, "model_scores": {"confidence_level": "low"}},
+    {"features": {"recipient_tx_count": 50}, "model_scores": {"confidence_level": ""}, "confidence_level": "LOW"},
+    {"features": {"recipient_tx_count": 50}, "model_scores": {"confidence_level": "HIGH"}},
+]
+PATTERN_CASES = [(0.0, "ALLOW"), (0.35, "ALLOW"), (0.45, "DELAY"), (0.55, "ALLOW"), (0.7, "BLOCK")]
+
+
+def _pg_connect():
+    try:
+        import psycopg2
+        conn = psycopg2.connect(os.getenv("DB_URL", "postgresql://localhost/postgres"), connect_timeout=2)
+    except Exception:
+        return None
+    return conn
+
+
+class TestPatternFlagsParity:
+    """tx_pattern_flags() in PostgreSQL against admin_repository.pattern_trigger_flags()"""
+
+    def test_sql_function_matches_python(self):
+        conn = _pg_connect()
+        if conn is None:
+            pytest.skip("PostgreSQL unavailable")
+        import json
+        from app.admin_repository import pattern_trigger_flags
+        from app.rollups import PATTERN_FUNCTIONS_SQL
+        try:
+            cur = conn.cursor()
+            # Created inside the test transaction and rolled back below
+            cur.execute(PATTERN_FUNCTIONS_SQL)
+            for expl in PATTERN_FIXTURES:
+                for risk, action in PATTERN_CASES:
+                    cur.execute("SELECT tx_pattern_flags(%s::jsonb, %s, %s)",
+                                (None if expl is None else json.dumps(expl), risk, action))
+                    assert cur.fetchone()[0] == pattern_trigger_flags(expl, risk, action), (expl, risk, action)
+        finally:
+            conn.rollback()
+            conn.close()
@@ -0,0 +1,90 @@
+"""
+Micro-batcher tests: concurrent callers are coalesced into bounded batches
+and each caller gets its own result back.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.score_batcher import ScoringBatcher
+from app.scoring_executor import ScoringOverloaded
+
+
+class TestScoringBatcher:
+    """Flush on size / time and per-caller result routing"""
+
+    def test_results_routed_to_callers(self):
+        batch_sizes = []
+
+        def score_fn(txs):
+            batch_sizes.append(len(txs))
+            return [tx["amount"] * 2 for tx in txs]
+
+        async def run():
+            batcher = ScoringBatcher(max_batch_size=4, max_wait_ms=20, score_fn=score_fn)
+            results = await asyncio.gather(*[batcher.score({"amount": i}) for i in range(10)])
+            return results, batcher.get_metrics()
+
+        results, metrics = asyncio.run(run())
+
+        assert results == [i * 2 for i in range(10)]
+        assert batch_sizes == [4, 4, 2]
+        assert metrics["items_scored"] == 10
+        assert metrics["queue_depth"] == 0
+
+    def test_errors_propagate_to_every_caller(self):
+        def score_fn(txs):
+            raise RuntimeError("model unavailable")
+
+        async def run():
+            batcher = ScoringBatcher(max_batch_size=8, max_wait_ms=1, score_fn=score_fn)
+            return await asyncio.gather(*[batcher.score({}) for _ in range(3)], return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    def test_sheds_load_when_saturated(self):
+        async def run():
+            batcher = ScoringBatcher(max_batch_size=100, max_wait_ms=50,
+                                     score_fn=lambda txs: list(txs), max_pending=2)
+            first = asyncio.ensure_future(batcher.score({"n": 1}))
+            second = asyncio.ensure_future(batcher.score({"n": 2}))
+            await asyncio.sleep(0)
+            with pytest.raises(ScoringOverloaded):
+                await batcher.score({"n": 3})
+            return await asyncio.gather(first, second), batcher.get_metrics()
+
+        results, metrics = asyncio.run(run())
+        assert results == [{"n": 1}, {"n": 2}]
+        assert metrics["rejected"] == 1
+        assert metrics["outstanding"] == 0
+
+    def test_score_many_is_admitted_as_a_group(self):
+        batch_sizes = []
+
+        def score_fn(txs):
+            batch_sizes.append(len(txs))
+            return [tx["n"] for tx in txs]
+
+        async def run():
+            batcher = ScoringBatcher(max_batch_size=4, max_wait_ms=20, score_fn=score_fn, max_pending=8)
+            # An idle batcher admits a group larger than max_pending
+            assert await batcher.score_many([{"n": i} for i in range(10)]) == list(range(10))
+            single = asyncio.ensure_future(batcher.score({"n": -1}))
+            await asyncio.sleep(0)
+            with pytest.raises(ScoringOverloaded):
+                await batcher.score_many([{"n": i} for i in range(8)])
+            grouped = await batcher.score_many([{"n": i} for i in range(3)])
+            return await single, grouped, batcher.get_metrics()
+
+        single, grouped, metrics = asyncio.run(run())
+        assert single == -1 and grouped == [0, 1, 2]
+        assert batch_sizes[:3] == [4, 4, 2]
+        assert metrics["rejected"] == 1
+        assert metrics["outstanding"] == 0
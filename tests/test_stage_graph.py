@@ -0,0 +1,91 @@
+"""
+Stage graph tests: independent stages overlap, dependencies see their
+inputs, fallbacks absorb failures and timings are recorded.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.stage_graph import StageGraph, get_stage_metrics
+
+
+def _sleep(seconds, value):
+    def fn(_):
+        time.sleep(seconds)
+        return value
+    return fn
+
+
+class TestStageGraph:
+    def test_independent_stages_run_concurrently(self):
+        graph = StageGraph("test_concurrent")
+        for name in ("a", "b", "c", "d"):
+            graph.stage(name, _sleep(0.1, name))
+        started = time.perf_counter()
+        results = graph.run()
+        elapsed = time.perf_counter() - started
+        assert results == {"a": "a", "b": "b", "c": "c", "d": "d"}
+        assert elapsed < 0.3
+
+    def test_dependent_stage_sees_inputs(self):
+        seen = {}
+        graph = StageGraph("test_deps")
+        graph.stage("score", _sleep(0.05, 0.4))
+        graph.stage("trust", _sleep(0.01, 0.5))
+
+        def blend(results):
+            seen.update(results)
+            return results["score"] * results["trust"]
+
+        graph.stage("blend", blend, after=("score", "trust"))
+        assert graph.run()["blend"] == pytest.approx(0.2)
+        assert seen == {"score": 0.4, "trust": 0.5}
+
+    def test_fallback_replaces_failed_stage(self):
+        def boom(_):
+            raise RuntimeError("redis down")
+
+        graph = StageGraph("test_fallback")
+        graph.stage("graph", boom, fallback=lambda e: (0.0, {"status": str(e)}))
+        graph.stage("after", lambda res: res["graph"][0] + 1, after=("graph",))
+        results = graph.run()
+        assert results["graph"] == (0.0, {"status": "redis down"})
+        assert results["after"] == 1.0
+
+    def test_error_without_fallback_propagates_and_skips_dependents(self):
+        ran = threading.Event()
+
+        def boom(_):
+            raise ValueError("overloaded")
+
+        graph = StageGraph("test_error")
+        graph.stage("score", boom)
+        graph.stage("drift", lambda res: ran.set(), after=("score",))
+        graph.stage("trust", _sleep(0.02, 1.0))
+        with pytest.raises(ValueError):
+            graph.run()
+        assert not ran.is_set()
+        assert graph.results["trust"] == 1.0
+
+    def test_timings_and_metrics(self):
+        graph = StageGraph("test_timings")
+        graph.stage("slow", _sleep(0.05, None))
+        graph.run()
+        with graph.measure("inline"):
+            time.sleep(0.01)
+        assert graph.timings["slow"] >= 40
+        assert graph.timings["total"] >= graph.timings["slow"]
+        assert graph.timings["inline"] >= 5
+        metrics = get_stage_metrics()["test_timings"]
+        assert metrics["slow"]["runs"] == 1 and metrics["inline"]["runs"] == 1
+
+    def test_unknown_dependency_rejected(self):
+        with pytest.raises(ValueError):
+            StageGraph("test_unknown").stage("blend", lambda res: None, after=("score",))
@@ -0,0 +1,251 @@
+"""
+Transaction ID allocator tests: hi/lo blocks from a shared Redis counter or
+per-day PostgreSQL sequence stay unique across workers and threads, keep
+the YYMMDDXXXXXX format and never restart below the day's stored IDs.
+Uses in-memory stand-ins for Redis and for the PostgreSQL cursor.
+"""
+
+import os
+import re
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import redis_pool, upi_transaction_id
+from app.upi_transaction_id import (
+    TxIdAllocator, _drop_old_sequences, generate_upi_transaction_id, is_valid_upi_transaction_id, reset_sequence,
+)
+
+
+class _Redis:
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def register_script(self, source):
+        # _INCRBY_SEEDED_LUA: INCRBY only an existing key
+        def script(keys, args):
+            with self.lock:
+                if keys[0] not in self.data:
+                    return None
+            return self.incrby(keys[0], int(args[0]))
+        return script
+
+    def set(self, key, value, nx=False, ex=None):
+        with self.lock:
+            if nx and key in self.data:
+                return None
+            self.data[key] = int(value)
+            return True
+
+    def incrby(self, key, amount):
+        with self.lock:
+            self.calls += 1
+            self.data[key] = self.data.get(key, 0) + amount
+            return self.data[key]
+
+
+class _Cursor:
+    def __init__(self, max_seq):
+        self.max_seq = max_seq
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchone(self):
+        return {"max_seq": self.max_seq}
+
+
+class _PgCursor:
+    """Just enough of PostgreSQL for the allocator: sequences and savepoints."""
+
+    def __init__(self, max_seq=0, sequences=None, fail=()):
+        self.max_seq = max_seq
+        self.sequences = sequences if sequences is not None else {}  # name -> [next, step]
+        self.fail = list(fail)  # statement prefixes that raise once
+        self.log = []
+        self._row = None
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.log.append(sql)
+        for prefix in self.fail:
+            if sql.startswith(prefix):
+                self.fail.remove(prefix)
+                raise Exception(f"simulated failure: {prefix}")
+        if sql.startswith("SELECT to_regclass"):
+            self._row = {"present": params[0] in self.sequences}
+        elif "MAX(CAST(SUBSTR" in sql:
+            self._row = {"max_seq": self.max_seq}
+        elif sql.startswith("CREATE SEQUENCE"):
+            name, step, start = re.match(
+                r"CREATE SEQUENCE IF NOT EXISTS (\w+) INCREMENT BY (\d+) .* START WITH (\d+)", sql).groups()
+            self.sequences.setdefault(name, [int(start), int(step)])
+        elif sql.startswith("SELECT nextval"):
+            seq = self.sequences[params[0]]
+            self._row = {"start": seq[0], "step": seq[1]}
+            seq[0] += seq[1]
+        elif sql.startswith("SELECT sequencename"):
+            self._rows = [{"sequencename": n} for n in sorted(self.sequences)]
+        elif sql.startswith("DROP SEQUENCE"):
+            self.sequences.pop(sql.split()[-1], None)
+
+    def fetchone(self):
+        return self._row
+
+    def fetchall(self):
+        return self._rows
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    r = _Redis()
+    monkeypatch.setattr(redis_pool, "get_redis", lambda: r)
+    return r
+
+
+DAY = datetime(2026, 2, 14, 12, tzinfo=timezone.utc)
+
+
+class TestTxIdAllocator:
+    def test_unique_across_workers_and_threads(self, fake_redis):
+        workers = [TxIdAllocator(backend="redis", block_size=50) for _ in range(2)]
+        ids = []
+        ids_lock = threading.Lock()
+
+        def run(allocator):
+            local = [allocator.next_id(DAY, db_cursor=_Cursor(0)) for _ in range(500)]
+            with ids_lock:
+                ids.extend(local)
+
+        threads = [threading.Thread(target=run, args=(w,)) for w in workers for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(ids) == 4000
+        assert len(set(ids)) == 4000
+        assert all(i.startswith("260214") and is_valid_upi_transaction_id(i) for i in ids)
+        # One shared-counter round trip per block, not per ID
+        assert fake_redis.calls == 4000 // 50
+        assert sum(w.get_metrics()["fallbacks"] for w in workers) == 0
+
+    def test_seeded_from_existing_transactions(self, fake_redis):
+        allocator = TxIdAllocator(backend="redis", block_size=10)
+        assert allocator.next_id(DAY, db_cursor=_Cursor(41)) == "260214000042"
+        assert allocator.next_id(DAY) == "260214000043"
+        # A second worker seeing the key already seeded starts after the first block
+        assert TxIdAllocator(backend="redis", block_size=10).next_id(DAY, db_cursor=_Cursor(0)) == "260214000052"
+
+    def test_new_day_restarts_sequence(self, fake_redis):
+        allocator = TxIdAllocator(backend="redis", block_size=10)
+        cur = _Cursor(0)
+        allocator.next_id(DAY, db_cursor=cur)
+        allocator.next_id(DAY, db_cursor=cur)
+        assert allocator.next_id(datetime(2026, 2, 15, tzinfo=timezone.utc), db_cursor=cur) == "260215000001"
+
+    def test_lost_key_is_reseeded_from_stored_ids(self, fake_redis):
+        allocator = TxIdAllocator(backend="redis", block_size=10)
+        assert allocator.next_id(DAY, db_cursor=_Cursor(0)) == "260214000001"
+        # Evicted or flushed mid-day, after 57 IDs were stored
+        fake_redis.data.clear()
+        allocator.reset()
+        assert allocator.next_id(DAY, db_cursor=_Cursor(57)) == "260214000058"
+
+    def test_missing_key_is_not_seeded_without_a_cursor(self, fake_redis):
+        with pytest.raises(RuntimeError):
+            TxIdAllocator(backend="redis", block_size=10).next_id(DAY)
+        assert fake_redis.data == {}
+
+    def test_unreachable_counter_raises(self, monkeypatch):
+        # Other workers may hold unstored blocks above MAX, so MAX + 1 is not safe
+        monkeypatch.setattr(redis_pool, "get_redis", lambda: None)
+        reset_sequence()
+        allocator = TxIdAllocator(backend="redis")
+        with pytest.raises(RuntimeError):
+            allocator.next_id(DAY, db_cursor=_Cursor(41))
+        allocator.dsn = "postgresql://localhost/x"
+        with pytest.raises(RuntimeError):
+            allocator.next_id(DAY)
+        assert allocator.get_metrics()["fallbacks"] == 0
+        reset_sequence()
+
+    def test_cursorless_default_counts_locally(self, monkeypatch):
+        # Scripts call generate_upi_transaction_id() with no cursor and no dsn
+        monkeypatch.setattr(upi_transaction_id, "tx_id_allocator", TxIdAllocator(backend="postgres"))
+        reset_sequence()
+        assert [generate_upi_transaction_id(DAY) for _ in range(2)] == ["260214000001", "260214000002"]
+        reset_sequence()
+
+    def test_memory_backend_counts_locally(self):
+        reset_sequence()
+        allocator = TxIdAllocator(backend="memory")
+        assert [allocator.next_id(DAY) for _ in range(2)] == ["260214000001", "260214000002"]
+        reset_sequence()
+
+
+class TestPostgresBackend:
+    # Today, so the day's sequence is not dropped as stale by _drop_old_sequences
+    TODAY = datetime.now(timezone.utc)
+    PREFIX = TODAY.strftime("%y%m%d")
+    SEQ = f"tx_id_seq_{PREFIX}"
+
+    def test_blocks_come_from_the_callers_cursor(self):
+        cur = _PgCursor(max_seq=41)
+        allocator = TxIdAllocator(backend="postgres", block_size=10)
+        ids = [allocator.next_id(self.TODAY, db_cursor=cur) for _ in range(12)]
+        assert ids[0] == self.PREFIX + "000042" and ids[-1] == self.PREFIX + "000053"
+        assert cur.sequences[self.SEQ] == [62, 10]
+        assert sum(sql.startswith("SELECT nextval") for sql in cur.log) == 2
+        assert cur.log[0] == "SAVEPOINT tx_id_alloc" and "RELEASE SAVEPOINT tx_id_alloc" in cur.log
+
+    def test_workers_get_disjoint_blocks(self):
+        cur = _PgCursor()
+        workers = [TxIdAllocator(backend="postgres", block_size=5) for _ in range(3)]
+        ids = [w.next_id(self.TODAY, db_cursor=cur) for _ in range(7) for w in workers]
+        assert len(set(ids)) == len(ids) == 21
+
+    def test_failed_create_is_rolled_back_and_retried(self):
+        cur = _PgCursor(fail=["CREATE SEQUENCE"])
+        allocator = TxIdAllocator(backend="postgres", block_size=10)
+        assert allocator.next_id(self.TODAY, db_cursor=cur) == self.PREFIX + "000001"
+        assert "ROLLBACK TO SAVEPOINT tx_id_alloc" in cur.log
+        assert allocator.get_metrics()["fallbacks"] == 0
+
+    def test_reservation_failure_raises(self):
+        cur = _PgCursor(max_seq=500, fail=["SELECT to_regclass", "SELECT to_regclass"])
+        allocator = TxIdAllocator(backend="postgres", block_size=10)
+        with pytest.raises(RuntimeError):
+            allocator.next_id(self.TODAY, db_cursor=cur)
+        assert not any("MAX(CAST(SUBSTR" in sql for sql in cur.log)
+        # The next reservation succeeds once the sequence is reachable again
+        assert allocator.next_id(self.TODAY, db_cursor=cur) == self.PREFIX + "000501"
+
+    def test_exhausted_day_raises(self):
+        cur = _PgCursor(sequences={self.SEQ: [1, 10]})
+        execute = cur.execute
+
+        def exhausted(sql, params=None):
+            if "nextval" in sql:
+                raise Exception(f'nextval: reached maximum value of sequence "{self.SEQ}"')
+            execute(sql, params)
+
+        cur.execute = exhausted
+        with pytest.raises(RuntimeError):
+            TxIdAllocator(backend="postgres").next_id(self.TODAY, db_cursor=cur)
+
+    def test_drop_old_sequences(self):
+        today = datetime.now(timezone.utc)
+        keep = [f"tx_id_seq_{(today - timedelta(days=d)).strftime('%y%m%d')}" for d in (0, 1)]
+        old = f"tx_id_seq_{(today - timedelta(days=2)).strftime('%y%m%d')}"
+        cur = _PgCursor(sequences={name: [1, 100] for name in keep + [old, "tx_id_seq_custom"]})
+        _drop_old_sequences(cur)
+        assert sorted(cur.sequences) == sorted(keep + ["tx_id_seq_custom"])
@@ -0,0 +1,90 @@
+"""
+Velocity bucket tests: bucketed tx_count_* windows vs exact sliding-window
+counts over the same timestamp history.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import feature_engine
+from app.feature_engine import VELOCITY_WINDOWS, velocity_counts
+
+WINDOW_SECONDS = {"tx_count_1min": 60, "tx_count_5min": 300, "tx_count_1h": 3600,
+                  "tx_count_6h": 6 * 3600, "tx_count_24h": 86400}
+
+
+def _history(rng, now, n):
+    # Distinct whole-second timestamps (the legacy ZSET collapsed duplicates)
+    return sorted(rng.sample(range(now - 2 * 86400, now + 1), n))
+
+
+def _exact(stamps, now, seconds):
+    return sum(1 for ts in stamps if now - seconds < ts <= now)
+
+
+def _bucketed(stamps, now):
+    buckets = {}
+    for ts in stamps:
+        for field in (f"s{ts}", f"m{ts // 60}"):
+            buckets[field] = buckets.get(field, 0) + 1
+    return velocity_counts(buckets, now)
+
+
+def _assert_within_bounds(counts, stamps, now):
+    for name, unit, _ in VELOCITY_WINDOWS:
+        seconds = WINDOW_SECONDS[name]
+        if unit == "s":
+            assert counts[name] == _exact(stamps, now, seconds), name
+        else:
+            # Minute-aligned windows lose at most the first 59 seconds
+            assert _exact(stamps, now, seconds - 59) <= counts[name] <= _exact(stamps, now, seconds), name
+
+
+class TestVelocityBuckets:
+    """Bucketed velocity counts vs exact ZSET-style counts"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_bucket_counts_match_exact_windows(self, seed):
+        rng = random.Random(seed)
+        now = 1770000000 + rng.randrange(86400)
+        stamps = _history(rng, now, 3000)
+        # Dense burst in the last few minutes
+        stamps = sorted(set(stamps) | set(range(now - 400, now + 1, 7)))
+        _assert_within_bounds(_bucketed(stamps, now), stamps, now)
+
+    def test_window_edges(self):
+        now = 1770000000
+        minute = now // 60
+        buckets = {"p": minute, f"s{now}": 1, f"s{now - 59}": 2, f"s{now - 60}": 4, f"s{now - 300}": 8,
+                   f"s{now + 1}": 16, f"m{minute - 59}": 1, f"m{minute - 60}": 2, f"m{minute - 1439}": 4,
+                   f"m{minute - 1440}": 8}
+        assert velocity_counts(buckets, now) == {"tx_count_1min": 3, "tx_count_5min": 7, "tx_count_1h": 1,
+                                                 "tx_count_6h": 3, "tx_count_24h": 7}
+
+    def test_script_args_do_not_grow_with_windows(self):
+        args = feature_engine._behaviour_args(1770000000, "x@upi", 100.0)
+        assert len(args) == 8 and args[-1] == "1"
+        assert feature_engine._behaviour_args(1770000000, "x@upi", 100.0, read=False)[-1] == "0"
+
+    @pytest.mark.skipif(feature_engine._get_redis() is None, reason="Redis unavailable")
+    @pytest.mark.parametrize("mode", ["lua", "pipeline"])
+    def test_redis_counts_match_exact_windows(self, mode):
+        r = feature_engine._get_redis()
+        rng = random.Random(7)
+        now = 1770000000
+        user = f"velocity_test_{mode}"
+        keys = feature_engine._behaviour_keys(user)
+        r.delete(*keys)
+        stamps = sorted(rng.sample(range(now - 86400, now), 300))
+        try:
+            for ts in stamps:
+                counts = feature_engine.fetch_behaviour(user, "x@upi", 100.0, ts, mode=mode)
+            _assert_within_bounds(counts, stamps, stamps[-1])
+        finally:
+            r.delete(*keys)
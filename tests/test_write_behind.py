@@ -0,0 +1,172 @@
+"""
+Write-behind persistence tests: batching by size and time, the two
+durability modes, row-by-row fallback and the COPY staging format.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.write_behind import (
+    STAGE_COLUMNS,
+    WriteBehindQueue,
+    merge_sql,
+    stage_csv,
+    stage_records,
+    transaction_row,
+)
+
+
+def _row(i, **extra):
+    return transaction_row({"tx_id": f"tx{i}", "user_id": "u1", "amount": 100, "recipient_vpa": "a@upi",
+                            "risk_score": 0.2, "action": "ALLOW", **extra})
+
+
+class Recorder:
+    def __init__(self, fail_batch=False, bad_ids=()):
+        self.batches = []
+        self.inserted = []
+        self.fail_batch = fail_batch
+        self.bad_ids = set(bad_ids)
+
+    async def flush(self, rows):
+        await asyncio.sleep(0)
+        if self.fail_batch:
+            raise RuntimeError("batch failed")
+        self.batches.append([r["tx_id"] for r in rows])
+
+    async def insert(self, row):
+        if row["tx_id"] in self.bad_ids:
+            raise ValueError("fk violation")
+        self.inserted.append(row["tx_id"])
+
+
+class TestWriteBehindQueue:
+    def test_flush_mode_batches_by_size(self):
+        rec = Recorder()
+
+        async def run():
+            q = WriteBehindQueue(rec.flush, rec.insert, mode="flush", batch_rows=3, flush_ms=1000)
+            await asyncio.gather(*(q.submit(_row(i)) for i in range(6)))
+            return q
+
+        q = asyncio.run(run())
+        assert rec.batches == [["tx0", "tx1", "tx2"], ["tx3", "tx4", "tx5"]]
+        assert q.get_metrics()["batches_flushed"] == 2
+        assert q.get_metrics()["queued"] == 0
+
+    def test_enqueue_mode_returns_before_flush(self):
+        rec = Recorder()
+        flushed = []
+
+        async def run():
+            q = WriteBehindQueue(rec.flush, rec.insert, mode="enqueue", batch_rows=100, flush_ms=5,
+                                 on_flushed=flushed.append)
+            row = await q.submit(_row(1))
+            assert row["tx_id"] == "tx1" and rec.batches == []
+            await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+        assert rec.batches == [["tx1"]]
+        assert [r["tx_id"] for r in flushed[0]] == ["tx1"]
+
+    def test_failed_batch_falls_back_row_by_row(self):
+        rec = Recorder(fail_batch=True, bad_ids={"tx1"})
+
+        async def run():
+            q = WriteBehindQueue(rec.flush, rec.insert, mode="flush", batch_rows=3)
+            return q, await asyncio.gather(*(q.submit(_row(i)) for i in range(3)), return_exceptions=True)
+
+        q, results = asyncio.run(run())
+        assert rec.inserted == ["tx0", "tx2"]
+        assert isinstance(results[1], ValueError)
+        assert q.get_metrics()["failed_rows"] == 1
+
+    def test_drain_flushes_queued_rows(self):
+        rec = Recorder()
+
+        async def run():
+            q = WriteBehindQueue(rec.flush, rec.insert, mode="enqueue", batch_rows=100, flush_ms=60000)
+            await q.submit(_row(1))
+            await q.drain()
+
+        asyncio.run(run())
+        assert rec.batches == [["tx1"]]
+
+
+class TestStaging:
+    def test_records_keep_last_write_per_tx(self):
+        records = stage_records([_row(1), _row(1, action="BLOCK"), _row(2)])
+        action = STAGE_COLUMNS.index("action")
+        assert [(r[0], r[action]) for r in records] == [("tx1", "BLOCK"), ("tx2", "ALLOW")]
+
+    def test_csv_distinguishes_null_and_empty(self):
+        records = stage_records([_row(1, device_id="", explainability={"reason": "velocity"})])
+        line = stage_csv(records).read()
+        fields = line.rstrip("\n").split(",")
+        assert fields[STAGE_COLUMNS.index("device_id")] == '""'
+        assert fields[STAGE_COLUMNS.index("tx_type")] == ""
+        assert '"{""reason"": ""velocity""}"' in line
+
+    def test_merge_matches_insert_upsert(self):
+        sql = merge_sql(True)
+        assert "explainability::jsonb" in sql and "ON CONFLICT (tx_id) DO UPDATE" in sql
+        assert "explainability" not in merge_sql(False)
+
+    def test_created_at_is_staged_as_utc(self):
+        row = _row(1)
+        row["created_at"] = datetime(2026, 2, 14, 10, 30)
+        record = stage_records([row])[0]
+        assert record[STAGE_COLUMNS.index("created_at")] == "2026-02-14T10:30:00+00:00"
+        assert "created_at::timestamptz::timestamp" in merge_sql(True)
+
+
+def _pg_connect():
+    try:
+        import psycopg2
+        conn = psycopg2.connect(os.getenv("DB_URL", "postgresql://localhost/postgres"), connect_timeout=2)
+    except Exception:
+        return None
+    return conn
+
+
+class TestSessionTimezone:
+    """Needs PostgreSQL at DB_URL (skipped otherwise); nothing is committed."""
+
+    def test_merge_and_insert_store_the_same_created_at(self):
+        conn = _pg_connect()
+        if conn is None:
+            pytest.skip("PostgreSQL unavailable")
+        from app.write_behind import STAGE_TABLE_SQL
+        try:
+            cur = conn.cursor()
+            cur.execute("SET LOCAL TIME ZONE 'Asia/Kolkata'")
+            # Column types of public.transactions, in a temp table of the same name
+            cur.execute(
+                "CREATE TEMP TABLE transactions (tx_id TEXT PRIMARY KEY, user_id TEXT, device_id TEXT, "
+                "ts TIMESTAMP, amount NUMERIC, recipient_vpa TEXT, tx_type TEXT, channel TEXT, "
+                "risk_score NUMERIC, action TEXT, db_status TEXT, explainability JSONB, created_at TIMESTAMP)"
+            )
+            # Synchronous path (db_insert_transaction)
+            cur.execute("INSERT INTO pg_temp.transactions (tx_id, created_at) VALUES ('sync', now())")
+            # Write-behind path: COPY into the stage, then the merge
+            cur.execute(STAGE_TABLE_SQL)
+            cur.copy_expert(
+                f"COPY tx_write_behind_stage ({', '.join(STAGE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                stage_csv(stage_records([_row("wb")])),
+            )
+            cur.execute(merge_sql(True).replace("public.transactions", "pg_temp.transactions"))
+            cur.execute("""
+                SELECT abs(extract(epoch FROM (SELECT created_at FROM pg_temp.transactions WHERE tx_id = 'txwb')
+                                            - (SELECT created_at FROM pg_temp.transactions WHERE tx_id = 'sync')))
+            """)
+            assert cur.fetchone()[0] < 60
+        finally:
+            conn.rollback()
+            conn.close()
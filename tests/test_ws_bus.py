@@ -0,0 +1,88 @@
+"""
+Cross-worker WebSocket bus tests: batching, origin skipping and delivery to
+sockets held by another worker. Redis is taken out of the loop by moving
+the flushed batches from one bus to the other by hand.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ws_bus import WSBus, pack_batch, unpack_batch, user_channel
+from backend.ws_manager import WebSocketManager
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+
+def _relay(source, target):
+    async def run():
+        for channel, payload in source.take_batches():
+            await target.dispatch(channel, payload)
+    return run()
+
+
+class TestWSBus:
+    def test_batches_pack_and_split(self):
+        bus = WSBus(max_batch=2, worker_id="w1")
+        for i in range(5):
+            bus.publish("ws:admin", {"seq": i})
+        bus.publish(user_channel("u1"), {"type": "ping"})
+        batches = bus.take_batches()
+        assert [c for c, _ in batches] == ["ws:admin"] * 3 + ["ws:user:u1"]
+        origin, messages = unpack_batch(batches[0][1])
+        assert origin == "w1" and messages == [{"seq": 0}, {"seq": 1}]
+        assert bus.take_batches() == []
+        assert bus.published == 6
+
+    def test_own_messages_are_skipped(self):
+        got = []
+        bus = WSBus(worker_id="w1")
+        bus.handlers["ws:admin"] = got.append
+        asyncio.run(bus.dispatch("ws:admin", pack_batch(['{"a":1}'], "w1")))
+        asyncio.run(bus.dispatch("ws:admin", pack_batch(['{"a":2}'], "w2")))
+        assert got == [{"a": 2}]
+        assert bus.skipped_own == 1 and bus.received == 1
+
+    def test_disabled_bus_publishes_nothing(self):
+        bus = WSBus(enabled=False)
+        bus.publish("ws:admin", {"a": 1})
+        assert bus.take_batches() == []
+
+
+class TestCrossWorkerUserSockets:
+    def test_send_reaches_socket_on_other_worker(self, monkeypatch):
+        worker_a, worker_b = WSBus(worker_id="a"), WSBus(worker_id="b")
+        manager_a, manager_b = WebSocketManager(), WebSocketManager()
+
+        async def run():
+            sock_a, sock_b = FakeSocket(), FakeSocket()
+            monkeypatch.setattr("backend.ws_manager.ws_bus", worker_b)
+            await manager_b.connect(sock_b, "u1")
+            monkeypatch.setattr("backend.ws_manager.ws_bus", worker_a)
+            await manager_a.connect(sock_a, "u1")
+
+            await manager_a.send_to_user("u1", {"type": "balance_updated", "amount": -5.0})
+            # Fast path: worker A's socket already has it; B gets it via the bus
+            assert sock_a.sent == [{"type": "balance_updated", "amount": -5.0}]
+            assert sock_b.sent == []
+            await _relay(worker_a, worker_b)
+            assert sock_b.sent == [{"type": "balance_updated", "amount": -5.0}]
+
+            monkeypatch.setattr("backend.ws_manager.ws_bus", worker_b)
+            manager_b.disconnect(sock_b)
+            assert user_channel("u1") not in worker_b.handlers
+
+        asyncio.run(run())
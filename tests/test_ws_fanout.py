@@ -0,0 +1,119 @@
+"""
+WebSocket fan-out tests: bounded per-connection queues, drop-oldest with a
+resync marker, disconnect eviction and isolation from slow consumers.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ws_fanout import ConnectionSender, encode_message
+
+
+class FakeSocket:
+    """Records sent text; sends block until `gate` is set."""
+
+    def __init__(self, blocked=False):
+        self.sent = []
+        self.closed_with = None
+        self.gate = asyncio.Event()
+        if not blocked:
+            self.gate.set()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(text)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _drain():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+class TestConnectionSender:
+    def test_encode_once_is_compact_json(self):
+        text = encode_message({"type": "delta", "seq": 1, "amount": 10.5})
+        assert json.loads(text) == {"type": "delta", "seq": 1, "amount": 10.5}
+        assert " " not in text
+
+    def test_drop_oldest_sends_resync_marker(self):
+        async def run():
+            ws = FakeSocket(blocked=True)
+            sender = ConnectionSender(ws, maxsize=2, policy="drop_oldest")
+            sender.offer("m0")
+            await _drain()  # m0 is now in flight, blocked on the socket
+            for i in range(1, 5):
+                assert sender.offer(f"m{i}")
+            ws.gate.set()
+            await _drain()
+            sender.close()
+            return ws, sender
+
+        ws, sender = asyncio.run(run())
+        # m0 was already in flight; m1 and m2 were dropped
+        assert ws.sent[0] == "m0"
+        assert json.loads(ws.sent[1]) == {"type": "resync", "dropped": 2}
+        assert ws.sent[2:] == ["m3", "m4"]
+        assert sender.dropped == 2 and sender.max_depth == 2
+
+    def test_disconnect_policy_evicts(self):
+        closed = []
+
+        async def run():
+            ws = FakeSocket(blocked=True)
+            sender = ConnectionSender(ws, maxsize=1, policy="disconnect", on_close=closed.append)
+            sender.offer("a")
+            await _drain()
+            assert sender.offer("b")
+            assert sender.offer("c") is False
+            ws.gate.set()
+            await _drain()
+            return ws, sender
+
+        ws, sender = asyncio.run(run())
+        assert ws.closed_with == 1013
+        assert sender.closed and sender.evicted
+        assert closed == [sender]
+        assert sender.offer("d") is False
+
+    def test_slow_consumer_does_not_delay_others(self):
+        async def run():
+            slow, fast = FakeSocket(blocked=True), FakeSocket()
+            senders = [ConnectionSender(slow, maxsize=8), ConnectionSender(fast, maxsize=8)]
+            for i in range(3):
+                text = encode_message({"seq": i})
+                for s in senders:
+                    s.offer(text)
+            await _drain()
+            metrics = senders[0].get_metrics()
+            for s in senders:
+                s.close()
+            return slow, fast, metrics
+
+        slow, fast, metrics = asyncio.run(run())
+        assert [json.loads(t)["seq"] for t in fast.sent] == [0, 1, 2]
+        assert slow.sent == []
+        assert metrics["depth"] == 2 and metrics["sent"] == 0
+
+    def test_send_failure_closes_connection(self):
+        closed = []
+
+        class BrokenSocket(FakeSocket):
+            async def send_text(self, text):
+                raise RuntimeError("gone")
+
+        async def run():
+            sender = ConnectionSender(BrokenSocket(), on_close=closed.append)
+            sender.offer("x")
+            await _drain()
+            return sender
+
+        sender = asyncio.run(run())
+        assert sender.closed and closed == [sender]
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Redis-backed feature extraction, Lua script vs MULTI pipeline.
+
+The Lua path does all velocity, recipient and amount bookkeeping for a
+transaction in a single round trip; the pipeline path needs one extra
+write-only round trip for the amount-stats bucket update and velocity
+bucket pruning (see feature_engine.fetch_behaviour).
+This script runs the same synthetic transaction stream through each mode
+against a local Redis, checks that both produce identical features, and
+reports per-transaction latency.
+
+Usage:
+    REDIS_URL=redis://localhost:6379/15 python tools/benchmark_feature_extraction.py [n_tx]
+
+WARNING: the target Redis DB is flushed between runs - point REDIS_URL at a
+scratch database.
+"""
+
+import os
+import sys
+import time
+import random
+import statistics
+from datetime import datetime, timezone, timedelta
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import feature_engine
+
+
+def make_transactions(n, n_users=50, seed=42):
+    """Generate a reproducible stream of transactions spread over ~1 day."""
+    rng = random.Random(seed)
+    start = datetime(2026, 2, 10, tzinfo=timezone.utc)
+    txs = []
+    ts = start
+    for _ in range(n):
+        ts += timedelta(seconds=rng.expovariate(1 / 2.0))
+        txs.append({
+            "user_id": f"bench_user_{rng.randrange(n_users)}",
+            "amount": round(rng.choice([100, 250, 499.99, 1500, 20000]) * rng.uniform(0.5, 1.5), 2),
+            "recipient_vpa": f"merchant{rng.randrange(200)}@upi",
+            "tx_type": rng.choice(["P2P", "P2M"]),
+            "channel": rng.choice(["app", "qr", "web"]),
+            "timestamp": ts.isoformat(),
+        })
+    return txs
+
+
+def run_mode(mode, txs):
+    """Run all transactions through one mode; return (features, latencies_ms)."""
+    feature_engine._get_redis().flushdb()
+    feature_engine.REDIS_FEATURE_MODE = mode
+    results = []
+    latencies = []
+    for tx in txs:
+        start = time.perf_counter()
+        results.append(feature_engine.extract_features(tx))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, latencies
+
+
+def summarize(mode, latencies):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    total_s = sum(latencies) / 1000
+    print(f"  {mode:<10} p50={p50:7.3f} ms  p99={p99:7.3f} ms  "
+          f"throughput={len(latencies) / total_s:8.0f} tx/s")
+
+
+def main():
+    n_tx = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    if feature_engine._get_redis() is None:
+        print("❌ Redis unavailable - set REDIS_URL to a running local Redis")
+        sys.exit(1)
+
+    txs = make_transactions(n_tx)
+    print(f"\n{'='*70}")
+    print(f"Feature extraction benchmark: {n_tx} transactions")
+    print(f"{'='*70}")
+
+    features_lua, lat_lua = run_mode("lua", txs)
+    features_pipe, lat_pipe = run_mode("pipeline", txs)
+
+    summarize("lua", lat_lua)
+    summarize("pipeline", lat_pipe)
+
+    if features_lua == features_pipe:
+        print("\n✓ Both modes produced identical features")
+    else:
+        mismatches = sum(1 for a, b in zip(features_lua, features_pipe) if a != b)
+        print(f"\n✗ {mismatches} transactions produced different features")
+        sys.exit(1)
+
+    feature_engine._get_redis().flushdb()
+
+
+if __name__ == "__main__":
+    main()
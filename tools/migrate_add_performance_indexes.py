@@ -27,7 +27,22 @@ def main():
              "CREATE INDEX IF NOT EXISTS idx_transactions_user_created ON transactions(user_id, created_at DESC)"),
             
             ("idx_transactions_user_action_created", 
-             "CREATE INDEX IF NOT EXISTS idx_transactions_user_action_created ON transactions(user_id, action, created_at DESC)")
+             "CREATE INDEX IF NOT EXISTS idx_transactions_user_action_created ON transactions(user_id, action, created_at DESC)"),
+
+            ("idx_transactions_delay_pending",
+             "CREATE INDEX IF NOT EXISTS idx_transactions_delay_pending ON transactions(created_at) "
+             "WHERE action = 'DELAY' AND db_status = 'pending'"),
+
+            ("idx_transactions_sort_ts",
+             "CREATE INDEX IF NOT EXISTS idx_transactions_sort_ts ON transactions((COALESCE(ts, created_at)) DESC, tx_id DESC)"),
+
+            ("idx_transactions_action_sort_ts",
+             "CREATE INDEX IF NOT EXISTS idx_transactions_action_sort_ts "
+             "ON transactions(action, (COALESCE(ts, created_at)) DESC, tx_id DESC)"),
+
+            ("idx_transactions_high_risk",
+             "CREATE INDEX IF NOT EXISTS idx_transactions_high_risk "
+             "ON transactions((COALESCE(ts, created_at)) DESC, tx_id DESC) WHERE risk_score >= 0.8")
         ]
         
         for idx_name, sql in indexes:
@@ -40,7 +55,12 @@ def main():
         print("\nIndexes created:")
         print("  - idx_transactions_user_created (user_id, created_at DESC)")
         print("  - idx_transactions_user_action_created (user_id, action, created_at DESC)")
-        print("\nThese indexes will significantly speed up transaction history queries.")
+        print("  - idx_transactions_delay_pending (created_at) WHERE action='DELAY' AND db_status='pending'")
+        print("  - idx_transactions_sort_ts (COALESCE(ts, created_at) DESC, tx_id DESC)")
+        print("  - idx_transactions_action_sort_ts (action, COALESCE(ts, created_at) DESC, tx_id DESC)")
+        print("  - idx_transactions_high_risk (COALESCE(ts, created_at) DESC, tx_id DESC) WHERE risk_score >= 0.8")
+        print("\nThese indexes will significantly speed up transaction history queries")
+        print("and the paginated admin /recent-transactions feed.")
         
         cur.close()
         conn.close()
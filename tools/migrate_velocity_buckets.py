@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Migration: legacy velocity ZSETs -> bucketed velocity hash.
+
+Older feature_engine versions kept three ZSETs per user
+(user:{id}:timestamps, user:{id}:vel_1m, user:{id}:vel_5m). This script
+replays the last 24h of each user's timestamps ZSET into the
+user:{id}:velocity bucket hash and deletes the ZSETs.
+
+Safe to skip: un-migrated users simply start their velocity counts from
+zero and the old keys expire on their own TTL. Run it before switching
+traffic to avoid a 24h dip in tx_count_* features.
+
+Usage:
+    REDIS_URL=redis://localhost:6379/0 python tools/migrate_velocity_buckets.py [--dry-run]
+"""
+
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app import feature_engine
+
+
+def main():
+    dry_run = "--dry-run" in sys.argv
+
+    r = feature_engine._get_redis()
+    if r is None:
+        print("❌ Redis unavailable - set REDIS_URL")
+        sys.exit(1)
+
+    users = 0
+    migrated = 0
+    for key in r.scan_iter(match="user:*:timestamps", count=1000):
+        user = key[len("user:"):-len(":timestamps")]
+        users += 1
+        if dry_run:
+            migrated += r.zcard(key)
+            continue
+        migrated += feature_engine.migrate_user_velocity(user)
+        if users % 1000 == 0:
+            print(f"  ... {users} users migrated")
+
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"✓ {action} {migrated} timestamps across {users} users")
+
+
+if __name__ == "__main__":
+    main()